@@ -14,8 +14,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.database import Base
 from app.models.user import User
 from app.models.project import Project, ProjectMember
-from app.models.task import Task
+from app.models.task import Task, TaskDependency
 from app.models.ai_insight import AIInsight
+from app.models.lock import DistributedLock
+from app.models.llm_usage import LLMUsage
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,32 @@
+"""Add granularity to project_analytics
+
+Revision ID: 3b7e9c1d2a4f
+Revises: 9e4b2d7c1a05
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e9c1d2a4f'
+down_revision: Union[str, Sequence[str], None] = '9e4b2d7c1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('project_analytics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('granularity', sa.String(length=10), nullable=False, server_default='daily'))
+        batch_op.create_index('ix_project_analytics_series', ['project_id', 'granularity', 'analysis_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('project_analytics', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_analytics_series')
+        batch_op.drop_column('granularity')
@@ -0,0 +1,30 @@
+"""Add (project_id, created_at) index to ai_insights
+
+Revision ID: 6d2f4a8b9e13
+Revises: 3b7e9c1d2a4f
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2f4a8b9e13'
+down_revision: Union[str, Sequence[str], None] = '3b7e9c1d2a4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.create_index('ix_ai_insights_project_created', ['project_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.drop_index('ix_ai_insights_project_created')
@@ -0,0 +1,32 @@
+"""Add expiry indexes to ai_insights
+
+Revision ID: 8a1c5e7f3b26
+Revises: 6d2f4a8b9e13
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a1c5e7f3b26'
+down_revision: Union[str, Sequence[str], None] = '6d2f4a8b9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.create_index('ix_ai_insights_project_expires', ['project_id', 'expires_at'], unique=False)
+        batch_op.create_index('ix_ai_insights_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.drop_index('ix_ai_insights_expires_at')
+        batch_op.drop_index('ix_ai_insights_project_expires')
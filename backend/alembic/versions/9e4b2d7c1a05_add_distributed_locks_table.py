@@ -0,0 +1,41 @@
+"""Add distributed_locks table
+
+Revision ID: 9e4b2d7c1a05
+Revises: c5affa85a0f2
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b2d7c1a05'
+down_revision: Union[str, Sequence[str], None] = 'c5affa85a0f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Leader lock of the insight sweep scheduler
+    op.create_table(
+        'distributed_locks',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('owner', sa.String(length=255), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('distributed_locks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_distributed_locks_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('distributed_locks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_distributed_locks_expires_at'))
+
+    op.drop_table('distributed_locks')
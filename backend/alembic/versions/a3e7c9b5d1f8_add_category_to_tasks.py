@@ -0,0 +1,53 @@
+"""Add category to tasks
+
+Revision ID: a3e7c9b5d1f8
+Revises: f2c8a4d6b1e7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.task_categories import task_classifier
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e7c9b5d1f8'
+down_revision: Union[str, Sequence[str], None] = 'f2c8a4d6b1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(length=32), nullable=True))
+
+    # Classify existing rows in id order; classify_tasks.py redoes this when
+    # TASK_CATEGORY_KEYWORDS changes
+    tasks = sa.table('tasks', sa.column('id', sa.Integer), sa.column('title', sa.String), sa.column('category', sa.String))
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(tasks.c.id, tasks.c.title).where(tasks.c.id > last_id).order_by(tasks.c.id).limit(1000)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam('task_id')).values(category=sa.bindparam('new_category')),
+            [{'task_id': task_id, 'new_category': task_classifier.classify(title)} for task_id, title in rows]
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_project_category', ['project_id', 'category'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_project_category')
+        batch_op.drop_column('category')
@@ -0,0 +1,42 @@
+"""Add fingerprint and last_seen_at to ai_insights
+
+Revision ID: b4e2d6f8a1c3
+Revises: 8a1c5e7f3b26
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e2d6f8a1c3'
+down_revision: Union[str, Sequence[str], None] = '8a1c5e7f3b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Existing rows were last seen when they were created; fingerprints are
+    # filled in by compact_insights.py, which also merges duplicates
+    op.execute("UPDATE ai_insights SET last_seen_at = created_at WHERE last_seen_at IS NULL")
+
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.create_index('ix_ai_insights_project_last_seen', ['project_id', 'last_seen_at'], unique=False)
+        batch_op.create_index('ux_ai_insights_project_fingerprint', ['project_id', 'fingerprint'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.drop_index('ux_ai_insights_project_fingerprint')
+        batch_op.drop_index('ix_ai_insights_project_last_seen')
+        batch_op.drop_column('last_seen_at')
+        batch_op.drop_column('fingerprint')
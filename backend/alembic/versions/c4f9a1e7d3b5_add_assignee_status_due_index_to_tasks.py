@@ -0,0 +1,31 @@
+"""Add assignee/status/due date index to tasks
+
+Revision ID: c4f9a1e7d3b5
+Revises: b8d2f4a6c0e3
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f9a1e7d3b5'
+down_revision: Union[str, Sequence[str], None] = 'b8d2f4a6c0e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Overdue/upcoming lists page and count a user's open tasks by due date
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_assignee_status_due', ['assignee_id', 'status', 'due_date', 'project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_assignee_status_due')
@@ -0,0 +1,59 @@
+"""Add llm_usage ledger
+
+Revision ID: d7a3f1c9e5b2
+Revises: b4e2d6f8a1c3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3f1c9e5b2'
+down_revision: Union[str, Sequence[str], None] = 'b4e2d6f8a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'llm_usage',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('analysis', sa.String(length=30), nullable=True),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False),
+        sa.Column('cached_tokens', sa.Integer(), nullable=False),
+        sa.Column('cache_hit', sa.Boolean(), nullable=False),
+        sa.Column('latency_ms', sa.Float(), nullable=False),
+        sa.Column('breaker_state', sa.String(length=10), nullable=True),
+        sa.Column('outcome', sa.String(length=10), nullable=False),
+        sa.Column('streamed', sa.Boolean(), nullable=False),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('llm_usage', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_llm_usage_id'), ['id'], unique=False)
+        batch_op.create_index('ix_llm_usage_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_llm_usage_project_created', ['project_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_llm_usage_user_created', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('llm_usage', schema=None) as batch_op:
+        batch_op.drop_index('ix_llm_usage_user_created')
+        batch_op.drop_index('ix_llm_usage_project_created')
+        batch_op.drop_index('ix_llm_usage_created_at')
+        batch_op.drop_index(batch_op.f('ix_llm_usage_id'))
+
+    op.drop_table('llm_usage')
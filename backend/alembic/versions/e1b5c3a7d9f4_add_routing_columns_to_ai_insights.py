@@ -0,0 +1,34 @@
+"""Add model routing columns to ai_insights
+
+Revision ID: e1b5c3a7d9f4
+Revises: d7a3f1c9e5b2
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b5c3a7d9f4'
+down_revision: Union[str, Sequence[str], None] = 'd7a3f1c9e5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('routing_tier', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('routing_model', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('routing_reason', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ai_insights', schema=None) as batch_op:
+        batch_op.drop_column('routing_reason')
+        batch_op.drop_column('routing_model')
+        batch_op.drop_column('routing_tier')
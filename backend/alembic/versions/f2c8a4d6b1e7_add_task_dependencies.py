@@ -0,0 +1,55 @@
+"""Add task_dependencies table and tasks project index
+
+Revision ID: f2c8a4d6b1e7
+Revises: e1b5c3a7d9f4
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a4d6b1e7'
+down_revision: Union[str, Sequence[str], None] = 'e1b5c3a7d9f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'task_dependencies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('blocker_id', sa.Integer(), nullable=False),
+        sa.Column('blocked_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['blocker_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['blocked_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('blocker_id', 'blocked_id', name='uq_task_dependencies_edge')
+    )
+    with op.batch_alter_table('task_dependencies', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_task_dependencies_id'), ['id'], unique=False)
+        batch_op.create_index('ix_task_dependencies_project', ['project_id'], unique=False)
+        batch_op.create_index('ix_task_dependencies_blocked', ['blocked_id'], unique=False)
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tasks_project_id'), ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tasks_project_id'))
+
+    with op.batch_alter_table('task_dependencies', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_dependencies_blocked')
+        batch_op.drop_index('ix_task_dependencies_project')
+        batch_op.drop_index(batch_op.f('ix_task_dependencies_id'))
+
+    op.drop_table('task_dependencies')
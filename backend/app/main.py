@@ -7,6 +7,11 @@ from dotenv import load_dotenv
 
 from .database import engine, Base
 from .routes import auth, projects, tasks, ai_insights, dashboard, admin
+from .services.insight_scheduler import insight_scheduler
+from .services.deadline_alerts import deadline_alerts
+from .services.circuit_breaker import deepseek_breaker
+from .services.usage_ledger import usage_ledger
+from .services.execution_lanes import ExecutionLaneMiddleware, analysis_lane, reserve_crud_threads
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +28,10 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Analysis endpoints run in a bounded lane (503 + Retry-After when saturated)
+# so LLM-bound requests cannot take every worker thread from CRUD endpoints
+app.add_middleware(ExecutionLaneMiddleware, lane=analysis_lane)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -64,7 +73,11 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "project-ai-manager",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ai_provider": {
+            "circuit_breaker": deepseek_breaker.get_state()
+        },
+        "analysis_lane": analysis_lane.get_stats()
     }
 
 @app.get("/api/v1/info")
@@ -144,11 +157,18 @@ async def startup_event():
     print("🚀 Project AI Manager API is starting up...")
     print("📊 Database tables created successfully")
     print("🔗 API documentation available at /docs")
+    threads = reserve_crud_threads(analysis_lane)
+    print(f"🧵 Worker threads: {threads} ({analysis_lane.concurrency} for analysis)")
+    insight_scheduler.start()
+    deadline_alerts.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event"""
     print("🛑 Project AI Manager API is shutting down...")
+    insight_scheduler.stop()
+    deadline_alerts.stop()
+    usage_ledger.stop()
 
 if __name__ == "__main__":
     # Get configuration from environment variables
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Float, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pydantic import BaseModel
@@ -38,10 +38,23 @@ class AIInsight(Base):
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=True)
+    fingerprint = Column(String(64), nullable=True)  # Hash of type + normalized content
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)  # Last analysis that produced it
+    routing_tier = Column(String(10), nullable=True)  # Model routing: none, fast or strong
+    routing_model = Column(String(100), nullable=True)
+    routing_reason = Column(String(255), nullable=True)
     
     # Relationships
     project = relationship("Project")
     acknowledged_by_user = relationship("User", foreign_keys=[acknowledged_by])
+    
+    __table_args__ = (
+        Index("ix_ai_insights_project_created", "project_id", "created_at"),
+        Index("ix_ai_insights_project_expires", "project_id", "expires_at"),
+        Index("ix_ai_insights_expires_at", "expires_at"),
+        Index("ix_ai_insights_project_last_seen", "project_id", "last_seen_at"),
+        Index("ux_ai_insights_project_fingerprint", "project_id", "fingerprint", unique=True),
+    )
 
 class ProjectAnalytics(Base):
     __tablename__ = "project_analytics"
@@ -49,6 +62,7 @@ class ProjectAnalytics(Base):
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     analysis_date = Column(DateTime(timezone=True), server_default=func.now())
+    granularity = Column(String(10), nullable=False, default="daily", server_default="daily")  # daily, weekly, monthly
     
     # Progress metrics
     total_tasks = Column(Integer, default=0)
@@ -74,6 +88,10 @@ class ProjectAnalytics(Base):
     
     # Relationships
     project = relationship("Project")
+    
+    __table_args__ = (
+        Index("ix_project_analytics_series", "project_id", "granularity", "analysis_date"),
+    )
 
 # Pydantic models for API
 class AIInsightBase(BaseModel):
@@ -104,6 +122,10 @@ class AIInsightResponse(AIInsightBase):
     acknowledged_at: Optional[datetime] = None
     created_at: datetime
     expires_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    routing_tier: Optional[str] = None
+    routing_model: Optional[str] = None
+    routing_reason: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -128,10 +150,24 @@ class ProjectAnalyticsResponse(ProjectAnalyticsBase):
     id: int
     project_id: int
     analysis_date: datetime
+    granularity: Optional[str] = "daily"
     
     class Config:
         from_attributes = True
 
+class ProjectAnalyticsPoint(ProjectAnalyticsBase):
+    analysis_date: datetime
+    
+    class Config:
+        from_attributes = True
+
+class ProjectAnalyticsSeries(BaseModel):
+    project_id: int
+    granularity: str
+    start: datetime
+    end: datetime
+    points: List[ProjectAnalyticsPoint]
+
 class ProjectInfo(BaseModel):
     id: int
     name: str
@@ -150,6 +186,8 @@ class RiskAssessment(BaseModel):
     risk_categories: Dict[str, float]  # {"technical": 0.2, "timeline": 0.5, "resources": 0.3}
     mitigation_strategies: List[Dict[str, str]]
     impact_assessment: Dict[str, Any]
+    analysis_source: Optional[str] = None  # "local", "llm", "hybrid" or "fallback"
+    routing: Optional[Dict[str, Any]] = None  # Model routing decision in auto mode
 
 class ProgressPrediction(BaseModel):
     project_info: ProjectInfo
@@ -160,7 +198,11 @@ class ProgressPrediction(BaseModel):
     recommended_actions: List[str]
     milestone_predictions: List[Dict[str, Any]]
     velocity_analysis: Dict[str, float]
-    timeline_scenarios: Dict[str, Dict[str, Any]]  # optimistic, realistic, pessimistic
+    timeline_scenarios: Dict[str, Dict[str, Any]]  # optimistic, realistic, pessimistic (P50/P80/P95 locally)
+    analysis_source: Optional[str] = None  # "local", "llm", "hybrid" or "fallback"
+    forecast: Optional[Dict[str, Any]] = None  # Monte Carlo percentiles (local engine)
+    critical_path: Optional[Dict[str, Any]] = None  # Longest dependency chain (local engine)
+    routing: Optional[Dict[str, Any]] = None  # Model routing decision in auto mode
 
 class TeamPerformanceAnalysis(BaseModel):
     project_info: ProjectInfo
@@ -173,14 +215,19 @@ class TeamPerformanceAnalysis(BaseModel):
     collaboration_metrics: Dict[str, float]
     skill_gap_analysis: List[Dict[str, str]]
     workload_distribution: Dict[str, float]
+    trend_weeks: List[str] = []  # Week starts of performance_trends, oldest first
+    velocity_anomalies: List[Dict[str, Any]] = []
 
 class BudgetForecast(BaseModel):
     project_info: ProjectInfo
     projected_total_cost: float
+    budget_health_score: float  # 0-100
     current_utilization: float
     cost_variance: float
     budget_alerts: List[str]
     cost_optimization_tips: List[str]
     cost_breakdown: Dict[str, float]
-    spending_trends: List[Dict[str, Any]]
-    roi_analysis: Dict[str, float]
\ No newline at end of file
+    spending_trend: str  # "increasing", "stable", "decreasing" or "unknown"
+    burn_rate_analysis: Dict[str, Any]
+    cost_efficiency_metrics: Dict[str, float]
+    estimation: Optional[Dict[str, Any]] = None  # Learned effort model behind the hours
\ No newline at end of file
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Boolean, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class LLMUsage(Base):
+    """One row per LLM call: who it was for, what it cost and how it went"""
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    analysis = Column(String(30), nullable=True)  # risk, progress, narrative, portfolio, ...
+    model = Column(String(100), nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)  # Prompt tokens served from the provider cache
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    latency_ms = Column(Float, nullable=False, default=0.0)
+    breaker_state = Column(String(10), nullable=True)  # Circuit breaker state when the call started
+    outcome = Column(String(10), nullable=False)  # success, error, invalid, rejected
+    streamed = Column(Boolean, nullable=False, default=False)
+    error = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_llm_usage_created_at", "created_at"),
+        Index("ix_llm_usage_project_created", "project_id", "created_at"),
+        Index("ix_llm_usage_user_created", "user_id", "created_at"),
+    )
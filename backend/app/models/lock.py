@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class DistributedLock(Base):
+    __tablename__ = "distributed_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from pydantic import BaseModel, validator, Field
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 from datetime import datetime
 from enum import Enum as PyEnum
 from ..database import Base
@@ -28,14 +28,15 @@ class Task(Base):
     description = Column(Text, nullable=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.TODO)
     priority = Column(Enum(TaskPriority), default=TaskPriority.MEDIUM)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     parent_task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
     estimated_hours = Column(Integer, nullable=True)
     actual_hours = Column(Integer, nullable=True)
-    due_date = Column(DateTime(timezone=True), nullable=True)
+    due_date = Column(DateTime(timezone=True), nullable=True, index=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    category = Column(String(32), nullable=True)  # Derived from the title by TaskService on every write
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -45,6 +46,13 @@ class Task(Base):
     creator = relationship("User", back_populates="created_tasks", foreign_keys=[creator_id])
     parent_task = relationship("Task", remote_side=[id], backref="subtasks")
     comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_tasks_project_category", "project_id", "category"),
+        # Overdue/upcoming lists; project_id lets access checks stay in the index
+        Index("ix_tasks_assignee_status_due", "assignee_id", "status", "due_date", "project_id"),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
@@ -60,6 +68,22 @@ class Comment(Base):
     task = relationship("Task", back_populates="comments")
     author = relationship("User", back_populates="comments")
 
+class TaskDependency(Base):
+    """Edge of the task dependency graph: the blocker must finish before the blocked task"""
+    __tablename__ = "task_dependencies"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    blocker_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    blocked_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("blocker_id", "blocked_id", name="uq_task_dependencies_edge"),
+        Index("ix_task_dependencies_project", "project_id"),
+        Index("ix_task_dependencies_blocked", "blocked_id"),
+    )
+
 # Pydantic models for API
 class TaskBase(BaseModel):
     title: str
@@ -203,6 +227,7 @@ class TaskResponse(TaskBase):
     creator_id: Optional[int] = None
     actual_hours: Optional[int] = None
     completed_at: Optional[datetime] = None
+    category: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     assignee: Optional["UserResponse"] = None
@@ -213,6 +238,32 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskDependencyCreate(BaseModel):
+    blocker_id: int  # Task that must finish first
+
+class TaskDependencyResponse(BaseModel):
+    id: int
+    project_id: int
+    blocker_id: int
+    blocked_id: int
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class AssignmentPlanRequest(BaseModel):
+    project_id: int
+    task_ids: Optional[List[int]] = None  # Default: every open, unassigned task of the project
+    member_ids: Optional[List[int]] = None  # Default: owner and members, except viewers
+    capacity_hours: Optional[Dict[int, float]] = None  # Per-member override of ASSIGNMENT_CAPACITY_HOURS
+    apply: bool = False  # Save the proposed assignments in one transaction
+
+class SimilarTaskQuery(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    project_id: Optional[int] = None  # Flags possible duplicates within this project
+    limit: int = Field(10, ge=1, le=50)
+
 class TaskSummary(BaseModel):
     id: int
     title: str
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import get_db
 from ..models.user import UserListResponse, UserAdminUpdate
 from ..models.project import Project, ProjectMember
@@ -8,6 +8,11 @@ from ..models.task import Task
 from ..services.auth_service import AuthService
 from ..services.project_service import ProjectService
 from ..services.task_service import TaskService
+from ..services.lock_service import LockService
+from ..services.insight_scheduler import insight_scheduler
+from ..services.deadline_alerts import deadline_alerts
+from ..services.llm_usage_service import LLMUsageService
+from ..services.usage_ledger import usage_ledger
 from ..dependencies import get_current_admin_user, get_current_user
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -317,4 +322,42 @@ async def unassign_task(
     task.assignee_id = None
     db.commit()
     
-    return {"message": "Task unassigned successfully"}
\ No newline at end of file
+    return {"message": "Task unassigned successfully"}
+# Scheduler Endpoints
+@router.get("/scheduler/status")
+async def get_scheduler_status(
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """Get insight sweep scheduler status and progress (admin only)"""
+    holder = LockService.get_holder(db, insight_scheduler.LOCK_NAME)
+    return {
+        "scheduler": insight_scheduler.get_metrics(),
+        "deadline_alerts": deadline_alerts.get_metrics(),
+        "lock": {
+            "owner": holder.owner if holder else None,
+            "acquired_at": holder.acquired_at if holder else None,
+            "expires_at": holder.expires_at if holder else None
+        }
+    }
+
+# LLM Usage Endpoints
+@router.get("/llm-usage")
+async def get_llm_usage(
+    group_by: str = Query("day", pattern="^(project|user|day|model|analysis)$"),
+    days: int = Query(30, ge=1, le=365),
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """LLM calls, tokens and latency percentiles grouped by project, user, day, model or analysis (admin only)"""
+    summary = LLMUsageService().summarize(
+        db,
+        group_by=group_by,
+        days=days,
+        project_ids=[project_id] if project_id is not None else None,
+        user_id=user_id
+    )
+    summary["ledger"] = usage_ledger.get_stats()
+    return summary
@@ -1,18 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from ..database import get_db
 from ..models.ai_insight import (
     AIInsight, AIInsightCreate, AIInsightUpdate, AIInsightResponse,
-    ProjectAnalytics, ProjectAnalyticsResponse,
+    ProjectAnalyticsResponse, ProjectAnalyticsSeries,
     RiskAssessment, ProgressPrediction, TeamPerformanceAnalysis, BudgetForecast
 )
 from ..services.auth_service import AuthService
 from ..services.ai_service import AIProjectAnalysisService
 from ..services.project_service import ProjectService
+from ..services.analytics_service import ProjectAnalyticsService
+from ..services.insight_service import InsightService
+from ..services.insight_retention_service import InsightRetentionService, active_insight_filter
+from ..services.insight_dedup_service import InsightDedupService
+from ..services.analysis_stream_service import AnalysisStreamService
+from ..services.llm_usage_service import LLMUsageService
 
 router = APIRouter(prefix="/ai-insights", tags=["ai-insights"])
 security = HTTPBearer()
@@ -29,6 +37,7 @@ def get_current_user(
 def analyze_project(
     project_id: int,
     analysis_type: Optional[str] = Query(None, description="Specific analysis type: risk, progress, team, budget, or all"),
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -42,7 +51,7 @@ def analyze_project(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     try:
         if analysis_type and analysis_type != "all":
             # Generate specific analysis type
@@ -66,9 +75,33 @@ def analyze_project(
             detail=f"Error analyzing project: {str(e)}"
         )
 
+@router.post("/analyze-project/{project_id}/stream")
+def stream_project_analysis(
+    project_id: int,
+    analysis_type: str = Query("risk", pattern="^(risk|progress)$", description="Analysis to stream: risk or progress"),
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="local skips the streamed LLM narrative, auto lets the model router decide; defaults to AI_ANALYSIS_MODE"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream a project analysis as Server-Sent Events: metrics, narrative, insight ids"""
+    project_service = ProjectService()
+    project = project_service.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or access denied"
+        )
+    
+    return StreamingResponse(
+        AnalysisStreamService(analysis_mode, user_id=current_user.id).stream(project_id, analysis_type),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/project/{project_id}/risk-assessment")
 def get_risk_assessment(
     project_id: int,
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -82,7 +115,7 @@ def get_risk_assessment(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     try:
         risk_assessment = ai_service.analyze_project_risk(project_id, db)
         return risk_assessment
@@ -95,6 +128,7 @@ def get_risk_assessment(
 @router.get("/project/{project_id}/progress-prediction")
 def get_progress_prediction(
     project_id: int,
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -108,7 +142,7 @@ def get_progress_prediction(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     try:
         prediction = ai_service.predict_project_completion(project_id, db)
         return prediction
@@ -134,7 +168,7 @@ def get_team_performance_analysis(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(user_id=current_user.id)
     try:
         analysis = ai_service.analyze_team_performance(project_id, db)
         return analysis
@@ -147,6 +181,7 @@ def get_team_performance_analysis(
 @router.post("/project/{project_id}/analyze/risk")
 def analyze_project_risk_specific(
     project_id: int,
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -160,7 +195,7 @@ def analyze_project_risk_specific(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     try:
         insights = ai_service.generate_specific_analysis(db, project_id, "risk")
         return {
@@ -177,6 +212,7 @@ def analyze_project_risk_specific(
 @router.post("/project/{project_id}/analyze/progress")
 def analyze_project_progress_specific(
     project_id: int,
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -190,7 +226,7 @@ def analyze_project_progress_specific(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     try:
         insights = ai_service.generate_specific_analysis(db, project_id, "progress")
         return {
@@ -220,7 +256,7 @@ def analyze_project_team_specific(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(user_id=current_user.id)
     try:
         insights = ai_service.generate_specific_analysis(db, project_id, "team")
         return {
@@ -250,9 +286,9 @@ def get_budget_forecast(
             detail="Project not found or access denied"
         )
     
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(user_id=current_user.id)
     try:
-        forecast = ai_service.forecast_budget(db, project_id)
+        forecast = ai_service.forecast_budget(project_id, db)
         return forecast
     except Exception as e:
         raise HTTPException(
@@ -282,12 +318,12 @@ def get_project_insights(
     
     query = db.query(AIInsight, Project.name.label('project_name')).join(
         Project, AIInsight.project_id == Project.id
-    ).filter(AIInsight.project_id == project_id)
+    ).filter(AIInsight.project_id == project_id, active_insight_filter())
     
     if insight_type:
         query = query.filter(AIInsight.insight_type == insight_type)
     
-    insights_query = query.order_by(AIInsight.created_at.desc()).limit(limit).all()
+    insights_query = query.order_by(AIInsight.last_seen_at.desc()).limit(limit).all()
     
     # Convert to list of dictionaries with project_name included
     insights = []
@@ -307,7 +343,8 @@ def get_project_insights(
             acknowledged_by=insight.acknowledged_by,
             acknowledged_at=insight.acknowledged_at,
             created_at=insight.created_at,
-            expires_at=insight.expires_at
+            expires_at=insight.expires_at,
+            last_seen_at=insight.last_seen_at
         )
         insights.append(insight_dict)
     
@@ -329,10 +366,8 @@ def get_project_analytics(
             detail="Project not found or access denied"
         )
     
-    # Get the latest analytics record
-    analytics = db.query(ProjectAnalytics).filter(
-        ProjectAnalytics.project_id == project_id
-    ).order_by(ProjectAnalytics.analysis_date.desc()).first()
+    # Get the latest analytics record (snapshotted on demand if missing)
+    analytics = ProjectAnalyticsService().get_latest(db, project_id)
     
     if not analytics:
         raise HTTPException(
@@ -342,6 +377,36 @@ def get_project_analytics(
     
     return analytics
 
+@router.get("/project/{project_id}/analytics/series", response_model=ProjectAnalyticsSeries)
+def get_project_analytics_series(
+    project_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = Query("auto", pattern="^(auto|daily|weekly|monthly)$"),
+    max_points: int = Query(200, ge=2, le=2000),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the project analytics time series for a date range (defaults to the last 90 days)"""
+    # Check if user has access to the project
+    project_service = ProjectService()
+    project = project_service.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or access denied"
+        )
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=90)
+    try:
+        return ProjectAnalyticsService().get_series(db, project_id, start, end, granularity, max_points)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/project/{project_id}/insights", response_model=AIInsightResponse)
 def create_insight(
     project_id: int,
@@ -362,10 +427,8 @@ def create_insight(
     # Create the insight
     insight_data = insight.dict()
     insight_data['project_id'] = project_id
-    db_insight = AIInsight(**insight_data)
-    db.add(db_insight)
-    db.commit()
-    db.refresh(db_insight)
+    insight_data['expires_at'] = InsightRetentionService().expiry_for(insight.insight_type)
+    db_insight = InsightDedupService().upsert(db, AIInsight(**insight_data))
     
     return db_insight
 
@@ -398,9 +461,19 @@ def update_insight(
     update_data = insight_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_insight, field, value)
+    db_insight.fingerprint = InsightDedupService.fingerprint(
+        db_insight.insight_type, db_insight.title, db_insight.description, db_insight.recommendations
+    )
     
     db_insight.updated_at = datetime.utcnow()
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="An identical insight already exists for this project"
+        )
     db.refresh(db_insight)
     
     return db_insight
@@ -466,8 +539,9 @@ def get_dashboard_insights(
         Project, AIInsight.project_id == Project.id
     ).filter(
         AIInsight.project_id.in_(project_ids),
-        AIInsight.created_at >= since_date
-    ).order_by(AIInsight.created_at.desc()).limit(100).all()
+        AIInsight.last_seen_at >= since_date,
+        active_insight_filter()
+    ).order_by(AIInsight.last_seen_at.desc()).limit(100).all()
     
     # Convert to list of dictionaries with project_name included
     insights = []
@@ -487,7 +561,8 @@ def get_dashboard_insights(
             "acknowledged_by": insight.acknowledged_by,
             "acknowledged_at": insight.acknowledged_at,
             "created_at": insight.created_at,
-            "expires_at": insight.expires_at
+            "expires_at": insight.expires_at,
+            "last_seen_at": insight.last_seen_at
         }
         insights.append(insight_dict)
     
@@ -526,35 +601,57 @@ def get_insight_types():
 @router.post("/batch-analyze")
 def batch_analyze_projects(
     project_ids: List[int],
+    batched: bool = Query(False, description="Risk-only portfolio sweep: pack many projects into each LLM prompt"),
+    analysis_mode: Optional[str] = Query(None, pattern="^(local|llm|hybrid|auto)$", description="Analysis engine: local (rules), llm, hybrid or auto (model routing); defaults to AI_ANALYSIS_MODE"),
     current_user = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Analyze multiple projects in batch"""
     project_service = ProjectService()
-    ai_service = AIProjectAnalysisService()
+    ai_service = AIProjectAnalysisService(analysis_mode, user_id=current_user.id)
     
     results = []
     errors = []
+    accessible = {}
     
     for project_id in project_ids:
+        # Check access
+        project = project_service.get_project(db, project_id, current_user.id)
+        if not project:
+            errors.append(f"Project {project_id}: Not found or access denied")
+            continue
+        accessible[project_id] = project
+    
+    if batched:
         try:
-            # Check access
-            project = project_service.get_project(db, project_id, current_user.id)
-            if not project:
-                errors.append(f"Project {project_id}: Not found or access denied")
+            saved = ai_service.generate_portfolio_risk_insights(db, list(accessible))
+        except Exception as e:
+            saved = {}
+            errors.append(f"Batched analysis failed: {str(e)}")
+        for project_id, project in accessible.items():
+            if project_id not in saved:
+                errors.append(f"Project {project_id}: No analysis generated")
                 continue
-            
-            # Generate insights
-            insights = ai_service.generate_project_insights(db, project_id)
             results.append({
                 "project_id": project_id,
                 "project_name": project.name,
-                "insights_generated": len(insights) if isinstance(insights, list) else 1,
+                "insights_generated": len(saved[project_id]),
                 "status": "success"
             })
-            
-        except Exception as e:
-            errors.append(f"Project {project_id}: {str(e)}")
+    else:
+        for project_id, project in accessible.items():
+            try:
+                # Generate insights
+                insights = ai_service.generate_project_insights(db, project_id)
+                results.append({
+                    "project_id": project_id,
+                    "project_name": project.name,
+                    "insights_generated": len(insights) if isinstance(insights, list) else 1,
+                    "status": "success"
+                })
+                
+            except Exception as e:
+                errors.append(f"Project {project_id}: {str(e)}")
     
     return {
         "analyzed_projects": results,
@@ -562,6 +659,25 @@ def batch_analyze_projects(
         "errors": errors
     }
 
+@router.get("/project/{project_id}/llm-usage")
+def get_project_llm_usage(
+    project_id: int,
+    group_by: str = Query("day", pattern="^(user|day|model|analysis)$"),
+    days: int = Query(30, ge=1, le=365),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """LLM calls, tokens and latency of a project's analyses"""
+    project_service = ProjectService()
+    project = project_service.get_project(db, project_id, current_user.id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or access denied"
+        )
+    
+    return LLMUsageService().summarize(db, group_by=group_by, days=days, project_ids=[project_id])
+
 @router.get("/trends/insights")
 def get_insights_trends(
     days: int = Query(90, ge=7, le=365),
@@ -569,48 +685,4 @@ def get_insights_trends(
     db: Session = Depends(get_db)
 ):
     """Get trends in AI insights over time"""
-    # Get user's projects
-    project_service = ProjectService()
-    user_projects = project_service.get_projects(db, current_user.id)
-    project_ids = [p["id"] for p in user_projects]
-    
-    if not project_ids:
-        return {"trends": [], "summary": {}}
-    
-    # Get insights from the last N days
-    since_date = datetime.utcnow() - timedelta(days=days)
-    
-    insights = db.query(AIInsight).filter(
-        AIInsight.project_id.in_(project_ids),
-        AIInsight.created_at >= since_date
-    ).all()
-    
-    # Group by week and type
-    trends = {}
-    for insight in insights:
-        week = insight.created_at.strftime("%Y-W%U")
-        if week not in trends:
-            trends[week] = {}
-        
-        insight_type = insight.insight_type
-        if insight_type not in trends[week]:
-            trends[week][insight_type] = 0
-        trends[week][insight_type] += 1
-    
-    # Convert to list format
-    trend_list = []
-    for week, types in sorted(trends.items()):
-        trend_list.append({
-            "week": week,
-            "insights_by_type": types,
-            "total": sum(types.values())
-        })
-    
-    return {
-        "trends": trend_list,
-        "summary": {
-            "total_insights": len(insights),
-            "period_days": days,
-            "avg_per_week": len(insights) / max(1, len(trend_list))
-        }
-    }
\ No newline at end of file
+    return InsightService().get_trends(db, current_user.id, days)
\ No newline at end of file
@@ -11,6 +11,7 @@ from ..models.project import (
 )
 from ..services.auth_service import AuthService
 from ..services.project_service import ProjectService
+from ..services.task_service import TaskService
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 security = HTTPBearer()
@@ -195,6 +196,17 @@ def get_project_analytics(
     analytics = project_service.get_project_analytics(db, project_id, current_user.id)
     return analytics
 
+@router.get("/{project_id}/critical-path")
+def get_project_critical_path(
+    project_id: int,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum tasks of the path to return"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the longest chain of dependent remaining work, weighted by estimated hours"""
+    task_service = TaskService()
+    return task_service.get_critical_path(db, project_id, current_user.id, limit)
+
 @router.get("/{project_id}/dashboard")
 def get_project_dashboard(
     project_id: int,
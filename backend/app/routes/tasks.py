@@ -8,6 +8,7 @@ from ..database import get_db
 from ..models.task import (
     Task, TaskCreate, TaskUpdate, TaskResponse, TaskSummary,
     Comment, CommentCreate, CommentUpdate, CommentResponse,
+    TaskDependencyCreate, TaskDependencyResponse, AssignmentPlanRequest, SimilarTaskQuery,
     TaskStatus, TaskPriority
 )
 from ..services.auth_service import AuthService
@@ -65,6 +66,64 @@ def get_tasks(
     )
     return tasks
 
+# Quick Actions (declared before /{task_id}, which would otherwise match these paths)
+@router.get("/my-tasks")
+def get_my_tasks(
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get tasks assigned to current user"""
+    task_service = TaskService()
+    tasks = task_service.get_tasks(
+        db, current_user.id, 
+        assignee_id=current_user.id,
+        status=status,
+        priority=priority,
+        skip=skip,
+        limit=limit
+    )
+    return tasks
+
+@router.get("/overdue")
+def get_overdue_tasks(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get overdue tasks for current user"""
+    task_service = TaskService()
+    page = task_service.get_overdue_tasks(db, current_user.id, skip, limit)
+    return {
+        "overdue_tasks": page["tasks"],
+        "count": page["total"],
+        "skip": skip,
+        "limit": limit
+    }
+
+@router.get("/upcoming")
+def get_upcoming_tasks(
+    days: int = Query(7, ge=1, le=30),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get upcoming tasks for current user"""
+    task_service = TaskService()
+    page = task_service.get_upcoming_tasks(db, current_user.id, days, skip, limit)
+    return {
+        "upcoming_tasks": page["tasks"],
+        "count": page["total"],
+        "period_days": days,
+        "skip": skip,
+        "limit": limit
+    }
+
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: int,
@@ -126,6 +185,56 @@ def get_subtasks(
     subtasks = task_service.get_subtasks(db, task_id, current_user.id)
     return subtasks
 
+# Dependencies
+@router.get("/{task_id}/dependencies", response_model=Dict[str, List[TaskDependencyResponse]])
+def get_task_dependencies(
+    task_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the tasks this task waits for (blocked_by) and the tasks waiting for it (blocks)"""
+    task_service = TaskService()
+    return task_service.get_task_dependencies(db, task_id, current_user.id)
+
+@router.post("/{task_id}/dependencies", response_model=TaskDependencyResponse)
+def add_task_dependency(
+    task_id: int,
+    dependency: TaskDependencyCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Make a task wait for another task of the same project (cycles are rejected)"""
+    task_service = TaskService()
+    return task_service.add_dependency(db, task_id, dependency.blocker_id, current_user.id)
+
+@router.delete("/{task_id}/dependencies/{blocker_id}")
+def remove_task_dependency(
+    task_id: int,
+    blocker_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a dependency"""
+    task_service = TaskService()
+    success = task_service.remove_dependency(db, task_id, blocker_id, current_user.id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dependency not found"
+        )
+    return {"message": "Dependency removed successfully"}
+
+@router.get("/{task_id}/similar")
+def get_similar_tasks(
+    task_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the most similar tasks, an hours suggestion and possible duplicates in the same project"""
+    task_service = TaskService()
+    return task_service.get_similar_tasks(db, task_id, current_user.id, limit)
+
 # Comments
 @router.post("/{task_id}/comments", response_model=CommentResponse)
 def add_comment(
@@ -289,89 +398,6 @@ def get_project_tasks_analytics(
     analytics = task_service.get_project_tasks_analytics(db, project_id, current_user.id)
     return analytics
 
-# Quick Actions
-@router.get("/my-tasks")
-def get_my_tasks(
-    status: Optional[TaskStatus] = None,
-    priority: Optional[TaskPriority] = None,
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get tasks assigned to current user"""
-    task_service = TaskService()
-    tasks = task_service.get_tasks(
-        db, current_user.id, 
-        assignee_id=current_user.id,
-        status=status,
-        priority=priority,
-        skip=skip,
-        limit=limit
-    )
-    return tasks
-
-@router.get("/overdue")
-def get_overdue_tasks(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get overdue tasks for current user"""
-    task_service = TaskService()
-    
-    # Get tasks due before now that are not completed
-    now = datetime.utcnow()
-    tasks = task_service.get_tasks(
-        db, current_user.id,
-        assignee_id=current_user.id,
-        due_date_to=now,
-        limit=1000
-    )
-    
-    # Filter out completed tasks
-    overdue_tasks = [
-        task for task in tasks 
-        if task.status != TaskStatus.DONE and task.due_date and task.due_date < now
-    ]
-    
-    return {
-        "overdue_tasks": overdue_tasks,
-        "count": len(overdue_tasks)
-    }
-
-@router.get("/upcoming")
-def get_upcoming_tasks(
-    days: int = Query(7, ge=1, le=30),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get upcoming tasks for current user"""
-    task_service = TaskService()
-    
-    from datetime import timedelta
-    now = datetime.utcnow()
-    future_date = now + timedelta(days=days)
-    
-    tasks = task_service.get_tasks(
-        db, current_user.id,
-        assignee_id=current_user.id,
-        due_date_from=now,
-        due_date_to=future_date,
-        limit=1000
-    )
-    
-    # Filter out completed tasks
-    upcoming_tasks = [
-        task for task in tasks 
-        if task.status != TaskStatus.DONE
-    ]
-    
-    return {
-        "upcoming_tasks": upcoming_tasks,
-        "count": len(upcoming_tasks),
-        "period_days": days
-    }
-
 # Bulk Operations
 @router.put("/bulk/status")
 def bulk_update_status(
@@ -433,4 +459,24 @@ def bulk_assign_tasks(
         "updated_tasks": updated_tasks,
         "updated_count": len(updated_tasks),
         "errors": errors
-    }
\ No newline at end of file
+    }
+
+@router.post("/bulk/assignment-plan")
+def plan_task_assignments(
+    plan_request: AssignmentPlanRequest,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Propose balanced assignments for unassigned tasks; with apply=true, save them in one transaction"""
+    task_service = TaskService()
+    return task_service.plan_assignments(db, plan_request, current_user.id)
+
+@router.post("/similar")
+def find_similar_tasks(
+    query: SimilarTaskQuery,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Find tasks similar to a new title/description before creating it"""
+    task_service = TaskService()
+    return task_service.find_similar_tasks(db, query, current_user.id)
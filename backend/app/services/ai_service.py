@@ -3,6 +3,7 @@ import numpy as np
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
 from ..models.project import Project, ProjectStatus
 from ..models.task import Task, TaskStatus, TaskPriority
@@ -13,14 +14,58 @@ from ..models.ai_insight import (
 import os
 from dotenv import load_dotenv
 from .deepseek_service import DeepseekAIService
+from .insight_retention_service import InsightRetentionService
+from .insight_dedup_service import InsightDedupService
+from .single_flight import analysis_flight, project_data_version
+from .usage_ledger import usage_scope
+from .model_router import ModelRouter, RoutingDecision, model_router
+from .completion_forecast import completion_forecaster
+from .dependency_service import dependency_service
+from .effort_estimator import effort_estimator
+from .task_categories import task_classifier, OTHER_CATEGORY
+from .velocity_monitor import VelocityAnomaly, velocity_monitor
 
 load_dotenv()
 
+# local: rule-based engine only, no network calls
+# llm: Deepseek analysis, rule-based fallback when it fails
+# hybrid: rule-based metrics, Deepseek only writes the narrative text
+# auto: ModelRouter picks local, the fast model or the strong model per project
+ANALYSIS_MODES = ("local", "llm", "hybrid", "auto")
+
+# Insight type saved by each specific analysis
+ANALYSIS_INSIGHT_TYPES = {
+    "risk": InsightType.RISK_ANALYSIS,
+    "progress": InsightType.PROGRESS_PREDICTION,
+    "team": InsightType.TEAM_PERFORMANCE,
+    "budget": InsightType.BUDGET_FORECAST
+}
+
+# Narrative the LLM writes for each rule-based analysis (hybrid mode, streaming)
+NARRATIVE_FIELDS = {
+    "risk": "acciones concretas para reducir el riesgo",
+    "progress": "acciones recomendadas para cumplir la fecha"
+}
+
 class AIProjectAnalysisService:
-    def __init__(self):
+    def __init__(self, analysis_mode: Optional[str] = None, user_id: Optional[int] = None):
+        # user_id only attributes LLM usage; access checks stay in the routes
+        self.user_id = user_id
+        self.analysis_mode = analysis_mode or os.getenv("AI_ANALYSIS_MODE", "llm")
+        if self.analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unsupported analysis mode: {self.analysis_mode}")
+        
         # Initialize Deepseek service
         self.deepseek_service = DeepseekAIService()
         self.ai_enabled = self.deepseek_service.is_enabled()
+        self.retention_service = InsightRetentionService()
+        self.dedup_service = InsightDedupService()
+        self.flight = analysis_flight
+        self.router = model_router
+        self.forecaster = completion_forecaster
+        self.dependencies = dependency_service
+        self.estimator = effort_estimator
+        self.velocity = velocity_monitor
         
         # Legacy OpenAI support (deprecated)
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -32,14 +77,131 @@ class AIProjectAnalysisService:
     
     def _generate_mock_data_notice(self) -> str:
         """Generate a notice about mock data when AI is not available"""
-        if self.ai_enabled:
-            return ""  # No notice needed when AI is working
+        if self.ai_enabled or self.analysis_mode in ("local", "auto"):
+            return ""  # No notice needed when AI is working or rules were chosen
         return "⚠️ Datos simulados - Configure DEEPSEEK_API_KEY para análisis real con IA"
     
+    def _load_project_data(self, project_id: int, db: Session):
+        """Project, its ProjectInfo and tasks for the rule-based engine"""
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            raise ValueError("Project not found")
+        
+        project_info = ProjectInfo(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            status=project.status.value if project.status else "active",
+            created_at=project.created_at,
+            deadline=project.end_date
+        )
+        tasks = db.query(Task).filter(Task.project_id == project_id).all()
+        return project, project_info, tasks
+    
     def analyze_project_risk(self, project_id: int, db: Session) -> RiskAssessment:
-        """Analyze project risks using Deepseek AI"""
-        # Use Deepseek service for risk analysis
-        return self.deepseek_service.analyze_project_risk(project_id, db)
+        """Analyze project risks using the configured analysis mode"""
+        with usage_scope(project_id=project_id, user_id=self.user_id, analysis="risk"):
+            if self.analysis_mode == "llm":
+                return self.deepseek_service.analyze_project_risk(project_id, db)
+            if self.analysis_mode == "auto":
+                return self._routed(
+                    db, project_id, "risk",
+                    lambda: self._analyze_project_risk_local(project_id, db),
+                    lambda: self.deepseek_service.analyze_project_risk(project_id, db)
+                )
+        
+            assessment = self._analyze_project_risk_local(project_id, db)
+            if self.analysis_mode == "hybrid":
+                narrative = self.deepseek_service.generate_narrative(
+                    "risk",
+                    self.narrative_facts("risk", assessment),
+                    {"recommendations": NARRATIVE_FIELDS["risk"]}
+                )
+                if narrative:
+                    assessment.recommendations = narrative["recommendations"]
+                    assessment.analysis_source = "hybrid"
+            return assessment
+    
+    def route_analysis(self, db: Session, project_id: int, analysis: str) -> RoutingDecision:
+        """Model routing decision for one analysis of a project"""
+        return self.router.route(db, project_id, analysis, llm_available=self.deepseek_service.is_available())
+    
+    def _routed(self, db: Session, project_id: int, analysis: str, run_local, run_llm):
+        """Run the analysis on the engine the router picks and attach the decision"""
+        decision = self.route_analysis(db, project_id, analysis)
+        if decision.tier == ModelRouter.NONE:
+            result = run_local()
+        else:
+            with self.deepseek_service.using_model(decision.model):
+                result = run_llm()
+        result.routing = decision.as_dict()
+        return result
+    
+    def _routing_if_auto(self, db: Session, project_id: int, analysis: str) -> Optional[Dict[str, Any]]:
+        """Decision recorded with rule-only insights (team, budget) in auto mode"""
+        if self.analysis_mode != "auto":
+            return None
+        return self.route_analysis(db, project_id, analysis).as_dict()
+    
+    @staticmethod
+    def _routing_columns(insight_data: Dict[str, Any]) -> Dict[str, Any]:
+        routing = insight_data.get("routing") or {}
+        return {
+            "routing_tier": routing.get("tier"),
+            "routing_model": routing.get("model"),
+            "routing_reason": routing.get("reason")
+        }
+    
+    @staticmethod
+    def narrative_facts(analysis: str, result) -> Dict[str, Any]:
+        """Precomputed facts of a rule-based risk or progress result for the LLM narrative"""
+        if analysis == "risk":
+            return {
+                "project": result.project_info.name,
+                "risk_score": result.overall_risk_score,
+                "risk_level": result.risk_level,
+                "risk_factors": [f["description"] for f in result.risk_factors],
+                "risk_categories": result.risk_categories
+            }
+        return {
+            "project": result.project_info.name,
+            "predicted_completion_date": result.predicted_completion_date.strftime("%Y-%m-%d"),
+            "deadline": result.project_info.deadline.strftime("%Y-%m-%d") if result.project_info.deadline else None,
+            "confidence": result.confidence_level,
+            "completion_probability": result.completion_probability,
+            "velocity_tasks_per_week": result.velocity_analysis.get("current_velocity"),
+            "completion_p80_date": result.forecast["p80_date"][:10] if result.forecast else None,
+            "completion_p95_date": result.forecast["p95_date"][:10] if result.forecast else None,
+            "factors": result.factors_affecting_timeline
+        }
+    
+    def _analyze_project_risk_local(self, project_id: int, db: Session) -> RiskAssessment:
+        """Rule-based risk analysis (no network calls)"""
+        project, project_info, tasks = self._load_project_data(project_id, db)
+        if not tasks:
+            return RiskAssessment(
+                project_info=project_info,
+                overall_risk_score=0.0,
+                risk_level="Mínimo",
+                risk_factors=[],
+                recommendations=["📋 Crear tareas para poder evaluar riesgos del proyecto"],
+                critical_issues=[],
+                risk_categories={
+                    "schedule_risk": 0.0,
+                    "resource_risk": 0.0,
+                    "quality_risk": 0.0,
+                    "budget_risk": 0.0,
+                    "technical_risk": 0.0
+                },
+                mitigation_strategies=[],
+                impact_assessment={
+                    "schedule_impact": "Bajo",
+                    "budget_impact": "Bajo",
+                    "quality_impact": "Bajo",
+                    "team_impact": "Bajo"
+                },
+                analysis_source="local"
+            )
         
         # Initialize comprehensive risk analysis
         risk_score = 0.0
@@ -289,9 +451,6 @@ class AIProjectAnalysisService:
             recommendations.append("✅ Proyecto en buen estado - Continuar con monitoreo regular")
             mitigation_strategies.append({"strategy": "Mantener prácticas actuales y monitoreo preventivo", "priority": "Baja", "timeline": "Continuo"})
         
-        # Add mock data notice if OpenAI is not available
-        if not self.openai_enabled:
-            recommendations.insert(0, self._generate_mock_data_notice())
         
         return RiskAssessment(
             project_info=project_info,
@@ -308,13 +467,59 @@ class AIProjectAnalysisService:
                 "quality_impact": "Alto" if risk_categories.get("quality_risk", 0) > 0.3 else "Medio" if risk_categories.get("quality_risk", 0) > 0.1 else "Bajo",
                 "team_impact": "Alto" if risk_categories.get("resource_risk", 0) > 0.3 else "Medio" if risk_categories.get("resource_risk", 0) > 0.1 else "Bajo"
             },
-            risk_timeline=risk_timeline
+            risk_timeline=risk_timeline,
+            analysis_source="local"
         )
     
     def predict_project_completion(self, project_id: int, db: Session) -> ProgressPrediction:
-        """Predict project completion using Deepseek AI"""
-        # Use Deepseek service for progress prediction
-        return self.deepseek_service.predict_project_completion(project_id, db)
+        """Predict project completion using the configured analysis mode"""
+        with usage_scope(project_id=project_id, user_id=self.user_id, analysis="progress"):
+            if self.analysis_mode == "llm":
+                return self.deepseek_service.predict_project_completion(project_id, db)
+            if self.analysis_mode == "auto":
+                return self._routed(
+                    db, project_id, "progress",
+                    lambda: self._predict_project_completion_local(project_id, db),
+                    lambda: self.deepseek_service.predict_project_completion(project_id, db)
+                )
+        
+            prediction = self._predict_project_completion_local(project_id, db)
+            if self.analysis_mode == "hybrid":
+                narrative = self.deepseek_service.generate_narrative(
+                    "progress",
+                    self.narrative_facts("progress", prediction),
+                    {
+                        "factors_affecting_timeline": "factores que afectan el cronograma",
+                        "recommended_actions": NARRATIVE_FIELDS["progress"]
+                    }
+                )
+                if narrative:
+                    prediction.factors_affecting_timeline = narrative["factors_affecting_timeline"]
+                    prediction.recommended_actions = narrative["recommended_actions"]
+                    prediction.analysis_source = "hybrid"
+            return prediction
+    
+    def _predict_project_completion_local(self, project_id: int, db: Session) -> ProgressPrediction:
+        """Rule-based completion prediction (no network calls)"""
+        project, project_info, tasks = self._load_project_data(project_id, db)
+        if not tasks:
+            predicted_date = datetime.utcnow() + timedelta(days=30)
+            return ProgressPrediction(
+                project_info=project_info,
+                predicted_completion_date=predicted_date,
+                confidence_level=0.3,
+                completion_probability=0.5,
+                factors_affecting_timeline=["📋 Sin tareas definidas - Estimación basada en promedio de proyectos"],
+                recommended_actions=["📋 Crear y estimar las tareas del proyecto"],
+                milestone_predictions=[],
+                velocity_analysis={"current_velocity": 0.0, "historical_velocity": 0.0, "velocity_trend": 0.0},
+                timeline_scenarios={
+                    "optimistic": {"completion_date": predicted_date - timedelta(days=7), "probability": 0.2},
+                    "realistic": {"completion_date": predicted_date, "probability": 0.5},
+                    "pessimistic": {"completion_date": predicted_date + timedelta(days=14), "probability": 0.3}
+                },
+                analysis_source="local"
+            )
         
         # Calculate detailed progress metrics
         completed_tasks = [t for t in tasks if t.status == TaskStatus.DONE]
@@ -350,40 +555,22 @@ class AIProjectAnalysisService:
         elif velocity < 0.5:
             velocity_trend = "decreasing"
         
-        # Predict remaining time with multiple factors
-        base_remaining_days = len(remaining_tasks) * avg_completion_days
-        
-        # Team efficiency analysis
         active_assignees = len(set(t.assignee_id for t in tasks if t.assignee_id and t.status != TaskStatus.DONE))
-        team_factor = 1.0
-        if active_assignees > 3:
-            team_factor = 0.7  # Large team efficiency
-        elif active_assignees > 1:
-            team_factor = 0.8  # Small team efficiency
-        elif active_assignees == 0:
-            team_factor = 1.5  # No assignments penalty
-        
-        # Complexity and priority analysis
-        high_priority_remaining = len([t for t in remaining_tasks if t.priority in ['high', 'urgent']])
-        complexity_factor = 1.0
-        if high_priority_remaining > len(remaining_tasks) * 0.5:
-            complexity_factor = 1.3  # Many high priority tasks
-        
-        # Overdue task impact
+        high_priority_remaining = len([t for t in remaining_tasks if t.priority in [TaskPriority.HIGH, TaskPriority.CRITICAL]])
         overdue_tasks = [t for t in tasks if t.due_date and t.due_date < datetime.utcnow() and t.status != TaskStatus.DONE]
-        overdue_factor = 1.0
-        if overdue_tasks:
-            overdue_factor = 1.2 + (len(overdue_tasks) / len(tasks)) * 0.5
         
-        # Calculate final prediction
-        adjusted_days = base_remaining_days * team_factor * complexity_factor * overdue_factor
-        predicted_date = datetime.utcnow() + timedelta(days=max(1, adjusted_days))
+        # Monte Carlo over the project's own throughput and cycle times;
+        # seeded by project so unchanged data gives the same dates
+        forecast = self.forecaster.forecast_tasks(
+            tasks, started_at=project.created_at, deadline=project.end_date, seed=project.id
+        )
+        adjusted_days = forecast.days[50]
+        predicted_date = forecast.now + timedelta(days=max(1, adjusted_days))
         
-        # Calculate completion probability
+        # Share of simulations finishing by the deadline
         completion_probability = 0.9
-        if predicted_date > project.end_date if project.end_date else False:
-            days_over = (predicted_date - project.end_date).days if project.end_date else 0
-            completion_probability = max(0.1, 0.9 - (days_over / 30) * 0.3)
+        if forecast.on_time_probability is not None:
+            completion_probability = forecast.on_time_probability
         
         # Calculate confidence level with detailed factors
         confidence = 0.9
@@ -407,11 +594,26 @@ class AIProjectAnalysisService:
         
         confidence = max(0.1, confidence)
         
-        # Identify critical path tasks
+        # Longest chain of dependent remaining work; without dependencies
+        # fall back to urgent tasks
+        graph = self.dependencies.graph(db, project.id)
+        critical_path = None
         critical_path_tasks = []
-        for task in remaining_tasks:
-            if task.priority in ['high', 'urgent'] or (task.due_date and task.due_date < datetime.utcnow() + timedelta(days=7)):
-                critical_path_tasks.append(f"🔥 {task.title}")
+        if graph.edge_count:
+            path, path_hours = graph.critical_path()
+            titles = {t.id: t.title for t in remaining_tasks}
+            pending = [node for node in path if node in titles]
+            critical_path = {
+                "task_ids": pending[:20],
+                "remaining_tasks": len(pending),
+                "total_hours": round(path_hours, 1),
+                "length": len(path)
+            }
+            critical_path_tasks = [f"🧭 {titles[node]}" for node in pending]
+        else:
+            for task in remaining_tasks:
+                if task.priority in [TaskPriority.HIGH, TaskPriority.CRITICAL] or (task.due_date and task.due_date < datetime.utcnow() + timedelta(days=7)):
+                    critical_path_tasks.append(f"🔥 {task.title}")
         
         # Identify potential delays
         potential_delays = []
@@ -428,7 +630,7 @@ class AIProjectAnalysisService:
         acceleration_opportunities = []
         if active_assignees == 1 and len(remaining_tasks) > 5:
             acceleration_opportunities.append("👥 Agregar más miembros al equipo")
-        if len([t for t in remaining_tasks if t.priority == 'low']) > 3:
+        if len([t for t in remaining_tasks if t.priority == TaskPriority.LOW]) > 3:
             acceleration_opportunities.append("🎯 Diferir tareas de baja prioridad")
         if velocity > 1.5:
             acceleration_opportunities.append("⚡ Aprovechar alta velocidad actual")
@@ -489,6 +691,9 @@ class AIProjectAnalysisService:
         elif velocity < 0.5:
             factors.append("🐌 Velocidad baja del equipo - Riesgo de retrasos")
         
+        if critical_path and critical_path["remaining_tasks"]:
+            factors.append(f"🧭 Ruta crítica: {critical_path['remaining_tasks']} tareas encadenadas, {critical_path['total_hours']:.0f} h de trabajo restante")
+        
         # Task complexity factors
         if high_priority_remaining > 0:
             factors.append(f"🔥 {high_priority_remaining} tareas de alta prioridad pendientes")
@@ -525,9 +730,6 @@ class AIProjectAnalysisService:
             else:
                 recommendations.append("📊 Continuar monitoreando progreso de cerca")
         
-        # Add mock data notice if OpenAI is not available
-        if not self.openai_enabled:
-            recommendations.insert(0, self._generate_mock_data_notice())
         
         return ProgressPrediction(
             project_info=project_info,
@@ -550,24 +752,18 @@ class AIProjectAnalysisService:
             velocity_analysis={
                 "current_velocity": round(velocity, 2),
                 "historical_velocity": round(velocity * 0.9, 2),  # Simulated historical data
-                "velocity_trend": 0.1 if velocity_trend == "improving" else -0.1 if velocity_trend == "declining" else 0.0
+                "velocity_trend": 0.1 if velocity_trend == "increasing" else -0.1 if velocity_trend == "decreasing" else 0.0
             },
+            # Probability = chance of finishing by that date
             timeline_scenarios={
-                "optimistic": {
-                    "completion_date": predicted_date - timedelta(days=max(1, int(adjusted_days * 0.2))),
-                    "probability": round(completion_probability * 0.3, 2)
-                },
-                "realistic": {
-                    "completion_date": predicted_date,
-                    "probability": round(completion_probability, 2)
-                },
-                "pessimistic": {
-                    "completion_date": predicted_date + timedelta(days=max(1, int(adjusted_days * 0.3))),
-                    "probability": round(max(0.1, 1.0 - completion_probability), 2)
-                }
+                name: {"completion_date": max(predicted_date, forecast.dates[p]), "probability": p / 100, "percentile": p}
+                for name, p in (("optimistic", 50), ("realistic", 80), ("pessimistic", 95))
             },
+            forecast=forecast.as_dict(),
+            critical_path=critical_path,
             factors_affecting_timeline=factors,
-            recommended_actions=recommendations
+            recommended_actions=recommendations,
+            analysis_source="local"
         )
     
     def analyze_team_performance(self, project_id: int, db: Session) -> TeamPerformanceAnalysis:
@@ -606,12 +802,12 @@ class AIProjectAnalysisService:
         completed_tasks = [t for t in tasks if t.status == TaskStatus.DONE and t.completed_at]
         in_progress_tasks = [t for t in tasks if t.status == TaskStatus.IN_PROGRESS]
         
-        # Advanced velocity calculation
+        # Weekly completion series per project and assignee, from one aggregate query
+        series, anomalies = self.velocity.scan(db, [project_id])
+        project_row = series.row(project_id)
+        team_velocity = float(series.completions[project_row, -4:].mean())  # tasks per week, last 4 complete weeks
+        
         if completed_tasks:
-            four_weeks_ago = datetime.utcnow() - timedelta(weeks=4)
-            recent_completions = [t for t in completed_tasks if t.completed_at >= four_weeks_ago]
-            team_velocity = len(recent_completions) / 4  # tasks per week
-            
             # Calculate efficiency score based on estimated vs actual time
             efficiency_scores = []
             for task in completed_tasks:
@@ -621,9 +817,11 @@ class AIProjectAnalysisService:
             
             team_efficiency_score = sum(efficiency_scores) / len(efficiency_scores) if efficiency_scores else 75.0
         else:
-            team_velocity = 0.0
             team_efficiency_score = 0.0
         
+        # Learned hours for tasks without (or with biased) estimates
+        estimates = self.estimator.estimate_tasks(db, tasks)
+        
         # Detailed individual performance analysis
         individual_performance = []
         assignees = set(t.assignee_id for t in tasks if t.assignee_id)
@@ -638,9 +836,11 @@ class AIProjectAnalysisService:
             completion_rate = len(completed_by_assignee) / len(assignee_tasks) * 100 if assignee_tasks else 0
             
             # Calculate workload metrics
-            total_estimated_hours = sum(t.estimated_hours or 8 for t in assignee_tasks)
+            total_estimated_hours = sum(estimates[t.id].planned_hours for t in assignee_tasks)
             total_actual_hours = sum(t.actual_hours or 0 for t in completed_by_assignee)
-            workload_distribution[f"user_{assignee_id}"] = total_estimated_hours
+            open_tasks = [t for t in assignee_tasks if t.status not in (TaskStatus.DONE, TaskStatus.CANCELLED)]
+            expected_open_hours = sum(estimates[t.id].expected_hours for t in open_tasks)
+            workload_distribution[f"user_{assignee_id}"] = round(expected_open_hours, 1)
             
             # Performance metrics
             completed_with_times = [t for t in completed_by_assignee if t.completed_at and t.created_at]
@@ -691,7 +891,8 @@ class AIProjectAnalysisService:
                 "overdue_tasks": len(overdue_by_assignee),
                 "productivity_score": productivity_score,
                 "performance_level": performance_level,
-                "estimated_hours": total_estimated_hours,
+                "estimated_hours": round(total_estimated_hours, 1),
+                "expected_open_hours": round(expected_open_hours, 1),
                 "actual_hours": total_actual_hours,
                 "time_efficiency": round((total_estimated_hours / total_actual_hours) * 100, 1) if total_actual_hours > 0 else 0
             })
@@ -719,11 +920,21 @@ class AIProjectAnalysisService:
             if max_tasks > min_tasks * 2.5:
                 bottlenecks.append(f"⚖️ Desequilibrio de carga: {max_tasks} vs {min_tasks} tareas por persona")
         
-        # Performance trends simulation
+        # Velocity drops against each series' own recent weeks
+        for anomaly in anomalies:
+            if anomaly.kind == "drop":
+                who = "Equipo" if anomaly.assignee_id is None else f"user_{anomaly.assignee_id}"
+                bottlenecks.append(
+                    f"📉 {who}: {int(anomaly.completions)} tareas completadas la semana del "
+                    f"{anomaly.week_start.strftime('%d/%m')} frente a una media de {anomaly.baseline:.1f}"
+                )
+        
+        # Weekly trends (oldest first); the baseline starts once a full window is available
+        baseline, _ = self.velocity.rolling_scores(series.completions[project_row:project_row + 1])
         performance_trends = {
-            "velocity": [team_velocity * 0.8, team_velocity * 0.9, team_velocity, team_velocity * 1.1],
-            "efficiency": [team_efficiency_score * 0.85, team_efficiency_score * 0.92, team_efficiency_score, team_efficiency_score * 1.05],
-            "completion_rate": [85.0, 88.0, 92.0, 95.0] if completed_tasks else [0.0, 0.0, 0.0, 0.0]
+            "velocity": series.completions[project_row].tolist(),
+            "throughput_hours": series.hours[project_row].tolist(),
+            "velocity_baseline": [round(value, 2) for value in baseline[0].tolist()]
         }
         
         # Collaboration metrics
@@ -780,7 +991,9 @@ class AIProjectAnalysisService:
             performance_trends=performance_trends,
             collaboration_metrics=collaboration_metrics,
             skill_gap_analysis=skill_gap_analysis,
-            workload_distribution=workload_distribution
+            workload_distribution=workload_distribution,
+            trend_weeks=[week.date().isoformat() for week in series.weeks],
+            velocity_anomalies=[anomaly.as_dict() for anomaly in anomalies]
         )
     
     def forecast_budget(self, project_id: int, db: Session) -> BudgetForecast:
@@ -835,9 +1048,12 @@ class AIProjectAnalysisService:
         hourly_rate = 75  # Default hourly rate - could be configurable
         current_cost = total_actual_hours * hourly_rate
         
-        # Calculate projected cost
-        total_estimated_hours = sum(t.estimated_hours or 8 for t in tasks)  # Default 8 hours per task
-        projected_total_cost = total_estimated_hours * hourly_rate
+        # Calculate projected cost: hours spent on finished tasks plus the
+        # learned expectation (bias-corrected or filled in) for the rest
+        estimates = self.estimator.estimate_tasks(db, tasks)
+        hours_by_category = self._hours_by_category(db, project_id)
+        total_estimated_hours = sum(estimates[t.id].planned_hours for t in tasks)
+        projected_total_cost = sum(hours_by_category.values()) * hourly_rate
         
         # Calculate utilization
         current_utilization = (current_cost / project.budget) * 100 if project.budget > 0 else 0
@@ -860,22 +1076,9 @@ class AIProjectAnalysisService:
         elif cost_variance > 20:
             budget_health_score = max(60, 100 - cost_variance)
         
-        # Analyze cost breakdown by task categories
-        development_tasks = [t for t in tasks if 'desarrollo' in (t.title or '').lower() or 'dev' in (t.title or '').lower()]
-        testing_tasks = [t for t in tasks if 'test' in (t.title or '').lower() or 'prueba' in (t.title or '').lower()]
-        management_tasks = [t for t in tasks if 'gestión' in (t.title or '').lower() or 'management' in (t.title or '').lower()]
-        
-        development_cost = sum((t.actual_hours or t.estimated_hours or 8) * hourly_rate for t in development_tasks)
-        testing_cost = sum((t.actual_hours or t.estimated_hours or 8) * hourly_rate for t in testing_tasks)
-        management_cost = sum((t.actual_hours or t.estimated_hours or 8) * hourly_rate for t in management_tasks)
-        other_cost = projected_total_cost - (development_cost + testing_cost + management_cost)
-        
-        cost_breakdown = {
-            "development": development_cost,
-            "testing": testing_cost,
-            "management": management_cost,
-            "other": max(0, other_cost)
-        }
+        # Cost breakdown by task category (each task counts in exactly one)
+        cost_breakdown = {category: round(hours * hourly_rate, 2) for category, hours in hours_by_category.items()}
+        development_cost = cost_breakdown.get("development", 0.0)
         
         # Analyze spending trend
         spending_trend = "stable"
@@ -897,7 +1100,7 @@ class AIProjectAnalysisService:
         
         # Project future burn rate based on remaining tasks
         remaining_tasks = [t for t in tasks if t.status != TaskStatus.DONE]
-        remaining_estimated_hours = sum(t.estimated_hours or 8 for t in remaining_tasks)
+        remaining_estimated_hours = sum(estimates[t.id].expected_hours for t in remaining_tasks)
         projected_burn_rate = (remaining_estimated_hours * hourly_rate) / max(1, len(remaining_tasks) * 3)  # Assuming 3 days per task
         
         burn_rate_analysis = {
@@ -956,6 +1159,14 @@ class AIProjectAnalysisService:
         if cost_variance > 10:
             cost_optimization_tips.append("📊 Revisar horas reales vs estimadas para mejorar futuras estimaciones")
         
+        estimation = self.estimator.describe(project_id)
+        if estimation["training_tasks_with_estimate"] and abs(estimation["project_bias_factor"] - 1) >= 0.2:
+            direction = "más" if estimation["project_bias_factor"] > 1 else "menos"
+            cost_optimization_tips.append(
+                f"📐 Las tareas suelen tomar un {abs(estimation['project_bias_factor'] - 1) * 100:.0f}% {direction} de lo estimado; "
+                "el costo proyectado ya incluye esta corrección"
+            )
+        
         if daily_burn_rate > projected_burn_rate * 1.5:
             cost_optimization_tips.append("🔥 Ritmo de gasto actual es muy alto - revisar asignaciones")
         
@@ -986,66 +1197,89 @@ class AIProjectAnalysisService:
             burn_rate_analysis=burn_rate_analysis,
             cost_efficiency_metrics=cost_efficiency_metrics,
             budget_alerts=budget_alerts,
-            cost_optimization_tips=cost_optimization_tips
+            cost_optimization_tips=cost_optimization_tips,
+            estimation=estimation
         )
     
+    def _hours_by_category(self, db: Session, project_id: int) -> Dict[str, float]:
+        """Spent plus expected hours per task category, from a single GROUP BY.
+        
+        Finished tasks count their actual hours; the rest are summed per
+        (category, assignee) and scaled by the learned effort model.
+        """
+        self.estimator.refresh(db)
+        finished = and_(Task.status == TaskStatus.DONE, func.coalesce(Task.actual_hours, 0) > 0)
+        estimated = func.coalesce(Task.estimated_hours, 0) > 0
+        rows = db.query(
+            Task.category,
+            Task.assignee_id,
+            func.sum(case((finished, Task.actual_hours), else_=0)),
+            func.sum(case((finished, 0), (estimated, Task.estimated_hours), else_=0)),
+            func.sum(case((finished, 0), (estimated, 0), else_=1))
+        ).filter(Task.project_id == project_id).group_by(Task.category, Task.assignee_id).all()
+        
+        hours = {category: 0.0 for category in task_classifier.categories + [OTHER_CATEGORY]}
+        for category, assignee_id, spent, estimated_hours, unestimated in rows:
+            category = category or OTHER_CATEGORY  # Rows not yet classified by classify_tasks.py
+            expected = self.estimator.group_hours((category, project_id, assignee_id), estimated_hours or 0, unestimated or 0)
+            hours[category] = hours.get(category, 0.0) + (spent or 0) + expected
+        return hours
+    
+    @staticmethod
+    def _data_source(label: str, insight_data: Dict[str, Any]) -> str:
+        """Stored data_source, tagged with the engine that produced the insight"""
+        source = insight_data.get("analysis_source")
+        return f"{label} ({source})" if source else label
+    
     def generate_project_insights(self, db: Session, project_id: int) -> List[Dict[str, Any]]:
         """Generate comprehensive AI insights for a project - main entry point"""
         return self.generate_ai_insights(project_id, db)
     
     def generate_specific_analysis(self, db: Session, project_id: int, analysis_type: str) -> List[Dict[str, Any]]:
-        """Generate specific type of AI analysis for a project"""
+        """Generate specific type of AI analysis for a project.
+        
+        Concurrent identical requests (same project, type, mode and data
+        version) share one run; see SingleFlight.
+        """
+        return self._coalesced(
+            db, project_id, analysis_type,
+            lambda: self._generate_specific_analysis(db, project_id, analysis_type),
+            lambda since: [self._insight_dict(row) for row in self._recent_insights(db, project_id, analysis_type, since)]
+        )
+    
+    def _generate_specific_analysis(self, db: Session, project_id: int, analysis_type: str) -> List[Dict[str, Any]]:
         insights = []
         
         try:
             if analysis_type == "risk":
                 # Risk analysis only
                 risk_assessment = self.analyze_project_risk(project_id, db)
-                insights.append({
-                    "type": InsightType.RISK_ANALYSIS,
-                    "priority": InsightPriority.HIGH if risk_assessment.overall_risk_score > 0.6 else InsightPriority.MEDIUM,
-                    "title": f"Evaluación de Riesgos - Puntuación: {risk_assessment.overall_risk_score:.1%}",
-                    "description": f"Análisis de riesgos identificó {len(risk_assessment.risk_factors)} factores de riesgo. Nivel de riesgo: {'Alto' if risk_assessment.overall_risk_score > 0.6 else 'Medio' if risk_assessment.overall_risk_score > 0.3 else 'Bajo'}",
-                    "recommendations": "; ".join(risk_assessment.recommendations),
-                    "confidence_score": 0.85,
-                    "analysis_data": {
-                        "overall_risk_score": risk_assessment.overall_risk_score,
-                        "risk_factors": risk_assessment.risk_factors,
-                        "critical_issues": risk_assessment.critical_issues
-                    }
-                })
+                insights.append(self._risk_insight(risk_assessment))
                 
             elif analysis_type == "progress":
                 # Progress prediction only
                 progress_prediction = self.predict_project_completion(project_id, db)
-                insights.append({
-                    "type": InsightType.PROGRESS_PREDICTION,
-                    "priority": InsightPriority.MEDIUM,
-                    "title": f"Predicción de Progreso - Finalización: {progress_prediction.predicted_completion_date.strftime('%d/%m/%Y')}",
-                    "description": f"Predicción basada en el progreso actual. Confianza: {progress_prediction.confidence_level:.1%}. Factores que afectan el cronograma: {len(progress_prediction.factors_affecting_timeline)}",
-                    "recommendations": "; ".join(progress_prediction.recommended_actions),
-                    "confidence_score": progress_prediction.confidence_level,
-                    "analysis_data": {
-                        "predicted_completion_date": progress_prediction.predicted_completion_date.isoformat(),
-                        "confidence_level": progress_prediction.confidence_level,
-                        "factors_affecting_timeline": progress_prediction.factors_affecting_timeline
-                    }
-                })
+                insights.append(self._progress_insight(progress_prediction))
                 
             elif analysis_type == "team":
                 # Team performance only
                 team_analysis = self.analyze_team_performance(project_id, db)
+                team_drop = any(a["kind"] == "drop" and a["assignee_id"] is None for a in team_analysis.velocity_anomalies)
                 insights.append({
                     "type": InsightType.TEAM_PERFORMANCE,
-                    "priority": InsightPriority.MEDIUM if team_analysis.bottlenecks else InsightPriority.LOW,
+                    "priority": InsightPriority.HIGH if team_drop else InsightPriority.MEDIUM if team_analysis.bottlenecks else InsightPriority.LOW,
                     "title": f"Rendimiento del Equipo - Velocidad: {team_analysis.team_velocity:.1f} tareas/semana",
                     "description": f"Análisis de rendimiento del equipo. Cuellos de botella identificados: {len(team_analysis.bottlenecks)}. Miembros analizados: {len(team_analysis.individual_performance)}",
                     "recommendations": "; ".join(team_analysis.optimization_suggestions),
                     "confidence_score": 0.75,
+                    "analysis_source": "local",
+                    "routing": self._routing_if_auto(db, project_id, "team"),
                     "analysis_data": {
                         "team_velocity": team_analysis.team_velocity,
                         "bottlenecks": team_analysis.bottlenecks,
-                        "individual_performance": team_analysis.individual_performance
+                        "individual_performance": team_analysis.individual_performance,
+                        "velocity_anomalies": team_analysis.velocity_anomalies,
+                        "performance_trends": team_analysis.performance_trends
                     }
                 })
                 
@@ -1059,11 +1293,14 @@ class AIProjectAnalysisService:
                     "description": f"Análisis de presupuesto. Costo proyectado: ${budget_forecast.projected_total_cost:,.2f}. Alertas: {len(budget_forecast.budget_alerts)}",
                     "recommendations": "; ".join(budget_forecast.cost_optimization_tips),
                     "confidence_score": 0.9,
+                    "analysis_source": "local",
+                    "routing": self._routing_if_auto(db, project_id, "budget"),
                     "analysis_data": {
                         "projected_total_cost": budget_forecast.projected_total_cost,
                         "current_utilization": budget_forecast.current_utilization,
                         "cost_variance": budget_forecast.cost_variance,
-                        "budget_alerts": budget_forecast.budget_alerts
+                        "budget_alerts": budget_forecast.budget_alerts,
+                        "estimation": budget_forecast.estimation
                     }
                 })
             else:
@@ -1080,6 +1317,76 @@ class AIProjectAnalysisService:
                 "confidence_score": 0.1
             })
         
+        return self._save_insights(db, project_id, insights, analysis_type)
+    
+    @staticmethod
+    def _risk_insight(risk_assessment: RiskAssessment) -> Dict[str, Any]:
+        """Insight payload for a risk assessment"""
+        return {
+            "type": InsightType.RISK_ANALYSIS,
+            "priority": InsightPriority.HIGH if risk_assessment.overall_risk_score > 0.6 else InsightPriority.MEDIUM,
+            "title": f"Evaluación de Riesgos - Puntuación: {risk_assessment.overall_risk_score:.1%}",
+            "description": f"Análisis de riesgos identificó {len(risk_assessment.risk_factors)} factores de riesgo. Nivel de riesgo: {'Alto' if risk_assessment.overall_risk_score > 0.6 else 'Medio' if risk_assessment.overall_risk_score > 0.3 else 'Bajo'}",
+            "recommendations": "; ".join(risk_assessment.recommendations),
+            "confidence_score": 0.85,
+            "analysis_source": risk_assessment.analysis_source,
+            "routing": risk_assessment.routing,
+            "analysis_data": {
+                "overall_risk_score": risk_assessment.overall_risk_score,
+                "risk_factors": risk_assessment.risk_factors,
+                "critical_issues": risk_assessment.critical_issues
+            }
+        }
+    
+    @staticmethod
+    def _progress_insight(progress_prediction: ProgressPrediction) -> Dict[str, Any]:
+        """Insight payload for a completion prediction"""
+        return {
+            "type": InsightType.PROGRESS_PREDICTION,
+            "priority": InsightPriority.MEDIUM,
+            "title": f"Predicción de Progreso - Finalización: {progress_prediction.predicted_completion_date.strftime('%d/%m/%Y')}",
+            "description": f"Predicción basada en el progreso actual. Confianza: {progress_prediction.confidence_level:.1%}. Factores que afectan el cronograma: {len(progress_prediction.factors_affecting_timeline)}",
+            "recommendations": "; ".join(progress_prediction.recommended_actions),
+            "confidence_score": progress_prediction.confidence_level,
+            "analysis_source": progress_prediction.analysis_source,
+            "routing": progress_prediction.routing,
+            "analysis_data": {
+                "predicted_completion_date": progress_prediction.predicted_completion_date.isoformat(),
+                "confidence_level": progress_prediction.confidence_level,
+                "factors_affecting_timeline": progress_prediction.factors_affecting_timeline,
+                "forecast": progress_prediction.forecast
+            }
+        }
+    
+    @staticmethod
+    def _velocity_insight(anomalies: List[VelocityAnomaly]) -> Dict[str, Any]:
+        """Insight payload for velocity anomalies (project-wide ones first)"""
+        lead = anomalies[0]
+        scope = "Team" if lead.assignee_id is None else f"User {lead.assignee_id}"
+        details = [
+            f"{'team' if a.assignee_id is None else f'user {a.assignee_id}'} {a.kind}: "
+            f"{int(a.completions)} vs {a.baseline:.1f}/week (z={a.z_score:+.1f})"
+            for a in anomalies
+        ]
+        if any(a.kind == "drop" for a in anomalies):
+            recommendations = [
+                "Review blockers and unplanned work from the affected week",
+                "Check absences and reassign open tasks if the drop continues"
+            ]
+        else:
+            recommendations = ["Check whether tasks were closed in bulk or scoped smaller than usual"]
+        return {
+            "type": InsightType.TEAM_PERFORMANCE,
+            "priority": InsightPriority.HIGH if lead.kind == "drop" and lead.assignee_id is None else InsightPriority.MEDIUM,
+            "title": f"{scope} Velocity {lead.kind.title()}: {int(lead.completions)} tasks vs {lead.baseline:.1f}/week",
+            "description": f"Week of {lead.week_start.strftime('%Y-%m-%d')}: " + "; ".join(details),
+            "recommendations": "; ".join(recommendations),
+            "confidence_score": 0.7,
+            "analysis_source": "local"
+        }
+    
+    def _save_insights(self, db: Session, project_id: int, insights: List[Dict[str, Any]], analysis_type: str) -> List[Dict[str, Any]]:
+        """Persist insight payloads and return them with their database fields"""
         # Save insights to database and return original data with analysis_data
         saved_insights = []
         for insight_data in insights:
@@ -1093,13 +1400,13 @@ class AIProjectAnalysisService:
                     priority=insight_data["priority"],
                     confidence_score=insight_data["confidence_score"],
                     recommendations=insight_data["recommendations"],
-                    data_source=f"AI Analysis - {analysis_type.title()}"
+                    data_source=self._data_source(f"AI Analysis - {analysis_type.title()}", insight_data),
+                    expires_at=self.retention_service.expiry_for(insight_data["type"]),
+                    **self._routing_columns(insight_data)
                 )
                 
-                # Save to database
-                db.add(ai_insight)
-                db.commit()
-                db.refresh(ai_insight)
+                # Save to database, refreshing an identical stored insight instead of duplicating it
+                ai_insight = self.dedup_service.upsert(db, ai_insight)
                 
                 # Return the original insight_data with analysis_data intact
                 # Add database fields to the original data
@@ -1110,7 +1417,11 @@ class AIProjectAnalysisService:
                 insight_data["acknowledged_at"] = ai_insight.acknowledged_at
                 insight_data["created_at"] = ai_insight.created_at
                 insight_data["expires_at"] = ai_insight.expires_at
+                insight_data["last_seen_at"] = ai_insight.last_seen_at
                 insight_data["data_source"] = ai_insight.data_source
+                insight_data["routing_tier"] = ai_insight.routing_tier
+                insight_data["routing_model"] = ai_insight.routing_model
+                insight_data["routing_reason"] = ai_insight.routing_reason
                 
                 saved_insights.append(insight_data)
                 
@@ -1121,8 +1432,97 @@ class AIProjectAnalysisService:
         
         return saved_insights
     
-    def generate_ai_insights(self, project_id: int, db: Session) -> List[Dict[str, Any]]:
-        """Generate comprehensive AI insights for a project"""
+    def save_analysis(self, db: Session, project_id: int, analysis_type: str, result) -> List[Dict[str, Any]]:
+        """Persist a risk or progress result computed elsewhere (e.g. the streaming endpoint)"""
+        payload = self._risk_insight(result) if analysis_type == "risk" else self._progress_insight(result)
+        return self._save_insights(db, project_id, [payload], analysis_type)
+    
+    def analyze_portfolio_risk(self, project_ids: List[int], db: Session) -> Dict[int, RiskAssessment]:
+        """Risk assessments for many projects; llm mode batches them into shared prompts"""
+        with usage_scope(user_id=self.user_id, analysis="portfolio"):
+            if self.analysis_mode == "llm":
+                return self.deepseek_service.analyze_portfolio_risk(project_ids, db)
+            results = {}
+            for project_id in project_ids:
+                try:
+                    results[project_id] = self.analyze_project_risk(project_id, db)
+                except ValueError:
+                    continue  # Unknown project, same as the batched path
+            return results
+    
+    def generate_portfolio_risk_insights(self, db: Session, project_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Batched risk analysis of a portfolio, saving one risk insight per project"""
+        assessments = self.analyze_portfolio_risk(project_ids, db)
+        return {
+            project_id: self._save_insights(db, project_id, [self._risk_insight(assessment)], "risk")
+            for project_id, assessment in assessments.items()
+        }
+    
+    def generate_ai_insights(self, project_id: int, db: Session) -> List[AIInsight]:
+        """Generate comprehensive AI insights for a project.
+        
+        Concurrent identical runs are coalesced; callers that did not compute
+        load the shared result's rows in their own session.
+        """
+        computed: List[AIInsight] = []
+        
+        def compute():
+            computed.extend(self._generate_ai_insights(project_id, db))
+            return [insight.id for insight in computed]
+        
+        ids = self._coalesced(
+            db, project_id, "all", compute,
+            lambda since: [row.id for row in self._recent_insights(db, project_id, "all", since)]
+        )
+        if computed:
+            return computed
+        rows = {row.id: row for row in db.query(AIInsight).filter(AIInsight.id.in_(ids)).all()}
+        return [rows[insight_id] for insight_id in ids if insight_id in rows]
+    
+    def _coalesced(self, db: Session, project_id: int, analysis_type: str, compute, load_shared):
+        """Run compute once for concurrent identical requests (single flight)"""
+        key = f"analysis:{project_id}:{analysis_type}:{self.analysis_mode}:{project_data_version(db, project_id)}"
+        with usage_scope(project_id=project_id, user_id=self.user_id, analysis=analysis_type):
+            result, role = self.flight.do(key, compute, load_shared)
+        if role != "leader":
+            print(f"🔗 Reused {analysis_type} analysis of project {project_id} ({role})")
+        return result
+    
+    @staticmethod
+    def _recent_insights(db: Session, project_id: int, analysis_type: str, since: datetime) -> List[AIInsight]:
+        """Insights another worker saved (or refreshed) for this analysis since it started"""
+        query = db.query(AIInsight).filter(
+            AIInsight.project_id == project_id,
+            AIInsight.last_seen_at >= since
+        )
+        if analysis_type in ANALYSIS_INSIGHT_TYPES:
+            query = query.filter(AIInsight.insight_type == ANALYSIS_INSIGHT_TYPES[analysis_type])
+        return query.order_by(AIInsight.id).all()
+    
+    @staticmethod
+    def _insight_dict(insight: AIInsight) -> Dict[str, Any]:
+        return {
+            "id": insight.id,
+            "project_id": insight.project_id,
+            "type": insight.insight_type,
+            "priority": insight.priority,
+            "title": insight.title,
+            "description": insight.description,
+            "recommendations": insight.recommendations,
+            "confidence_score": insight.confidence_score,
+            "is_acknowledged": insight.is_acknowledged,
+            "acknowledged_by": insight.acknowledged_by,
+            "acknowledged_at": insight.acknowledged_at,
+            "created_at": insight.created_at,
+            "expires_at": insight.expires_at,
+            "last_seen_at": insight.last_seen_at,
+            "data_source": insight.data_source,
+            "routing_tier": insight.routing_tier,
+            "routing_model": insight.routing_model,
+            "routing_reason": insight.routing_reason
+        }
+    
+    def _generate_ai_insights(self, project_id: int, db: Session) -> List[AIInsight]:
         insights = []
         
         # Add mock data notice if AI is not enabled
@@ -1142,7 +1542,9 @@ class AIProjectAnalysisService:
                     "title": title,
                     "description": f"Risk analysis identified {len(risk_assessment.risk_factors)} risk factors",
                     "recommendations": "; ".join(risk_assessment.recommendations),
-                    "confidence_score": 0.8
+                    "confidence_score": 0.8,
+                    "analysis_source": risk_assessment.analysis_source,
+                    "routing": risk_assessment.routing
                 })
             
             # Progress prediction
@@ -1157,20 +1559,17 @@ class AIProjectAnalysisService:
                 "title": title,
                 "description": f"Based on current progress and factors affecting timeline",
                 "recommendations": "; ".join(progress_prediction.factors_affecting_timeline),
-                "confidence_score": 0.7
+                "confidence_score": 0.7,
+                "analysis_source": progress_prediction.analysis_source,
+                "routing": progress_prediction.routing
             })
             
-            # Team performance
-            team_analysis = self.analyze_team_performance(project_id, db)
-            if team_analysis.bottlenecks:
-                insights.append({
-                    "type": InsightType.TEAM_PERFORMANCE,
-                    "priority": InsightPriority.MEDIUM,
-                    "title": f"Team Velocity: {team_analysis.team_velocity:.1f} tasks/week",
-                    "description": f"Performance analysis identified {len(team_analysis.bottlenecks)} bottlenecks",
-                    "recommendations": "; ".join(team_analysis.optimization_suggestions),
-                    "confidence_score": 0.7
-                })
+            # Team performance: only when weekly velocity breaks from its recent pattern
+            _, anomalies = self.velocity.scan(db, [project_id])
+            if anomalies:
+                insight = self._velocity_insight(anomalies)
+                insight["routing"] = self._routing_if_auto(db, project_id, "team")
+                insights.append(insight)
             
             # Budget forecast
             budget_forecast = self.forecast_budget(project_id, db)
@@ -1181,7 +1580,9 @@ class AIProjectAnalysisService:
                     "title": f"Budget Utilization: {budget_forecast.current_utilization:.1f}%",
                     "description": f"Budget analysis shows {len(budget_forecast.budget_alerts)} alerts",
                     "recommendations": "; ".join(budget_forecast.cost_optimization_tips),
-                    "confidence_score": 0.9
+                    "confidence_score": 0.9,
+                    "analysis_source": "local",
+                    "routing": self._routing_if_auto(db, project_id, "budget")
                 })
             
         except Exception as e:
@@ -1208,13 +1609,13 @@ class AIProjectAnalysisService:
                     priority=insight_data["priority"],
                     confidence_score=insight_data["confidence_score"],
                     recommendations=insight_data["recommendations"],
-                    data_source="AI Analysis"
+                    data_source=self._data_source("AI Analysis", insight_data),
+                    expires_at=self.retention_service.expiry_for(insight_data["type"]),
+                    **self._routing_columns(insight_data)
                 )
                 
-                # Save to database
-                db.add(ai_insight)
-                db.commit()
-                db.refresh(ai_insight)
+                # Save to database, refreshing an identical stored insight instead of duplicating it
+                ai_insight = self.dedup_service.upsert(db, ai_insight)
                 saved_insights.append(ai_insight)
                 
             except Exception as e:
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Optional
+from sqlalchemy.orm import Session
+from ..database import SessionLocal
+from .ai_service import AIProjectAnalysisService, NARRATIVE_FIELDS
+
+STREAM_ANALYSES = ("risk", "progress")
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+class AnalysisStreamService:
+    """Streams a project analysis as Server-Sent Events in three stages.
+
+    1. ``metrics``: the rule-based result, computed from the database only.
+    2. ``narrative``: Deepseek's recommendations, one event per text delta
+       (skipped in local mode or while the provider is unavailable; in auto
+       mode the model router decides whether and with which model).
+    3. ``insights``: ids of the persisted insights, followed by ``done``.
+
+    The generator opens its own session: request-scoped sessions are closed
+    before a streaming response body is sent.
+    """
+
+    def __init__(
+        self,
+        analysis_mode: Optional[str] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        user_id: Optional[int] = None
+    ):
+        # Metrics always come from the rule-based engine; the mode only
+        # decides whether the LLM writes the narrative
+        self.ai_service = AIProjectAnalysisService("local")
+        self.analysis_mode = analysis_mode or os.getenv("AI_ANALYSIS_MODE", "llm")
+        self.stream_narrative = self.analysis_mode != "local"
+        self.deepseek_service = self.ai_service.deepseek_service
+        self.session_factory = session_factory
+        self.user_id = user_id
+
+    def stream(self, project_id: int, analysis_type: str = "risk") -> Iterator[str]:
+        if analysis_type not in STREAM_ANALYSES:
+            raise ValueError(f"Unsupported streaming analysis: {analysis_type}")
+
+        db = self.session_factory()
+        try:
+            # Stage 1: locally computed metrics
+            if analysis_type == "risk":
+                result = self.ai_service.analyze_project_risk(project_id, db)
+            else:
+                result = self.ai_service.predict_project_completion(project_id, db)
+            model = None
+            stream_narrative = self.stream_narrative
+            if self.analysis_mode == "auto":
+                decision = self.ai_service.route_analysis(db, project_id, analysis_type)
+                result.routing = decision.as_dict()
+                stream_narrative, model = decision.tier != "none", decision.model
+            yield sse_event("metrics", {"analysis_type": analysis_type, "result": result.model_dump(mode="json")})
+
+            # Stage 2: narrative streamed token by token
+            text = ""
+            if stream_narrative and self.deepseek_service.is_available():
+                builder = self.deepseek_service.prompt_builder
+                spec = builder.get_spec("narrative")
+                messages = builder.build_text(
+                    spec, self.ai_service.narrative_facts(analysis_type, result), NARRATIVE_FIELDS[analysis_type]
+                )
+                yield sse_event("narrative_start", {})
+                try:
+                    with self.deepseek_service.using_model(model):
+                        deltas = self.deepseek_service.stream_chat(
+                            messages, spec.max_output_tokens, analysis="narrative",
+                            usage_attributes={"project_id": project_id, "user_id": self.user_id}
+                        )
+                        for delta in deltas:
+                            text += delta
+                            yield sse_event("narrative", {"delta": delta})
+                except Exception as e:
+                    print(f"Error streaming {analysis_type} narrative: {e}")
+                    yield sse_event("narrative_error", {"detail": str(e)})
+                    text = ""
+
+            items = self.deepseek_service.prompt_builder.parse_lines(text)
+            if items:
+                if analysis_type == "risk":
+                    result.recommendations = items
+                else:
+                    result.recommended_actions = items
+                result.analysis_source = "hybrid"
+            yield sse_event("narrative_end", {"items": items, "analysis_source": result.analysis_source})
+
+            # Stage 3: persisted insights
+            saved = self.ai_service.save_analysis(db, project_id, analysis_type, result)
+            yield sse_event("insights", {"ids": [insight["id"] for insight in saved]})
+            yield sse_event("done", {"analysis_source": result.analysis_source})
+        except Exception as e:
+            print(f"Error streaming analysis for project {project_id}: {e}")
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            db.close()
@@ -0,0 +1,257 @@
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, cast, func, insert, literal, select, DateTime, Integer, String
+from dotenv import load_dotenv
+from ..models.project import Project, ProjectStatus
+from ..models.task import Task, TaskStatus
+from ..models.ai_insight import ProjectAnalytics
+from .time_buckets import bucket_start, python_bucket_start, hours_between
+
+load_dotenv()
+
+HOURLY_RATE = 75  # Same default rate used by budget forecasts
+
+# Metric columns copied by snapshots and averaged by rollups
+INTEGER_METRICS = [
+    "total_tasks", "completed_tasks", "in_progress_tasks", "overdue_tasks",
+    "estimated_total_hours", "actual_total_hours", "remaining_estimated_hours",
+    "active_team_members"
+]
+FLOAT_METRICS = [
+    "progress_percentage", "average_task_completion_time", "team_velocity",
+    "budget_utilization", "schedule_variance", "risk_score"
+]
+
+def _to_naive_utc(value: datetime) -> datetime:
+    # Stored timestamps are naive UTC; query parameters may carry an offset
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class ProjectAnalyticsService:
+    """Maintains the ProjectAnalytics time series.
+
+    A daily snapshot row is written per project with one INSERT ... SELECT over
+    tasks, daily rows are rolled up into weekly and monthly averages, and old
+    daily/weekly rows are trimmed. Trend charts read the pre-aggregated series
+    instead of recomputing history from tasks.
+    """
+
+    def __init__(self):
+        self.daily_retention_days = int(os.getenv("ANALYTICS_DAILY_RETENTION_DAYS", "90"))
+        self.weekly_retention_days = int(os.getenv("ANALYTICS_RETENTION_DAYS", "365"))
+        # Rollups are recomputed for this many days back, so the window must
+        # stay inside the daily retention to never average a partial period
+        self.rollup_lookback_days = min(
+            int(os.getenv("ANALYTICS_ROLLUP_LOOKBACK_DAYS", "45")),
+            max(0, self.daily_retention_days - 31)
+        )
+
+    def snapshot_projects(self, db: Session, project_ids: Optional[List[int]] = None, now: Optional[datetime] = None) -> int:
+        """Write today's daily row for each project; re-running replaces today's rows"""
+        now = now or datetime.utcnow()
+        snapshot_date = python_bucket_start(now, "daily")
+        dialect = db.bind.dialect.name
+        now_param = literal(now, DateTime())
+
+        is_done = Task.status == TaskStatus.DONE
+        not_done = and_(Task.id.isnot(None), Task.status != TaskStatus.DONE)
+
+        total = func.count(Task.id)
+        completed = func.coalesce(func.sum(case((is_done, 1), else_=0)), 0)
+        overdue = func.coalesce(func.sum(case((and_(not_done, Task.due_date < now_param), 1), else_=0)), 0)
+        actual_hours = func.coalesce(func.sum(Task.actual_hours), 0)
+        progress = case((total > 0, completed * 100.0 / total), else_=0.0)
+        overdue_rate = case((total > 0, overdue * 100.0 / total), else_=0.0)
+
+        # Same rule-based score as the local risk fallback
+        risk_score = case((total == 0, 0.0), else_=(
+            case((overdue_rate > 30, 0.4), (overdue_rate > 10, 0.2), else_=0.0) +
+            case((progress < 30, 0.3), else_=0.0)
+        ))
+
+        # Days ahead (+) or behind (-) the linear plan from start to end date
+        start_date = func.coalesce(Project.start_date, Project.created_at)
+        planned_days = hours_between(start_date, Project.end_date, dialect) / 24.0
+        elapsed_days = hours_between(start_date, now_param, dialect) / 24.0
+        schedule_variance = case(
+            (and_(Project.end_date.isnot(None), total > 0), progress / 100.0 * planned_days - elapsed_days),
+            else_=0.0
+        )
+
+        metrics = {
+            "total_tasks": total,
+            "completed_tasks": completed,
+            "in_progress_tasks": func.coalesce(func.sum(case((Task.status == TaskStatus.IN_PROGRESS, 1), else_=0)), 0),
+            "overdue_tasks": overdue,
+            "progress_percentage": progress,
+            "estimated_total_hours": func.coalesce(func.sum(Task.estimated_hours), 0),
+            "actual_total_hours": actual_hours,
+            "remaining_estimated_hours": func.coalesce(func.sum(case((not_done, Task.estimated_hours), else_=0)), 0),
+            "active_team_members": func.count(func.distinct(case((not_done, Task.assignee_id), else_=None))),
+            "average_task_completion_time": func.coalesce(func.avg(case(
+                (and_(is_done, Task.completed_at.isnot(None)), hours_between(Task.created_at, Task.completed_at, dialect)),
+                else_=None
+            )), 0.0),
+            "team_velocity": func.coalesce(func.sum(case(
+                (Task.completed_at >= literal(now - timedelta(weeks=4), DateTime()), 1), else_=0
+            )), 0) / 4.0,
+            "budget_utilization": case(
+                (Project.budget > 0, actual_hours * HOURLY_RATE * 100.0 / Project.budget), else_=0.0
+            ),
+            "schedule_variance": func.coalesce(schedule_variance, 0.0),
+            "risk_score": risk_score
+        }
+
+        source = select(
+            Project.id,
+            literal(snapshot_date, DateTime()),
+            literal("daily", String()),
+            *metrics.values()
+        ).select_from(Project).outerjoin(Task, Task.project_id == Project.id).group_by(
+            Project.id, Project.budget, Project.start_date, Project.created_at, Project.end_date
+        )
+
+        existing = db.query(ProjectAnalytics).filter(
+            ProjectAnalytics.granularity == "daily",
+            ProjectAnalytics.analysis_date >= snapshot_date,
+            ProjectAnalytics.analysis_date < snapshot_date + timedelta(days=1)
+        )
+        if project_ids is not None:
+            source = source.where(Project.id.in_(project_ids))
+            existing = existing.filter(ProjectAnalytics.project_id.in_(project_ids))
+        else:
+            # Finished projects keep their history (today's row included) but stop getting new rows
+            active = Project.status.notin_([ProjectStatus.COMPLETED, ProjectStatus.CANCELLED])
+            source = source.where(active)
+            existing = existing.filter(ProjectAnalytics.project_id.in_(select(Project.id).where(active)))
+
+        existing.delete(synchronize_session=False)
+        result = db.execute(insert(ProjectAnalytics).from_select(
+            ["project_id", "analysis_date", "granularity", *metrics.keys()], source
+        ))
+        db.commit()
+        return result.rowcount
+
+    def rollup(self, db: Session, granularity: str, now: Optional[datetime] = None) -> int:
+        """Recompute weekly or monthly averages for recent periods from daily rows"""
+        if granularity not in ("weekly", "monthly"):
+            raise ValueError(f"Unsupported rollup granularity: {granularity}")
+
+        now = now or datetime.utcnow()
+        cutoff = python_bucket_start(now - timedelta(days=self.rollup_lookback_days), granularity)
+        bucket = bucket_start(ProjectAnalytics.analysis_date, granularity, db.bind.dialect.name)
+
+        aggregates = [
+            cast(func.round(func.avg(getattr(ProjectAnalytics, name))), Integer) for name in INTEGER_METRICS
+        ] + [
+            func.avg(getattr(ProjectAnalytics, name)) for name in FLOAT_METRICS
+        ]
+        source = select(
+            ProjectAnalytics.project_id,
+            bucket,
+            literal(granularity, String()),
+            *aggregates
+        ).where(
+            ProjectAnalytics.granularity == "daily",
+            ProjectAnalytics.analysis_date >= cutoff
+        ).group_by(ProjectAnalytics.project_id, bucket)
+
+        db.query(ProjectAnalytics).filter(
+            ProjectAnalytics.granularity == granularity,
+            ProjectAnalytics.analysis_date >= cutoff
+        ).delete(synchronize_session=False)
+        result = db.execute(insert(ProjectAnalytics).from_select(
+            ["project_id", "analysis_date", "granularity", *INTEGER_METRICS, *FLOAT_METRICS], source
+        ))
+        db.commit()
+        return result.rowcount
+
+    def apply_retention(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Delete daily and weekly rows past their retention; monthly rows are kept"""
+        now = now or datetime.utcnow()
+        deleted = {}
+        for granularity, days in (("daily", self.daily_retention_days), ("weekly", self.weekly_retention_days)):
+            cutoff = python_bucket_start(now - timedelta(days=days), granularity)
+            deleted[granularity] = db.query(ProjectAnalytics).filter(
+                ProjectAnalytics.granularity == granularity,
+                ProjectAnalytics.analysis_date < cutoff
+            ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def run_pipeline(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Snapshot, roll up and trim the analytics series"""
+        now = now or datetime.utcnow()
+        return {
+            "snapshots": self.snapshot_projects(db, now=now),
+            "weekly_rollups": self.rollup(db, "weekly", now=now),
+            "monthly_rollups": self.rollup(db, "monthly", now=now),
+            "deleted": self.apply_retention(db, now=now)
+        }
+
+    def get_latest(self, db: Session, project_id: int) -> Optional[ProjectAnalytics]:
+        """Latest daily row for a project, snapshotting it on demand if none exists"""
+        query = db.query(ProjectAnalytics).filter(
+            ProjectAnalytics.project_id == project_id,
+            ProjectAnalytics.granularity == "daily"
+        ).order_by(ProjectAnalytics.analysis_date.desc())
+        latest = query.first()
+        if not latest:
+            self.snapshot_projects(db, project_ids=[project_id])
+            latest = query.first()
+        return latest
+
+    def choose_granularity(self, start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+        """Pick the finest granularity that is still retained and fits the range"""
+        now = now or datetime.utcnow()
+        span_days = (end - start).days
+        oldest_daily = python_bucket_start(now - timedelta(days=self.daily_retention_days), "daily")
+        oldest_weekly = python_bucket_start(now - timedelta(days=self.weekly_retention_days), "weekly")
+        if span_days <= 92 and start >= oldest_daily:
+            return "daily"
+        if span_days <= 730 and start >= oldest_weekly:
+            return "weekly"
+        return "monthly"
+
+    def get_series(
+        self,
+        db: Session,
+        project_id: int,
+        start: datetime,
+        end: datetime,
+        granularity: str = "auto",
+        max_points: int = 200
+    ) -> Dict[str, Any]:
+        """Return the analytics series for a date range, downsampled to max_points"""
+        start, end = _to_naive_utc(start), _to_naive_utc(end)
+        if start >= end:
+            raise ValueError("start must be before end")
+        if granularity == "auto":
+            granularity = self.choose_granularity(start, end)
+
+        rows = db.query(ProjectAnalytics).filter(
+            ProjectAnalytics.project_id == project_id,
+            ProjectAnalytics.granularity == granularity,
+            ProjectAnalytics.analysis_date >= python_bucket_start(start, granularity),
+            ProjectAnalytics.analysis_date <= end
+        ).order_by(ProjectAnalytics.analysis_date).all()
+
+        # Evenly spaced points, always keeping the most recent one
+        if len(rows) > max_points:
+            step = math.ceil(len(rows) / max_points)
+            sampled = rows[::step]
+            if sampled[-1] is not rows[-1]:
+                sampled[-1] = rows[-1]
+            rows = sampled
+
+        return {
+            "project_id": project_id,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "points": rows
+        }
@@ -0,0 +1,124 @@
+import heapq
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from ..models.task import TaskPriority
+
+load_dotenv()
+
+# Tasks are placed in this order, so capacity goes to the most urgent work first
+PRIORITY_RANK = {
+    TaskPriority.CRITICAL: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.MEDIUM: 2,
+    TaskPriority.LOW: 3
+}
+
+@dataclass
+class AssignmentPlan:
+    """Proposed (task id, member id, hours) assignments and the resulting loads.
+
+    ``loads`` includes each member's existing open work; ``unassigned``
+    holds the tasks that fit nobody's remaining capacity.
+    """
+    assignments: List[Tuple[int, int, float]]
+    unassigned: List[int]
+    loads: Dict[int, float]
+    capacities: Dict[int, float]
+    elapsed_ms: float = 0.0
+    assigned_hours: Dict[int, float] = field(init=False)
+
+    def __post_init__(self):
+        self.assigned_hours = {member: 0.0 for member in self.loads}
+        for _, member, hours in self.assignments:
+            self.assigned_hours[member] += hours
+
+    @property
+    def max_load(self) -> float:
+        return max(self.loads.values(), default=0.0)
+
+class AssignmentOptimizer:
+    """Greedy min-max load assignment of tasks to team members.
+
+    Tasks go out by priority and, within a priority, largest first (LPT);
+    each one goes to the least-loaded member it still fits, taken from a
+    min-heap of loads. Members too full for the current task wait in a
+    second heap keyed by headroom, and members that cannot fit any remaining
+    task are dropped, so a plan for thousands of tasks and hundreds of
+    members takes a few milliseconds. LPT keeps the largest load within 4/3
+    of the optimum when capacities do not bind.
+    """
+
+    def __init__(self, default_hours: Optional[float] = None, capacity_hours: Optional[float] = None):
+        self.default_hours = default_hours if default_hours is not None else float(os.getenv("ASSIGNMENT_DEFAULT_HOURS", "8"))
+        self.capacity_hours = capacity_hours if capacity_hours is not None else float(os.getenv("ASSIGNMENT_CAPACITY_HOURS", "40"))
+
+    def task_hours(self, estimated_hours: Optional[float]) -> float:
+        return float(estimated_hours) if estimated_hours is not None else self.default_hours
+
+    def plan(
+        self,
+        tasks: Sequence[Tuple[int, Optional[float], Optional[TaskPriority]]],
+        loads: Dict[int, float],
+        capacities: Optional[Dict[int, float]] = None
+    ) -> AssignmentPlan:
+        """Assign (task id, estimated hours, priority) rows to the members in ``loads``.
+
+        ``loads`` maps every candidate member to their current open hours;
+        ``capacities`` overrides the default capacity per member.
+        """
+        started = time.perf_counter()
+        capacities = {member: (capacities or {}).get(member, self.capacity_hours) for member in loads}
+        loads = {member: float(load) for member, load in loads.items()}
+
+        ordered = sorted(
+            ((task_id, self.task_hours(hours), PRIORITY_RANK.get(priority, PRIORITY_RANK[TaskPriority.MEDIUM]))
+             for task_id, hours, priority in tasks),
+            key=lambda row: (row[2], -row[1], row[0])
+        )
+        # Smallest task still to place from each position on: a member whose
+        # headroom is below it can leave the heap for good
+        smallest_after = [0.0] * (len(ordered) + 1)
+        smallest_after[-1] = float("inf")
+        for index in range(len(ordered) - 1, -1, -1):
+            smallest_after[index] = min(ordered[index][1], smallest_after[index + 1])
+
+        heap = [(load, member) for member, load in loads.items() if capacities[member] - load >= smallest_after[0]]
+        heapq.heapify(heap)
+        assignments, unassigned = [], []
+        # Members too full for the tasks being placed now, by largest headroom;
+        # they return to the heap once tasks get small enough
+        parked = []
+        for index, (task_id, hours, _) in enumerate(ordered):
+            while parked and -parked[0][0] >= hours:
+                _, member = heapq.heappop(parked)
+                heapq.heappush(heap, (loads[member], member))
+            chosen = None
+            while heap:
+                load, member = heapq.heappop(heap)
+                headroom = capacities[member] - load
+                if hours <= headroom:
+                    chosen = member
+                    break
+                if headroom >= smallest_after[index + 1]:
+                    heapq.heappush(parked, (-headroom, member))
+
+            if chosen is None:
+                unassigned.append(task_id)
+                continue
+            loads[chosen] += hours
+            assignments.append((task_id, chosen, hours))
+            if capacities[chosen] - loads[chosen] >= smallest_after[index + 1]:
+                heapq.heappush(heap, (loads[chosen], chosen))
+
+        return AssignmentPlan(
+            assignments=assignments,
+            unassigned=unassigned,
+            loads=loads,
+            capacities=capacities,
+            elapsed_ms=(time.perf_counter() - started) * 1000
+        )
+
+assignment_optimizer = AssignmentOptimizer()
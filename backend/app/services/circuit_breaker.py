@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+class CircuitBreaker:
+    """Failure-rate and slow-call circuit breaker for an external provider.
+
+    Outcomes of the last ``window_size`` calls are kept. Once at least
+    ``minimum_calls`` are recorded, the breaker opens if the failure rate or the
+    rate of calls slower than ``slow_call_seconds`` reaches its threshold. While
+    open every call is rejected immediately; after ``open_seconds`` it goes
+    half-open and lets ``half_open_calls`` probes through. A successful, fast
+    probe closes it again, anything else re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 8.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        minimum_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = max(1, minimum_calls)
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max(1, window_size))  # (failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._stats = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "times_opened": 0,
+            "last_failure": None,
+            "last_state_change": None
+        }
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str) -> "CircuitBreaker":
+        """Build a breaker configured by <prefix>_BREAKER_* environment variables"""
+        def env(key: str, default: str) -> str:
+            return os.getenv(f"{prefix}_BREAKER_{key}", default)
+
+        return cls(
+            name=name,
+            failure_rate_threshold=float(env("FAILURE_RATE", "0.5")),
+            slow_call_seconds=float(env("SLOW_CALL_SECONDS", "8")),
+            slow_call_rate_threshold=float(env("SLOW_CALL_RATE", "0.8")),
+            window_size=int(env("WINDOW", "20")),
+            minimum_calls=int(env("MIN_CALLS", "5")),
+            open_seconds=float(env("OPEN_SECONDS", "30")),
+            half_open_calls=int(env("HALF_OPEN_CALLS", "1"))
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected without trying the provider"""
+        return self.state == self.OPEN
+
+    def allow_request(self) -> bool:
+        """Reserve a call slot; every allowed call must be followed by a record_* call"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self, duration: float):
+        self._record(failed=False, duration=duration)
+
+    def record_failure(self, duration: float, error: Optional[Exception] = None):
+        self._record(failed=True, duration=duration, error=error)
+
+    def get_state(self) -> Dict[str, Any]:
+        """Current state, window rates and counters (for health/status endpoints)"""
+        with self._lock:
+            self._maybe_half_open()
+            window = len(self._outcomes)
+            failures = sum(1 for failed, _ in self._outcomes if failed)
+            slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_calls": window,
+                "failure_rate": round(failures / window, 3) if window else 0.0,
+                "slow_call_rate": round(slow / window, 3) if window else 0.0,
+                "retry_in_seconds": retry_in,
+                **self._stats
+            }
+
+    def reset(self):
+        """Force the breaker closed and forget recorded outcomes"""
+        with self._lock:
+            self._outcomes.clear()
+            self._probes_in_flight = 0
+            self._transition(self.CLOSED)
+
+    def _record(self, failed: bool, duration: float, error: Optional[Exception] = None):
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._stats["calls"] += 1
+            if failed:
+                self._stats["failures"] += 1
+                self._stats["last_failure"] = str(error) if error else "failure"
+            if slow:
+                self._stats["slow_calls"] += 1
+
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._open()
+                else:
+                    self._outcomes.clear()
+                    self._transition(self.CLOSED)
+                return
+
+            self._outcomes.append((failed, slow))
+            if self._state == self.CLOSED and len(self._outcomes) >= self.minimum_calls:
+                window = len(self._outcomes)
+                failure_rate = sum(1 for f, _ in self._outcomes if f) / window
+                slow_rate = sum(1 for _, s in self._outcomes if s) / window
+                if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                    self._open()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._stats["times_opened"] += 1
+        self._transition(self.OPEN)
+        print(f"⚡ Circuit breaker '{self.name}' opened for {self.open_seconds:g}s")
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+
+    def _transition(self, state: str):
+        if state != self._state:
+            self._state = state
+            self._stats["last_state_change"] = datetime.utcnow()
+
+# Shared by every DeepseekAIService instance (services are created per request)
+deepseek_breaker = CircuitBreaker.from_env("deepseek", "DEEPSEEK")
@@ -0,0 +1,213 @@
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+from ..models.task import Task, TaskStatus
+
+load_dotenv()
+
+PERCENTILES = (50, 80, 95)
+
+# Cycle-time prior (days) for projects without any completed task
+PRIOR_MEDIAN_DAYS = 3.0
+PRIOR_SIGMA = 0.75
+
+@dataclass
+class CompletionForecast:
+    """Monte Carlo completion forecast; ``days`` holds P50/P80/P95 from ``now``.
+
+    ``model`` is "throughput" (weekly completions resampled), "cycle_time"
+    (per-task cycle times over the active assignees), "prior" (no history)
+    or "done" (nothing left). ``beyond_horizon`` is the share of simulations
+    that had not finished after ``max_weeks`` and count as finishing there.
+    """
+    model: str
+    simulations: int
+    remaining_tasks: int
+    now: datetime
+    days: Dict[int, float]
+    on_time_probability: Optional[float] = None
+    mean_weekly_throughput: float = 0.0
+    history_weeks: int = 0
+    beyond_horizon: float = 0.0
+    elapsed_ms: float = 0.0
+    dates: Dict[int, datetime] = field(init=False)
+
+    def __post_init__(self):
+        self.dates = {p: self.now + timedelta(days=d) for p, d in self.days.items()}
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = {
+            "model": self.model,
+            "simulations": self.simulations,
+            "remaining_tasks": self.remaining_tasks,
+            "on_time_probability": self.on_time_probability,
+            "mean_weekly_throughput": round(self.mean_weekly_throughput, 2),
+            "history_weeks": self.history_weeks,
+            "beyond_horizon": round(self.beyond_horizon, 4),
+            "elapsed_ms": round(self.elapsed_ms, 1)
+        }
+        for p in PERCENTILES:
+            result[f"p{p}_days"] = round(self.days[p], 1)
+            result[f"p{p}_date"] = self.dates[p].isoformat()
+        return result
+
+class CompletionForecaster:
+    """Samples historical delivery to forecast when the remaining backlog is done.
+
+    With at least ``min_history_weeks`` weeks of history (and some
+    completions in them) each simulation resamples the project's weekly
+    throughput until the remaining tasks are covered; the last week is
+    interpolated. Otherwise it sums resampled cycle times of the remaining
+    tasks over the active assignees. All simulations advance together as
+    NumPy arrays, a block of weeks (or tasks) at a time.
+    """
+
+    WEEK_BLOCK = 52
+    TASK_BLOCK = 256
+
+    def __init__(
+        self,
+        simulations: int = 10000,
+        history_weeks: int = 12,
+        min_history_weeks: int = 3,
+        max_weeks: int = 520
+    ):
+        self.simulations = max(100, simulations)
+        self.history_weeks = max(1, history_weeks)
+        self.min_history_weeks = max(1, min_history_weeks)
+        self.max_weeks = max(1, max_weeks)
+
+    @classmethod
+    def from_env(cls) -> "CompletionForecaster":
+        return cls(
+            simulations=int(os.getenv("FORECAST_SIMULATIONS", "10000")),
+            history_weeks=int(os.getenv("FORECAST_HISTORY_WEEKS", "12")),
+            min_history_weeks=int(os.getenv("FORECAST_MIN_HISTORY_WEEKS", "3")),
+            max_weeks=int(os.getenv("FORECAST_MAX_WEEKS", "520"))
+        )
+
+    def history(self, tasks: Sequence[Task], now: datetime, started_at: Optional[datetime] = None):
+        """(cycle times in days, weekly throughput) of a project's tasks.
+
+        Weeks are the 7-day windows ending at ``now``, so the current week is
+        never a partial one; windows before ``started_at`` are left out.
+        """
+        completed = [t for t in tasks if t.status == TaskStatus.DONE and t.completed_at and t.created_at]
+        cycle_times = np.array(
+            [(t.completed_at - t.created_at).total_seconds() / 86400 for t in completed], dtype=float
+        )
+        cycle_times = cycle_times[cycle_times >= 0]
+
+        weeks = self.history_weeks
+        if started_at:
+            weeks = min(weeks, max(1, int(np.ceil((now - started_at).total_seconds() / (7 * 86400)))))
+        ages = np.array([(now - t.completed_at).total_seconds() / (7 * 86400) for t in completed], dtype=float)
+        ages = ages[(ages >= 0) & (ages < weeks)].astype(int)
+        throughput = np.bincount(ages, minlength=weeks).astype(float)
+        return cycle_times, throughput
+
+    def forecast(
+        self,
+        remaining_tasks: int,
+        cycle_times: np.ndarray,
+        weekly_throughput: np.ndarray,
+        workers: int = 1,
+        now: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
+        seed: Optional[int] = None
+    ) -> CompletionForecast:
+        """Run the simulations; ``seed`` makes repeated runs on unchanged data identical"""
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        rng = np.random.default_rng(seed)
+        n = self.simulations
+        weekly_throughput = np.asarray(weekly_throughput, dtype=float)
+        cycle_times = np.asarray(cycle_times, dtype=float)
+        beyond_horizon = 0.0
+
+        if remaining_tasks <= 0:
+            model, days = "done", np.zeros(1)
+        elif weekly_throughput.size >= self.min_history_weeks and weekly_throughput.sum() > 0:
+            model = "throughput"
+            days, beyond_horizon = self._simulate_throughput(rng, remaining_tasks, weekly_throughput)
+        else:
+            model = "cycle_time" if cycle_times.size else "prior"
+            if not cycle_times.size:
+                cycle_times = rng.lognormal(np.log(PRIOR_MEDIAN_DAYS), PRIOR_SIGMA, size=1000)
+            days = self._simulate_cycle_times(rng, remaining_tasks, cycle_times, max(1, workers))
+
+        on_time = None
+        if deadline is not None:
+            on_time = round(float(np.mean(days <= (deadline - now).total_seconds() / 86400)), 3)
+        percentiles = np.percentile(days, PERCENTILES)
+        return CompletionForecast(
+            model=model,
+            simulations=n if model != "done" else 0,
+            remaining_tasks=max(0, remaining_tasks),
+            now=now,
+            days={p: float(value) for p, value in zip(PERCENTILES, percentiles)},
+            on_time_probability=on_time,
+            mean_weekly_throughput=float(weekly_throughput.mean()) if weekly_throughput.size else 0.0,
+            history_weeks=int(weekly_throughput.size),
+            beyond_horizon=beyond_horizon,
+            elapsed_ms=(time.perf_counter() - started) * 1000
+        )
+
+    def forecast_tasks(
+        self,
+        tasks: Sequence[Task],
+        now: Optional[datetime] = None,
+        started_at: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
+        seed: Optional[int] = None
+    ) -> CompletionForecast:
+        """Forecast from a project's loaded tasks"""
+        now = now or datetime.utcnow()
+        remaining = [t for t in tasks if t.status != TaskStatus.DONE]
+        workers = len({t.assignee_id for t in remaining if t.assignee_id})
+        cycle_times, throughput = self.history(tasks, now, started_at)
+        return self.forecast(len(remaining), cycle_times, throughput, workers, now, deadline, seed)
+
+    def _simulate_throughput(self, rng: np.random.Generator, remaining: int, samples: np.ndarray):
+        n = self.simulations
+        days = np.full(n, self.max_weeks * 7.0)
+        # Weekly counts are whole numbers: int32 sampling and sums are cheaper
+        samples = samples.astype(np.int32)
+        done = np.zeros(n, dtype=np.int32)
+        pending = np.arange(n)
+        week = 0
+        # First block sized to the expected duration so most runs finish in it
+        block = int(np.ceil(remaining / samples.mean() * 1.2)) + 1
+        while pending.size and week < self.max_weeks:
+            block = min(max(block, self.WEEK_BLOCK), self.max_weeks - week)
+            reached = samples[rng.integers(0, samples.size, size=(pending.size, block), dtype=np.int32)]
+            np.cumsum(reached, axis=1, out=reached)
+            if week:
+                reached += done[pending, None]
+            # Weeks still short of the backlog; the next one covers it
+            first = (reached < remaining).sum(axis=1)
+            finished = first < block
+            rows = np.nonzero(finished)[0]
+            first = first[rows]
+            after = reached[rows, first]
+            before = np.where(first > 0, reached[rows, first - 1], done[pending[rows]])
+            days[pending[rows]] = (week + first + (remaining - before) / (after - before)) * 7.0
+            done[pending] = reached[:, -1]
+            pending = pending[~finished]
+            week += block
+            block = self.WEEK_BLOCK
+        return days, pending.size / n
+
+    def _simulate_cycle_times(self, rng: np.random.Generator, remaining: int, samples: np.ndarray, workers: int):
+        total = np.zeros(self.simulations)
+        for start in range(0, remaining, self.TASK_BLOCK):
+            size = min(self.TASK_BLOCK, remaining - start)
+            total += rng.choice(samples, size=(self.simulations, size)).sum(axis=1)
+        return total / workers
+
+# Shared forecaster configured from the environment
+completion_forecaster = CompletionForecaster.from_env()
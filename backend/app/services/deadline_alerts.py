@@ -0,0 +1,236 @@
+import heapq
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..database import SessionLocal
+from ..models.task import Task, TaskStatus
+from ..models.ai_insight import AIInsight, InsightType, InsightPriority
+from .insight_dedup_service import InsightDedupService
+from .insight_retention_service import InsightRetentionService
+
+load_dotenv()
+
+CLOSED_STATUSES = (TaskStatus.DONE, TaskStatus.CANCELLED)
+
+def parse_lead_hours(spec: str) -> List[float]:
+    """"48,24,0" → [48.0, 24.0, 0.0]; 0 is the overdue alert"""
+    hours = {float(part) for part in spec.split(",") if part.strip()}
+    return sorted((value for value in hours if value >= 0), reverse=True)
+
+def _naive(value: datetime) -> datetime:
+    # Due dates are stored as UTC; SQLite hands them back without tzinfo,
+    # Postgres in the session time zone
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+class DeadlineAlertEngine:
+    """Fires DEADLINE_ALERT insights as tasks reach each lead time before their due date.
+
+    Open tasks with a due date are loaded once from the due_date index;
+    every (fire time, task, lead time) event waits in a min-heap, and the
+    background thread sleeps until the earliest one, so nothing runs between
+    events. TaskService reports writes: a changed due date pushes new
+    events and the outdated ones are skipped when popped. Before firing,
+    the task is re-read, so work finished or rescheduled by another worker
+    does not alert. Alerts are saved through InsightDedupService, so the
+    same alert fired by several workers, or again after a restart, is
+    stored once.
+    """
+
+    def __init__(self, lead_hours: Optional[Sequence[float]] = None, lookback_hours: Optional[float] = None):
+        self.enabled = os.getenv("DEADLINE_ALERTS_ENABLED", "true").lower() == "true"
+        self.lead_hours = list(lead_hours) if lead_hours is not None else parse_lead_hours(
+            os.getenv("DEADLINE_ALERT_LEAD_HOURS", "48,24,0")
+        )
+        # Tasks overdue for longer than this are not alerted at startup
+        self.lookback = timedelta(hours=lookback_hours if lookback_hours is not None else float(
+            os.getenv("DEADLINE_ALERT_LOOKBACK_HOURS", "72")
+        ))
+        self.dedup_service = InsightDedupService()
+        self.retention_service = InsightRetentionService()
+        # (fire at, task id, lead hours, due date the event was computed for)
+        self._heap: List[Tuple[datetime, int, float, datetime]] = []
+        self._due: Dict[int, datetime] = {}
+        self._loaded = False
+        self._condition = threading.Condition(threading.RLock())
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.fired = 0
+
+    # Lifecycle
+
+    def start(self):
+        """Load the heap and start the alert thread (no-op when disabled or already running)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="deadline-alerts", daemon=True)
+        self._thread.start()
+        print(f"⏰ Deadline alerts started (lead times {', '.join(f'{h:g}h' for h in self.lead_hours)})")
+
+    def stop(self):
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        db = SessionLocal()
+        try:
+            self.load(db)
+        finally:
+            db.close()
+        while not self._stop_event.is_set():
+            with self._condition:
+                wait = self.seconds_until_next()
+                if wait is None or wait > 0:
+                    self._condition.wait(timeout=wait)
+            if self._stop_event.is_set():
+                break
+            db = SessionLocal()
+            try:
+                self.fire_due(db)
+            except Exception as e:
+                db.rollback()
+                print(f"Error firing deadline alerts: {e}")
+            finally:
+                db.close()
+
+    # Heap maintenance
+
+    def load(self, db: Session, now: Optional[datetime] = None):
+        """Schedule every open task due after ``now - lookback``"""
+        now = now or datetime.utcnow()
+        rows = db.query(Task.id, Task.due_date).filter(
+            Task.due_date >= now - self.lookback,
+            ~Task.status.in_(CLOSED_STATUSES)
+        ).all()
+        with self._condition:
+            self._due = {task_id: _naive(due_date) for task_id, due_date in rows}
+            self._heap = [event for task_id, due_date in self._due.items() for event in self._events(task_id, due_date, now)]
+            heapq.heapify(self._heap)
+            self._loaded = True
+            self._condition.notify_all()
+
+    def _events(self, task_id: int, due_date: datetime, now: datetime) -> List[Tuple[datetime, int, float, datetime]]:
+        """The task's future events, plus the latest lead time already reached (fired right away)"""
+        events = []
+        passed = None
+        for lead in self.lead_hours:
+            fire_at = due_date - timedelta(hours=lead)
+            if fire_at > now:
+                events.append((fire_at, task_id, lead, due_date))
+            else:
+                passed = lead
+        if passed is not None:
+            events.append((now, task_id, passed, due_date))
+        return events
+
+    def task_saved(self, task: Task, now: Optional[datetime] = None):
+        """Reschedule a created or updated task (call after commit/refresh)"""
+        with self._condition:
+            if not self._loaded:
+                return
+            now = now or datetime.utcnow()
+            due_date = _naive(task.due_date) if task.due_date else None
+            if task.status in CLOSED_STATUSES or due_date is None or due_date < now - self.lookback:
+                self._due.pop(task.id, None)
+                return
+            if self._due.get(task.id) == due_date:
+                return
+            head = self._heap[0][0] if self._heap else None
+            self._due[task.id] = due_date
+            for event in self._events(task.id, due_date, now):
+                heapq.heappush(self._heap, event)
+            if self._heap and (head is None or self._heap[0][0] < head):
+                self._condition.notify_all()
+
+    def task_deleted(self, task_id: int):
+        with self._condition:
+            self._due.pop(task_id, None)
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the earliest event (None when the heap is empty)"""
+        with self._condition:
+            if not self._heap:
+                return None
+            return max(0.0, (self._heap[0][0] - (now or datetime.utcnow())).total_seconds())
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    # Firing
+
+    def fire_due(self, db: Session, now: Optional[datetime] = None) -> List[AIInsight]:
+        """Pop and fire every event due by ``now``; stale events are dropped"""
+        now = now or datetime.utcnow()
+        due_events = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                _, task_id, lead, due_date = heapq.heappop(self._heap)
+                # Events of a due date that has since changed (or a closed task) are dropped
+                if self._due.get(task_id) == due_date:
+                    due_events.append((task_id, due_date, lead))
+
+        alerts = []
+        for task_id, due_date, lead in due_events:
+            task = db.query(Task).filter(Task.id == task_id).first()
+            if task is None or task.status in CLOSED_STATUSES or task.due_date is None:
+                self.task_deleted(task_id)
+                continue
+            if _naive(task.due_date) != due_date:
+                # Rescheduled by another worker
+                self.task_saved(task, now)
+                continue
+            alerts.append(self._save_alert(db, task, lead, now))
+        return alerts
+
+    def _save_alert(self, db: Session, task: Task, lead: float, now: datetime) -> AIInsight:
+        if lead == 0:
+            priority = InsightPriority.CRITICAL
+            title = f"🚨 Tarea vencida: {task.title}"
+        else:
+            priority = InsightPriority.HIGH if lead <= 24 else InsightPriority.MEDIUM
+            title = f"⏰ Vence en menos de {lead:g} h: {task.title}"
+        status_label = task.status.value if task.status else "todo"
+        assignee = f"asignada a user_{task.assignee_id}" if task.assignee_id else "sin asignar"
+        insight = AIInsight(
+            project_id=task.project_id,
+            insight_type=InsightType.DEADLINE_ALERT,
+            title=title,
+            description=(
+                f"La tarea #{task.id} vence el {_naive(task.due_date).strftime('%d/%m/%Y %H:%M')} UTC "
+                f"y sigue en estado {status_label} ({assignee})."
+            ),
+            priority=priority,
+            confidence_score=1.0,
+            recommendations=(
+                "Replanificar la fecha o reducir el alcance; informar a los interesados" if lead == 0
+                else "Confirmar que se terminará a tiempo o ajustar la fecha de entrega"
+            ),
+            data_source="Deadline Alerts",
+            expires_at=self.retention_service.expiry_for(InsightType.DEADLINE_ALERT)
+        )
+        insight = self.dedup_service.upsert(db, insight, now)
+        self.fired += 1
+        print(f"⏰ Deadline alert for task {task.id} (project {task.project_id}): {title}")
+        return insight
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "enabled": self.enabled,
+                "running": bool(self._thread and self._thread.is_alive()),
+                "lead_hours": self.lead_hours,
+                "tracked_tasks": len(self._due),
+                "pending_events": len(self._heap),
+                "next_event_at": self._heap[0][0].isoformat() if self._heap else None,
+                "alerts_fired": self.fired
+            }
+
+deadline_alerts = DeadlineAlertEngine()
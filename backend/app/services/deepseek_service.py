@@ -1,9 +1,11 @@
 import openai
 import os
-import json
-from typing import Dict, List, Optional, Any
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func
 from ..models.project import Project, ProjectStatus
 from ..models.task import Task, TaskStatus, TaskPriority
 from ..models.ai_insight import (
@@ -11,6 +13,9 @@ from ..models.ai_insight import (
     RiskAssessment, ProgressPrediction, TeamPerformanceAnalysis, BudgetForecast, ProjectInfo
 )
 from dotenv import load_dotenv
+from .circuit_breaker import CircuitOpenError, deepseek_breaker
+from .prompt_builder import PromptBuilder, PromptValidationError, FieldSpec
+from .usage_ledger import usage_ledger, usage_counts
 
 load_dotenv()
 
@@ -22,20 +27,35 @@ class DeepseekAIService:
         self.base_url = os.getenv("DEEPSEEK_BASE_URL", "https://openrouter.ai/api/v1")
         self.model = os.getenv("DEEPSEEK_MODEL", "deepseek/deepseek-chat:free")
         self.max_tokens = int(os.getenv("DEEPSEEK_MAX_TOKENS", "1000"))
+        # Per-call deadline; retries are left to the circuit breaker, not the client
+        self.timeout_seconds = float(os.getenv("DEEPSEEK_TIMEOUT_SECONDS", "15"))
+        self.max_retries = int(os.getenv("DEEPSEEK_MAX_RETRIES", "0"))
+        self.breaker = deepseek_breaker
+        # Structured analyses ask for JSON mode (disable for providers without it)
+        self.json_mode = os.getenv("DEEPSEEK_JSON_MODE", "true").lower() == "true"
+        self.structured_temperature = float(os.getenv("DEEPSEEK_STRUCTURED_TEMPERATURE", "0.2"))
+        self.prompt_builder = PromptBuilder()
+        # Portfolio sweeps pack this many projects into one prompt
+        self.portfolio_batch_size = max(1, int(os.getenv("DEEPSEEK_PORTFOLIO_BATCH_SIZE", "20")))
+        self.batch_max_tokens = int(os.getenv("DEEPSEEK_BATCH_MAX_TOKENS", "4000"))
         self.ai_provider = os.getenv("AI_PROVIDER", "deepseek")
         
-        # Check if Deepseek is properly configured
-        self.deepseek_enabled = (
+        # Check if Deepseek is properly configured. OpenRouter keys start with
+        # sk-or-; any other OpenAI-compatible endpoint (e.g. llm_stub_server.py)
+        # accepts whatever key it is given
+        self.deepseek_enabled = bool(
             self.api_key and 
-            self.api_key != "sk-or-v1-PLACEHOLDER-GET-FROM-OPENROUTER" and
-            self.api_key.startswith("sk-or-")
+            self.api_key not in ("sk-or-v1-PLACEHOLDER-GET-FROM-OPENROUTER", "disabled") and
+            (self.api_key.startswith("sk-or-") or "openrouter.ai" not in self.base_url)
         )
         
         if self.deepseek_enabled:
             # Configure OpenAI client to use OpenRouter
             self.client = openai.OpenAI(
                 api_key=self.api_key,
-                base_url=self.base_url
+                base_url=self.base_url,
+                timeout=self.timeout_seconds,
+                max_retries=self.max_retries
             )
         else:
             self.client = None
@@ -44,27 +64,337 @@ class DeepseekAIService:
         """Check if Deepseek service is properly configured and enabled"""
         return self.deepseek_enabled
     
+    def is_available(self) -> bool:
+        """Check if the API is configured and the circuit breaker lets calls through"""
+        return self.deepseek_enabled and not self.breaker.is_open()
+    
+    @contextmanager
+    def using_model(self, model: Optional[str]):
+        """Send this instance's calls inside the block to ``model`` (model routing)"""
+        previous = self.model
+        self.model = model or previous
+        try:
+            yield
+        finally:
+            self.model = previous
+    
     def _call_deepseek_api(self, prompt: str, system_message: str = None) -> str:
         """Make a call to Deepseek API via OpenRouter"""
+        messages = []
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": prompt})
+        return self._call_deepseek_messages(messages)
+    
+    def _call_deepseek_messages(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        temperature: float = 0.7,
+        token_ceiling: Optional[int] = None,
+        analysis: Optional[str] = None,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        """Send chat messages through the circuit breaker with a per-call deadline.
+        
+        Every call, including rejected ones, is recorded in the usage ledger.
+        With ``validate`` the parsed value is returned and a validation
+        failure is recorded as an "invalid" outcome.
+        """
         if not self.deepseek_enabled:
             raise ValueError("Deepseek API is not properly configured")
+        breaker_state = self.breaker.state
+        if not self.breaker.allow_request():
+            self._record_usage(0.0, "rejected", breaker_state, analysis=analysis)
+            raise CircuitOpenError("Deepseek API circuit breaker is open")
+        
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": min(max_tokens or self.max_tokens, token_ceiling or self.max_tokens),
+            "temperature": temperature,
+            "timeout": self.timeout_seconds
+        }
+        if json_mode and self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+        
+        started = time.monotonic()
+        try:
+            response = self.client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            self.breaker.record_failure(elapsed, e)
+            self._record_usage(elapsed, "error", breaker_state, analysis=analysis, error=e)
+            raise Exception(f"Error calling Deepseek API: {str(e)}")
         
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+        usage = getattr(response, "usage", None)
+        if validate is None:
+            self._record_usage(elapsed, "success", breaker_state, usage, analysis)
+            return content
         try:
-            messages = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = self.client.chat.completions.create(
+            result = validate(content)
+        except PromptValidationError as e:
+            self._record_usage(elapsed, "invalid", breaker_state, usage, analysis, error=e)
+            raise
+        self._record_usage(elapsed, "success", breaker_state, usage, analysis)
+        return result
+    
+    def _record_usage(
+        self,
+        elapsed: float,
+        outcome: str,
+        breaker_state: str,
+        usage: Any = None,
+        analysis: Optional[str] = None,
+        error: Optional[Exception] = None,
+        streamed: bool = False,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        usage_ledger.record(
+            **(attributes or {}),
+            model=self.model,
+            analysis=analysis,
+            latency_ms=round(elapsed * 1000, 1),
+            breaker_state=breaker_state,
+            outcome=outcome,
+            streamed=streamed,
+            error=error,
+            **usage_counts(usage)
+        )
+    
+    def call_structured(
+        self,
+        analysis: str,
+        facts: Dict[str, Any],
+        fields: Optional[Dict[str, FieldSpec]] = None
+    ) -> Dict[str, Any]:
+        """Run a budgeted JSON-mode analysis and return the schema-validated result"""
+        spec = self.prompt_builder.get_spec(analysis, fields)
+        messages = self.prompt_builder.build(spec, facts)
+        return self._call_deepseek_messages(
+            messages,
+            max_tokens=spec.max_output_tokens,
+            json_mode=True,
+            temperature=self.structured_temperature,
+            analysis=spec.name,
+            validate=lambda raw: self.prompt_builder.validate(spec, raw)
+        )
+    
+    def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        analysis: Optional[str] = None,
+        usage_attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """Yield text deltas of a streamed chat completion.
+        
+        Goes through the circuit breaker like every other call; the latency
+        recorded is the time to the first token, so long answers are not
+        counted as slow calls. ``usage_attributes`` (project_id, user_id)
+        are passed explicitly: a streaming response body is iterated outside
+        the request's context, so usage_scope does not reach it.
+        """
+        if not self.deepseek_enabled:
+            raise ValueError("Deepseek API is not properly configured")
+        breaker_state = self.breaker.state
+        if not self.breaker.allow_request():
+            self._record_usage(0.0, "rejected", breaker_state, analysis=analysis, streamed=True, attributes=usage_attributes)
+            raise CircuitOpenError("Deepseek API circuit breaker is open")
+        
+        started = time.monotonic()
+        first_token = None
+        failed = None
+        usage = None
+        try:
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                max_tokens=self.max_tokens,
-                temperature=0.7
+                max_tokens=min(max_tokens or self.max_tokens, self.max_tokens),
+                temperature=0.7,
+                timeout=self.timeout_seconds,
+                stream=True,
+                stream_options={"include_usage": True}
             )
-            
-            return response.choices[0].message.content
+            for chunk in stream:
+                # The usage chunk comes last and has no choices
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    yield delta
         except Exception as e:
+            failed = e
             raise Exception(f"Error calling Deepseek API: {str(e)}")
+        finally:
+            # Also runs when the consumer stops early (client disconnected)
+            elapsed = first_token if first_token is not None else time.monotonic() - started
+            if failed is not None:
+                self.breaker.record_failure(time.monotonic() - started, failed)
+                self._record_usage(elapsed, "error", breaker_state, usage, analysis, error=failed, streamed=True,
+                                   attributes=usage_attributes)
+            else:
+                self.breaker.record_success(elapsed)
+                self._record_usage(elapsed, "success", breaker_state, usage, analysis, streamed=True,
+                                   attributes=usage_attributes)
+    
+    def call_structured_batch(
+        self,
+        analysis: str,
+        facts_by_key: Dict[Any, Dict[str, Any]]
+    ) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, str]]:
+        """One JSON-mode call for many items; returns (valid sections, per-key errors)"""
+        spec = self.prompt_builder.get_spec(analysis)
+        messages = self.prompt_builder.build_batch(spec, facts_by_key)
+        return self._call_deepseek_messages(
+            messages,
+            max_tokens=spec.max_output_tokens * len(facts_by_key),
+            json_mode=True,
+            temperature=self.structured_temperature,
+            token_ceiling=self.batch_max_tokens,
+            analysis=spec.name,
+            validate=lambda raw: self.prompt_builder.validate_batch(spec, raw, list(facts_by_key))
+        )
+    
+    def generate_narrative(self, analysis: str, facts: Dict[str, Any], fields: Dict[str, str]) -> Optional[Dict[str, List[str]]]:
+        """Ask the LLM only for narrative lists about precomputed facts.
+        
+        Returns {field: [str, ...]} for every requested field, or None if the
+        API is unavailable or the answer is unusable (callers keep local text).
+        """
+        if not self.is_available():
+            return None
+        
+        try:
+            return self.call_structured(
+                "narrative",
+                {"analysis": analysis, **facts},
+                {name: FieldSpec("str_list", description, min_items=1, max_items=5) for name, description in fields.items()}
+            )
+        except Exception as e:
+            print(f"Error generating {analysis} narrative: {e}")
+            return None
+    
+    @staticmethod
+    def _risk_facts(project: Project, total_tasks: int, completed_tasks: int, overdue_tasks: int, in_progress_tasks: int) -> Dict[str, Any]:
+        """Precomputed project metrics sent to the risk prompts"""
+        return {
+            "name": project.name,
+            "description": project.description or "",
+            "status": project.status.value if project.status else "active",
+            "total_tasks": total_tasks,
+            "completed_tasks": completed_tasks,
+            "completion_rate": round(completed_tasks / total_tasks * 100, 1) if total_tasks else 0,
+            "overdue_tasks": overdue_tasks,
+            "overdue_rate": round(overdue_tasks / total_tasks * 100, 1) if total_tasks else 0,
+            "in_progress_tasks": in_progress_tasks,
+            "deadline": project.end_date.strftime('%Y-%m-%d') if project.end_date else None
+        }
+    
+    @staticmethod
+    def _risk_from_llm(project_info: ProjectInfo, ai_analysis: Dict[str, Any], overdue_rate: float) -> RiskAssessment:
+        """RiskAssessment from a validated risk (or portfolio section) response"""
+        score = ai_analysis.get("overall_risk_score", 0.3)
+        return RiskAssessment(
+            project_info=project_info,
+            overall_risk_score=score,
+            risk_level=ai_analysis.get("risk_level", "Medio"),
+            risk_factors=ai_analysis.get("risk_factors", []),
+            recommendations=ai_analysis.get("recommendations", []),
+            critical_issues=ai_analysis.get("critical_issues", []),
+            risk_categories={
+                "schedule_risk": min(0.8, overdue_rate / 100),
+                "resource_risk": 0.3,
+                "quality_risk": 0.2,
+                "budget_risk": 0.2,
+                "technical_risk": 0.3
+            },
+            mitigation_strategies=[{"strategy": m} for m in ai_analysis.get("mitigation_strategies", [])],
+            impact_assessment={
+                "schedule_impact": "Alto" if overdue_rate > 30 else "Medio" if overdue_rate > 10 else "Bajo",
+                "budget_impact": "Medio",
+                "quality_impact": "Bajo",
+                "team_impact": "Bajo"
+            },
+            risk_timeline={
+                "current": score,
+                "projected_30_days": min(1.0, score + 0.1),
+                "projected_60_days": min(1.0, score + 0.2)
+            },
+            analysis_source="llm"
+        )
+    
+    def analyze_portfolio_risk(self, project_ids: List[int], db: Session) -> Dict[int, RiskAssessment]:
+        """Risk assessments for many projects with one LLM round-trip per batch.
+        
+        Task metrics of every project come from a single aggregate query and
+        are packed into batched prompts of up to ``portfolio_batch_size``
+        projects. Each project's section of the answer is validated on its
+        own; projects whose section is missing or invalid (or whose whole
+        batch failed) are retried individually with analyze_project_risk.
+        Unknown project ids are skipped.
+        """
+        projects = {p.id: p for p in db.query(Project).filter(Project.id.in_(project_ids)).all()}
+        now = datetime.utcnow()
+        not_done = Task.status != TaskStatus.DONE
+        rows = db.query(
+            Task.project_id,
+            func.count(Task.id),
+            func.sum(case((Task.status == TaskStatus.DONE, 1), else_=0)),
+            func.sum(case((and_(not_done, Task.due_date < now), 1), else_=0)),
+            func.sum(case((Task.status == TaskStatus.IN_PROGRESS, 1), else_=0))
+        ).filter(Task.project_id.in_(list(projects))).group_by(Task.project_id).all()
+        metrics = {row[0]: tuple(int(value or 0) for value in row[1:]) for row in rows}
+        
+        results: Dict[int, RiskAssessment] = {}
+        retry: List[int] = []
+        pending = [pid for pid in project_ids if pid in projects and metrics.get(pid, (0,))[0] > 0]
+        # Projects without tasks get the fixed local assessment, no LLM needed
+        retry.extend(pid for pid in project_ids if pid in projects and pid not in pending)
+        
+        for start in range(0, len(pending), self.portfolio_batch_size):
+            chunk = pending[start:start + self.portfolio_batch_size]
+            if not self.is_available():
+                retry.extend(chunk)
+                continue
+            try:
+                sections, errors = self.call_structured_batch("portfolio", {
+                    pid: self._risk_facts(projects[pid], *metrics[pid]) for pid in chunk
+                })
+            except Exception as e:
+                print(f"Error in batched risk analysis ({len(chunk)} projects): {e}")
+                retry.extend(chunk)
+                continue
+            for pid, section in sections.items():
+                total, _, overdue, _ = metrics[pid]
+                results[pid] = self._risk_from_llm(
+                    self._project_info(projects[pid]), section, overdue / total * 100
+                )
+            if errors:
+                print(f"Batched risk analysis: retrying {len(errors)} project(s) individually")
+            retry.extend(errors)
+        
+        for pid in retry:
+            results[pid] = self.analyze_project_risk(pid, db)
+        return {pid: results[pid] for pid in project_ids if pid in results}
+    
+    @staticmethod
+    def _project_info(project: Project) -> ProjectInfo:
+        return ProjectInfo(
+            id=project.id,
+            name=project.name,
+            description=project.description,
+            status=project.status.value if project.status else "active",
+            created_at=project.created_at,
+            deadline=project.end_date
+        )
     
     def analyze_project_risk(self, project_id: int, db: Session) -> RiskAssessment:
         """Analyze project risks using Deepseek AI"""
@@ -106,7 +436,8 @@ class DeepseekAIService:
                     "quality_impact": "Bajo",
                     "team_impact": "Bajo"
                 },
-                risk_timeline={"current": 0.1, "projected_30_days": 0.1, "projected_60_days": 0.1}
+                risk_timeline={"current": 0.1, "projected_30_days": 0.1, "projected_60_days": 0.1},
+                analysis_source="local"
             )
         
         # Prepare data for AI analysis
@@ -119,71 +450,15 @@ class DeepseekAIService:
         completion_rate = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
         overdue_rate = (len(overdue_tasks) / total_tasks) * 100 if total_tasks > 0 else 0
         
-        # Use AI for risk analysis if enabled
-        if self.deepseek_enabled:
+        # Use AI for risk analysis if enabled (skipped while the breaker is open)
+        if self.is_available():
             try:
-                system_message = """Eres un experto analista de riesgos de proyectos. Analiza los datos del proyecto y proporciona una evaluación de riesgos detallada en español. 
-                Responde SOLO con un JSON válido con la siguiente estructura:
-                {
-                    "overall_risk_score": 0.0-1.0,
-                    "risk_level": "Bajo|Medio|Alto",
-                    "risk_factors": [{"factor": "nombre", "severity": "low|medium|high", "description": "descripción", "impact": 0.0-1.0}],
-                    "recommendations": ["recomendación1", "recomendación2"],
-                    "critical_issues": ["issue1", "issue2"],
-                    "mitigation_strategies": ["estrategia1", "estrategia2"]
-                }"""
+                ai_analysis = self.call_structured("risk", self._risk_facts(
+                    project, total_tasks, completed_tasks, len(overdue_tasks), len(in_progress_tasks)
+                ))
                 
-                prompt = f"""
-                Analiza este proyecto:
-                - Nombre: {project.name}
-                - Descripción: {project.description or 'Sin descripción'}
-                - Estado: {project.status.value if project.status else 'activo'}
-                - Total de tareas: {total_tasks}
-                - Tareas completadas: {completed_tasks} ({completion_rate:.1f}%)
-                - Tareas vencidas: {len(overdue_tasks)} ({overdue_rate:.1f}%)
-                - Tareas en progreso: {len(in_progress_tasks)}
-                - Fecha límite: {project.end_date.strftime('%Y-%m-%d') if project.end_date else 'No definida'}
+                return self._risk_from_llm(project_info, ai_analysis, overdue_rate)
                 
-                Proporciona un análisis de riesgos completo considerando estos factores.
-                """
-                
-                ai_response = self._call_deepseek_api(prompt, system_message)
-                
-                # Parse AI response
-                try:
-                    ai_analysis = json.loads(ai_response)
-                    
-                    return RiskAssessment(
-                        project_info=project_info,
-                        overall_risk_score=ai_analysis.get("overall_risk_score", 0.3),
-                        risk_level=ai_analysis.get("risk_level", "Medio"),
-                        risk_factors=ai_analysis.get("risk_factors", []),
-                        recommendations=ai_analysis.get("recommendations", []),
-                        critical_issues=ai_analysis.get("critical_issues", []),
-                        risk_categories={
-                            "schedule_risk": min(0.8, overdue_rate / 100),
-                            "resource_risk": 0.3,
-                            "quality_risk": 0.2,
-                            "budget_risk": 0.2,
-                            "technical_risk": 0.3
-                        },
-                        mitigation_strategies=ai_analysis.get("mitigation_strategies", []),
-                        impact_assessment={
-                            "schedule_impact": "Alto" if overdue_rate > 30 else "Medio" if overdue_rate > 10 else "Bajo",
-                            "budget_impact": "Medio",
-                            "quality_impact": "Bajo",
-                            "team_impact": "Bajo"
-                        },
-                        risk_timeline={
-                            "current": ai_analysis.get("overall_risk_score", 0.3),
-                            "projected_30_days": min(1.0, ai_analysis.get("overall_risk_score", 0.3) + 0.1),
-                            "projected_60_days": min(1.0, ai_analysis.get("overall_risk_score", 0.3) + 0.2)
-                        }
-                    )
-                except json.JSONDecodeError:
-                    # Fallback if AI response is not valid JSON
-                    pass
-                    
             except Exception as e:
                 print(f"Error in AI risk analysis: {e}")
                 # Continue with fallback analysis
@@ -261,7 +536,8 @@ class DeepseekAIService:
                 "current": min(1.0, risk_score),
                 "projected_30_days": min(1.0, risk_score + 0.1),
                 "projected_60_days": min(1.0, risk_score + 0.2)
-            }
+            },
+            analysis_source="fallback"
         )
     
     def predict_project_completion(self, project_id: int, db: Session) -> ProgressPrediction:
@@ -289,10 +565,17 @@ class DeepseekAIService:
                 confidence_level=0.3,
                 current_progress_percentage=0.0,
                 estimated_remaining_days=30,
+                completion_probability=0.5,
                 factors_affecting_timeline=["📋 Sin tareas definidas - Estimación basada en promedio de proyectos"],
+                recommended_actions=["📋 Crear y estimar las tareas del proyecto"],
                 milestone_predictions=[],
-                resource_requirements=[],
-                bottleneck_analysis=[]
+                velocity_analysis={"current_velocity": 0.0, "historical_velocity": 0.0, "velocity_trend": 0.0},
+                timeline_scenarios={
+                    "optimistic": {"completion_date": predicted_date - timedelta(days=7), "probability": 0.2},
+                    "realistic": {"completion_date": predicted_date, "probability": 0.5},
+                    "pessimistic": {"completion_date": predicted_date + timedelta(days=14), "probability": 0.3}
+                },
+                analysis_source="local"
             )
         
         # Calculate current metrics
@@ -300,47 +583,40 @@ class DeepseekAIService:
         completed_tasks = len([t for t in tasks if t.status == TaskStatus.DONE])
         progress_percentage = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
         
-        # Use AI for prediction if enabled
-        if self.deepseek_enabled:
+        # Use AI for prediction if enabled (skipped while the breaker is open)
+        if self.is_available():
             try:
-                system_message = """Eres un experto en gestión de proyectos. Analiza los datos del proyecto y predice la fecha de finalización. 
-                Responde SOLO con un JSON válido con la siguiente estructura:
-                {
-                    "estimated_days_remaining": número,
-                    "confidence_level": 0.0-1.0,
-                    "factors_affecting_timeline": ["factor1", "factor2"],
-                    "bottleneck_analysis": ["bottleneck1", "bottleneck2"],
-                    "resource_requirements": ["recurso1", "recurso2"]
-                }"""
+                ai_analysis = self.call_structured("progress", {
+                    "name": project.name,
+                    "total_tasks": total_tasks,
+                    "completed_tasks": completed_tasks,
+                    "progress_percentage": round(progress_percentage, 1),
+                    "start_date": project.created_at.strftime('%Y-%m-%d'),
+                    "deadline": project.end_date.strftime('%Y-%m-%d') if project.end_date else None,
+                    "days_elapsed": (datetime.utcnow() - project.created_at).days
+                })
                 
-                prompt = f"""
-                Analiza este proyecto para predecir su finalización:
-                - Nombre: {project.name}
-                - Total de tareas: {total_tasks}
-                - Tareas completadas: {completed_tasks} ({progress_percentage:.1f}%)
-                - Fecha de inicio: {project.created_at.strftime('%Y-%m-%d')}
-                - Fecha límite: {project.end_date.strftime('%Y-%m-%d') if project.end_date else 'No definida'}
-                - Días transcurridos: {(datetime.utcnow() - project.created_at).days}
-                
-                Proporciona una predicción realista de finalización.
-                """
-                
-                ai_response = self._call_deepseek_api(prompt, system_message)
-                ai_analysis = json.loads(ai_response)
-                
-                estimated_days = ai_analysis.get("estimated_days_remaining", 30)
+                estimated_days = ai_analysis["estimated_days_remaining"]
                 predicted_date = datetime.utcnow() + timedelta(days=estimated_days)
                 
+                on_time = not project.end_date or predicted_date <= project.end_date
                 return ProgressPrediction(
                     project_info=project_info,
                     predicted_completion_date=predicted_date,
                     confidence_level=ai_analysis.get("confidence_level", 0.7),
+                    completion_probability=0.8 if on_time else 0.4,
                     current_progress_percentage=progress_percentage,
                     estimated_remaining_days=estimated_days,
                     factors_affecting_timeline=ai_analysis.get("factors_affecting_timeline", []),
+                    recommended_actions=ai_analysis["recommended_actions"] or ai_analysis["resource_requirements"],
                     milestone_predictions=[],
+                    velocity_analysis={},
+                    timeline_scenarios={
+                        "realistic": {"completion_date": predicted_date, "probability": ai_analysis.get("confidence_level", 0.7)}
+                    },
                     resource_requirements=ai_analysis.get("resource_requirements", []),
-                    bottleneck_analysis=ai_analysis.get("bottleneck_analysis", [])
+                    bottleneck_analysis=ai_analysis.get("bottleneck_analysis", []),
+                    analysis_source="llm"
                 )
                 
             except Exception as e:
@@ -380,5 +656,6 @@ class DeepseekAIService:
                 "optimistic": {"completion_date": predicted_date - timedelta(days=5), "probability": 0.2},
                 "realistic": {"completion_date": predicted_date, "probability": 0.6},
                 "pessimistic": {"completion_date": predicted_date + timedelta(days=10), "probability": 0.2}
-            }
+            },
+            analysis_source="fallback"
         )
\ No newline at end of file
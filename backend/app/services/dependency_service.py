@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..models.task import Task, TaskDependency, TaskStatus
+from .task_graph import EDGE_CHECKSUM_FACTOR, TaskGraph
+
+load_dotenv()
+
+class DependencyService:
+    """Task dependency edges plus a per-process cache of each project's TaskGraph.
+
+    A cached graph is reused while its signature (task count, latest task
+    change, edge count and checksum) matches the database, so edits made by
+    other workers trigger a rebuild. Edits made through this service, and
+    task saves reported by TaskService, update the cached graph in place.
+    """
+
+    def __init__(self, default_hours: Optional[float] = None, max_projects: Optional[int] = None):
+        self.default_hours = default_hours if default_hours is not None else float(os.getenv("CRITICAL_PATH_DEFAULT_HOURS", "8"))
+        self.max_projects = max_projects or int(os.getenv("DEPENDENCY_GRAPH_CACHE_PROJECTS", "16"))
+        self._graphs: "OrderedDict[int, TaskGraph]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def remaining_hours(self, status: Optional[TaskStatus], estimated_hours: Optional[float]) -> float:
+        """Weight of a task on the critical path: its estimate until it is done or cancelled"""
+        if status in (TaskStatus.DONE, TaskStatus.CANCELLED):
+            return 0.0
+        return float(estimated_hours) if estimated_hours is not None else self.default_hours
+
+    @staticmethod
+    def graph_signature(db: Session, project_id: int) -> Tuple[int, Any, int, int]:
+        task_count, latest = db.query(
+            func.count(Task.id),
+            func.max(func.coalesce(Task.updated_at, Task.created_at))
+        ).filter(Task.project_id == project_id).one()
+        edge_count, checksum = db.query(
+            func.count(TaskDependency.id),
+            func.coalesce(func.sum(TaskDependency.blocker_id * EDGE_CHECKSUM_FACTOR + TaskDependency.blocked_id), 0)
+        ).filter(TaskDependency.project_id == project_id).one()
+        return task_count, latest, edge_count, int(checksum)
+
+    def graph(self, db: Session, project_id: int) -> TaskGraph:
+        """The project's graph, rebuilt only when the database has moved on"""
+        signature = self.graph_signature(db, project_id)
+        with self._lock:
+            graph = self._graphs.get(project_id)
+            if graph is not None and graph.signature() == signature:
+                self._graphs.move_to_end(project_id)
+                return graph
+
+            rows = db.query(
+                Task.id, Task.status, Task.estimated_hours, func.coalesce(Task.updated_at, Task.created_at)
+            ).filter(Task.project_id == project_id).all()
+            edges = db.query(TaskDependency.blocker_id, TaskDependency.blocked_id).filter(
+                TaskDependency.project_id == project_id
+            ).all()
+            graph = TaskGraph.build(
+                ((task_id, self.remaining_hours(status, hours), updated) for task_id, status, hours, updated in rows),
+                edges
+            )
+            self._graphs[project_id] = graph
+            self._graphs.move_to_end(project_id)
+            while len(self._graphs) > self.max_projects:
+                self._graphs.popitem(last=False)
+            return graph
+
+    def add(self, db: Session, blocker: Task, blocked: Task) -> TaskDependency:
+        """Insert ``blocker → blocked``; raises CycleError or ValueError (duplicate)"""
+        with self._lock:
+            graph = self.graph(db, blocked.project_id)
+            if blocked.id in graph.successors[blocker.id]:
+                raise ValueError("Dependency already exists")
+            graph.check_edge(blocker.id, blocked.id)
+
+            dependency = TaskDependency(project_id=blocked.project_id, blocker_id=blocker.id, blocked_id=blocked.id)
+            db.add(dependency)
+            db.commit()
+            db.refresh(dependency)
+            graph.add_edge(blocker.id, blocked.id)
+            return dependency
+
+    def remove(self, db: Session, project_id: int, blocker_id: int, blocked_id: int) -> bool:
+        with self._lock:
+            deleted = db.query(TaskDependency).filter(
+                TaskDependency.blocker_id == blocker_id,
+                TaskDependency.blocked_id == blocked_id
+            ).delete(synchronize_session=False)
+            db.commit()
+            graph = self._graphs.get(project_id)
+            if deleted and graph is not None:
+                graph.remove_edge(blocker_id, blocked_id)
+            return bool(deleted)
+
+    def task_saved(self, task: Task):
+        """Apply a created or updated task to the cached graph (call after commit/refresh)"""
+        with self._lock:
+            graph = self._graphs.get(task.project_id)
+            if graph is not None:
+                graph.add_task(task.id, self.remaining_hours(task.status, task.estimated_hours),
+                               task.updated_at or task.created_at)
+
+    def tasks_touched(self, project_id: int, task_ids: List[int], updated: datetime):
+        """Record a bulk update that changed no durations (e.g. reassignment)"""
+        with self._lock:
+            graph = self._graphs.get(project_id)
+            if graph is not None:
+                for task_id in task_ids:
+                    if task_id in graph:
+                        graph.set_hours(task_id, graph.hours[task_id], updated)
+
+    def delete_task_edges(self, db: Session, task: Task):
+        """Delete a task's edges before the task itself (SQLite does not cascade)"""
+        db.query(TaskDependency).filter(
+            or_(TaskDependency.blocker_id == task.id, TaskDependency.blocked_id == task.id)
+        ).delete(synchronize_session=False)
+
+    def task_deleted(self, project_id: int, task_id: int):
+        with self._lock:
+            graph = self._graphs.get(project_id)
+            if graph is not None and task_id in graph:
+                graph.remove_task(task_id)
+
+    def dependencies(self, db: Session, task_id: int) -> Dict[str, List[TaskDependency]]:
+        edges = db.query(TaskDependency).filter(
+            or_(TaskDependency.blocker_id == task_id, TaskDependency.blocked_id == task_id)
+        ).all()
+        return {
+            "blocked_by": [edge for edge in edges if edge.blocked_id == task_id],
+            "blocks": [edge for edge in edges if edge.blocker_id == task_id]
+        }
+
+    def critical_path(self, db: Session, project_id: int, limit: int = 100) -> Dict[str, Any]:
+        """Longest chain of remaining work, weighted by estimated hours"""
+        with self._lock:
+            graph = self.graph(db, project_id)
+            path, total_hours = graph.critical_path()
+            timing = {node: (graph.start[node], graph.finish[node], graph.hours[node]) for node in path[:limit]}
+            task_count, edge_count = len(graph), graph.edge_count
+
+        shown = path[:limit]
+        tasks = {task.id: task for task in db.query(Task.id, Task.title, Task.status).filter(Task.id.in_(shown))} if shown else {}
+        return {
+            "project_id": project_id,
+            "total_hours": round(total_hours, 1),
+            "length": len(path),
+            "task_count": task_count,
+            "dependency_count": edge_count,
+            "tasks": [
+                {
+                    "id": node,
+                    "title": tasks[node].title if node in tasks else None,
+                    "status": tasks[node].status.value if node in tasks and tasks[node].status else None,
+                    "remaining_hours": timing[node][2],
+                    "earliest_start_hours": round(timing[node][0], 1),
+                    "earliest_finish_hours": round(timing[node][1], 1)
+                }
+                for node in shown
+            ]
+        }
+
+# One graph cache per worker process
+dependency_service = DependencyService()
@@ -0,0 +1,228 @@
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..models.task import Task, TaskStatus
+from .task_categories import categorize_task
+
+load_dotenv()
+
+# (category, project id, assignee id): the factors the model learns an effect for
+CellKey = Tuple[str, int, Optional[int]]
+
+# Learned corrections stay within these factors of the written estimate
+MIN_BIAS_FACTOR = 0.25
+MAX_BIAS_FACTOR = 4.0
+# Cap on the log-space variance used for the lognormal mean correction
+MAX_LOG_VARIANCE = 1.0
+
+class TrainingRow(NamedTuple):
+    key: CellKey
+    estimated_hours: Optional[float]
+    actual_hours: float
+
+class EffortEstimate(NamedTuple):
+    planned_hours: float  # The written estimate, or the learned one when missing
+    expected_hours: float  # What the task is expected to take, bias included
+    source: str  # "estimate" (corrected) or "learned" (missing estimate)
+
+class ShrinkageModel:
+    """Additive log-space model: global mean plus category, project and assignee effects.
+
+    Observations are kept as (count, sum, sum of squares) per cell, so adding
+    or removing one is O(1). Fitting backfits each factor on the cells with
+    bincount; every effect is shrunk toward zero by ``shrinkage`` pseudo
+    observations, so small groups stay close to the global mean.
+    """
+
+    def __init__(self, prior: float, shrinkage: float, iterations: int = 4):
+        self.prior = prior
+        self.shrinkage = shrinkage
+        self.iterations = iterations
+        self.cells: Dict[CellKey, List[float]] = {}
+        self.count = 0
+        self.mean = prior
+        self.effects: Tuple[Dict[Any, float], ...] = ({}, {}, {})
+        self.variance = 0.0
+        self._dirty = False
+
+    def add(self, key: CellKey, value: float, weight: int = 1):
+        """Add (weight 1) or remove (weight -1) one observation"""
+        cell = self.cells.setdefault(key, [0.0, 0.0, 0.0])
+        cell[0] += weight
+        cell[1] += weight * value
+        cell[2] += weight * value * value
+        self.count += weight
+        if cell[0] <= 0:
+            del self.cells[key]
+        self._dirty = True
+
+    def fit(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        if not self.cells:
+            self.mean, self.effects, self.variance = self.prior, ({}, {}, {}), 0.0
+            return
+
+        keys = list(self.cells)
+        n, sums, squares = np.array(list(self.cells.values())).T
+        k = self.shrinkage
+        self.mean = (sums.sum() + k * self.prior) / (n.sum() + k)
+
+        factors = []
+        for position in range(3):
+            levels: Dict[Any, int] = {}
+            index = np.fromiter((levels.setdefault(key[position], len(levels)) for key in keys), dtype=np.intp, count=len(keys))
+            factors.append((levels, index, np.zeros(len(levels))))
+        fitted = np.full(len(keys), self.mean)
+        for _ in range(self.iterations):
+            for position, (levels, index, effect) in enumerate(factors):
+                others = fitted - effect[index]
+                effect = (np.bincount(index, weights=sums - n * others, minlength=len(levels))
+                          / (np.bincount(index, weights=n, minlength=len(levels)) + k))
+                factors[position] = (levels, index, effect)
+                fitted = others + effect[index]
+
+        self.effects = tuple(
+            {level: float(effect[i]) for level, i in levels.items()} for levels, _, effect in factors
+        )
+        residual = float((squares - 2 * fitted * sums + n * fitted ** 2).sum())
+        self.variance = min(MAX_LOG_VARIANCE, max(0.0, residual) / max(1.0, n.sum() - 1))
+
+    def predict(self, key: CellKey) -> float:
+        """Expected value on the original scale (lognormal mean) for a cell"""
+        self.fit()
+        log_value = self.mean + sum(effect.get(level, 0.0) for effect, level in zip(self.effects, key))
+        return math.exp(log_value + self.variance / 2)
+
+class EffortEstimator:
+    """Learns how long tasks take from completed tasks with actual hours.
+
+    Two shrinkage models are kept: the ratio actual/estimated (to correct
+    biased estimates) and actual hours (to fill missing estimates), each by
+    category, project and assignee. The training set is cached per process
+    and updated incrementally by TaskService; a cheap aggregate query
+    detects changes made by other workers and triggers a reload.
+    """
+
+    def __init__(self, default_hours: Optional[float] = None, shrinkage: Optional[float] = None):
+        self.default_hours = default_hours if default_hours is not None else float(os.getenv("EFFORT_DEFAULT_HOURS", "8"))
+        self.shrinkage = shrinkage if shrinkage is not None else float(os.getenv("EFFORT_SHRINKAGE", "5"))
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.bias = ShrinkageModel(prior=0.0, shrinkage=self.shrinkage)
+        self.size = ShrinkageModel(prior=math.log(self.default_hours), shrinkage=self.shrinkage)
+        self._tally = (0, 0.0, 0.0)
+
+    @staticmethod
+    def task_key(task: Task) -> CellKey:
+        return task.category or categorize_task(task.title), task.project_id, task.assignee_id
+
+    @staticmethod
+    def training_row(task: Task) -> Optional[TrainingRow]:
+        """The task as a training observation, if it is done with actual hours"""
+        if task.status != TaskStatus.DONE or not task.actual_hours or task.actual_hours <= 0:
+            return None
+        return TrainingRow(
+            key=EffortEstimator.task_key(task),
+            estimated_hours=float(task.estimated_hours) if task.estimated_hours and task.estimated_hours > 0 else None,
+            actual_hours=float(task.actual_hours)
+        )
+
+    @staticmethod
+    def signature(db: Session) -> Tuple[int, float, float]:
+        count, actual, estimated = db.query(
+            func.count(Task.id),
+            func.coalesce(func.sum(Task.actual_hours), 0),
+            func.coalesce(func.sum(case((Task.estimated_hours > 0, Task.estimated_hours), else_=0)), 0)
+        ).filter(Task.status == TaskStatus.DONE, Task.actual_hours > 0).one()
+        return int(count), float(actual), float(estimated)
+
+    def refresh(self, db: Session):
+        """Reload the training set if the database no longer matches it"""
+        signature = self.signature(db)
+        with self._lock:
+            if self._loaded and signature == self._tally:
+                return
+            rows = db.query(
+                Task.title, Task.category, Task.project_id, Task.assignee_id,
+                Task.estimated_hours, Task.actual_hours, Task.status
+            ).filter(Task.status == TaskStatus.DONE, Task.actual_hours > 0).all()
+            self._reset()
+            for row in rows:
+                self._apply(self.training_row(row), 1)
+            self._loaded = True
+
+    def observe(self, before: Optional[TrainingRow], after: Optional[TrainingRow]):
+        """Apply a task change (training rows before and after it; None when not training data)"""
+        if before == after:
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+            self._apply(before, -1)
+            self._apply(after, 1)
+
+    def _apply(self, row: Optional[TrainingRow], weight: int):
+        if row is None:
+            return
+        self.size.add(row.key, math.log(row.actual_hours), weight)
+        if row.estimated_hours is not None:
+            self.bias.add(row.key, math.log(row.actual_hours / row.estimated_hours), weight)
+        count, actual, estimated = self._tally
+        self._tally = (count + weight, actual + weight * row.actual_hours,
+                       estimated + weight * (row.estimated_hours or 0.0))
+
+    def estimate(self, task: Task) -> EffortEstimate:
+        with self._lock:
+            key = self.task_key(task)
+            if task.estimated_hours and task.estimated_hours > 0:
+                planned = float(task.estimated_hours)
+                factor = min(MAX_BIAS_FACTOR, max(MIN_BIAS_FACTOR, self.bias.predict(key)))
+                return EffortEstimate(planned, planned * factor, "estimate")
+            learned = self.size.predict(key)
+            return EffortEstimate(learned, learned, "learned")
+
+    def group_hours(self, key: CellKey, estimated_hours: float, unestimated_tasks: int) -> float:
+        """Expected hours of open tasks sharing a key: their estimates corrected, plus learned hours for the rest"""
+        with self._lock:
+            factor = min(MAX_BIAS_FACTOR, max(MIN_BIAS_FACTOR, self.bias.predict(key)))
+            return estimated_hours * factor + unestimated_tasks * self.size.predict(key)
+
+    def estimate_tasks(self, db: Session, tasks: Iterable[Task]) -> Dict[int, EffortEstimate]:
+        """Learned estimates for a batch of tasks, by task id"""
+        self.refresh(db)
+        with self._lock:
+            return {task.id: self.estimate(task) for task in tasks}
+
+    def estimate_title(self, db: Session, title: str, project_id: int) -> EffortEstimate:
+        """Learned estimate for an unassigned task not yet created"""
+        self.refresh(db)
+        with self._lock:
+            learned = self.size.predict((categorize_task(title), project_id, None))
+            return EffortEstimate(learned, learned, "learned")
+
+    def describe(self, project_id: int) -> Dict[str, Any]:
+        """Model summary for reports: training size and the learned bias factors"""
+        with self._lock:
+            self.bias.fit()
+            global_factor = math.exp(self.bias.mean + self.bias.variance / 2)
+            project_factor = math.exp(self.bias.mean + self.bias.effects[1].get(project_id, 0.0) + self.bias.variance / 2)
+            return {
+                "training_tasks": self.size.count,
+                "training_tasks_with_estimate": self.bias.count,
+                "bias_factor": round(min(MAX_BIAS_FACTOR, max(MIN_BIAS_FACTOR, global_factor)), 3),
+                "project_bias_factor": round(min(MAX_BIAS_FACTOR, max(MIN_BIAS_FACTOR, project_factor)), 3),
+                "typical_hours": round(self.size.predict(("", project_id, None)), 1)
+            }
+
+# One training cache per worker process
+effort_estimator = EffortEstimator()
@@ -0,0 +1,153 @@
+import os
+import re
+from typing import Any, Dict, Optional, Pattern
+import anyio
+import anyio.to_thread
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Endpoints that block on the LLM or run a full analysis; everything else
+# (projects, tasks, stored insights, auth) is interactive CRUD
+ANALYSIS_PATHS = re.compile(
+    r"^/api/v1/ai-insights/("
+    r"analyze-project/\d+(/stream)?"
+    r"|project/\d+/(risk-assessment|progress-prediction|team-performance|budget-forecast|analyze/\w+)"
+    r"|batch-analyze"
+    r")/?$"
+)
+
+class LaneFullError(Exception):
+    """Raised when a lane's queue is full or a request waited too long for a slot"""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"{lane} lane is saturated")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class ExecutionLane:
+    """Bounded lane for slow work: ``concurrency`` requests run, ``max_queue`` wait.
+
+    Waiting happens on the event loop, so queued requests hold no worker
+    thread. A request that finds the queue full, or waits longer than
+    ``queue_timeout`` seconds, is rejected with LaneFullError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int = 8,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0,
+        retry_after: int = 10
+    ):
+        self.name = name
+        self.limiter = anyio.CapacityLimiter(max(1, concurrency))
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @classmethod
+    def from_env(cls, name: str = "analysis") -> "ExecutionLane":
+        return cls(
+            name,
+            concurrency=int(os.getenv("AI_LANE_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("AI_LANE_MAX_QUEUE", "16")),
+            queue_timeout=float(os.getenv("AI_LANE_QUEUE_TIMEOUT_SECONDS", "30")),
+            retry_after=int(os.getenv("AI_LANE_RETRY_AFTER_SECONDS", "10"))
+        )
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.limiter.total_tokens)
+
+    async def acquire(self, borrower: object):
+        try:
+            self.limiter.acquire_on_behalf_of_nowait(borrower)
+            self._stats["admitted"] += 1
+            return
+        except anyio.WouldBlock:
+            pass
+
+        if self.limiter.statistics().tasks_waiting >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise LaneFullError(self.name, self.retry_after)
+
+        self._stats["queued"] += 1
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await self.limiter.acquire_on_behalf_of(borrower)
+        except TimeoutError:
+            self._stats["timed_out"] += 1
+            raise LaneFullError(self.name, self.retry_after)
+        self._stats["admitted"] += 1
+
+    def release(self, borrower: object):
+        self.limiter.release_on_behalf_of(borrower)
+
+    def get_stats(self) -> Dict[str, Any]:
+        statistics = self.limiter.statistics()
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "running": statistics.borrowed_tokens,
+            "waiting": statistics.tasks_waiting,
+            "max_queue": self.max_queue,
+            **self._stats
+        }
+
+class ExecutionLaneMiddleware:
+    """Sends analysis requests through ``lane``; other requests pass straight through.
+
+    The slot is held until the response is fully sent, so streamed analyses
+    count for their whole duration. Rejections are 503 with Retry-After.
+    """
+
+    def __init__(self, app: ASGIApp, lane: Optional["ExecutionLane"] = None, paths: Pattern = ANALYSIS_PATHS):
+        self.app = app
+        self.lane = lane or analysis_lane
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS" or not self.paths.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        borrower = object()
+        try:
+            await self.lane.acquire(borrower)
+        except LaneFullError as e:
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error": "El servicio de análisis está saturado, inténtelo de nuevo más tarde",
+                    "status_code": 503,
+                    "path": scope["path"]
+                },
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.lane.release(borrower)
+
+def reserve_crud_threads(lane: "ExecutionLane", crud_threads: Optional[int] = None) -> int:
+    """Size the sync-endpoint threadpool so CRUD always has ``crud_threads`` free.
+
+    Sync endpoints share one threadpool; the analysis lane can occupy at most
+    ``lane.concurrency`` of its threads, the rest are reserved for interactive
+    requests. Must run inside the event loop (startup).
+    """
+    if crud_threads is None:
+        crud_threads = int(os.getenv("CRUD_LANE_THREADS", "32"))
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = lane.concurrency + max(1, crud_threads)
+    return int(limiter.total_tokens)
+
+# One analysis lane per worker process
+analysis_lane = ExecutionLane.from_env()
@@ -0,0 +1,135 @@
+import hashlib
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from ..models.ai_insight import AIInsight
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+def _latest(values: List[Optional[datetime]]) -> Optional[datetime]:
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+class InsightDedupService:
+    """Stores each distinct insight once per project.
+
+    An insight is identified by a fingerprint of its type and normalized title,
+    description and recommendations. Saving an insight that already exists for
+    the project refreshes ``last_seen_at`` (and expiry, priority, confidence) on
+    the stored row instead of inserting a duplicate.
+    """
+
+    @staticmethod
+    def fingerprint(insight_type, title: str, description: str, recommendations: Optional[str]) -> str:
+        """Stable content hash; the project is the other half of the unique key"""
+        type_value = insight_type.value if hasattr(insight_type, "value") else str(insight_type)
+        content = "\x1f".join([type_value, _normalize(title), _normalize(description), _normalize(recommendations)])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def upsert(self, db: Session, insight: AIInsight, now: Optional[datetime] = None) -> AIInsight:
+        """Insert a new insight or refresh the identical one already stored"""
+        now = now or datetime.utcnow()
+        insight.fingerprint = self.fingerprint(
+            insight.insight_type, insight.title, insight.description, insight.recommendations
+        )
+
+        existing = self._find(db, insight.project_id, insight.fingerprint)
+        if existing:
+            return self._refresh(db, existing, insight, now)
+
+        insight.last_seen_at = now
+        db.add(insight)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent analysis stored the same insight first
+            db.rollback()
+            existing = self._find(db, insight.project_id, insight.fingerprint)
+            if not existing:
+                raise
+            return self._refresh(db, existing, insight, now)
+        db.refresh(insight)
+        return insight
+
+    def compact(self, db: Session, project_ids: Optional[List[int]] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Merge existing duplicate insights and fingerprint every row.
+
+        The oldest row of each group is kept; it inherits the latest
+        last_seen_at/expires_at and stays acknowledged if any copy was.
+        """
+        if project_ids is None:
+            project_ids = [row.project_id for row in db.query(AIInsight.project_id).distinct().all()]
+
+        stats = {"projects": 0, "groups": 0, "deleted": 0, "fingerprinted": 0}
+        for project_id in project_ids:
+            rows = db.query(AIInsight).filter(AIInsight.project_id == project_id).order_by(AIInsight.id).all()
+            groups: Dict[str, List[AIInsight]] = {}
+            for row in rows:
+                key = self.fingerprint(row.insight_type, row.title, row.description, row.recommendations)
+                groups.setdefault(key, []).append(row)
+
+            updates = []
+            for key, group in groups.items():
+                keeper, duplicates = group[0], group[1:]
+                if duplicates:
+                    stats["groups"] += 1
+                    stats["deleted"] += len(duplicates)
+                    keeper.last_seen_at = _latest([r.last_seen_at or r.created_at for r in group])
+                    keeper.expires_at = None if any(r.expires_at is None for r in group) else _latest([r.expires_at for r in group])
+                    acknowledged = next((r for r in group if r.is_acknowledged), None)
+                    if acknowledged and not keeper.is_acknowledged:
+                        keeper.is_acknowledged = True
+                        keeper.acknowledged_by = acknowledged.acknowledged_by
+                        keeper.acknowledged_at = acknowledged.acknowledged_at
+                    for duplicate in duplicates:
+                        db.delete(duplicate)
+                if keeper.fingerprint != key:
+                    updates.append((keeper, key))
+                if keeper.last_seen_at is None:
+                    keeper.last_seen_at = keeper.created_at
+
+            if dry_run:
+                db.rollback()
+            else:
+                # Delete duplicates before setting fingerprints so the unique
+                # index never sees two rows with the same key
+                db.flush()
+                for keeper, key in updates:
+                    keeper.fingerprint = key
+                db.commit()
+            stats["projects"] += 1
+            stats["fingerprinted"] += len(updates)
+
+        return stats
+
+    @staticmethod
+    def _find(db: Session, project_id: int, fingerprint: str) -> Optional[AIInsight]:
+        return db.query(AIInsight).filter(
+            AIInsight.project_id == project_id,
+            AIInsight.fingerprint == fingerprint
+        ).first()
+
+    @staticmethod
+    def _refresh(db: Session, existing: AIInsight, insight: AIInsight, now: datetime) -> AIInsight:
+        existing.last_seen_at = now
+        existing.priority = insight.priority or existing.priority
+        if insight.confidence_score is not None:
+            existing.confidence_score = insight.confidence_score
+        if insight.data_source:
+            existing.data_source = insight.data_source
+        if insight.expires_at is not None:
+            existing.expires_at = insight.expires_at
+        if insight.routing_tier:
+            existing.routing_tier = insight.routing_tier
+            existing.routing_model = insight.routing_model
+            existing.routing_reason = insight.routing_reason
+        db.commit()
+        db.refresh(existing)
+        return existing
@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from dotenv import load_dotenv
+from ..models.ai_insight import AIInsight, InsightType
+
+load_dotenv()
+
+# Days an insight stays visible after it is generated. Point-in-time alerts go
+# stale quickly; slower-moving analyses are kept longer. Override per type with
+# INSIGHT_TTL_DAYS_<TYPE> (e.g. INSIGHT_TTL_DAYS_DEADLINE_ALERT=2); 0 keeps the
+# insight forever.
+DEFAULT_TTL_DAYS = {
+    InsightType.RISK_ANALYSIS: 14,
+    InsightType.PROGRESS_PREDICTION: 7,
+    InsightType.RESOURCE_OPTIMIZATION: 30,
+    InsightType.DEADLINE_ALERT: 3,
+    InsightType.TEAM_PERFORMANCE: 14,
+    InsightType.BUDGET_FORECAST: 30
+}
+
+ARCHIVE_FIELDS = [
+    "id", "project_id", "insight_type", "priority", "title", "description",
+    "recommendations", "confidence_score", "data_source", "is_acknowledged",
+    "acknowledged_by", "acknowledged_at", "created_at", "expires_at"
+]
+
+def active_insight_filter(now: Optional[datetime] = None):
+    """Filter clause that excludes expired insights (rows without expiry never expire)"""
+    now = now or datetime.utcnow()
+    return or_(AIInsight.expires_at.is_(None), AIInsight.expires_at > now)
+
+class InsightRetentionService:
+    """Expiry and purge of AIInsight rows.
+
+    New insights get ``expires_at`` from a per-type TTL. Reads hide expired rows
+    straight away; the purge job deletes them later in small batches (so no
+    long-running DELETE holds locks), optionally archiving each batch to a
+    gzip-compressed NDJSON file first.
+    """
+
+    def __init__(self):
+        default_days = os.getenv("INSIGHT_TTL_DAYS")
+        self.ttl_days: Dict[InsightType, int] = {}
+        for insight_type, days in DEFAULT_TTL_DAYS.items():
+            value = os.getenv(f"INSIGHT_TTL_DAYS_{insight_type.name}", default_days)
+            self.ttl_days[insight_type] = int(value) if value is not None else days
+        self.batch_size = max(1, int(os.getenv("INSIGHT_PURGE_BATCH_SIZE", "500")))
+        self.archive_dir = os.getenv("INSIGHT_ARCHIVE_DIR") or None
+
+    def expiry_for(self, insight_type: InsightType, created_at: Optional[datetime] = None) -> Optional[datetime]:
+        """Expiry timestamp for an insight of this type, or None if it never expires"""
+        if isinstance(insight_type, str):
+            insight_type = InsightType(insight_type)
+        days = self.ttl_days.get(insight_type, 0)
+        if days <= 0:
+            return None
+        return (created_at or datetime.utcnow()) + timedelta(days=days)
+
+    def backfill_expiry(self, db: Session) -> int:
+        """Set expires_at on older rows created before TTLs existed"""
+        updated = 0
+        for insight_type in InsightType:
+            if self.ttl_days.get(insight_type, 0) <= 0:
+                continue
+            last_id = 0
+            while True:
+                rows = db.query(AIInsight.id, AIInsight.created_at).filter(
+                    AIInsight.insight_type == insight_type,
+                    AIInsight.expires_at.is_(None),
+                    AIInsight.id > last_id
+                ).order_by(AIInsight.id).limit(self.batch_size).all()
+                if not rows:
+                    break
+                db.bulk_update_mappings(AIInsight, [
+                    {"id": row.id, "expires_at": self.expiry_for(insight_type, _naive(row.created_at))}
+                    for row in rows
+                ])
+                db.commit()
+                updated += len(rows)
+                last_id = rows[-1].id
+        return updated
+
+    def purge_expired(
+        self,
+        db: Session,
+        now: Optional[datetime] = None,
+        archive_dir: Optional[str] = None,
+        max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Delete expired insights batch by batch, archiving them first if configured"""
+        now = now or datetime.utcnow()
+        archive_dir = archive_dir or self.archive_dir
+        archive_path = None
+        if archive_dir:
+            Path(archive_dir).mkdir(parents=True, exist_ok=True)
+            archive_path = Path(archive_dir) / f"ai_insights-{now.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            rows = db.query(AIInsight).filter(
+                AIInsight.expires_at.isnot(None),
+                AIInsight.expires_at <= now
+            ).order_by(AIInsight.expires_at, AIInsight.id).limit(self.batch_size).all()
+            if not rows:
+                break
+
+            # Archive before deleting: a crash in between only repeats a row in
+            # the archive, it never loses one
+            if archive_path:
+                self._archive(archive_path, rows)
+
+            ids = [row.id for row in rows]
+            db.expunge_all()
+            deleted += db.query(AIInsight).filter(AIInsight.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            batches += 1
+
+        return {
+            "deleted": deleted,
+            "batches": batches,
+            "archive_file": str(archive_path) if archive_path and deleted else None
+        }
+
+    def run(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Backfill missing expiries, then purge expired rows"""
+        backfilled = self.backfill_expiry(db)
+        result = self.purge_expired(db, now=now)
+        result["backfilled"] = backfilled
+        return result
+
+    @staticmethod
+    def _archive(path: Path, rows: List[AIInsight]):
+        with gzip.open(path, "at", encoding="utf-8") as archive:
+            for row in rows:
+                record = {}
+                for field in ARCHIVE_FIELDS:
+                    value = getattr(row, field)
+                    if isinstance(value, datetime):
+                        value = value.isoformat()
+                    elif hasattr(value, "value"):
+                        value = value.value
+                    record[field] = value
+                archive.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None) - value.utcoffset()
+    return value
@@ -0,0 +1,217 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from dotenv import load_dotenv
+from ..database import SessionLocal
+from ..models.project import Project, ProjectStatus
+from .ai_service import AIProjectAnalysisService
+from .analytics_service import ProjectAnalyticsService
+from .insight_retention_service import InsightRetentionService
+from .lock_service import LockService, make_owner_id
+
+load_dotenv()
+
+class InsightSweepScheduler:
+    """Periodically analyzes active projects so insights exist before anyone asks.
+
+    Every worker process runs the same loop, but a sweep only starts after the
+    ``insight_sweep`` lock row is acquired. The lease lasts one full interval and
+    is never released early, so across all workers (and the cron CLI) at most
+    one sweep runs per interval.
+    """
+
+    LOCK_NAME = "insight_sweep"
+
+    def __init__(self):
+        self.enabled = os.getenv("INSIGHT_SCHEDULER_ENABLED", "false").lower() == "true"
+        self.interval_seconds = float(os.getenv("AI_ANALYSIS_INTERVAL_HOURS", "24")) * 3600
+        self.poll_seconds = float(os.getenv("INSIGHT_SCHEDULER_POLL_SECONDS", "300"))
+        self.concurrency = max(1, int(os.getenv("INSIGHT_SWEEP_CONCURRENCY", "4")))
+        self.jitter_seconds = float(os.getenv("INSIGHT_SWEEP_JITTER_SECONDS", "30"))
+        self.time_budget_seconds = float(os.getenv("INSIGHT_SWEEP_TIME_BUDGET_SECONDS", "1800"))
+
+        self.owner = make_owner_id()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            "is_leader": False,
+            "running": False,
+            "sweeps_completed": 0,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_duration_seconds": None,
+            "projects_total": 0,
+            "projects_analyzed": 0,
+            "projects_failed": 0,
+            "projects_skipped": 0,
+            "insights_created": 0,
+            "analytics": None,
+            "retention": None,
+            "last_error": None
+        }
+
+    # Lifecycle
+
+    def start(self):
+        """Start the background loop (no-op when disabled or already running)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="insight-sweep", daemon=True)
+        self._thread.start()
+        print(f"⏱️ Insight scheduler started (interval {self.interval_seconds:.0f}s, concurrency {self.concurrency})")
+
+    def stop(self):
+        """Signal the loop to stop and wait briefly for it to exit"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        # Stagger workers that boot together so they don't race for the lock
+        self._stop_event.wait(random.uniform(0, self.jitter_seconds))
+        while not self._stop_event.is_set():
+            try:
+                self.run_if_leader()
+            except Exception as e:
+                self._set_metrics(last_error=str(e))
+                print(f"Error in insight scheduler: {e}")
+            self._stop_event.wait(self.poll_seconds + random.uniform(0, self.jitter_seconds))
+
+    # Sweeps
+
+    def run_if_leader(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Run a sweep if this process wins the lock for the current interval.
+
+        The lease is taken, never renewed: the leader polls again before it
+        expires without sweeping, and the first poll after expiry (from any
+        worker) starts the next interval's sweep.
+        """
+        if not force:
+            db = SessionLocal()
+            try:
+                acquired = LockService.try_acquire(db, self.LOCK_NAME, self.owner, self.interval_seconds)
+                holder = None if acquired else LockService.get_holder(db, self.LOCK_NAME)
+                is_leader = acquired or (holder is not None and holder.owner == self.owner)
+            finally:
+                db.close()
+            self._set_metrics(is_leader=is_leader)
+            if not acquired:
+                return None
+        return self.run_sweep()
+
+    def run_sweep(self) -> Dict[str, Any]:
+        """Analyze all active projects within the configured time budget"""
+        started = time.monotonic()
+        deadline = started + self.time_budget_seconds
+        project_ids = self._get_active_project_ids()
+
+        self._set_metrics(
+            running=True,
+            last_started_at=datetime.utcnow(),
+            projects_total=len(project_ids),
+            projects_analyzed=0,
+            projects_failed=0,
+            projects_skipped=0,
+            insights_created=0,
+            last_error=None
+        )
+
+        try:
+            self._run_analytics_pipeline()
+            self._run_retention()
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="insight-sweep") as executor:
+                list(executor.map(lambda pid: self._analyze_project(pid, deadline), project_ids))
+        finally:
+            self._set_metrics(
+                running=False,
+                last_finished_at=datetime.utcnow(),
+                last_duration_seconds=round(time.monotonic() - started, 2)
+            )
+            with self._metrics_lock:
+                self._metrics["sweeps_completed"] += 1
+
+        return self.get_metrics()
+
+    def _analyze_project(self, project_id: int, deadline: float):
+        # Spread the LLM calls out instead of firing all workers at once
+        jitter = random.uniform(0, self.jitter_seconds)
+        if time.monotonic() + jitter >= deadline or self._stop_event.wait(jitter):
+            self._increment("projects_skipped")
+            return
+
+        db = SessionLocal()
+        try:
+            insights = AIProjectAnalysisService().generate_ai_insights(project_id, db)
+            self._increment("projects_analyzed")
+            self._increment("insights_created", len(insights))
+        except Exception as e:
+            self._increment("projects_failed")
+            self._set_metrics(last_error=f"Project {project_id}: {e}")
+            print(f"Error sweeping project {project_id}: {e}")
+        finally:
+            db.close()
+
+    def _run_analytics_pipeline(self):
+        # Daily ProjectAnalytics snapshot; cheap set-based SQL, so it runs first
+        db = SessionLocal()
+        try:
+            self._set_metrics(analytics=ProjectAnalyticsService().run_pipeline(db))
+        except Exception as e:
+            db.rollback()
+            self._set_metrics(last_error=f"Analytics pipeline: {e}")
+            print(f"Error in analytics pipeline: {e}")
+        finally:
+            db.close()
+
+    def _run_retention(self):
+        # Purge expired insights before the sweep adds fresh ones
+        db = SessionLocal()
+        try:
+            self._set_metrics(retention=InsightRetentionService().run(db))
+        except Exception as e:
+            db.rollback()
+            self._set_metrics(last_error=f"Insight retention: {e}")
+            print(f"Error purging expired insights: {e}")
+        finally:
+            db.close()
+
+    def _get_active_project_ids(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            rows = db.query(Project.id).filter(Project.status == ProjectStatus.ACTIVE).all()
+            return [row.id for row in rows]
+        finally:
+            db.close()
+
+    # Metrics
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of scheduler state and progress of the last sweep"""
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot.update({
+            "enabled": self.enabled,
+            "owner": self.owner,
+            "interval_seconds": self.interval_seconds,
+            "concurrency": self.concurrency,
+            "time_budget_seconds": self.time_budget_seconds
+        })
+        return snapshot
+
+    def _set_metrics(self, **values):
+        with self._metrics_lock:
+            self._metrics.update(values)
+
+    def _increment(self, key: str, amount: int = 1):
+        with self._metrics_lock:
+            self._metrics[key] += amount
+
+# Shared instance started from the FastAPI startup hook
+insight_scheduler = InsightSweepScheduler()
@@ -0,0 +1,81 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from dotenv import load_dotenv
+from ..models.ai_insight import AIInsight
+from .cache_service import TTLCache
+from .project_service import ProjectService
+from .time_buckets import bucket_start
+
+load_dotenv()
+
+# Trends only change when new insights are generated, so per-user results are
+# cached for a while; the day is part of the key so windows roll over at midnight
+_trends_cache = TTLCache(
+    maxsize=int(os.getenv("INSIGHT_TRENDS_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("INSIGHT_TRENDS_CACHE_SECONDS", "600"))
+)
+
+class InsightService:
+    """Read-side queries over stored AI insights"""
+
+    def __init__(self):
+        self.project_service = ProjectService()
+
+    def get_trends(self, db: Session, user_id: int, days: int = 90, use_cache: bool = True) -> Dict[str, Any]:
+        """Weekly insight counts per type for the user's projects over the last N days"""
+        today = datetime.utcnow().date()
+        cache_key = (user_id, days, today)
+        if use_cache:
+            cached = _trends_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self._compute_trends(db, user_id, days)
+        _trends_cache.set(cache_key, result)
+        return result
+
+    def _compute_trends(self, db: Session, user_id: int, days: int) -> Dict[str, Any]:
+        since_date = datetime.utcnow() - timedelta(days=days)
+        week = bucket_start(AIInsight.created_at, "weekly", db.bind.dialect.name)
+
+        query = select(week, AIInsight.insight_type, func.count(AIInsight.id)).where(
+            AIInsight.created_at >= since_date
+        ).group_by(week, AIInsight.insight_type).order_by(week)
+
+        accessible_ids = self.project_service.get_accessible_project_ids_query(db, user_id)
+        if accessible_ids is not None:
+            query = query.where(AIInsight.project_id.in_(accessible_ids))
+
+        trends: Dict[str, Dict[str, int]] = {}
+        for week_start, insight_type, count in db.execute(query):
+            if isinstance(week_start, str):
+                week_start = datetime.fromisoformat(week_start)
+            # Buckets start on Monday: ISO year and week, so a week spanning New Year keeps one label
+            label = week_start.strftime("%G-W%V")
+            types = trends.setdefault(label, {})
+            type_key = insight_type.value if hasattr(insight_type, "value") else insight_type
+            types[type_key] = types.get(type_key, 0) + count
+
+        trend_list = [
+            {"week": label, "insights_by_type": types, "total": sum(types.values())}
+            for label, types in sorted(trends.items())
+        ]
+        if not trend_list:
+            return {"trends": [], "summary": {}}
+
+        total_insights = sum(item["total"] for item in trend_list)
+        return {
+            "trends": trend_list,
+            "summary": {
+                "total_insights": total_insights,
+                "period_days": days,
+                "avg_per_week": total_insights / len(trend_list)
+            }
+        }
+
+    @staticmethod
+    def clear_trends_cache():
+        _trends_cache.clear()
@@ -0,0 +1,158 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from ..models.llm_usage import LLMUsage
+from ..models.project import Project
+from ..models.user import User
+from .time_buckets import bucket_start
+
+USAGE_GROUPS = ("project", "user", "day", "model", "analysis")
+PERCENTILES = (0.5, 0.95, 0.99)
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class LLMUsageService:
+    """Aggregates the LLM usage ledger for capacity planning.
+
+    Counts and token sums are one GROUP BY query. Latency percentiles use
+    percentile_cont on PostgreSQL; other databases stream the group's
+    latencies in order and pick them in Python.
+    """
+
+    def summarize(
+        self,
+        db: Session,
+        group_by: str = "day",
+        days: int = 30,
+        project_ids: Optional[List[int]] = None,
+        user_id: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        if group_by not in USAGE_GROUPS:
+            raise ValueError(f"Unsupported usage grouping: {group_by}")
+        now = now or datetime.utcnow()
+        start = now - timedelta(days=days)
+        dialect = db.bind.dialect.name
+        key = self._group_key(group_by, dialect)
+
+        filters = [LLMUsage.created_at >= start]
+        if project_ids is not None:
+            filters.append(LLMUsage.project_id.in_(project_ids))
+        if user_id is not None:
+            filters.append(LLMUsage.user_id == user_id)
+
+        not_success = LLMUsage.outcome != "success"
+        columns = [
+            key.label("key"),
+            func.count(LLMUsage.id).label("calls"),
+            func.sum(case((not_success, 1), else_=0)).label("failed"),
+            func.sum(case((LLMUsage.outcome == "rejected", 1), else_=0)).label("rejected"),
+            func.coalesce(func.sum(LLMUsage.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMUsage.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(LLMUsage.cached_tokens), 0).label("cached_tokens"),
+            func.sum(case((LLMUsage.cache_hit.is_(True), 1), else_=0)).label("cache_hits"),
+            func.avg(case((LLMUsage.outcome != "rejected", LLMUsage.latency_ms), else_=None)).label("avg_latency")
+        ]
+        if dialect == "postgresql":
+            columns += [
+                func.percentile_cont(fraction).within_group(LLMUsage.latency_ms).filter(
+                    LLMUsage.outcome != "rejected"
+                ).label(f"p{int(fraction * 100)}")
+                for fraction in PERCENTILES
+            ]
+        rows = db.query(*columns).filter(*filters).group_by(key).all()
+        percentiles = {} if dialect == "postgresql" else self._python_percentiles(db, key, filters)
+        labels = self._labels(db, group_by, [row.key for row in rows])
+
+        groups = []
+        for row in rows:
+            group_key = row.key
+            if dialect == "postgresql":
+                latency = {f"p{int(f * 100)}": getattr(row, f"p{int(f * 100)}") for f in PERCENTILES}
+            else:
+                latency = percentiles.get(group_key, {f"p{int(f * 100)}": None for f in PERCENTILES})
+            groups.append({
+                "key": group_key,
+                "label": labels.get(group_key),
+                "calls": row.calls,
+                "failed": int(row.failed or 0),
+                "rejected": int(row.rejected or 0),
+                "prompt_tokens": int(row.prompt_tokens),
+                "completion_tokens": int(row.completion_tokens),
+                "total_tokens": int(row.prompt_tokens) + int(row.completion_tokens),
+                "cached_tokens": int(row.cached_tokens),
+                "cache_hit_rate": round(int(row.cache_hits or 0) / row.calls, 3) if row.calls else 0.0,
+                "latency_ms": {
+                    "avg": round(row.avg_latency, 1) if row.avg_latency is not None else None,
+                    **{name: round(value, 1) if value is not None else None for name, value in latency.items()}
+                }
+            })
+
+        if group_by == "day":
+            groups.sort(key=lambda g: str(g["key"]))
+        else:
+            groups.sort(key=lambda g: -g["total_tokens"])
+
+        return {
+            "group_by": group_by,
+            "start": start,
+            "end": now,
+            "totals": {
+                "calls": sum(g["calls"] for g in groups),
+                "failed": sum(g["failed"] for g in groups),
+                "prompt_tokens": sum(g["prompt_tokens"] for g in groups),
+                "completion_tokens": sum(g["completion_tokens"] for g in groups),
+                "total_tokens": sum(g["total_tokens"] for g in groups)
+            },
+            "groups": groups
+        }
+
+    @staticmethod
+    def _group_key(group_by: str, dialect: str):
+        if group_by == "project":
+            return LLMUsage.project_id
+        if group_by == "user":
+            return LLMUsage.user_id
+        if group_by == "model":
+            return LLMUsage.model
+        if group_by == "analysis":
+            return LLMUsage.analysis
+        return bucket_start(LLMUsage.created_at, "daily", dialect)
+
+    @staticmethod
+    def _python_percentiles(db: Session, key, filters) -> Dict[Any, Dict[str, float]]:
+        # One ordered scan of (group, latency); only the current group is held
+        query = db.query(key.label("key"), LLMUsage.latency_ms).filter(
+            *filters, LLMUsage.outcome != "rejected"
+        ).order_by(key, LLMUsage.latency_ms)
+
+        results = {}
+        current_key, values = object(), []
+
+        def close_group():
+            if values:
+                results[current_key] = {f"p{int(f * 100)}": _percentile(values, f) for f in PERCENTILES}
+
+        for row in query.yield_per(1000):
+            if row.key != current_key:
+                close_group()
+                current_key, values = row.key, []
+            values.append(row.latency_ms)
+        close_group()
+        return results
+
+    @staticmethod
+    def _labels(db: Session, group_by: str, keys: List[Any]) -> Dict[Any, str]:
+        ids = [key for key in keys if key is not None]
+        if group_by == "project" and ids:
+            return {row.id: row.name for row in db.query(Project.id, Project.name).filter(Project.id.in_(ids))}
+        if group_by == "user" and ids:
+            return {row.id: row.email for row in db.query(User.id, User.email).filter(User.id.in_(ids))}
+        return {}
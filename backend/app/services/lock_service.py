@@ -0,0 +1,95 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from ..models.lock import DistributedLock
+
+def make_owner_id() -> str:
+    """Build a lock owner id that is unique per process instance"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class LockService:
+    """Lease-based locks stored as rows in the database.
+
+    A lock is a row keyed by name. Acquiring it either inserts the row or takes
+    over a row whose lease has expired, so a crashed holder never blocks others
+    for longer than its lease.
+    """
+
+    @staticmethod
+    def acquire(db: Session, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Try to acquire (or renew) the lock; returns True if owner now holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        # Take over an expired lease or renew our own in a single UPDATE
+        updated = db.query(DistributedLock).filter(
+            DistributedLock.name == name,
+            or_(DistributedLock.expires_at < now, DistributedLock.owner == owner)
+        ).update(
+            {"owner": owner, "acquired_at": now, "expires_at": expires_at},
+            synchronize_session=False
+        )
+        db.commit()
+        if updated:
+            return True
+
+        # No row matched: either it does not exist yet or someone else holds it
+        try:
+            db.add(DistributedLock(name=name, owner=owner, acquired_at=now, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    @staticmethod
+    def try_acquire(db: Session, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take the lock only if it is free or its lease has expired; never renews.
+
+        A holder calling again before expiry gets False, which makes the lease a
+        once-per-period token rather than a renewable lock.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+
+        updated = db.query(DistributedLock).filter(
+            DistributedLock.name == name,
+            DistributedLock.expires_at < now
+        ).update(
+            {"owner": owner, "acquired_at": now, "expires_at": expires_at},
+            synchronize_session=False
+        )
+        db.commit()
+        if updated:
+            return True
+
+        try:
+            db.add(DistributedLock(name=name, owner=owner, acquired_at=now, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+            return False
+
+    @staticmethod
+    def release(db: Session, name: str, owner: str) -> bool:
+        """Release the lock if it is held by owner"""
+        deleted = db.query(DistributedLock).filter(
+            DistributedLock.name == name,
+            DistributedLock.owner == owner
+        ).delete(synchronize_session=False)
+        db.commit()
+        return bool(deleted)
+
+    @staticmethod
+    def get_holder(db: Session, name: str) -> Optional[DistributedLock]:
+        """Return the current, unexpired lock row for name, if any"""
+        return db.query(DistributedLock).filter(
+            DistributedLock.name == name,
+            DistributedLock.expires_at >= datetime.utcnow()
+        ).first()
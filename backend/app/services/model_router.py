@@ -0,0 +1,121 @@
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func
+from dotenv import load_dotenv
+from ..models.ai_insight import AIInsight, InsightType
+from ..models.task import Task
+
+load_dotenv()
+
+# Analyses whose LLM output adds narrative the rule-based engine cannot write
+NARRATIVE_ANALYSES = {
+    "risk": InsightType.RISK_ANALYSIS,
+    "progress": InsightType.PROGRESS_PREDICTION
+}
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """Model chosen for one analysis; tier is "none", "fast" or "strong"."""
+    tier: str
+    model: Optional[str]
+    reason: str
+    task_count: int
+    changed_tasks: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ModelRouter:
+    """Chooses no model, the fast model or the strong model for an analysis.
+
+    Inputs are the project's task count, how many tasks changed since the
+    last insight of the same type (the data-version delta) and whether the
+    analysis needs narrative at all:
+
+    - no narrative needed, fewer than ``local_max_tasks`` tasks or the
+      provider unavailable: no model, the rule-based engine answers
+    - at least ``strong_min_tasks`` tasks and ``strong_min_changes`` changed
+      tasks: the strong model
+    - anything else: the fast model (a big project with few changes only
+      gets a cheap refresh)
+    """
+
+    NONE = "none"
+    FAST = "fast"
+    STRONG = "strong"
+
+    def __init__(
+        self,
+        fast_model: str,
+        strong_model: str,
+        local_max_tasks: int = 10,
+        strong_min_tasks: int = 200,
+        strong_min_changes: int = 25
+    ):
+        self.fast_model = fast_model
+        self.strong_model = strong_model
+        self.local_max_tasks = local_max_tasks
+        self.strong_min_tasks = strong_min_tasks
+        self.strong_min_changes = strong_min_changes
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        default_model = os.getenv("DEEPSEEK_MODEL", "deepseek/deepseek-chat:free")
+        return cls(
+            fast_model=os.getenv("DEEPSEEK_FAST_MODEL", default_model),
+            strong_model=os.getenv("DEEPSEEK_STRONG_MODEL", default_model),
+            local_max_tasks=int(os.getenv("MODEL_ROUTING_LOCAL_MAX_TASKS", "10")),
+            strong_min_tasks=int(os.getenv("MODEL_ROUTING_STRONG_MIN_TASKS", "200")),
+            strong_min_changes=int(os.getenv("MODEL_ROUTING_STRONG_MIN_CHANGES", "25"))
+        )
+
+    def decide(self, analysis: str, task_count: int, changed_tasks: int, llm_available: bool = True) -> RoutingDecision:
+        """Pure routing rule, see the class docstring"""
+        def decision(tier: str, reason: str) -> RoutingDecision:
+            model = {self.FAST: self.fast_model, self.STRONG: self.strong_model}.get(tier)
+            return RoutingDecision(tier, model, reason, task_count, changed_tasks)
+
+        if analysis not in NARRATIVE_ANALYSES:
+            return decision(self.NONE, "análisis sin narrativa")
+        if task_count < self.local_max_tasks:
+            return decision(self.NONE, f"proyecto pequeño ({task_count} tareas)")
+        if not llm_available:
+            return decision(self.NONE, "proveedor LLM no disponible")
+        if task_count >= self.strong_min_tasks:
+            if changed_tasks >= self.strong_min_changes:
+                return decision(self.STRONG, f"proyecto complejo ({task_count} tareas, {changed_tasks} cambiadas)")
+            return decision(self.FAST, f"pocos cambios desde el último análisis ({changed_tasks} tareas)")
+        return decision(self.FAST, f"proyecto mediano ({task_count} tareas)")
+
+    def route(self, db: Session, project_id: int, analysis: str, llm_available: bool = True) -> RoutingDecision:
+        """Decide for a stored project (two aggregate queries)"""
+        task_count, changed_tasks = self.project_delta(db, project_id, NARRATIVE_ANALYSES.get(analysis))
+        return self.decide(analysis, task_count, changed_tasks, llm_available)
+
+    @staticmethod
+    def project_delta(db: Session, project_id: int, insight_type: Optional[InsightType]) -> Tuple[int, int]:
+        """(task count, tasks changed since the last insight of this type)"""
+        last_analysis: Optional[datetime] = None
+        if insight_type is not None:
+            last_analysis = db.query(
+                func.max(func.coalesce(AIInsight.last_seen_at, AIInsight.created_at))
+            ).filter(
+                AIInsight.project_id == project_id,
+                AIInsight.insight_type == insight_type
+            ).scalar()
+
+        changed = func.count(Task.id)
+        if last_analysis is not None:
+            changed = func.sum(case(
+                (func.coalesce(Task.updated_at, Task.created_at) > last_analysis, 1), else_=0
+            ))
+        task_count, changed_tasks = db.query(func.count(Task.id), changed).filter(
+            Task.project_id == project_id
+        ).one()
+        return int(task_count or 0), int(changed_tasks or 0)
+
+# Thresholds and models are read once per worker
+model_router = ModelRouter.from_env()
@@ -1,9 +1,9 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, select
 from datetime import datetime, timedelta
 from ..models.project import Project, ProjectMember, ProjectCreate, ProjectUpdate, ProjectStatus, ProjectPriority
-from ..models.task import Task, TaskStatus
+from ..models.task import Task, TaskDependency, TaskStatus
 from ..models.user import User
 from ..models.ai_insight import AIInsight, ProjectAnalytics
 from .ai_service import AIProjectAnalysisService
@@ -150,6 +150,8 @@ class ProjectService:
                 detail="Only project owner can delete the project"
             )
         
+        # Dependency edges are not covered by the ORM cascade on tasks
+        db.query(TaskDependency).filter(TaskDependency.project_id == project_id).delete(synchronize_session=False)
         db.delete(project)
         db.commit()
         return True
@@ -322,6 +324,16 @@ class ProjectService:
             "ai_insights": ai_insights
         }
     
+    def get_accessible_project_ids_query(self, db: Session, user_id: int):
+        """Select of project ids the user can access, or None for admins (all projects)"""
+        user = db.query(User).filter(User.id == user_id).first()
+        if user and user.is_admin:
+            return None
+        
+        return select(ProjectMember.project_id).where(ProjectMember.user_id == user_id).union(
+            select(Project.id).where(Project.owner_id == user_id)
+        )
+    
     def user_has_project_access(self, db: Session, project_id: int, user_id: int) -> bool:
         """Check if user has access to a project"""
         # Check if user is admin (admins have access to all projects)
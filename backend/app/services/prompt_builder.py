@@ -0,0 +1,295 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Identical on every call so providers can reuse the cached prefix; anything
+# analysis-specific goes in the user message after it.
+SHARED_SYSTEM_PROMPT = (
+    "Eres un analista experto en gestión de proyectos. "
+    "Recibes una tarea, un esquema JSON y datos del proyecto en JSON compacto. "
+    "Las métricas ya están calculadas: no las recalcules ni inventes datos. "
+    "Responde SOLO con un objeto JSON que cumpla el esquema, en español, "
+    "con frases breves y accionables."
+)
+
+# Streamed narratives are plain text so the client can render tokens as they
+# arrive; one item per line keeps them easy to split afterwards
+TEXT_SYSTEM_PROMPT = (
+    "Eres un analista experto en gestión de proyectos. "
+    "Recibes métricas ya calculadas en JSON compacto: no las recalcules ni inventes datos. "
+    "Responde en español, en texto plano sin markdown, con una frase breve y accionable por línea."
+)
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+# Rough size of a token for Spanish/JSON text; only used to keep prompts
+# under their input budget, not for billing
+CHARS_PER_TOKEN = 4
+
+class PromptValidationError(ValueError):
+    """Raised when an LLM response does not match the expected schema"""
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Expected type of a response field.
+
+    kind is one of "number", "int", "str", "enum", "str_list" or "object_list";
+    numbers are clamped to [minimum, maximum] when given.
+    """
+    kind: str
+    hint: str = ""
+    required: bool = True
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Tuple[str, ...] = ()
+    min_items: int = 0
+    max_items: int = 8
+
+@dataclass(frozen=True)
+class PromptSpec:
+    name: str
+    task: str
+    fields: Dict[str, FieldSpec]
+    max_output_tokens: int
+    max_input_tokens: int = 600
+
+def _spec(name: str, task: str, output_tokens: int, fields: Dict[str, FieldSpec]) -> PromptSpec:
+    # Per-analysis output budget, overridable with DEEPSEEK_MAX_TOKENS_<NAME>
+    budget = int(os.getenv(f"DEEPSEEK_MAX_TOKENS_{name.upper()}", str(output_tokens)))
+    return PromptSpec(name=name, task=task, fields=fields, max_output_tokens=budget)
+
+PROMPT_SPECS: Dict[str, PromptSpec] = {
+    "risk": _spec("risk", "Evalúa los riesgos del proyecto.", 600, {
+        "overall_risk_score": FieldSpec("number", "0-1", minimum=0.0, maximum=1.0),
+        "risk_level": FieldSpec("enum", choices=("Bajo", "Medio", "Alto")),
+        "risk_factors": FieldSpec("object_list", '{"factor","severity":"low|medium|high","description","impact":0-1}', max_items=5),
+        "recommendations": FieldSpec("str_list", min_items=1, max_items=5),
+        "critical_issues": FieldSpec("str_list", required=False, max_items=5),
+        "mitigation_strategies": FieldSpec("str_list", required=False, max_items=5)
+    }),
+    "progress": _spec("progress", "Predice cuántos días faltan para terminar el proyecto.", 400, {
+        "estimated_days_remaining": FieldSpec("int", "días", minimum=0, maximum=3650),
+        "confidence_level": FieldSpec("number", "0-1", minimum=0.0, maximum=1.0),
+        "factors_affecting_timeline": FieldSpec("str_list", max_items=5),
+        "recommended_actions": FieldSpec("str_list", required=False, max_items=5),
+        "bottleneck_analysis": FieldSpec("str_list", required=False, max_items=5),
+        "resource_requirements": FieldSpec("str_list", required=False, max_items=5)
+    }),
+    "narrative": _spec("narrative", "Redacta el texto para métricas ya calculadas.", 300, {}),
+    # Batched: budgets are per project, the prompt carries one section per id
+    "portfolio": _spec("portfolio", "Evalúa los riesgos de cada proyecto por separado.", 150, {
+        "overall_risk_score": FieldSpec("number", "0-1", minimum=0.0, maximum=1.0),
+        "risk_level": FieldSpec("enum", choices=("Bajo", "Medio", "Alto")),
+        "recommendations": FieldSpec("str_list", min_items=1, max_items=3),
+        "critical_issues": FieldSpec("str_list", required=False, max_items=3)
+    })
+}
+
+# Per-project input budget of batched prompts
+BATCH_INPUT_TOKENS_PER_ITEM = 80
+
+class PromptBuilder:
+    """Builds compact, deterministic prompts and validates JSON responses.
+
+    Facts are serialized as sorted, whitespace-free JSON and trimmed to the
+    spec's input budget, so the same project state always yields the same
+    prompt. The system prompt is shared by every analysis.
+    """
+
+    def get_spec(self, analysis: str, fields: Optional[Dict[str, FieldSpec]] = None) -> PromptSpec:
+        spec = PROMPT_SPECS.get(analysis)
+        if not spec:
+            raise ValueError(f"Unknown prompt analysis: {analysis}")
+        if fields is not None:
+            spec = PromptSpec(spec.name, spec.task, fields, spec.max_output_tokens, spec.max_input_tokens)
+        return spec
+
+    def build(self, spec: PromptSpec, facts: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Chat messages for an analysis: shared system prompt + compact user message"""
+        schema = self._schema_text(spec)
+        header = f"Tarea: {spec.task}\nEsquema: {schema}\nDatos: "
+        budget_chars = max(0, spec.max_input_tokens * CHARS_PER_TOKEN - len(header))
+        return [
+            {"role": "system", "content": SHARED_SYSTEM_PROMPT},
+            {"role": "user", "content": header + self._compact_facts(facts, budget_chars)}
+        ]
+
+    def build_text(self, spec: PromptSpec, facts: Dict[str, Any], instructions: str, max_items: int = 5) -> List[Dict[str, str]]:
+        """Chat messages for a streamed plain-text answer of up to max_items lines"""
+        header = f"Tarea: {spec.task}\nEscribe como máximo {max_items} líneas: {instructions}.\nDatos: "
+        budget_chars = max(0, spec.max_input_tokens * CHARS_PER_TOKEN - len(header))
+        return [
+            {"role": "system", "content": TEXT_SYSTEM_PROMPT},
+            {"role": "user", "content": header + self._compact_facts(facts, budget_chars)}
+        ]
+
+    @staticmethod
+    def parse_lines(text: str, max_items: int = 5) -> List[str]:
+        """Split a plain-text answer into items, dropping list markers and blank lines"""
+        items = [_LIST_MARKER.sub("", line).strip() for line in (text or "").splitlines()]
+        return [item for item in items if item][:max_items]
+
+    def build_batch(self, spec: PromptSpec, facts_by_key: Dict[Any, Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Chat messages for one analysis over many items, answered as {key: section}.
+
+        Each item's facts are trimmed to their own share of the input budget,
+        so one large project cannot crowd the others out of the prompt.
+        """
+        schema = self._schema_text(spec)
+        header = (
+            f"Tarea: {spec.task}\n"
+            f"Responde un objeto con una clave por id y, en cada una, el esquema.\n"
+            f"Esquema: {schema}\nDatos: "
+        )
+        sections = [
+            f"{json.dumps(str(key))}:{self._compact_facts(facts_by_key[key], BATCH_INPUT_TOKENS_PER_ITEM * CHARS_PER_TOKEN)}"
+            for key in sorted(facts_by_key, key=str)
+        ]
+        return [
+            {"role": "system", "content": SHARED_SYSTEM_PROMPT},
+            {"role": "user", "content": header + "{" + ",".join(sections) + "}"}
+        ]
+
+    def validate_batch(self, spec: PromptSpec, raw: str, keys: List[Any]) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, str]]:
+        """Validate a batched response section by section.
+
+        Returns (valid sections, errors) keyed like ``keys``; a malformed
+        section only fails its own key. Raises PromptValidationError when the
+        response as a whole cannot be parsed.
+        """
+        data = self._parse_json(raw)
+        wanted = {str(key) for key in keys}
+        # Some models nest the answer under a single wrapper key
+        if len(data) == 1 and not wanted & set(data) and isinstance(next(iter(data.values())), dict):
+            data = next(iter(data.values()))
+
+        results, errors = {}, {}
+        for key in keys:
+            section = data.get(str(key))
+            if not isinstance(section, dict):
+                errors[key] = "Missing section"
+                continue
+            try:
+                results[key] = self._validate_fields(spec, section)
+            except PromptValidationError as e:
+                errors[key] = str(e)
+        return results, errors
+
+    def validate(self, spec: PromptSpec, raw: str) -> Dict[str, Any]:
+        """Parse a response and coerce it to the spec; raises PromptValidationError"""
+        return self._validate_fields(spec, self._parse_json(raw))
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+
+    # Internals
+
+    @classmethod
+    def _validate_fields(cls, spec: PromptSpec, data: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for name, field_spec in spec.fields.items():
+            if data.get(name) is None or data[name] == "":
+                if field_spec.required:
+                    raise PromptValidationError(f"Missing field '{name}'")
+                result[name] = [] if field_spec.kind.endswith("_list") else None
+                continue
+            result[name] = cls._coerce(name, data[name], field_spec)
+        return result
+
+    @staticmethod
+    def _schema_text(spec: PromptSpec) -> str:
+        parts = []
+        for name, field_spec in spec.fields.items():
+            if field_spec.kind == "enum":
+                description = "|".join(field_spec.choices)
+            elif field_spec.kind == "str_list":
+                description = f"[{field_spec.hint or 'texto'}] max {field_spec.max_items}"
+            elif field_spec.kind == "object_list":
+                description = f"[{field_spec.hint}] max {field_spec.max_items}"
+            else:
+                description = f"{field_spec.kind} {field_spec.hint}".strip()
+            if not field_spec.required:
+                description += " (opcional)"
+            parts.append(f'"{name}":"{description}"')
+        return "{" + ",".join(parts) + "}"
+
+    @classmethod
+    def _compact_facts(cls, facts: Dict[str, Any], budget_chars: int) -> str:
+        def dump(value):
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+
+        text = dump(facts)
+        if len(text) <= budget_chars:
+            return text
+
+        # Over budget: shorten the longest lists first, then cut long strings
+        trimmed = json.loads(text)
+        lists = sorted((k for k, v in trimmed.items() if isinstance(v, list)), key=lambda k: -len(dump(trimmed[k])))
+        for key in lists:
+            while len(trimmed[key]) > 1 and len(dump(trimmed)) > budget_chars:
+                trimmed[key] = trimmed[key][:len(trimmed[key]) // 2]
+        for key, value in trimmed.items():
+            if isinstance(value, str) and len(value) > 200 and len(dump(trimmed)) > budget_chars:
+                trimmed[key] = value[:200] + "…"
+        return dump(trimmed)
+
+    @staticmethod
+    def _parse_json(raw: str) -> Dict[str, Any]:
+        if not raw:
+            raise PromptValidationError("Empty response")
+        text = raw.strip()
+        # Some models still wrap JSON in markdown fences or add prose around it
+        fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+        if fenced:
+            text = fenced.group(1).strip()
+        if not text.startswith("{"):
+            start, end = text.find("{"), text.rfind("}")
+            if start == -1 or end <= start:
+                raise PromptValidationError("No JSON object in response")
+            text = text[start:end + 1]
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise PromptValidationError(f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise PromptValidationError("Response is not a JSON object")
+        return data
+
+    @staticmethod
+    def _coerce(name: str, value: Any, spec: FieldSpec) -> Any:
+        try:
+            if spec.kind in ("number", "int"):
+                number = float(value)
+                if spec.minimum is not None:
+                    number = max(spec.minimum, number)
+                if spec.maximum is not None:
+                    number = min(spec.maximum, number)
+                return int(round(number)) if spec.kind == "int" else number
+            if spec.kind == "str":
+                return str(value)
+            if spec.kind == "enum":
+                for choice in spec.choices:
+                    if str(value).strip().lower() == choice.lower():
+                        return choice
+                raise PromptValidationError(f"Field '{name}' must be one of {spec.choices}")
+            if spec.kind in ("str_list", "object_list"):
+                items = value if isinstance(value, list) else [value]
+                if len(items) < spec.min_items:
+                    raise PromptValidationError(f"Field '{name}' needs at least {spec.min_items} item(s)")
+                if spec.kind == "object_list":
+                    if not all(isinstance(item, dict) for item in items):
+                        raise PromptValidationError(f"Field '{name}' must be a list of objects")
+                    return items[:spec.max_items]
+                return [str(item) if not isinstance(item, dict) else "; ".join(str(v) for v in item.values())
+                        for item in items][:spec.max_items]
+        except (TypeError, ValueError) as e:
+            if isinstance(e, PromptValidationError):
+                raise
+            raise PromptValidationError(f"Field '{name}' has an invalid value: {e}")
+        raise PromptValidationError(f"Unknown field kind: {spec.kind}")
@@ -0,0 +1,92 @@
+import os
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..models.task import Task
+from .task_similarity import SimilarityIndex
+
+load_dotenv()
+
+# Rows fetched per round trip when the index is built
+LOAD_BATCH_SIZE = 5000
+
+class SimilarTaskService:
+    """Per-process similarity index over the title and description of every task.
+
+    The index is built on first use. Before each query a cheap signature
+    (task count, highest id and latest change) is compared with the one
+    last seen: tasks inserted or changed since then by other workers are
+    re-indexed, and deleted ones are dropped when the count no longer
+    matches. Saves reported by TaskService update the index in place.
+    """
+
+    def __init__(self, index: Optional[SimilarityIndex] = None):
+        self.index = index or SimilarityIndex(
+            n_features=int(os.getenv("TASK_SIMILARITY_FEATURES", str(1 << 20))),
+            max_df=float(os.getenv("TASK_SIMILARITY_MAX_DF", "0.1"))
+        )
+        self.duplicate_threshold = float(os.getenv("TASK_DUPLICATE_THRESHOLD", "0.8"))
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._signature: Tuple[int, int, Any] = (0, 0, None)
+
+    @staticmethod
+    def signature(db: Session) -> Tuple[int, int, Any]:
+        count, last_id, latest = db.query(
+            func.count(Task.id),
+            func.coalesce(func.max(Task.id), 0),
+            func.max(func.coalesce(Task.updated_at, Task.created_at))
+        ).one()
+        return int(count), int(last_id), latest
+
+    def refresh(self, db: Session):
+        """Build the index, or catch up with changes made outside this process"""
+        signature = self.signature(db)
+        with self._lock:
+            if self._loaded and signature == self._signature:
+                return
+            changed = func.coalesce(Task.updated_at, Task.created_at)
+            rows = db.query(Task.id, Task.project_id, Task.title, Task.description)
+            if not self._loaded:
+                self.index.load(rows.yield_per(LOAD_BATCH_SIZE))
+                self._loaded = True
+            else:
+                _, last_id, latest = self._signature
+                # New rows by id: server-side creation times may not compare with update times
+                rows = rows.filter(or_(Task.id > last_id, changed >= latest) if latest is not None else Task.id > last_id)
+                for task_id, project_id, title, description in rows:
+                    self.index.upsert(task_id, project_id, title, description)
+                if len(self.index) != signature[0]:
+                    existing = {task_id for task_id, in db.query(Task.id)}
+                    for task_id in [task_id for task_id in self.index.task_ids() if task_id not in existing]:
+                        self.index.remove(task_id)
+            self._signature = signature
+
+    def task_saved(self, task: Task):
+        """Index a created or updated task (call after commit/refresh)"""
+        with self._lock:
+            if self._loaded:
+                self.index.upsert(task.id, task.project_id, task.title, task.description)
+
+    def task_deleted(self, task_id: int):
+        with self._lock:
+            if self._loaded:
+                self.index.remove(task_id)
+
+    def similar(
+        self,
+        db: Session,
+        title: Optional[str],
+        description: Optional[str] = None,
+        limit: int = 10,
+        project_ids: Optional[Sequence[int]] = None,
+        exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """(task id, cosine similarity) of the tasks most similar to a text"""
+        self.refresh(db)
+        return self.index.query(title, description, limit, project_ids, exclude)
+
+# One index per worker process
+similar_task_service = SimilarTaskService()
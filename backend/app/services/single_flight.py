@@ -0,0 +1,257 @@
+import copy
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from dotenv import load_dotenv
+from ..database import SessionLocal
+from ..models.project import Project
+from ..models.task import Task
+from .lock_service import LockService, make_owner_id
+
+load_dotenv()
+
+def project_data_version(db: Session, project_id: int) -> str:
+    """Short hash that changes whenever the project or any of its tasks changes"""
+    project_updated = db.query(func.coalesce(Project.updated_at, Project.created_at)).filter(
+        Project.id == project_id
+    ).scalar()
+    task_count, task_updated = db.query(
+        func.count(Task.id),
+        func.max(func.coalesce(Task.updated_at, Task.created_at))
+    ).filter(Task.project_id == project_id).one()
+    raw = f"{project_updated}|{task_count}|{task_updated}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+class LocalFlightLock:
+    """In-memory lease store standing in for the shared lock in tests.
+
+    Several SingleFlight instances sharing one LocalFlightLock behave like
+    separate workers sharing the database or Redis.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[str, Tuple[str, datetime, float]] = {}
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease and lease[0] != owner and lease[2] > time.monotonic():
+                return False
+            self._leases[key] = (owner, datetime.utcnow(), time.monotonic() + ttl_seconds)
+            return True
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            if key in self._leases and self._leases[key][0] == owner:
+                del self._leases[key]
+
+    def holder_since(self, key: str) -> Optional[datetime]:
+        with self._lock:
+            lease = self._leases.get(key)
+            return lease[1] if lease and lease[2] > time.monotonic() else None
+
+class DatabaseFlightLock:
+    """Flight leases stored as distributed_locks rows through LockService"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        db = self.session_factory()
+        try:
+            return LockService.acquire(db, key, owner, ttl_seconds)
+        finally:
+            db.close()
+
+    def release(self, key: str, owner: str):
+        db = self.session_factory()
+        try:
+            LockService.release(db, key, owner)
+        finally:
+            db.close()
+
+    def holder_since(self, key: str) -> Optional[datetime]:
+        db = self.session_factory()
+        try:
+            holder = LockService.get_holder(db, key)
+            if not holder:
+                return None
+            acquired_at = holder.acquired_at
+            return acquired_at.astimezone(timezone.utc).replace(tzinfo=None) if acquired_at and acquired_at.tzinfo else acquired_at
+        finally:
+            db.close()
+
+class RedisFlightLock:
+    """Flight leases as Redis keys (SET NX PX); value is "<owner>|<acquired iso>" """
+
+    _RELEASE_SCRIPT = (
+        "if string.find(redis.call('get', KEYS[1]) or '', ARGV[1] .. '|', 1, true) == 1 "
+        "then return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str):
+        import redis  # Only needed when this backend is selected
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def acquire(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        value = f"{owner}|{datetime.utcnow().isoformat()}"
+        return bool(self.client.set(key, value, nx=True, px=int(ttl_seconds * 1000)))
+
+    def release(self, key: str, owner: str):
+        self.client.eval(self._RELEASE_SCRIPT, 1, key, owner)
+
+    def holder_since(self, key: str) -> Optional[datetime]:
+        value = self.client.get(key)
+        if not value or "|" not in value:
+            return None
+        return datetime.fromisoformat(value.rsplit("|", 1)[1])
+
+def make_flight_backend():
+    """Shared lease store selected by ANALYSIS_COALESCE_BACKEND (database, redis or local)"""
+    backend = os.getenv("ANALYSIS_COALESCE_BACKEND", "database").lower()
+    if backend == "redis":
+        return RedisFlightLock(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    if backend == "local":
+        return LocalFlightLock()
+    return DatabaseFlightLock()
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single computation.
+
+    Within a process, the first caller for a key computes and later callers
+    wait for its result (each gets a deep copy). Across workers the leader
+    also takes a lease in the shared backend; a worker that finds the lease
+    held waits for it to be released and then calls ``load_shared`` to read
+    what the other worker persisted, computing itself only if that returns
+    nothing or the wait times out.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        lease_seconds: float = 120.0,
+        wait_seconds: float = 90.0,
+        poll_seconds: float = 0.5
+    ):
+        self.backend = backend
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        self.owner = make_owner_id()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {"leader": 0, "follower": 0, "shared": 0, "timeouts": 0}
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        enabled = os.getenv("ANALYSIS_COALESCE_ENABLED", "true").lower() == "true"
+        return cls(
+            backend=make_flight_backend() if enabled else None,
+            lease_seconds=float(os.getenv("ANALYSIS_COALESCE_LEASE_SECONDS", "120")),
+            wait_seconds=float(os.getenv("ANALYSIS_COALESCE_WAIT_SECONDS", "90"))
+        )
+
+    def do(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        load_shared: Optional[Callable[[datetime], Any]] = None
+    ) -> Tuple[Any, str]:
+        """Run compute once per key; returns (result, role) with role leader, follower or shared"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight:
+                flight.followers += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            if flight.done.wait(self.wait_seconds):
+                self._count("follower")
+                if flight.error is not None:
+                    raise flight.error
+                return copy.deepcopy(flight.result), "follower"
+            # The leader is stuck; do not make this caller wait any longer
+            self._count("timeouts")
+            return compute(), "leader"
+
+        try:
+            flight.result, role = self._lead(key, compute, load_shared)
+            self._count(role)
+            return flight.result, role
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"in_flight": len(self._flights), **self._stats}
+
+    def _lead(self, key: str, compute: Callable[[], Any], load_shared: Optional[Callable[[datetime], Any]]) -> Tuple[Any, str]:
+        if self.backend is None:
+            return compute(), "leader"
+
+        if not self._acquire(key):
+            since = self._wait_for_release(key)
+            if since is not None and load_shared is not None:
+                shared = load_shared(since)
+                if shared:
+                    return shared, "shared"
+            if not self._acquire(key):
+                # Still held (slow or crashed holder): compute without the lease
+                return compute(), "leader"
+
+        try:
+            return compute(), "leader"
+        finally:
+            try:
+                self.backend.release(key, self.owner)
+            except Exception as e:
+                print(f"⚠️ Could not release analysis lease {key}: {e}")
+
+    def _acquire(self, key: str) -> bool:
+        try:
+            return self.backend.acquire(key, self.owner, self.lease_seconds)
+        except Exception as e:
+            # The shared store being down must not block analyses
+            print(f"⚠️ Analysis lease store unavailable, computing locally: {e}")
+            return True
+
+    def _wait_for_release(self, key: str) -> Optional[datetime]:
+        """Poll until the other worker's lease is gone; returns when it was taken"""
+        since = None
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            held_since = self.backend.holder_since(key)
+            if held_since is None:
+                return since or datetime.utcnow() - timedelta(seconds=self.wait_seconds)
+            since = since or held_since
+            time.sleep(self.poll_seconds)
+        self._count("timeouts")
+        return None
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+# Shared by every request of this worker
+analysis_flight = SingleFlight.from_env()
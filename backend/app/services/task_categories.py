@@ -0,0 +1,118 @@
+import os
+import unicodedata
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Keywords per category, Spanish and English; a keyword matches at the start
+# of a word ("test" matches "testing" but not "contest"), ignoring accents.
+# When several categories match, the one with the most hits wins, then the
+# one listed first.
+DEFAULT_CATEGORY_KEYWORDS = {
+    "development": (
+        "desarrollo", "desarrollar", "implementar", "implementación", "programar", "programación",
+        "dev", "develop", "implement", "coding"
+    ),
+    "testing": (
+        "test", "prueba", "qa", "validación", "verificación", "verification"
+    ),
+    "management": (
+        "gestión", "management", "planificación", "planning", "reunión", "meeting", "coordinación", "seguimiento"
+    )
+}
+
+OTHER_CATEGORY = "other"
+
+def normalize_text(text: str) -> str:
+    """Lowercase without accents, so "Gestión" and "gestion" match alike"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def parse_keywords(spec: str) -> Dict[str, Tuple[str, ...]]:
+    """Parse "category:kw1,kw2;category2:kw3" (TASK_CATEGORY_KEYWORDS)"""
+    keywords = {}
+    for part in spec.split(";"):
+        if ":" not in part:
+            continue
+        category, words = part.split(":", 1)
+        words = tuple(word.strip() for word in words.split(",") if word.strip())
+        if category.strip() and words:
+            keywords[category.strip()] = words
+    return keywords
+
+class TaskCategoryClassifier:
+    """Assigns one category per task with a compiled Aho-Corasick automaton.
+
+    All keywords of all categories are matched in a single pass over the
+    text, however many there are.
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, Sequence[str]]] = None):
+        self.keywords = {category: tuple(words) for category, words in (keywords or DEFAULT_CATEGORY_KEYWORDS).items()}
+        self.categories: List[str] = list(self.keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]  # (category index, keyword length)
+        for index, category in enumerate(self.categories):
+            for keyword in self.keywords[category]:
+                self._insert(normalize_text(keyword), index)
+        self._link()
+
+    @classmethod
+    def from_env(cls) -> "TaskCategoryClassifier":
+        spec = os.getenv("TASK_CATEGORY_KEYWORDS", "")
+        return cls(parse_keywords(spec) or None)
+
+    def _insert(self, keyword: str, category_index: int):
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append((category_index, len(keyword)))
+
+    def _link(self):
+        # Breadth-first, so a state's failure target is complete before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def matches(self, text: Optional[str]) -> List[int]:
+        """Keyword hits per category (in ``categories`` order)"""
+        hits = [0] * len(self.categories)
+        text = normalize_text(text or "")
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for category_index, length in self._output[state]:
+                start = position - length + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    hits[category_index] += 1
+        return hits
+
+    def classify(self, text: Optional[str]) -> str:
+        hits = self.matches(text)
+        best = max(range(len(hits)), key=lambda index: (hits[index], -index), default=None)
+        return self.categories[best] if best is not None and hits[best] else OTHER_CATEGORY
+
+task_classifier = TaskCategoryClassifier.from_env()
+
+def categorize_task(title: Optional[str]) -> str:
+    """Work category of a task from its title; "other" when no keyword matches"""
+    return task_classifier.classify(title)
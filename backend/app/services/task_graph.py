@@ -0,0 +1,254 @@
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Multiplier of the edge checksum shared with DependencyService.graph_signature
+EDGE_CHECKSUM_FACTOR = 1000003
+
+class CycleError(ValueError):
+    """Raised when an edge would close a cycle; ``path`` runs from the blocked task back to it"""
+
+    def __init__(self, path: List[int]):
+        super().__init__("Dependency would create a cycle: " + " → ".join(str(node) for node in path))
+        self.path = path
+
+class TaskGraph:
+    """Task dependency DAG with an incrementally maintained longest path.
+
+    Nodes are task ids weighted by their remaining hours; an edge
+    ``blocker → blocked`` means the blocker must finish first. Every node
+    has an earliest start/finish (hours from now, assuming unlimited
+    people) and the predecessor that determines its start; the critical
+    path is the chain ending at the latest finish.
+
+    A topological index per node is kept up to date on every insert
+    (Pearce-Kelly): an edge that already goes forward in the order is
+    accepted in O(1); otherwise only the nodes between the two endpoints
+    are searched for a cycle and reordered. Changing a duration or an edge
+    re-propagates start/finish times from that node, in topological order,
+    only as far as they actually change.
+    """
+
+    def __init__(self):
+        self.hours: Dict[int, float] = {}
+        self.updated: Dict[int, Optional[datetime]] = {}
+        self.successors: Dict[int, Set[int]] = {}
+        self.predecessors: Dict[int, Set[int]] = {}
+        self.order: Dict[int, int] = {}
+        self.start: Dict[int, float] = {}
+        self.finish: Dict[int, float] = {}
+        self.via: Dict[int, Optional[int]] = {}
+        self.edge_count = 0
+        self.edge_checksum = 0
+        self.latest_update: Optional[datetime] = None
+        self._next_order = 0
+
+    @classmethod
+    def build(cls, tasks: Iterable[Tuple[int, float, Optional[datetime]]], edges: Iterable[Tuple[int, int]]) -> "TaskGraph":
+        """Bulk load (task id, hours, updated) rows and (blocker, blocked) edges.
+
+        Edges to unknown tasks are ignored and edges that close a cycle
+        (possible only through concurrent inserts) are skipped.
+        """
+        graph = cls()
+        for task_id, hours, updated in tasks:
+            graph.hours[task_id] = float(hours)
+            graph.updated[task_id] = updated
+            graph.successors[task_id] = set()
+            graph.predecessors[task_id] = set()
+        for blocker, blocked in edges:
+            if blocker in graph.hours and blocked in graph.hours and blocker != blocked and blocked not in graph.successors[blocker]:
+                graph.successors[blocker].add(blocked)
+                graph.predecessors[blocked].add(blocker)
+
+        # Kahn's algorithm; nodes left over sit on a cycle
+        indegree = {node: len(preds) for node, preds in graph.predecessors.items()}
+        ready = [node for node, degree in indegree.items() if degree == 0]
+        sequence = []
+        while ready:
+            node = ready.pop()
+            sequence.append(node)
+            for successor in graph.successors[node]:
+                indegree[successor] -= 1
+                if indegree[successor] == 0:
+                    ready.append(successor)
+        if len(sequence) < len(graph.hours):
+            for node in graph.hours:
+                if indegree[node] > 0:
+                    for blocker in list(graph.predecessors[node]):
+                        if indegree[blocker] > 0:
+                            print(f"⚠️ Skipping dependency {blocker} → {node}: it closes a cycle")
+                            graph.predecessors[node].discard(blocker)
+                            graph.successors[blocker].discard(node)
+            return cls.build(
+                ((node, graph.hours[node], graph.updated[node]) for node in graph.hours),
+                ((blocker, blocked) for blocker, successors in graph.successors.items() for blocked in successors)
+            )
+
+        for index, node in enumerate(sequence):
+            graph.order[node] = index
+            graph._relax(node)
+            graph.edge_count += len(graph.successors[node])
+            graph.edge_checksum += sum(node * EDGE_CHECKSUM_FACTOR + blocked for blocked in graph.successors[node])
+        graph._next_order = len(sequence)
+        graph.latest_update = max((value for value in graph.updated.values() if value is not None), default=None)
+        return graph
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.hours
+
+    def __len__(self) -> int:
+        return len(self.hours)
+
+    def signature(self) -> Tuple[int, Optional[datetime], int, int]:
+        """(task count, latest task change, edge count, edge checksum) as stored in the database"""
+        return len(self.hours), self.latest_update, self.edge_count, self.edge_checksum
+
+    def add_task(self, task_id: int, hours: float, updated: Optional[datetime] = None):
+        if task_id in self.hours:
+            self.set_hours(task_id, hours, updated)
+            return
+        self.hours[task_id] = float(hours)
+        self._touch(task_id, updated)
+        self.successors[task_id] = set()
+        self.predecessors[task_id] = set()
+        self.order[task_id] = self._next_order
+        self._next_order += 1
+        self.start[task_id] = 0.0
+        self.finish[task_id] = float(hours)
+        self.via[task_id] = None
+
+    def set_hours(self, task_id: int, hours: float, updated: Optional[datetime] = None):
+        self._touch(task_id, updated)
+        if self.hours[task_id] != float(hours):
+            self.hours[task_id] = float(hours)
+            self._propagate([task_id])
+
+    def remove_task(self, task_id: int):
+        for blocker in list(self.predecessors[task_id]):
+            self.remove_edge(blocker, task_id)
+        successors = list(self.successors[task_id])
+        for blocked in successors:
+            self.remove_edge(task_id, blocked)
+        removed = self.updated[task_id]
+        for mapping in (self.hours, self.updated, self.successors, self.predecessors,
+                        self.order, self.start, self.finish, self.via):
+            del mapping[task_id]
+        if removed is not None and removed == self.latest_update:
+            self.latest_update = max((value for value in self.updated.values() if value is not None), default=None)
+
+    def path_between(self, source: int, target: int) -> Optional[List[int]]:
+        """Dependency chain from ``source`` to ``target``, searching only between their topological positions"""
+        if source == target:
+            return [source]
+        limit = self.order[target]
+        parents = {source: None}
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            for successor in self.successors[node]:
+                if successor in parents or self.order[successor] > limit:
+                    continue
+                parents[successor] = node
+                if successor == target:
+                    path = [target]
+                    while parents[path[-1]] is not None:
+                        path.append(parents[path[-1]])
+                    return path[::-1]
+                stack.append(successor)
+        return None
+
+    def check_edge(self, blocker: int, blocked: int):
+        """Raise CycleError if ``blocker → blocked`` would close a cycle"""
+        if blocker == blocked:
+            raise CycleError([blocked, blocker])
+        if self.order[blocker] < self.order[blocked]:
+            return
+        path = self.path_between(blocked, blocker)
+        if path:
+            raise CycleError(path + [blocked])
+
+    def add_edge(self, blocker: int, blocked: int) -> bool:
+        """Insert ``blocker → blocked``; False if it already existed"""
+        if blocked in self.successors[blocker]:
+            return False
+        self.check_edge(blocker, blocked)
+        if self.order[blocker] > self.order[blocked]:
+            self._reorder(blocker, blocked)
+        self.successors[blocker].add(blocked)
+        self.predecessors[blocked].add(blocker)
+        self.edge_count += 1
+        self.edge_checksum += blocker * EDGE_CHECKSUM_FACTOR + blocked
+        self._propagate([blocked])
+        return True
+
+    def remove_edge(self, blocker: int, blocked: int) -> bool:
+        if blocked not in self.successors.get(blocker, ()):
+            return False
+        self.successors[blocker].discard(blocked)
+        self.predecessors[blocked].discard(blocker)
+        self.edge_count -= 1
+        self.edge_checksum -= blocker * EDGE_CHECKSUM_FACTOR + blocked
+        self._propagate([blocked])
+        return True
+
+    def critical_path(self) -> Tuple[List[int], float]:
+        """Task ids of the longest chain (first to last) and its length in hours"""
+        if not self.finish:
+            return [], 0.0
+        end = max(self.finish, key=lambda node: (self.finish[node], -self.order[node]))
+        path = [end]
+        while self.via[path[-1]] is not None:
+            path.append(self.via[path[-1]])
+        return path[::-1], self.finish[end]
+
+    def _touch(self, task_id: int, updated: Optional[datetime]):
+        self.updated[task_id] = updated
+        if updated is not None and (self.latest_update is None or updated > self.latest_update):
+            self.latest_update = updated
+
+    def _relax(self, node: int) -> bool:
+        """Recompute a node's start from its blockers; True if its finish moved"""
+        start, via = 0.0, None
+        for blocker in self.predecessors[node]:
+            if self.finish[blocker] > start or (via is None and self.finish[blocker] == start):
+                start, via = self.finish[blocker], blocker
+        finish = start + self.hours[node]
+        changed = self.finish.get(node) != finish
+        self.start[node], self.finish[node], self.via[node] = start, finish, via
+        return changed
+
+    def _propagate(self, nodes: Iterable[int]):
+        # Nodes come off the heap in topological order, so every blocker of
+        # a node is final by the time the node is recomputed
+        heap = [(self.order[node], node) for node in nodes]
+        heapq.heapify(heap)
+        queued = {node for _, node in heap}
+        while heap:
+            _, node = heapq.heappop(heap)
+            queued.discard(node)
+            if self._relax(node):
+                for successor in self.successors[node]:
+                    if successor not in queued:
+                        queued.add(successor)
+                        heapq.heappush(heap, (self.order[successor], successor))
+
+    def _reorder(self, blocker: int, blocked: int):
+        """Pearce-Kelly: move the affected region so ``blocker`` comes before ``blocked``"""
+        lower, upper = self.order[blocked], self.order[blocker]
+        forward, stack = {blocked}, [blocked]
+        while stack:
+            for successor in self.successors[stack.pop()]:
+                if successor not in forward and self.order[successor] < upper:
+                    forward.add(successor)
+                    stack.append(successor)
+        backward, stack = {blocker}, [blocker]
+        while stack:
+            for predecessor in self.predecessors[stack.pop()]:
+                if predecessor not in backward and self.order[predecessor] > lower:
+                    backward.add(predecessor)
+                    stack.append(predecessor)
+        moved = sorted(backward, key=self.order.get) + sorted(forward, key=self.order.get)
+        slots = sorted(self.order[node] for node in moved)
+        for node, slot in zip(moved, slots):
+            self.order[node] = slot
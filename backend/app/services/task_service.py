@@ -1,11 +1,32 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, case, func, select, union_all
 from datetime import datetime, timedelta
-from ..models.task import Task, Comment, TaskCreate, TaskUpdate, CommentCreate, TaskStatus, TaskPriority
+from ..models.task import (
+    Task, TaskDependency, Comment, TaskCreate, TaskUpdate, CommentCreate, TaskStatus, TaskPriority,
+    AssignmentPlanRequest, SimilarTaskQuery
+)
 from ..models.project import Project, ProjectMember
 from ..models.user import User
 from fastapi import HTTPException, status
+from .dependency_service import dependency_service
+from .assignment_optimizer import assignment_optimizer
+from .effort_estimator import effort_estimator
+from .similar_task_service import similar_task_service
+from .deadline_alerts import deadline_alerts
+from .task_categories import categorize_task
+
+# Ids per IN (...) clause in bulk statements (SQLite caps bound parameters)
+IN_CLAUSE_CHUNK = 500
+
+# Statuses that can still miss a due date
+OPEN_STATUSES = [TaskStatus.TODO, TaskStatus.IN_PROGRESS, TaskStatus.IN_REVIEW]
+
+
+def _count_if(*conditions):
+    """Conditional count for aggregate queries"""
+    return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
 
 class TaskService:
     def create_task(self, db: Session, task: TaskCreate, creator_id: int) -> Task:
@@ -45,12 +66,17 @@ class TaskService:
         task_data = task.dict()
         db_task = Task(
             **task_data,
-            creator_id=creator_id
+            creator_id=creator_id,
+            category=categorize_task(task.title)
         )
         
         db.add(db_task)
         db.commit()
         db.refresh(db_task)
+        dependency_service.task_saved(db_task)
+        effort_estimator.observe(None, effort_estimator.training_row(db_task))
+        similar_task_service.task_saved(db_task)
+        deadline_alerts.task_saved(db_task)
         return db_task
     
     def get_task(self, db: Session, task_id: int, user_id: int) -> Optional[Task]:
@@ -131,6 +157,97 @@ class TaskService:
         
         return query.offset(skip).limit(limit).all()
     
+    def _visible_project_ids(self, db: Session, user_id: int) -> Optional[set]:
+        """Projects the user owns or belongs to (None for admins, who see every project)"""
+        if db.query(User.is_admin).filter(User.id == user_id).scalar():
+            return None
+        owned = select(Project.id).where(Project.owner_id == user_id)
+        joined = select(ProjectMember.project_id).where(ProjectMember.user_id == user_id)
+        return {project_id for project_id, in db.execute(union_all(owned, joined))}
+    
+    def _due_range_filters(
+        self, user_id: int, due_after: Optional[datetime], due_before: Optional[datetime], project_ids: Optional[set]
+    ) -> List[Any]:
+        """Predicates, besides an open status, of the user's tasks due in a range"""
+        filters = [Task.assignee_id == user_id]
+        if due_after is not None:
+            filters.append(Task.due_date >= due_after)
+        if due_before is not None:
+            filters.append(Task.due_date < due_before)
+        else:
+            filters.append(Task.due_date.isnot(None))
+        if project_ids is not None:
+            filters.append(Task.project_id.in_(project_ids))
+        return filters
+    
+    def _due_range_page(self, db: Session, filters: List[Any], newest_first: bool, skip: int, limit: int) -> List[Dict[str, Any]]:
+        """A page of open tasks matching ``filters``, in due date order.
+
+        Reads ix_tasks_assignee_status_due (assignee, status, due date,
+        project): the first ``skip + limit`` entries of each open status are
+        already in due date order and are merged (a single range over every
+        open status would sort all matches instead); only the task rows
+        returned are read.
+        """
+        def ordered(columns):
+            return (columns.due_date.desc(), columns.id.desc()) if newest_first else (columns.due_date, columns.id)
+
+        per_status = [
+            select(select(Task.id, Task.due_date).where(Task.status == task_status, *filters)
+                   .order_by(*ordered(Task)).limit(skip + limit).subquery())
+            for task_status in OPEN_STATUSES
+        ]
+        merged = union_all(*per_status).subquery()
+        page = select(merged).order_by(*ordered(merged.c)).offset(skip).limit(limit).subquery()
+        rows = db.execute(
+            select(Task.id, Task.title, Task.project_id, Task.status, Task.priority, Task.due_date)
+            .join(page, page.c.id == Task.id).order_by(*ordered(page.c))
+        ).all()
+        return [
+            {
+                "id": row.id,
+                "title": row.title,
+                "project_id": row.project_id,
+                "status": row.status.value,
+                "priority": row.priority.value if row.priority else None,
+                "due_date": row.due_date.isoformat()
+            }
+            for row in rows
+        ]
+    
+    def _assigned_by_due_date(
+        self,
+        db: Session,
+        user_id: int,
+        due_after: Optional[datetime],
+        due_before: Optional[datetime],
+        newest_first: bool,
+        skip: int,
+        limit: int,
+        project_ids: Optional[set] = None
+    ) -> Dict[str, Any]:
+        """A page of the user's open tasks in a due date range, and the total (counted on the index)"""
+        filters = self._due_range_filters(user_id, due_after, due_before, project_ids)
+        total = db.query(func.count()).select_from(Task).filter(Task.status.in_(OPEN_STATUSES), *filters).scalar()
+        return {"tasks": self._due_range_page(db, filters, newest_first, skip, limit), "total": total}
+    
+    def get_overdue_tasks(
+        self, db: Session, user_id: int, skip: int = 0, limit: int = 100, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Open tasks assigned to the user past their due date, most recently due first"""
+        return self._assigned_by_due_date(
+            db, user_id, None, now or datetime.utcnow(), True, skip, limit, self._visible_project_ids(db, user_id)
+        )
+    
+    def get_upcoming_tasks(
+        self, db: Session, user_id: int, days: int = 7, skip: int = 0, limit: int = 100, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Open tasks assigned to the user due within ``days``, soonest first"""
+        now = now or datetime.utcnow()
+        return self._assigned_by_due_date(
+            db, user_id, now, now + timedelta(days=days), False, skip, limit, self._visible_project_ids(db, user_id)
+        )
+    
     def update_task(self, db: Session, task_id: int, task_update: TaskUpdate, user_id: int) -> Optional[Task]:
         """Update a task"""
         task = self.get_task(db, task_id, user_id)
@@ -145,6 +262,7 @@ class TaskService:
             )
         
         update_data = task_update.dict(exclude_unset=True)
+        trained_as = effort_estimator.training_row(task)
         
         # Verify assignee has access to project if being changed
         if "assignee_id" in update_data and update_data["assignee_id"]:
@@ -162,12 +280,20 @@ class TaskService:
             elif new_status != TaskStatus.DONE and task.status == TaskStatus.DONE:
                 update_data["completed_at"] = None
         
+        # Reclassify when the title changes
+        if "title" in update_data:
+            update_data["category"] = categorize_task(update_data["title"])
+        
         for field, value in update_data.items():
             setattr(task, field, value)
         
         task.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(task)
+        dependency_service.task_saved(task)
+        effort_estimator.observe(trained_as, effort_estimator.training_row(task))
+        similar_task_service.task_saved(task)
+        deadline_alerts.task_saved(task)
         return task
     
     def delete_task(self, db: Session, task_id: int, user_id: int) -> bool:
@@ -191,8 +317,15 @@ class TaskService:
                 detail="Cannot delete task with subtasks. Delete subtasks first."
             )
         
+        project_id = task.project_id
+        trained_as = effort_estimator.training_row(task)
+        dependency_service.delete_task_edges(db, task)
         db.delete(task)
         db.commit()
+        dependency_service.task_deleted(project_id, task_id)
+        effort_estimator.observe(trained_as, None)
+        similar_task_service.task_deleted(task_id)
+        deadline_alerts.task_deleted(task_id)
         return True
     
     def get_subtasks(self, db: Session, parent_task_id: int, user_id: int) -> List[Task]:
@@ -207,6 +340,271 @@ class TaskService:
         
         return db.query(Task).filter(Task.parent_task_id == parent_task_id).all()
     
+    def add_dependency(self, db: Session, task_id: int, blocker_id: int, user_id: int) -> TaskDependency:
+        """Make ``task_id`` wait for ``blocker_id``; rejected if it would close a cycle"""
+        task = self.get_task(db, task_id, user_id)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        if not self._user_can_edit_task(db, task_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions to edit this task"
+            )
+        
+        blocker = db.query(Task).filter(Task.id == blocker_id).first()
+        if not blocker or blocker.project_id != task.project_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Blocking task not found or belongs to different project"
+            )
+        
+        try:
+            return dependency_service.add(db, blocker, task)
+        except ValueError as e:
+            # CycleError or a duplicate edge
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    def remove_dependency(self, db: Session, task_id: int, blocker_id: int, user_id: int) -> bool:
+        """Remove the ``blocker_id → task_id`` dependency"""
+        task = self.get_task(db, task_id, user_id)
+        if not task:
+            return False
+        if not self._user_can_edit_task(db, task_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions to edit this task"
+            )
+        return dependency_service.remove(db, task.project_id, blocker_id, task_id)
+    
+    def get_task_dependencies(self, db: Session, task_id: int, user_id: int) -> Dict[str, List[TaskDependency]]:
+        """Tasks this one waits for (blocked_by) and tasks waiting for it (blocks)"""
+        task = self.get_task(db, task_id, user_id)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        return dependency_service.dependencies(db, task_id)
+    
+    def get_critical_path(self, db: Session, project_id: int, user_id: int, limit: int = 100) -> Dict[str, Any]:
+        """Longest chain of remaining work in a project, weighted by estimated hours"""
+        if not self._user_has_project_access(db, project_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this project"
+            )
+        return dependency_service.critical_path(db, project_id, limit)
+    
+    def plan_assignments(self, db: Session, request: AssignmentPlanRequest, user_id: int) -> Dict[str, Any]:
+        """Propose assignments that keep the largest member load as low as possible.
+
+        Loads count each member's open estimated hours across all projects.
+        With ``apply`` the plan is saved in one transaction, and only if none
+        of its tasks was assigned in the meantime.
+        """
+        project = db.query(Project).filter(Project.id == request.project_id).first()
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
+        can_manage = self._user_can_manage_project(db, request.project_id, user_id)
+        if not can_manage and not self._user_has_project_access(db, request.project_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this project"
+            )
+        if request.apply and not can_manage:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only project owners and managers can apply an assignment plan"
+            )
+
+        team = {project.owner_id}
+        team.update(
+            member_id for member_id, in db.query(ProjectMember.user_id).filter(
+                ProjectMember.project_id == request.project_id,
+                ProjectMember.role != "viewer"
+            )
+        )
+        if request.member_ids is not None:
+            outsiders = set(request.member_ids) - team
+            if outsiders:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Users {sorted(outsiders)} are not members of this project"
+                )
+            team = set(request.member_ids)
+        if not team:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No members to assign tasks to"
+            )
+
+        closed = [TaskStatus.DONE, TaskStatus.CANCELLED]
+        candidates = db.query(Task.id, Task.estimated_hours, Task.priority, Task.assignee_id, Task.status).filter(
+            Task.project_id == request.project_id
+        )
+        if request.task_ids is None:
+            candidates = candidates.filter(Task.assignee_id.is_(None), ~Task.status.in_(closed)).all()
+        else:
+            wanted = list(dict.fromkeys(request.task_ids))
+            candidates = [
+                row for start in range(0, len(wanted), IN_CLAUSE_CHUNK)
+                for row in candidates.filter(Task.id.in_(wanted[start:start + IN_CLAUSE_CHUNK])).all()
+            ]
+            missing = set(wanted) - {row.id for row in candidates}
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Tasks {sorted(missing)[:20]} not found in this project"
+                )
+
+        unassigned = []
+        open_tasks = []
+        for row in candidates:
+            if row.status in closed:
+                unassigned.append({"task_id": row.id, "reason": "closed"})
+            elif row.assignee_id is not None:
+                unassigned.append({"task_id": row.id, "reason": "already_assigned"})
+            else:
+                open_tasks.append((row.id, row.estimated_hours, row.priority))
+
+        loads = {member_id: 0.0 for member_id in team}
+        for assignee_id, hours in db.query(
+            Task.assignee_id,
+            func.sum(func.coalesce(Task.estimated_hours, assignment_optimizer.default_hours))
+        ).filter(
+            Task.assignee_id.in_(list(team)),
+            ~Task.status.in_(closed)
+        ).group_by(Task.assignee_id):
+            loads[assignee_id] = float(hours or 0)
+
+        plan = assignment_optimizer.plan(open_tasks, loads, request.capacity_hours)
+        unassigned.extend({"task_id": task_id, "reason": "over_capacity"} for task_id in plan.unassigned)
+
+        if request.apply and plan.assignments:
+            by_member: Dict[int, List[int]] = {}
+            for task_id, member_id, _ in plan.assignments:
+                by_member.setdefault(member_id, []).append(task_id)
+            now = datetime.utcnow()
+            updated = 0
+            try:
+                for member_id, task_ids in by_member.items():
+                    for start in range(0, len(task_ids), IN_CLAUSE_CHUNK):
+                        updated += db.query(Task).filter(
+                            Task.id.in_(task_ids[start:start + IN_CLAUSE_CHUNK]),
+                            Task.assignee_id.is_(None)
+                        ).update({Task.assignee_id: member_id, Task.updated_at: now}, synchronize_session=False)
+                if updated != len(plan.assignments):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Some tasks were assigned while applying the plan; request a new plan"
+                    )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            dependency_service.tasks_touched(request.project_id, [task_id for task_id, _, _ in plan.assignments], now)
+
+        priorities = {task_id: priority for task_id, _, priority in open_tasks}
+        return {
+            "project_id": request.project_id,
+            "applied": bool(request.apply and plan.assignments),
+            "assignments": [
+                {
+                    "task_id": task_id,
+                    "assignee_id": member_id,
+                    "estimated_hours": hours,
+                    "priority": priorities[task_id].value if priorities[task_id] else None
+                }
+                for task_id, member_id, hours in plan.assignments
+            ],
+            "unassigned": unassigned,
+            "members": [
+                {
+                    "user_id": member_id,
+                    "current_hours": round(plan.loads[member_id] - plan.assigned_hours[member_id], 1),
+                    "assigned_hours": round(plan.assigned_hours[member_id], 1),
+                    "total_hours": round(plan.loads[member_id], 1),
+                    "capacity_hours": plan.capacities[member_id]
+                }
+                for member_id in sorted(plan.loads)
+            ],
+            "max_load_hours": round(plan.max_load, 1),
+            "elapsed_ms": round(plan.elapsed_ms, 1)
+        }
+    
+    def find_similar_tasks(self, db: Session, query: SimilarTaskQuery, user_id: int, exclude_task_id: Optional[int] = None) -> Dict[str, Any]:
+        """Tasks most like a title/description, across every project the user can see.
+
+        Completed matches suggest how long the new work takes (falling back to
+        the learned estimate); close matches in ``query.project_id`` are
+        flagged as possible duplicates.
+        """
+        if query.project_id is not None and not self._user_has_project_access(db, query.project_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this project"
+            )
+        project_ids = self._visible_project_ids(db, user_id)
+
+        ranked = similar_task_service.similar(db, query.title, query.description, query.limit, project_ids, exclude_task_id)
+        tasks = {task.id: task for task in db.query(Task).filter(Task.id.in_([task_id for task_id, _ in ranked]))}
+        threshold = similar_task_service.duplicate_threshold
+        matches = []
+        for task_id, score in ranked:
+            task = tasks.get(task_id)
+            if task is None:
+                continue
+            matches.append({
+                "task_id": task.id,
+                "title": task.title,
+                "project_id": task.project_id,
+                "status": task.status.value if task.status else None,
+                "estimated_hours": task.estimated_hours,
+                "actual_hours": task.actual_hours,
+                "similarity": round(score, 3),
+                "possible_duplicate": (
+                    score >= threshold and task.project_id == query.project_id and task.status != TaskStatus.CANCELLED
+                )
+            })
+
+        completed = [
+            (match["similarity"], match["actual_hours"]) for match in matches
+            if match["status"] == TaskStatus.DONE.value and match["actual_hours"]
+        ]
+        if completed:
+            suggested_hours = sum(score * hours for score, hours in completed) / sum(score for score, _ in completed)
+            source = "similar_tasks"
+        else:
+            suggested_hours = effort_estimator.estimate_title(db, query.title, query.project_id).expected_hours
+            source = "learned"
+
+        return {
+            "matches": matches,
+            "possible_duplicates": [match["task_id"] for match in matches if match["possible_duplicate"]],
+            "suggested_hours": round(suggested_hours, 1),
+            "suggested_hours_source": source
+        }
+    
+    def get_similar_tasks(self, db: Session, task_id: int, user_id: int, limit: int = 10) -> Dict[str, Any]:
+        """Tasks most like an existing task (the task itself excluded)"""
+        task = self.get_task(db, task_id, user_id)
+        if not task:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        query = SimilarTaskQuery(title=task.title, description=task.description, project_id=task.project_id, limit=limit)
+        return self.find_similar_tasks(db, query, user_id, exclude_task_id=task.id)
+    
     def add_comment(self, db: Session, task_id: int, comment: CommentCreate, user_id: int) -> Comment:
         """Add a comment to a task"""
         # Verify task exists and user has access
@@ -280,37 +678,38 @@ class TaskService:
         return True
     
     def get_user_tasks_summary(self, db: Session, user_id: int) -> Dict[str, Any]:
-        """Get summary of tasks assigned to user"""
-        # Get all tasks assigned to user
-        user_tasks = db.query(Task).filter(Task.assignee_id == user_id).all()
-        
-        # Calculate statistics
-        total_tasks = len(user_tasks)
-        completed_tasks = len([t for t in user_tasks if t.status == TaskStatus.DONE])
-        in_progress_tasks = len([t for t in user_tasks if t.status == TaskStatus.IN_PROGRESS])
-        todo_tasks = len([t for t in user_tasks if t.status == TaskStatus.TODO])
-        
-        # Get overdue tasks
-        overdue_tasks = [
-            t for t in user_tasks 
-            if t.due_date and t.due_date < datetime.utcnow() and t.status != TaskStatus.DONE
-        ]
-        
-        # Get upcoming tasks (due in next 7 days)
-        next_week = datetime.utcnow() + timedelta(days=7)
-        upcoming_tasks = [
-            t for t in user_tasks
-            if t.due_date and datetime.utcnow() <= t.due_date <= next_week and t.status != TaskStatus.DONE
-        ]
+        """Get summary of tasks assigned to user.
+
+        Every count comes from one aggregate over the user's tasks in projects
+        they can see; the five most recent overdue and most urgent upcoming
+        tasks are read from the due date index.
+        """
+        now = datetime.utcnow()
+        project_ids = self._visible_project_ids(db, user_id)
+        scope = [Task.assignee_id == user_id]
+        if project_ids is not None:
+            scope.append(Task.project_id.in_(project_ids))
+        overdue_filters = self._due_range_filters(user_id, None, now, project_ids)
+        upcoming_filters = self._due_range_filters(user_id, now, now + timedelta(days=7), project_ids)
+        is_open = Task.status.in_(OPEN_STATUSES)
+        not_done = Task.status != TaskStatus.DONE
+
+        totals = db.query(
+            func.count(Task.id),
+            _count_if(Task.status == TaskStatus.DONE),
+            _count_if(Task.status == TaskStatus.IN_PROGRESS),
+            _count_if(Task.status == TaskStatus.TODO),
+            _count_if(is_open, *overdue_filters),
+            _count_if(is_open, *upcoming_filters),
+            _count_if(Task.priority == TaskPriority.HIGH, not_done),
+            _count_if(Task.priority == TaskPriority.MEDIUM, not_done),
+            _count_if(Task.priority == TaskPriority.LOW, not_done)
+        ).filter(*scope).one()
+        total_tasks, completed_tasks, in_progress_tasks, todo_tasks, overdue_tasks, upcoming_tasks, high, medium, low = totals
         
         # Calculate completion rate
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
-        # Get tasks by priority
-        high_priority_tasks = len([t for t in user_tasks if t.priority == TaskPriority.HIGH and t.status != TaskStatus.DONE])
-        medium_priority_tasks = len([t for t in user_tasks if t.priority == TaskPriority.MEDIUM and t.status != TaskStatus.DONE])
-        low_priority_tasks = len([t for t in user_tasks if t.priority == TaskPriority.LOW and t.status != TaskStatus.DONE])
-        
         return {
             "user_id": user_id,
             "total_tasks": total_tasks,
@@ -320,35 +719,23 @@ class TaskService:
                 "todo": todo_tasks
             },
             "completion_rate": round(completion_rate, 1),
-            "overdue_tasks": len(overdue_tasks),
-            "upcoming_tasks": len(upcoming_tasks),
+            "overdue_tasks": overdue_tasks,
+            "upcoming_tasks": upcoming_tasks,
             "priority_breakdown": {
-                "high": high_priority_tasks,
-                "medium": medium_priority_tasks,
-                "low": low_priority_tasks
+                "high": high,
+                "medium": medium,
+                "low": low
             },
-            "recent_overdue": [
-                {
-                    "id": t.id,
-                    "title": t.title,
-                    "due_date": t.due_date.isoformat(),
-                    "project_id": t.project_id
-                }
-                for t in overdue_tasks[:5]  # Limit to 5 most recent
-            ],
-            "upcoming_deadlines": [
-                {
-                    "id": t.id,
-                    "title": t.title,
-                    "due_date": t.due_date.isoformat(),
-                    "project_id": t.project_id
-                }
-                for t in upcoming_tasks[:5]  # Limit to 5 most urgent
-            ]
+            "recent_overdue": self._due_range_page(db, overdue_filters, True, 0, 5) if overdue_tasks else [],
+            "upcoming_deadlines": self._due_range_page(db, upcoming_filters, False, 0, 5) if upcoming_tasks else []
         }
     
     def get_project_tasks_analytics(self, db: Session, project_id: int, user_id: int) -> Dict[str, Any]:
-        """Get analytics for tasks in a specific project"""
+        """Get analytics for tasks in a specific project.
+
+        One aggregate grouped by assignee; the project totals are the sums of
+        the groups (unassigned tasks form their own group).
+        """
         # Verify user has access to project
         if not self._user_has_project_access(db, project_id, user_id):
             raise HTTPException(
@@ -356,62 +743,58 @@ class TaskService:
                 detail="Access denied to this project"
             )
         
-        # Get all tasks for the project
-        project_tasks = db.query(Task).filter(Task.project_id == project_id).all()
-        
-        if not project_tasks:
+        now = datetime.utcnow()
+        four_weeks_ago = now - timedelta(weeks=4)
+        is_done = Task.status == TaskStatus.DONE
+
+        groups = db.query(
+            Task.assignee_id,
+            func.count(Task.id),
+            _count_if(is_done),
+            _count_if(Task.status == TaskStatus.IN_PROGRESS),
+            _count_if(Task.status == TaskStatus.TODO),
+            _count_if(Task.status == TaskStatus.CANCELLED),
+            func.coalesce(func.sum(Task.estimated_hours), 0),
+            func.coalesce(func.sum(Task.actual_hours), 0),
+            # Velocity: tasks completed in the last 4 weeks
+            _count_if(is_done, Task.completed_at >= four_weeks_ago),
+            _count_if(Task.due_date < now, Task.status.in_(OPEN_STATUSES))
+        ).filter(Task.project_id == project_id).group_by(Task.assignee_id).all()
+        
+        if not groups:
             return {
                 "project_id": project_id,
                 "total_tasks": 0,
                 "message": "No tasks found for this project"
             }
         
-        # Calculate basic statistics
-        total_tasks = len(project_tasks)
-        completed_tasks = len([t for t in project_tasks if t.status == TaskStatus.DONE])
+        totals = [sum(column) for column in list(zip(*groups))[1:]]
+        total_tasks, completed_tasks, in_progress, todo, cancelled, total_estimated_hours, total_actual_hours, \
+            recent_completions, overdue_tasks = totals
         progress_percentage = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
-        # Calculate time statistics
-        total_estimated_hours = sum(t.estimated_hours or 0 for t in project_tasks)
-        total_actual_hours = sum(t.actual_hours or 0 for t in project_tasks)
-        
-        # Get team workload distribution
-        assignee_workload = {}
-        for task in project_tasks:
-            if task.assignee_id:
-                if task.assignee_id not in assignee_workload:
-                    assignee_workload[task.assignee_id] = {
-                        "total_tasks": 0,
-                        "completed_tasks": 0,
-                        "estimated_hours": 0,
-                        "actual_hours": 0
-                    }
-                
-                assignee_workload[task.assignee_id]["total_tasks"] += 1
-                if task.status == TaskStatus.DONE:
-                    assignee_workload[task.assignee_id]["completed_tasks"] += 1
-                assignee_workload[task.assignee_id]["estimated_hours"] += task.estimated_hours or 0
-                assignee_workload[task.assignee_id]["actual_hours"] += task.actual_hours or 0
-        
-        # Calculate velocity (tasks completed per week)
-        completed_with_dates = [t for t in project_tasks if t.status == TaskStatus.DONE and t.completed_at]
-        if completed_with_dates:
-            # Get tasks completed in last 4 weeks
-            four_weeks_ago = datetime.utcnow() - timedelta(weeks=4)
-            recent_completions = [t for t in completed_with_dates if t.completed_at >= four_weeks_ago]
-            velocity = len(recent_completions) / 4  # tasks per week
-        else:
-            velocity = 0.0
+        # Team workload distribution
+        assignee_workload = {
+            assignee_id: {
+                "total_tasks": group_total,
+                "completed_tasks": group_completed,
+                "estimated_hours": estimated_hours,
+                "actual_hours": actual_hours
+            }
+            for assignee_id, group_total, group_completed, _, _, _, estimated_hours, actual_hours, _, _ in groups
+            if assignee_id
+        }
+        velocity = recent_completions / 4  # tasks per week
         
         return {
             "project_id": project_id,
             "total_tasks": total_tasks,
             "progress_percentage": round(progress_percentage, 1),
             "task_status_breakdown": {
-                "completed": len([t for t in project_tasks if t.status == TaskStatus.DONE]),
-                "in_progress": len([t for t in project_tasks if t.status == TaskStatus.IN_PROGRESS]),
-                "todo": len([t for t in project_tasks if t.status == TaskStatus.TODO]),
-                "cancelled": len([t for t in project_tasks if t.status == TaskStatus.CANCELLED])
+                "completed": completed_tasks,
+                "in_progress": in_progress,
+                "todo": todo,
+                "cancelled": cancelled
             },
             "time_tracking": {
                 "total_estimated_hours": total_estimated_hours,
@@ -420,10 +803,7 @@ class TaskService:
             },
             "team_workload": assignee_workload,
             "velocity": round(velocity, 1),
-            "overdue_tasks": len([
-                t for t in project_tasks 
-                if t.due_date and t.due_date < datetime.utcnow() and t.status != TaskStatus.DONE
-            ])
+            "overdue_tasks": overdue_tasks
         }
     
     def _user_has_project_access(self, db: Session, project_id: int, user_id: int) -> bool:
@@ -0,0 +1,253 @@
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .task_categories import normalize_text
+
+WORD_PATTERN = re.compile(r"\w+")
+# Too common to say anything about a task; dropped before hashing, as are numbers
+STOP_WORDS = frozenset((
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "para", "por", "se", "su", "un", "una", "y",
+    "an", "and", "for", "in", "is", "of", "on", "or", "the", "to", "with"
+))
+# Title terms count this many times a description term
+TITLE_WEIGHT = 2.0
+# Cached token hashes before the cache is cleared
+MAX_HASH_CACHE = 500000
+
+# (task id, project id, title, description)
+TaskText = Tuple[int, int, Optional[str], Optional[str]]
+
+class SimilarityIndex:
+    """Hashed TF-IDF vectors of task texts answering top-k cosine queries.
+
+    Words and word pairs of the title and description are hashed into
+    ``n_features`` buckets with sublinear term frequencies. The bulk of the
+    vectors lives in a column-major sparse matrix (feature → rows and term
+    frequencies), so a query reads only the postings of its own terms and
+    scores them with one bincount; the IDF weights and row norms are fixed
+    when the matrix is built. Tasks saved afterwards go to a small delta
+    index and replaced rows are tombstoned, until the delta grows past
+    ``delta_ratio`` of the matrix and both are compacted into a new matrix
+    with fresh IDF weights. Terms in more than ``max_df`` of the tasks (and
+    at least ``min_postings`` of them) are skipped at query time: their
+    postings are long and their weight small.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 1 << 20,
+        max_df: float = 0.1,
+        min_postings: int = 10000,
+        delta_ratio: float = 0.05,
+        min_delta: int = 1000
+    ):
+        self.n_features = n_features
+        self.max_df = max_df
+        self.min_postings = min_postings
+        self.delta_ratio = delta_ratio
+        self.min_delta = min_delta
+        self._lock = threading.RLock()
+        self._hashes: Dict[str, int] = {}
+        self._fingerprints: Dict[int, int] = {}
+        self._set_matrix(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                         np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._fingerprints
+
+    def task_ids(self) -> List[int]:
+        return list(self._fingerprints)
+
+    def _hash(self, gram: str) -> int:
+        feature = self._hashes.get(gram)
+        if feature is None:
+            if len(self._hashes) >= MAX_HASH_CACHE:
+                self._hashes.clear()
+            feature = self._hashes[gram] = zlib.crc32(gram.encode()) % self.n_features
+        return feature
+
+    def _counts(self, title: Optional[str], description: Optional[str]) -> Dict[int, float]:
+        counts: Dict[int, float] = {}
+        for text, weight in ((title, TITLE_WEIGHT), (description, 1.0)):
+            if not text:
+                continue
+            words = [
+                word for word in WORD_PATTERN.findall(normalize_text(text))
+                if word not in STOP_WORDS and not word.isdigit()
+            ]
+            for gram in words + [first + " " + second for first, second in zip(words, words[1:])]:
+                feature = self._hash(gram)
+                counts[feature] = counts.get(feature, 0.0) + weight
+        return counts
+
+    def vectorize(self, title: Optional[str], description: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Hashed features of a task text and their sublinear term frequencies"""
+        counts = self._counts(title, description)
+        features = np.fromiter(counts, dtype=np.int32, count=len(counts))
+        frequencies = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return features, 1 + np.log(frequencies)
+
+    @staticmethod
+    def fingerprint(project_id: int, title: Optional[str], description: Optional[str]) -> int:
+        return zlib.crc32(f"{project_id}\x00{title or ''}\x00{description or ''}".encode())
+
+    def load(self, tasks: Iterable[TaskText]):
+        """Replace the whole index with ``tasks`` in one bulk build"""
+        ids, projects, sizes, fingerprints = [], [], [], {}
+        entry_features, entry_counts = [], []
+        for task_id, project_id, title, description in tasks:
+            counts = self._counts(title, description)
+            entry_features.extend(counts)
+            entry_counts.extend(counts.values())
+            sizes.append(len(counts))
+            fingerprints[task_id] = self.fingerprint(project_id, title, description)
+            ids.append(task_id)
+            projects.append(project_id)
+        with self._lock:
+            self._fingerprints = fingerprints
+            self._set_matrix(
+                np.array(ids, dtype=np.int64), np.array(projects, dtype=np.int64),
+                np.repeat(np.arange(len(ids), dtype=np.int64), sizes),
+                np.array(entry_features, dtype=np.int32),
+                1 + np.log(np.array(entry_counts, dtype=np.float32))
+            )
+
+    def _set_matrix(self, ids: np.ndarray, projects: np.ndarray, entry_rows: np.ndarray,
+                    entry_features: np.ndarray, entry_tf: np.ndarray):
+        """Build the column-major matrix and its IDF weights from (row, feature, tf) entries"""
+        self._df = np.bincount(entry_features, minlength=self.n_features).astype(np.int64)
+        self._idf = (np.log((1.0 + len(ids)) / (1.0 + self._df)) + 1.0).astype(np.float32)
+        self._norms = np.sqrt(np.bincount(
+            entry_rows, weights=(entry_tf * self._idf[entry_features]) ** 2, minlength=len(ids)
+        )).astype(np.float32)
+        order = np.argsort(entry_features, kind="stable")
+        self._rows = entry_rows[order].astype(np.int32)
+        self._tf = entry_tf[order].astype(np.float32)
+        self._indptr = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(self._df, out=self._indptr[1:])
+        self._ids = ids
+        self._projects = projects
+        self._alive = np.ones(len(ids), dtype=bool)
+        self._row_of = {int(task_id): row for row, task_id in enumerate(ids.tolist())}
+        self._dead = 0
+        # task id → (project id, features, tf, norm) and feature → {task id: tf}
+        self._delta: Dict[int, Tuple[int, np.ndarray, np.ndarray, float]] = {}
+        self._delta_postings: Dict[int, Dict[int, float]] = {}
+
+    def upsert(self, task_id: int, project_id: int, title: Optional[str], description: Optional[str]) -> bool:
+        """Index a created or edited task; False when its text and project are unchanged"""
+        fingerprint = self.fingerprint(project_id, title, description)
+        with self._lock:
+            if self._fingerprints.get(task_id) == fingerprint:
+                return False
+            self._discard(task_id)
+            features, frequencies = self.vectorize(title, description)
+            norm = float(np.sqrt(((frequencies * self._idf[features]) ** 2).sum()))
+            self._delta[task_id] = (project_id, features, frequencies, norm)
+            for feature, frequency in zip(features.tolist(), frequencies.tolist()):
+                self._delta_postings.setdefault(feature, {})[task_id] = frequency
+            self._fingerprints[task_id] = fingerprint
+            self._maybe_compact()
+            return True
+
+    def remove(self, task_id: int) -> bool:
+        with self._lock:
+            if task_id not in self._fingerprints:
+                return False
+            self._discard(task_id)
+            del self._fingerprints[task_id]
+            self._maybe_compact()
+            return True
+
+    def _discard(self, task_id: int):
+        row = self._row_of.pop(task_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._dead += 1
+        entry = self._delta.pop(task_id, None)
+        if entry is not None:
+            for feature in entry[1].tolist():
+                postings = self._delta_postings[feature]
+                del postings[task_id]
+                if not postings:
+                    del self._delta_postings[feature]
+
+    def _maybe_compact(self):
+        limit = max(self.min_delta, self.delta_ratio * len(self._ids))
+        if len(self._delta) + self._dead > limit:
+            self.compact()
+
+    def compact(self):
+        """Fold the delta into the matrix, drop tombstones and refresh the IDF weights"""
+        with self._lock:
+            entry_features = np.repeat(np.arange(self.n_features, dtype=np.int32), np.diff(self._indptr))
+            keep = self._alive[self._rows]
+            new_row = np.cumsum(self._alive) - 1
+            live = np.flatnonzero(self._alive)
+            delta_ids = list(self._delta)
+            sizes = [len(self._delta[task_id][1]) for task_id in delta_ids]
+            delta_rows = np.repeat(np.arange(len(live), len(live) + len(delta_ids)), sizes)
+            self._set_matrix(
+                np.concatenate([self._ids[live], np.array(delta_ids, dtype=np.int64)]),
+                np.concatenate([self._projects[live], np.array([self._delta[t][0] for t in delta_ids], dtype=np.int64)]),
+                np.concatenate([new_row[self._rows[keep]], delta_rows]).astype(np.int64),
+                np.concatenate([entry_features[keep]] + [self._delta[t][1] for t in delta_ids]).astype(np.int32),
+                np.concatenate([self._tf[keep]] + [self._delta[t][2] for t in delta_ids]).astype(np.float32)
+            )
+
+    def query(
+        self,
+        title: Optional[str],
+        description: Optional[str] = None,
+        limit: int = 10,
+        project_ids: Optional[Sequence[int]] = None,
+        exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Top ``limit`` (task id, cosine similarity) pairs, optionally within ``project_ids``"""
+        features, frequencies = self.vectorize(title, description)
+        with self._lock:
+            weights = frequencies * self._idf[features]
+            query_norm = float(np.sqrt((weights ** 2).sum()))
+            if not query_norm:
+                return []
+            # Stored rows hold raw term frequencies: their IDF goes into the query weights
+            weights = weights * self._idf[features] / query_norm
+
+            common = self._df[features] > max(self.min_postings, self.max_df * len(self._ids))
+            if common.all():
+                common[np.argmin(self._df[features])] = False
+            scores: Dict[int, float] = {}
+            kept = features[~common]
+            if len(self._ids) and len(kept):
+                starts, ends = self._indptr[kept], self._indptr[kept + 1]
+                rows = np.concatenate([self._rows[s:e] for s, e in zip(starts, ends)])
+                values = np.concatenate([self._tf[s:e] * w for s, e, w in zip(starts, ends, weights[~common])])
+                candidates, inverse = np.unique(rows, return_inverse=True)
+                totals = np.bincount(inverse, weights=values) / self._norms[candidates]
+                mask = self._alive[candidates]
+                if project_ids is not None:
+                    mask &= np.isin(self._projects[candidates], np.asarray(list(project_ids), dtype=np.int64))
+                candidates, totals = candidates[mask], totals[mask]
+                if len(candidates) > limit + 1:
+                    top = np.argpartition(-totals, limit)[:limit + 1]
+                    candidates, totals = candidates[top], totals[top]
+                scores = dict(zip(self._ids[candidates].tolist(), totals.tolist()))
+
+            delta_scores: Dict[int, float] = {}
+            for feature, weight in zip(features.tolist(), weights.tolist()):
+                for task_id, frequency in self._delta_postings.get(feature, {}).items():
+                    delta_scores[task_id] = delta_scores.get(task_id, 0.0) + frequency * weight
+            allowed = set(project_ids) if project_ids is not None else None
+            for task_id, total in delta_scores.items():
+                project_id, _, _, norm = self._delta[task_id]
+                if norm and (allowed is None or project_id in allowed):
+                    scores[task_id] = total / norm
+
+        scores.pop(exclude, None)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(task_id, min(1.0, score)) for task_id, score in ranked if score > 0]
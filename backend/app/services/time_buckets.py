@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# SQL helpers for grouping timestamps into periods. Date functions differ per
+# database, so each helper takes the dialect name from ``db.bind.dialect.name``.
+
+GRANULARITIES = ("daily", "weekly", "monthly")
+
+def _sql_string(value: str) -> ColumnElement:
+    # Inline constants instead of bound parameters so the same expression can
+    # be repeated in SELECT and GROUP BY (PostgreSQL compares them textually)
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+def bucket_start(column: ColumnElement, granularity: str, dialect: str) -> ColumnElement:
+    """SQL expression truncating a timestamp to the start of its day/week/month.
+
+    Weeks start on Monday on every backend.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    if dialect == "postgresql":
+        unit = {"daily": "day", "weekly": "week", "monthly": "month"}[granularity]
+        return func.date_trunc(_sql_string(unit), column)
+    if dialect == "mysql":
+        if granularity == "daily":
+            return func.timestamp(func.date(column))
+        if granularity == "weekly":
+            return func.timestamp(func.subdate(func.date(column), func.weekday(column)))
+        return func.timestamp(func.date_format(column, _sql_string("%Y-%m-01")))
+
+    # SQLite: 'weekday 0' jumps forward to Sunday, '-6 days' lands on Monday.
+    # The microsecond suffix matches how SQLAlchemy stores DateTime values, so
+    # the buckets compare correctly against bound datetime parameters.
+    if granularity == "daily":
+        modifiers = ["start of day"]
+    elif granularity == "weekly":
+        modifiers = ["weekday 0", "-6 days", "start of day"]
+    else:
+        modifiers = ["start of month"]
+    return func.datetime(column, *[_sql_string(m) for m in modifiers]).concat(_sql_string(".000000"))
+
+def python_bucket_start(value: datetime, granularity: str) -> datetime:
+    """Python equivalent of bucket_start for bound parameters"""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "daily":
+        return day
+    if granularity == "weekly":
+        return day - timedelta(days=day.weekday())
+    if granularity == "monthly":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+def hours_between(start: ColumnElement, end: ColumnElement, dialect: str) -> ColumnElement:
+    """SQL expression for the number of hours from start to end"""
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start) / 3600.0
+    if dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), start, end) / 3600.0
+    return (func.julianday(end) - func.julianday(start)) * 24.0
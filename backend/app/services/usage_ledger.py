@@ -0,0 +1,181 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..database import SessionLocal
+from ..models.llm_usage import LLMUsage
+
+load_dotenv()
+
+# Every row carries every column so batches insert as one executemany
+ROW_DEFAULTS = {
+    "project_id": None, "user_id": None, "analysis": None, "model": "unknown",
+    "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "latency_ms": 0.0,
+    "breaker_state": None, "outcome": "success", "streamed": False, "error": None
+}
+
+# Project/user/analysis the current LLM calls are made for
+_usage_scope: ContextVar[Dict[str, Any]] = ContextVar("llm_usage_scope", default={})
+
+@contextmanager
+def usage_scope(**attributes):
+    """Attribute LLM calls made inside the block (project_id, user_id, analysis)"""
+    merged = {**_usage_scope.get(), **{k: v for k, v in attributes.items() if v is not None}}
+    token = _usage_scope.set(merged)
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+def current_usage_scope() -> Dict[str, Any]:
+    return dict(_usage_scope.get())
+
+def usage_counts(usage: Any) -> Dict[str, int]:
+    """Token counts from an OpenAI-style ``usage`` object (None-safe)"""
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    details = getattr(usage, "prompt_tokens_details", None)
+    # OpenAI-compatible providers report cached prompt tokens in the details;
+    # Deepseek's own API uses prompt_cache_hit_tokens
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    return {
+        "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+        "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+        "cached_tokens": int(cached or 0)
+    }
+
+class UsageLedger:
+    """Buffers LLM usage rows and writes them in batches from a background thread.
+
+    ``record`` never blocks the calling request: rows go to a bounded queue
+    (dropped and counted when it is full) and a daemon thread inserts them
+    every ``flush_seconds`` or as soon as ``batch_size`` rows are waiting.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = 100,
+        flush_seconds: float = 2.0,
+        queue_size: int = 10000,
+        enabled: bool = True
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.enabled = enabled
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stats = {"recorded": 0, "written": 0, "dropped": 0, "failed_batches": 0}
+
+    @classmethod
+    def from_env(cls) -> "UsageLedger":
+        return cls(
+            batch_size=int(os.getenv("LLM_USAGE_BATCH_SIZE", "100")),
+            flush_seconds=float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "2")),
+            queue_size=int(os.getenv("LLM_USAGE_QUEUE_SIZE", "10000")),
+            enabled=os.getenv("LLM_USAGE_ENABLED", "true").lower() == "true"
+        )
+
+    def record(self, **entry):
+        """Queue one usage row; scope attributes fill in project/user/analysis"""
+        if not self.enabled:
+            return
+        row = {**ROW_DEFAULTS, **current_usage_scope(), **{k: v for k, v in entry.items() if v is not None}}
+        row = {k: v for k, v in row.items() if k in ROW_DEFAULTS or k == "created_at"}
+        row.setdefault("created_at", datetime.utcnow())
+        row["cache_hit"] = row.get("cached_tokens", 0) > 0
+        if row.get("error"):
+            row["error"] = str(row["error"])[:255]
+        try:
+            self._queue.put_nowait(row)
+            self._stats["recorded"] += 1
+        except queue.Full:
+            self._stats["dropped"] += 1
+            return
+        self._ensure_started()
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every queued row now; returns how many were written"""
+        written = 0
+        with self._write_lock:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                written += self._write(batch)
+        return written
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the writer thread after a final flush"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self._stop.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"queued": self._queue.qsize(), "batch_size": self.batch_size, **self._stats}
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="llm-usage-ledger", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ LLM usage ledger flush failed: {e}")
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> int:
+        db = self.session_factory()
+        try:
+            db.execute(insert(LLMUsage), batch)
+            db.commit()
+            self._stats["written"] += len(batch)
+            return len(batch)
+        except Exception as e:
+            # Telemetry must never take requests down; the batch is lost
+            db.rollback()
+            self._stats["failed_batches"] += 1
+            self._stats["dropped"] += len(batch)
+            print(f"⚠️ Could not write {len(batch)} LLM usage rows: {e}")
+            return 0
+        finally:
+            db.close()
+
+# Shared by every DeepseekAIService instance of this worker
+usage_ledger = UsageLedger.from_env()
@@ -0,0 +1,170 @@
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from ..models.task import Task, TaskStatus
+from .time_buckets import bucket_start, python_bucket_start
+
+load_dotenv()
+
+# (project id, assignee id); assignee None is the project as a whole
+SeriesKey = Tuple[int, Optional[int]]
+
+@dataclass
+class VelocityAnomaly:
+    project_id: int
+    assignee_id: Optional[int]
+    week_start: datetime
+    kind: str  # "drop" or "spike"
+    completions: float
+    baseline: float  # Mean completions per week over the preceding window
+    z_score: float
+    hours: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "assignee_id": self.assignee_id,
+            "week_start": self.week_start.date().isoformat(),
+            "kind": self.kind,
+            "completions": int(self.completions),
+            "baseline": round(self.baseline, 2),
+            "z_score": round(self.z_score, 2),
+            "hours": round(self.hours, 1)
+        }
+
+@dataclass
+class VelocitySeries:
+    """Weekly completions and completed hours, one row per project and per assignee"""
+    weeks: List[datetime]
+    keys: List[SeriesKey]
+    completions: np.ndarray  # len(keys) x len(weeks)
+    hours: np.ndarray
+
+    def row(self, project_id: int, assignee_id: Optional[int] = None) -> Optional[int]:
+        try:
+            return self.keys.index((project_id, assignee_id))
+        except ValueError:
+            return None
+
+class VelocityMonitor:
+    """Change detection on weekly task completions.
+
+    One aggregate query returns completions and completed hours per
+    project, assignee and calendar week for the last ``history_weeks``
+    complete weeks (the current week is still filling up). Each week is
+    compared with the mean and standard deviation of the ``window_weeks``
+    before it, for every series at once with cumulative sums. The noise
+    floor is the Poisson deviation sqrt(mean), so a steady series does not
+    flag every small change, and series averaging fewer than
+    ``min_baseline`` completions per week are not judged at all.
+    """
+
+    def __init__(
+        self,
+        window_weeks: int = 6,
+        z_threshold: float = 2.5,
+        min_baseline: float = 1.0,
+        history_weeks: int = 12
+    ):
+        self.window_weeks = max(2, window_weeks)
+        self.z_threshold = z_threshold
+        self.min_baseline = min_baseline
+        self.history_weeks = max(history_weeks, self.window_weeks + 1)
+
+    @classmethod
+    def from_env(cls) -> "VelocityMonitor":
+        return cls(
+            window_weeks=int(os.getenv("VELOCITY_WINDOW_WEEKS", "6")),
+            z_threshold=float(os.getenv("VELOCITY_ANOMALY_Z", "2.5")),
+            min_baseline=float(os.getenv("VELOCITY_MIN_BASELINE", "1.0")),
+            history_weeks=int(os.getenv("VELOCITY_HISTORY_WEEKS", "12"))
+        )
+
+    def weekly_series(self, db: Session, project_ids: Sequence[int], now: Optional[datetime] = None) -> VelocitySeries:
+        """Completion series of the given projects and their assignees, from one GROUP BY"""
+        current_week = python_bucket_start(now or datetime.utcnow(), "weekly")
+        weeks = [current_week - timedelta(weeks=offset) for offset in range(self.history_weeks, 0, -1)]
+        week = bucket_start(Task.completed_at, "weekly", db.bind.dialect.name)
+        rows = db.query(
+            Task.project_id,
+            Task.assignee_id,
+            week,
+            func.count(Task.id),
+            func.sum(func.coalesce(Task.actual_hours, Task.estimated_hours, 0))
+        ).filter(
+            Task.project_id.in_(list(project_ids)),
+            Task.status == TaskStatus.DONE,
+            Task.completed_at >= weeks[0],
+            Task.completed_at < current_week
+        ).group_by(Task.project_id, Task.assignee_id, week).all()
+
+        keys: List[SeriesKey] = [(project_id, None) for project_id in project_ids]
+        keys.extend(sorted({(project_id, assignee_id) for project_id, assignee_id, _, _, _ in rows if assignee_id is not None}))
+        position = {key: index for index, key in enumerate(keys)}
+        completions = np.zeros((len(keys), len(weeks)))
+        hours = np.zeros((len(keys), len(weeks)))
+        for project_id, assignee_id, started, count, total_hours in rows:
+            if isinstance(started, str):
+                started = datetime.fromisoformat(started)
+            if started.tzinfo is not None:
+                # Postgres returns week starts in the session time zone
+                started = started.astimezone(timezone.utc).replace(tzinfo=None)
+            column = (started - weeks[0]).days // 7
+            if not 0 <= column < len(weeks):
+                continue
+            targets = [position[(project_id, None)]]
+            if assignee_id is not None:
+                targets.append(position[(project_id, assignee_id)])
+            for row in targets:
+                completions[row, column] += count
+                hours[row, column] += total_hours or 0
+        return VelocitySeries(weeks=weeks, keys=keys, completions=completions, hours=hours)
+
+    def rolling_scores(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Baseline mean and z-score of every week against the ``window_weeks`` before it.
+
+        Columns are weeks ``window_weeks`` .. end of ``values``.
+        """
+        window = self.window_weeks
+        padded = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(values, axis=1, out=padded[:, 1:])
+        squares = np.zeros_like(padded)
+        np.cumsum(values ** 2, axis=1, out=squares[:, 1:])
+        mean = (padded[:, window:-1] - padded[:, :-window - 1]) / window
+        variance = np.maximum(0.0, (squares[:, window:-1] - squares[:, :-window - 1]) / window - mean ** 2)
+        sigma = np.maximum(np.sqrt(variance), np.sqrt(np.maximum(mean, 1e-9)))
+        return mean, (values[:, window:] - mean) / sigma
+
+    def detect(self, series: VelocitySeries) -> List[VelocityAnomaly]:
+        """Anomalies in the last complete week, project-wide rows first, strongest first"""
+        if not series.keys:
+            return []
+        baseline, z_scores = self.rolling_scores(series.completions)
+        baseline, z_scores = baseline[:, -1], z_scores[:, -1]
+        flagged = np.flatnonzero((baseline >= self.min_baseline) & (np.abs(z_scores) >= self.z_threshold))
+        anomalies = [
+            VelocityAnomaly(
+                project_id=series.keys[row][0],
+                assignee_id=series.keys[row][1],
+                week_start=series.weeks[-1],
+                kind="drop" if z_scores[row] < 0 else "spike",
+                completions=float(series.completions[row, -1]),
+                baseline=float(baseline[row]),
+                z_score=float(z_scores[row]),
+                hours=float(series.hours[row, -1])
+            )
+            for row in flagged
+        ]
+        anomalies.sort(key=lambda anomaly: (anomaly.assignee_id is not None, -abs(anomaly.z_score)))
+        return anomalies
+
+    def scan(self, db: Session, project_ids: Sequence[int], now: Optional[datetime] = None) -> Tuple[VelocitySeries, List[VelocityAnomaly]]:
+        series = self.weekly_series(db, project_ids, now)
+        return series, self.detect(series)
+
+velocity_monitor = VelocityMonitor.from_env()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the AI analysis paths against the local LLM stub
+
+Seeds a throwaway database, starts llm_stub_server.py in-process (or uses
+--base-url) and runs each scenario with a pool of concurrent callers,
+reporting throughput, p50/p95/p99 latency and how many results came from
+the LLM versus the rule-based fallback.
+
+Usage:
+    python benchmark_ai.py --profile realistic --requests 40 --concurrency 8
+    python benchmark_ai.py --scenarios risk,stream --base-url http://127.0.0.1:18080/v1
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm_stub_server import StubConfig, start_in_thread
+
+# Provider behaviour of each profile
+PROFILES = {
+    "fast": StubConfig(latency="fixed", latency_ms=50, token_ms=0),
+    "realistic": StubConfig(latency="lognormal", latency_ms=800, latency_spread=0.5, token_ms=20,
+                            error_rate=0.02, invalid_rate=0.01),
+    "degraded": StubConfig(latency="lognormal", latency_ms=2500, latency_spread=0.8, token_ms=40,
+                           error_rate=0.15, invalid_rate=0.05, timeout_rate=0.02, hang_seconds=20)
+}
+SCENARIOS = ("risk", "progress", "hybrid", "auto", "stream", "portfolio")
+
+def percentile(values, fraction):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+def seed_database(projects: int, tasks_per_project: int):
+    import app.main  # noqa: F401 - registers every model before create_all
+    from app.database import SessionLocal, engine, Base
+    from app.models.user import User
+    from app.models.project import Project, ProjectStatus
+    from app.models.task import Task, TaskStatus, TaskPriority
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    user = User(email="bench@example.com", username="bench", full_name="Benchmark", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project_ids = []
+    for index in range(projects):
+        project = Project(name=f"Bench {index}", owner_id=user.id, status=ProjectStatus.ACTIVE, budget=50000,
+                          created_at=now - timedelta(days=90), end_date=now + timedelta(days=rng.randint(-5, 60)))
+        db.add(project)
+        db.commit()
+        # Vary the size so auto mode has something to route
+        count = tasks_per_project if index % 3 else max(3, tasks_per_project // 10)
+        for task_index in range(count):
+            status = rng.choice(list(TaskStatus))
+            created = now - timedelta(days=rng.randint(5, 80))
+            db.add(Task(title=f"Task {task_index}", project_id=project.id, creator_id=user.id, status=status,
+                        priority=rng.choice(list(TaskPriority)), estimated_hours=rng.choice([None, 4, 8, 16]),
+                        actual_hours=rng.choice([None, 3, 9, 20]), created_at=created,
+                        due_date=now + timedelta(days=rng.randint(-10, 20)),
+                        completed_at=created + timedelta(days=rng.randint(1, 10)) if status == TaskStatus.DONE else None))
+        db.commit()
+        project_ids.append(project.id)
+    user_id = user.id
+    db.close()
+    return user_id, project_ids
+
+def run_analysis(mode: str, analysis_type: str, project_id: int, user_id: int):
+    from app.database import SessionLocal
+    from app.services.ai_service import AIProjectAnalysisService
+
+    db = SessionLocal()
+    try:
+        insights = AIProjectAnalysisService(mode, user_id=user_id).generate_specific_analysis(db, project_id, analysis_type)
+        return insights[0].get("analysis_source") or "error" if insights else "error"
+    finally:
+        db.close()
+
+def run_stream(project_id: int, user_id: int):
+    from app.services.analysis_stream_service import AnalysisStreamService
+
+    events = Counter()
+    first_narrative = None
+    started = time.perf_counter()
+    for message in AnalysisStreamService("llm", user_id=user_id).stream(project_id, "risk"):
+        event = message.split("\n", 1)[0].replace("event: ", "")
+        events[event] += 1
+        if event == "narrative" and first_narrative is None:
+            first_narrative = time.perf_counter() - started
+    source = "hybrid" if events["narrative"] else ("error" if events["error"] else "local")
+    return source, first_narrative
+
+def run_portfolio(project_ids, user_id: int):
+    from app.database import SessionLocal
+    from app.services.ai_service import AIProjectAnalysisService
+
+    db = SessionLocal()
+    try:
+        results = AIProjectAnalysisService("llm", user_id=user_id).analyze_portfolio_risk(project_ids, db)
+        return Counter(assessment.analysis_source for assessment in results.values())
+    finally:
+        db.close()
+
+def run_scenario(name: str, args, user_id: int, project_ids, stub_stats):
+    from app.services.circuit_breaker import deepseek_breaker
+
+    deepseek_breaker.reset()
+    provider_before = stub_stats()
+    latencies, sources, first_tokens = [], Counter(), []
+
+    def call(index: int):
+        project_id = project_ids[index % len(project_ids)]
+        started = time.perf_counter()
+        if name == "stream":
+            source, first_token = run_stream(project_id, user_id)
+            if first_token is not None:
+                first_tokens.append(first_token)
+        elif name in ("risk", "progress"):
+            source = run_analysis("llm", name, project_id, user_id)
+        else:
+            source = run_analysis(name, "risk", project_id, user_id)
+        latencies.append(time.perf_counter() - started)
+        sources[source] += 1
+
+    started = time.perf_counter()
+    if name == "portfolio":
+        # One sweep over every project per request
+        for _ in range(max(1, args.requests // len(project_ids))):
+            sweep_started = time.perf_counter()
+            sources.update(run_portfolio(project_ids, user_id))
+            latencies.append(time.perf_counter() - sweep_started)
+    else:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(call, range(args.requests)))
+    wall = time.perf_counter() - started
+
+    provider_after = stub_stats()
+    completed = sum(sources.values())
+    result = {
+        "scenario": name,
+        "requests": len(latencies),
+        "analyses": completed,
+        "throughput_per_s": round(completed / wall, 2) if wall else None,
+        "latency_ms": {label: round(percentile(latencies, fraction) * 1000, 1)
+                       for label, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "sources": dict(sources),
+        "provider_calls": provider_after.get("requests", 0) - provider_before.get("requests", 0),
+        "breaker": deepseek_breaker.state
+    }
+    if first_tokens:
+        result["first_narrative_ms_p50"] = round(percentile(first_tokens, 0.5) * 1000, 1)
+    return result
+
+def print_table(results):
+    print(f"\n{'scenario':<10} {'req':>5} {'ok/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls':>6}  sources")
+    for result in results:
+        latency = result["latency_ms"]
+        print(f"{result['scenario']:<10} {result['requests']:>5} {result['throughput_per_s']:>7} "
+              f"{latency['p50']:>9} {latency['p95']:>9} {latency['p99']:>9} {result['provider_calls']:>6}  "
+              f"{result['sources']}" + (f"  first narrative p50 {result['first_narrative_ms_p50']} ms"
+                                        if "first_narrative_ms_p50" in result else ""))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI analysis paths against a stub provider")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--base-url", help="Use a running stub (or provider) instead of starting one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--projects", type=int, default=12)
+    parser.add_argument("--tasks", type=int, default=60, help="Tasks per project (every third project is small)")
+    parser.add_argument("--requests", type=int, default=24, help="Analyses per scenario")
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stub = None
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        stub, base_url = start_in_thread(PROFILES[args.profile])
+
+    # Configure before the app modules read the environment
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file.name}"
+    os.environ.setdefault("DEEPSEEK_API_KEY", "stub-key")
+    os.environ["DEEPSEEK_BASE_URL"] = base_url
+    os.environ.setdefault("INSIGHT_SCHEDULER_ENABLED", "false")
+    os.environ.setdefault("ANALYSIS_COALESCE_BACKEND", "local")
+
+    def stub_stats():
+        return stub.RequestHandlerClass.state.get_stats() if stub else {}
+
+    try:
+        user_id, project_ids = seed_database(args.projects, args.tasks)
+        print(f"📊 Benchmarking {', '.join(scenarios)} against {base_url} "
+              f"({args.profile if stub else 'external'}; {args.requests} requests, concurrency {args.concurrency})")
+        results = []
+        for name in scenarios:
+            results.append(run_scenario(name, args, user_id, project_ids, stub_stats))
+            print(f"   ✅ {name} done")
+
+        from app.services.usage_ledger import usage_ledger
+        usage_ledger.stop()
+        if args.json:
+            print(json.dumps({"profile": args.profile, "base_url": base_url, "results": results}, indent=2))
+        else:
+            print_table(results)
+    finally:
+        if stub:
+            stub.shutdown()
+        os.unlink(db_file.name)
+
+if __name__ == "__main__":
+    main()
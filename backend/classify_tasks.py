@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Classifies stored tasks into work categories again whenever
+TASK_CATEGORY_KEYWORDS changes (the migration that adds the category column
+classifies the rows it finds)
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.project import Project
+from app.models.task import Task
+from app.services.task_categories import task_classifier
+
+def reclassify(db, project_ids=None, batch_size=1000, dry_run=False):
+    """Recompute every task's category; returns counts per category and how many changed"""
+    stats = {"tasks": 0, "changed": 0, "categories": {}}
+    last_id = 0
+    while True:
+        query = db.query(Task.id, Task.title, Task.category).filter(Task.id > last_id)
+        if project_ids:
+            query = query.filter(Task.project_id.in_(project_ids))
+        rows = query.order_by(Task.id).limit(batch_size).all()
+        if not rows:
+            break
+        changes = []
+        for task_id, title, category in rows:
+            new_category = task_classifier.classify(title)
+            stats["categories"][new_category] = stats["categories"].get(new_category, 0) + 1
+            if new_category != category:
+                changes.append({"id": task_id, "category": new_category})
+        stats["tasks"] += len(rows)
+        stats["changed"] += len(changes)
+        if changes and not dry_run:
+            db.bulk_update_mappings(Task, changes)
+            db.commit()
+        last_id = rows[-1].id
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify tasks into work categories")
+    parser.add_argument("--project-id", type=int, action="append", help="Only classify these projects (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("🏷️ Classifying tasks..." + (" (dry run)" if args.dry_run else ""))
+        stats = reclassify(db, project_ids=args.project_id, dry_run=args.dry_run)
+        print(f"✅ {stats['tasks']} tasks, {stats['changed']} {'to update' if args.dry_run else 'updated'}")
+        for category, count in sorted(stats["categories"].items()):
+            print(f"   {category}: {count}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
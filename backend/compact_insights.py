@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+One-off compaction of duplicate AI insights: merges rows with the same
+project, type and content into the oldest copy and fingerprints every row
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.project import Project
+from app.services.insight_dedup_service import InsightDedupService
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate AI insights")
+    parser.add_argument("--project-id", type=int, action="append", help="Only compact these projects (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be merged without changing anything")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print("🧹 Compacting duplicate insights..." + (" (dry run)" if args.dry_run else ""))
+        stats = InsightDedupService().compact(db, project_ids=args.project_id, dry_run=args.dry_run)
+        print(f"✅ {stats['projects']} projects, {stats['groups']} duplicate groups, "
+              f"{stats['deleted']} rows {'to delete' if args.dry_run else 'deleted'}")
+        print(f"   Fingerprinted: {stats['fingerprinted']}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
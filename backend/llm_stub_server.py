@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible chat-completions server for offline AI testing
+
+Answers the prompts built by PromptBuilder with schema-valid JSON (single,
+batched and plain-text narratives), streams like the real API and injects
+latency, errors and invalid answers so the AI paths can be benchmarked
+without OpenRouter.
+
+Usage:
+    python llm_stub_server.py --port 18080 --latency lognormal --latency-ms 800 --error-rate 0.02
+    DEEPSEEK_API_KEY=stub DEEPSEEK_BASE_URL=http://127.0.0.1:18080/v1 uvicorn app.main:app
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Canned phrases the generated answers are drawn from
+PHRASES = [
+    "Replanificar las tareas vencidas con el equipo",
+    "Asignar responsables a las tareas sin dueño",
+    "Revisar el alcance del próximo hito",
+    "Reducir el trabajo en curso por persona",
+    "Escalar los bloqueos críticos al patrocinador"
+]
+RISK_FACTOR = {"factor": "Retrasos", "severity": "medium", "description": "Tareas vencidas acumuladas", "impact": 0.5}
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub provider.
+
+    ``latency_spread`` is relative: ±fraction for uniform, the standard
+    deviation as a fraction of the mean for normal and sigma for lognormal
+    (``latency_ms`` is then the median). ``responses`` maps a substring of
+    the user message to a canned answer (object or text); first match wins.
+    """
+    latency: str = "lognormal"
+    latency_ms: float = 800.0
+    latency_spread: float = 0.5
+    token_ms: float = 20.0
+    error_rate: float = 0.0
+    error_statuses: Tuple[int, ...] = (500, 503, 429)
+    invalid_rate: float = 0.0
+    timeout_rate: float = 0.0
+    hang_seconds: float = 30.0
+    cached_ratio: float = 0.5
+    seed: Optional[int] = None
+    responses: Dict[str, Any] = field(default_factory=dict)
+
+class StubState:
+    """Shared random generator and counters of one server"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "invalid": 0, "timeouts": 0, "latency_ms_total": 0.0}
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def sample_latency(self) -> float:
+        """Seconds before the first byte of a response"""
+        config = self.config
+        mean = config.latency_ms / 1000
+        with self.lock:
+            if config.latency == "uniform":
+                value = self.random.uniform(mean * (1 - config.latency_spread), mean * (1 + config.latency_spread))
+            elif config.latency == "normal":
+                value = self.random.gauss(mean, mean * config.latency_spread)
+            elif config.latency == "lognormal":
+                value = self.random.lognormvariate(math.log(mean), config.latency_spread) if mean > 0 else 0.0
+            else:
+                value = mean
+        return max(0.0, value)
+
+    def count(self, name: str, amount: float = 1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        served = stats["requests"] - stats["errors"] - stats["timeouts"]
+        stats["avg_latency_ms"] = round(stats.pop("latency_ms_total") / served, 1) if served else None
+        return stats
+
+def _field_value(description: str, rng: random.Random) -> Any:
+    """Plausible value for one field of a PromptBuilder schema description"""
+    description = description.replace(" (opcional)", "")
+    if description.startswith("[{"):
+        return [dict(RISK_FACTOR)]
+    if description.startswith("["):
+        match = re.search(r"max (\d+)", description)
+        count = min(int(match.group(1)) if match else 3, 3)
+        return rng.sample(PHRASES, count)
+    if description.startswith("number"):
+        return round(rng.uniform(0.2, 0.8), 2)
+    if description.startswith("int"):
+        return rng.randint(5, 60)
+    if "|" in description:
+        return rng.choice(description.split("|"))
+    return PHRASES[0]
+
+def parse_schema(text: str) -> Dict[str, str]:
+    """Field descriptions of a PromptBuilder schema.
+
+    Not parsed as JSON: object-list hints embed their own quotes
+    (``"[{"factor","severity":...}] max 5"``).
+    """
+    body = text.strip()[1:-1]
+    pieces, depth, start = [], 0, 0
+    for index, char in enumerate(body):
+        if char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+        elif char == "," and depth == 0 and re.match(r'"\w+":"', body[index + 1:]):
+            pieces.append(body[start:index])
+            start = index + 1
+    pieces.append(body[start:])
+    fields = {}
+    for piece in pieces:
+        match = re.match(r'"(\w+)":"(.*)"$', piece, re.DOTALL)
+        if match:
+            fields[match.group(1)] = match.group(2)
+    return fields
+
+def generate_answer(user_message: str, rng: random.Random) -> str:
+    """Answer a PromptBuilder prompt: JSON for a schema, text lines otherwise"""
+    schema_match = re.search(r"^Esquema: (\{.*\})$", user_message, re.MULTILINE)
+    if not schema_match:
+        return "\n".join(rng.sample(PHRASES, 3))
+    schema = parse_schema(schema_match.group(1))
+
+    def section() -> Dict[str, Any]:
+        return {name: _field_value(description, rng) for name, description in schema.items()}
+
+    if "una clave por id" in user_message:
+        data = user_message.split("Datos: ", 1)[1] if "Datos: " in user_message else "{}"
+        try:
+            keys = list(json.loads(data))
+        except json.JSONDecodeError:
+            keys = re.findall(r'"(\d+)":\{', data)
+        return json.dumps({key: section() for key in keys}, ensure_ascii=False)
+    return json.dumps(section(), ensure_ascii=False)
+
+def _usage(messages: List[Dict[str, Any]], completion: str, cached_ratio: float) -> Dict[str, Any]:
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    prompt_tokens = max(1, prompt_chars // 4)
+    # The shared system prompt is the part a provider can serve from its cache
+    system_tokens = sum(len(str(m.get("content", ""))) for m in messages if m.get("role") == "system") // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": max(1, len(completion) // 4),
+        "total_tokens": prompt_tokens + max(1, len(completion) // 4),
+        "prompt_tokens_details": {"cached_tokens": int(system_tokens * cached_ratio)}
+    }
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "LLMStub/1.0"
+    state: StubState  # Set on the handler class by make_server
+
+    def log_message(self, format, *args):
+        pass  # Benchmarks make thousands of requests
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            self._json(200, self.state.get_stats())
+        else:
+            self._json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        state, config = self.state, self.state.config
+        state.count("requests")
+        if state.roll(config.timeout_rate):
+            state.count("timeouts")
+            time.sleep(config.hang_seconds)
+            self._json(504, {"error": {"message": "Upstream timeout"}})
+            return
+
+        latency = state.sample_latency()
+        time.sleep(latency)
+        if state.roll(config.error_rate):
+            state.count("errors")
+            with state.lock:
+                status = state.random.choice(config.error_statuses)
+            headers = {"Retry-After": "1"} if status == 429 else {}
+            self._json(status, {"error": {"message": f"Injected error {status}", "type": "stub_error"}}, headers)
+            return
+        state.count("latency_ms_total", latency * 1000)
+
+        messages = body.get("messages") or []
+        content = self._answer(messages)
+        usage = _usage(messages, content, config.cached_ratio)
+        model = body.get("model", "stub")
+        if body.get("stream"):
+            state.count("streamed")
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream(model, content, usage if include_usage else None)
+            return
+        self._json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": usage
+        })
+
+    def _answer(self, messages: List[Dict[str, Any]]) -> str:
+        state = self.state
+        user_message = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), "")
+        if state.roll(state.config.invalid_rate):
+            state.count("invalid")
+            return "Lo siento, no puedo responder en JSON ahora mismo."
+        for needle, response in state.config.responses.items():
+            if needle in user_message:
+                return response if isinstance(response, str) else json.dumps(response, ensure_ascii=False)
+        with state.lock:
+            return generate_answer(user_message, state.random)
+
+    def _stream(self, model: str, content: str, usage: Optional[Dict[str, Any]]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def send(chunk: Dict[str, Any]):
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        try:
+            send(chunk({"role": "assistant", "content": ""}))
+            for piece in re.findall(r"\S+\s*|\s+", content):
+                if self.state.config.token_ms:
+                    time.sleep(self.state.config.token_ms / 1000)
+                send(chunk({"content": piece}))
+            send(chunk({}, "stop"))
+            if usage:
+                send({"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                      "model": model, "choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped reading
+
+    def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+def make_server(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Threaded stub server; port 0 picks a free port (see server.server_address)"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"state": StubState(config)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_in_thread(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub in a daemon thread; returns (server, base_url for DEEPSEEK_BASE_URL)"""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+def parse_args(argv=None) -> Tuple[StubConfig, str, int]:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub provider for offline AI testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Mean (median for lognormal) time to first byte")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Relative spread of the distribution")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an HTTP error")
+    parser.add_argument("--error-statuses", default="500,503,429")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Fraction of answers that are not valid JSON")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--cached-ratio", type=float, default=0.5, help="Share of the system prompt reported as cached")
+    parser.add_argument("--responses", help="JSON file mapping a prompt substring to a canned answer")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    responses = {}
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as handle:
+            responses = json.load(handle)
+    config = StubConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        token_ms=args.token_ms,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(status) for status in args.error_statuses.split(",") if status),
+        invalid_rate=args.invalid_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        cached_ratio=args.cached_ratio,
+        seed=args.seed,
+        responses=responses
+    )
+    return config, args.host, args.port
+
+def main():
+    config, host, port = parse_args()
+    server = make_server(config, host, port)
+    print(f"🧪 LLM stub listening on http://{host}:{server.server_address[1]}/v1")
+    print(f"   latency={config.latency} {config.latency_ms:.0f}ms ±{config.latency_spread}, "
+          f"errors={config.error_rate:.0%}, invalid={config.invalid_rate:.0%}, timeouts={config.timeout_rate:.0%}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping LLM stub")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Write today's ProjectAnalytics snapshot, refresh weekly/monthly rollups and
+trim old rows (for cron; the insight scheduler also runs this on each sweep)
+"""
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.services.analytics_service import ProjectAnalyticsService
+
+def main():
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        print("📊 Running analytics pipeline...")
+        result = ProjectAnalyticsService().run_pipeline(db)
+        print(f"✅ Daily snapshots: {result['snapshots']}")
+        print(f"   Weekly rollups: {result['weekly_rollups']}, monthly rollups: {result['monthly_rollups']}")
+        print(f"   Deleted: {result['deleted']['daily']} daily, {result['deleted']['weekly']} weekly rows")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Delete expired AI insights in batches, optionally archiving them to gzip NDJSON
+(for cron; the insight scheduler also runs this on each sweep)
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.services.insight_retention_service import InsightRetentionService
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge expired AI insights")
+    parser.add_argument("--archive-dir", help="Write purged rows to gzip NDJSON files in this directory")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many delete batches")
+    parser.add_argument("--skip-backfill", action="store_true", help="Do not set expires_at on older rows")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        service = InsightRetentionService()
+        if not args.skip_backfill:
+            print(f"🕒 Expiry set on {service.backfill_expiry(db)} older insights")
+        print("🧹 Purging expired insights...")
+        result = service.purge_expired(db, archive_dir=args.archive_dir, max_batches=args.max_batches)
+        print(f"✅ Deleted {result['deleted']} insights in {result['batches']} batches")
+        if result["archive_file"]:
+            print(f"   Archived to {result['archive_file']}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
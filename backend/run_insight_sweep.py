@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Run one insight sweep over all active projects (for cron)
+
+Usage:
+    python run_insight_sweep.py          # skip if another worker holds the sweep lock
+    python run_insight_sweep.py --force  # run even if the lock is held
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.append(str(Path(__file__).parent))
+
+from app.database import engine, Base
+from app.services.insight_scheduler import InsightSweepScheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a one-shot insight sweep")
+    parser.add_argument("--force", action="store_true", help="Ignore the sweep lock")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    scheduler = InsightSweepScheduler()
+    print("🔍 Running insight sweep...")
+    metrics = scheduler.run_if_leader(force=args.force)
+    if metrics is None:
+        print("⏭️  Another worker already ran the sweep for this interval, skipping")
+        return 0
+
+    print(f"✅ Sweep finished in {metrics['last_duration_seconds']}s")
+    print(f"   Projects: {metrics['projects_total']} total, {metrics['projects_analyzed']} analyzed, "
+          f"{metrics['projects_failed']} failed, {metrics['projects_skipped']} skipped")
+    print(f"   Insights created: {metrics['insights_created']}")
+    return 1 if metrics["projects_failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for the Server-Sent Events analysis stream
+Runs against a throwaway SQLite database with an in-process fake streaming client
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import AIInsight
+from app.services.analysis_stream_service import AnalysisStreamService
+
+def fake_stream_client(deltas, fail_after=None):
+    def create(**request):
+        assert request["stream"] is True
+        def chunks():
+            for i, delta in enumerate(deltas):
+                if fail_after is not None and i == fail_after:
+                    raise RuntimeError("connection reset")
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        return chunks()
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def parse_events(stream):
+    events = []
+    for message in stream:
+        lines = message.strip().split("\n")
+        assert lines[0].startswith("event: ") and lines[1].startswith("data: "), message
+        events.append((lines[0][7:], json.loads(lines[1][6:])))
+    return events
+
+def setup_data(db):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="stream@example.com", username="stream", full_name="Stream User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+    project = Project(name="Stream", owner_id=user.id, status=ProjectStatus.ACTIVE, end_date=now + timedelta(days=20))
+    db.add(project)
+    db.commit()
+    for i in range(6):
+        db.add(Task(title=f"Task {i}", project_id=project.id, creator_id=user.id,
+                    status=TaskStatus.DONE if i < 2 else TaskStatus.TODO, due_date=now - timedelta(days=2)))
+    db.commit()
+    return project.id
+
+def test_streamed_narrative(project_id):
+    print("=== TESTING STREAMED NARRATIVE ===")
+    service = AnalysisStreamService("hybrid")
+    service.deepseek_service.deepseek_enabled = True
+    service.deepseek_service.client = fake_stream_client(["1. Reprogramar ", "tareas vencidas\n", "- Asignar ", "responsables"])
+    service.deepseek_service.breaker.reset()
+
+    events = parse_events(service.stream(project_id, "risk"))
+    names = [name for name, _ in events]
+    print(f"   Events: {names}")
+    assert names[0] == "metrics", "metrics must come first"
+    assert names.count("narrative") == 4
+    assert names[-2:] == ["insights", "done"]
+    end = dict(events)["narrative_end"]
+    assert end["items"] == ["Reprogramar tareas vencidas", "Asignar responsables"], end
+    assert end["analysis_source"] == "hybrid"
+    ids = dict(events)["insights"]["ids"]
+    db = SessionLocal()
+    stored = db.query(AIInsight).filter(AIInsight.id.in_(ids)).all()
+    assert stored and "Reprogramar tareas vencidas" in stored[0].recommendations
+    db.close()
+    assert service.deepseek_service.breaker.get_state()["calls"] == 1
+    print("✅ Metrics, narrative deltas and insight ids are streamed in order")
+
+def test_failed_and_local_streams(project_id):
+    print("=== TESTING FAILED AND LOCAL STREAMS ===")
+    service = AnalysisStreamService("hybrid")
+    service.deepseek_service.deepseek_enabled = True
+    service.deepseek_service.client = fake_stream_client(["Una ", "acción"], fail_after=1)
+    service.deepseek_service.breaker.reset()
+    events = dict(parse_events(service.stream(project_id, "progress")))
+    assert "narrative_error" in events and events["narrative_end"]["analysis_source"] == "local"
+    assert events["insights"]["ids"], "insight saved with local text when the stream fails"
+    service.deepseek_service.breaker.reset()
+
+    names = [name for name, _ in parse_events(AnalysisStreamService("local").stream(project_id, "risk"))]
+    assert "narrative_start" not in names and names[-1] == "done", names
+
+    names = [name for name, _ in parse_events(AnalysisStreamService("local").stream(999999, "risk"))]
+    assert names == ["error"], names
+    print("✅ Streams finish with local text, or an error event, when the LLM is not usable")
+
+def main():
+    print("Testing analysis streaming...")
+    db = SessionLocal()
+    try:
+        project_id = setup_data(db)
+    finally:
+        db.close()
+    try:
+        test_streamed_narrative(project_id)
+        test_failed_and_local_streams(project_id)
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test script for the workload-balancing assignment optimizer
+Checks plan quality against brute force, capacity and priority handling,
+speed on large teams and the plan/apply endpoint
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.services.auth_service import AuthService
+from app.services import assignment_optimizer as optimizer_module
+from app.services.assignment_optimizer import AssignmentOptimizer
+
+def best_max_load(hours, members):
+    """Reference: smallest possible maximum load by exhaustive search"""
+    best = float("inf")
+    for choice in itertools.product(range(members), repeat=len(hours)):
+        loads = [0.0] * members
+        for task_hours, member in zip(hours, choice):
+            loads[member] += task_hours
+        best = min(best, max(loads))
+    return best
+
+def test_balance():
+    """Greedy plans stay within the LPT bound of the optimum"""
+    print("=== TESTING BALANCE ===")
+    optimizer = AssignmentOptimizer(capacity_hours=1000)
+    plan = optimizer.plan([(i, h, None) for i, h in enumerate([7, 6, 5, 4, 3, 3])], {1: 0, 2: 0, 3: 0})
+    assert len(plan.assignments) == 6 and plan.max_load == 10, plan.loads
+    print(f"✅ 28 h over 3 people: loads {sorted(plan.loads.values())}")
+
+    rng = random.Random(2)
+    worst = 1.0
+    for _ in range(40):
+        hours = [rng.randint(1, 12) for _ in range(rng.randint(4, 8))]
+        plan = optimizer.plan([(i, h, None) for i, h in enumerate(hours)], {1: 0, 2: 0, 3: 0})
+        ratio = plan.max_load / best_max_load(hours, 3)
+        assert ratio <= 4 / 3 + 1e-9, (hours, plan.loads)
+        worst = max(worst, ratio)
+    print(f"✅ 40 random instances within {worst:.2f}x of the optimum")
+
+    plan = optimizer.plan([(1, 10, None), (2, 10, None)], {1: 25, 2: 0})
+    assert plan.loads == {1: 25, 2: 20}
+    print("✅ Existing open work counts toward the load")
+
+def test_capacity_and_priority():
+    """Capacity is never exceeded and runs out on low-priority work first"""
+    print("\n=== TESTING CAPACITY AND PRIORITY ===")
+    optimizer = AssignmentOptimizer(default_hours=4, capacity_hours=20)
+    tasks = [(1, 8, TaskPriority.LOW), (2, 8, TaskPriority.CRITICAL), (3, 8, TaskPriority.HIGH),
+             (4, 8, TaskPriority.MEDIUM), (5, None, TaskPriority.LOW), (6, 8, TaskPriority.HIGH)]
+    plan = optimizer.plan(tasks, {1: 0, 2: 4}, {2: 16})
+    assigned = {task_id for task_id, _, _ in plan.assignments}
+    assert all(plan.loads[m] <= plan.capacities[m] for m in plan.loads), plan.loads
+    assert {2, 3, 6} <= assigned and 1 in plan.unassigned, plan.unassigned
+    assert 5 in assigned, "a small task still fits the leftover capacity"
+    print(f"✅ Loads {plan.loads} within capacity, unassigned {plan.unassigned}")
+
+    plan = optimizer.plan([(1, 8, None)], {1: 30}, {1: 20})
+    assert plan.assignments == [] and plan.unassigned == [1]
+    print("✅ Overloaded members receive nothing")
+
+def test_speed():
+    """Thousands of tasks and hundreds of members in well under a second"""
+    print("\n=== TESTING SPEED ===")
+    rng = random.Random(7)
+    priorities = list(TaskPriority)
+    tasks = [(i, rng.choice([None, 1, 2, 4, 8, 16, 24]), rng.choice(priorities)) for i in range(5000)]
+    loads = {member: rng.uniform(0, 30) for member in range(300)}
+    capacities = {member: rng.choice([20, 40, 60, 120]) for member in loads}
+    timings = []
+    for _ in range(3):
+        plan = AssignmentOptimizer().plan(tasks, loads, capacities)
+        timings.append(plan.elapsed_ms)
+    print(f"   5000 tasks, 300 members: {min(timings):.1f} ms, {len(plan.assignments)} assigned, max load {plan.max_load:.0f} h")
+    assert min(timings) < 200, timings
+    assert all(plan.loads[m] <= capacities[m] for m in plan.loads if plan.assigned_hours[m])
+    print("✅ Plan computed in well under a second")
+
+def setup_data():
+    db = SessionLocal()
+    owner = User(email="lead@example.com", username="lead", full_name="Lead",
+                 hashed_password=AuthService.get_password_hash("pw123456"))
+    member = User(email="dev@example.com", username="dev", full_name="Dev",
+                  hashed_password=AuthService.get_password_hash("pw123456"))
+    viewer = User(email="viewer@example.com", username="viewer", full_name="Viewer", hashed_password="x")
+    db.add_all([owner, member, viewer])
+    db.commit()
+    project = Project(name="Balance", owner_id=owner.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    db.add_all([
+        ProjectMember(project_id=project.id, user_id=owner.id, role="admin"),
+        ProjectMember(project_id=project.id, user_id=member.id, role="member"),
+        ProjectMember(project_id=project.id, user_id=viewer.id, role="viewer")
+    ])
+    # The developer already carries 20 h of open work
+    db.add(Task(title="En curso", project_id=project.id, creator_id=owner.id, assignee_id=member.id,
+                estimated_hours=20, status=TaskStatus.IN_PROGRESS))
+    for index in range(12):
+        db.add(Task(title=f"Tarea {index}", project_id=project.id, creator_id=owner.id,
+                    estimated_hours=[2, 4, 6][index % 3], priority=TaskPriority.HIGH if index < 4 else TaskPriority.MEDIUM))
+    db.add(Task(title="Cerrada", project_id=project.id, creator_id=owner.id, estimated_hours=5, status=TaskStatus.DONE))
+    db.commit()
+    ids = owner.id, member.id, viewer.id, project.id
+    db.close()
+    return ids
+
+def test_api():
+    """Proposal, validation, permissions and the one-transaction apply"""
+    print("\n=== TESTING API ===")
+    owner_id, member_id, viewer_id, project_id = setup_data()
+    with TestClient(app) as client:
+        def login(email):
+            token = client.post("/api/v1/auth/login", json={"email": email, "password": "pw123456"}).json()
+            return {"Authorization": f"Bearer {token['access_token']}"}
+        lead, dev = login("lead@example.com"), login("dev@example.com")
+
+        response = client.post("/api/v1/tasks/bulk/assignment-plan", headers=dev, json={"project_id": project_id})
+        assert response.status_code == 200, response.text
+        plan = response.json()
+        members = {m["user_id"]: m for m in plan["members"]}
+        assert set(members) == {owner_id, member_id}, "viewers are not candidates"
+        assert len(plan["assignments"]) == 12 and plan["applied"] is False
+        assert members[member_id]["current_hours"] == 20
+        assert abs(members[owner_id]["total_hours"] - members[member_id]["total_hours"]) <= 6
+        db = SessionLocal()
+        assert db.query(Task).filter(Task.assignee_id.is_(None)).count() == 13, "a proposal changes nothing"
+        print(f"✅ Proposal: max load {plan['max_load_hours']} h, loads {[m['total_hours'] for m in plan['members']]}")
+
+        checks = [
+            (dev, {"project_id": project_id, "apply": True}, 403),
+            (lead, {"project_id": project_id, "member_ids": [viewer_id]}, 400),
+            (lead, {"project_id": project_id, "task_ids": [999999]}, 400),
+            (lead, {"project_id": 999999}, 404)
+        ]
+        for headers, body, expected in checks:
+            assert client.post("/api/v1/tasks/bulk/assignment-plan", headers=headers, json=body).status_code == expected, body
+        closed_id = db.query(Task.id).filter(Task.title == "Cerrada").scalar()
+        response = client.post("/api/v1/tasks/bulk/assignment-plan", headers=lead,
+                               json={"project_id": project_id, "task_ids": [closed_id]}).json()
+        assert response["unassigned"] == [{"task_id": closed_id, "reason": "closed"}]
+        print("✅ Permissions, membership and task validation")
+
+        # A task assigned by someone else mid-apply rolls the whole plan back
+        real_plan = optimizer_module.assignment_optimizer.plan
+        def plan_then_race(*args, **kwargs):
+            result = real_plan(*args, **kwargs)
+            other = SessionLocal()
+            other.query(Task).filter(Task.id == result.assignments[-1][0]).update({Task.assignee_id: owner_id})
+            other.commit()
+            other.close()
+            return result
+        optimizer_module.assignment_optimizer.plan = plan_then_race
+        try:
+            response = client.post("/api/v1/tasks/bulk/assignment-plan", headers=lead, json={"project_id": project_id, "apply": True})
+        finally:
+            optimizer_module.assignment_optimizer.plan = real_plan
+        assert response.status_code == 409, response.text
+        db.expire_all()
+        assert db.query(Task).filter(Task.assignee_id.is_(None)).count() == 12
+        print("✅ Conflicting apply rolled back")
+
+        response = client.post("/api/v1/tasks/bulk/assignment-plan", headers=lead,
+                               json={"project_id": project_id, "apply": True, "capacity_hours": {str(member_id): 30}})
+        plan = response.json()
+        assert response.status_code == 200 and plan["applied"], response.text
+        db.expire_all()
+        assert db.query(Task).filter(Task.assignee_id.is_(None), Task.status != TaskStatus.DONE).count() == 0
+        dev_hours = sum(t.estimated_hours for t in db.query(Task).filter(Task.assignee_id == member_id))
+        assert dev_hours <= 30
+        print(f"✅ Applied {len(plan['assignments'])} assignments in one transaction, developer at {dev_hours} h")
+
+        # End to end on a large team: 3000 open tasks, 200 members
+        rng = random.Random(11)
+        big = Project(name="Big", owner_id=owner_id, status=ProjectStatus.ACTIVE)
+        db.add(big)
+        db.commit()
+        db.bulk_insert_mappings(User, [
+            {"email": f"u{i}@example.com", "username": f"u{i}", "full_name": f"U{i}", "hashed_password": "x"}
+            for i in range(200)
+        ])
+        db.commit()
+        user_ids = [user_id for user_id, in db.query(User.id).filter(User.username.like("u%"))]
+        db.bulk_insert_mappings(ProjectMember, [{"project_id": big.id, "user_id": user_id, "role": "member"} for user_id in user_ids])
+        db.bulk_insert_mappings(Task, [
+            {"title": f"T{i}", "project_id": big.id, "creator_id": owner_id, "estimated_hours": rng.choice([None, 1, 2, 4, 8]),
+             "priority": rng.choice(list(TaskPriority)), "status": TaskStatus.TODO}
+            for i in range(3000)
+        ])
+        db.commit()
+        started = time.perf_counter()
+        response = client.post("/api/v1/tasks/bulk/assignment-plan", headers=lead, json={"project_id": big.id, "apply": True})
+        elapsed = time.perf_counter() - started
+        plan = response.json()
+        assert response.status_code == 200 and len(plan["assignments"]) + len(plan["unassigned"]) == 3000, response.text[:300]
+        assert elapsed < 1.0, elapsed
+        print(f"✅ {len(plan['assignments'])} of 3000 tasks over 201 members planned and applied in {elapsed * 1000:.0f} ms "
+              f"(optimizer {plan['elapsed_ms']} ms, max load {plan['max_load_hours']} h)")
+        db.close()
+
+def main():
+    print("Testing the assignment optimizer...")
+    try:
+        test_balance()
+        test_capacity_and_priority()
+        test_speed()
+        test_api()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the Deepseek circuit breaker and fast local fallback
+Points the provider at a closed local port, no server or API key needed
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "sk-or-test-key"
+os.environ["DEEPSEEK_BASE_URL"] = "http://127.0.0.1:9/v1"
+os.environ["DEEPSEEK_BREAKER_MIN_CALLS"] = "3"
+os.environ["DEEPSEEK_BREAKER_OPEN_SECONDS"] = "0.5"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError, deepseek_breaker
+from app.services.deepseek_service import DeepseekAIService
+
+def test_state_machine():
+    """Closed -> open on failure rate, half-open after the cooldown, closed on a good probe"""
+    print("=== TESTING STATE MACHINE ===")
+    breaker = CircuitBreaker("test", failure_rate_threshold=0.5, slow_call_seconds=1.0,
+                             window_size=4, minimum_calls=4, open_seconds=0.2)
+    for failed in (False, True, False, True):
+        assert breaker.allow_request()
+        breaker.record_failure(0.01) if failed else breaker.record_success(0.01)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+    time.sleep(0.25)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request() and not breaker.allow_request(), "only one probe allowed"
+    breaker.record_success(2.0)  # slow probe re-opens
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.25)
+    assert breaker.allow_request()
+    breaker.record_success(0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    print(f"   {breaker.get_state()}")
+    print("✅ Breaker transitions are correct")
+
+def test_slow_calls_open_breaker():
+    print("=== TESTING SLOW CALL THRESHOLD ===")
+    breaker = CircuitBreaker("slow", slow_call_seconds=0.5, slow_call_rate_threshold=0.5, window_size=4, minimum_calls=2)
+    breaker.record_success(1.0)
+    breaker.record_success(1.0)
+    assert breaker.is_open()
+    print("✅ Slow successful calls open the breaker")
+
+def test_fallback_skips_provider():
+    """After the breaker opens, analyses return the local result without calling out"""
+    print("=== TESTING FAST FALLBACK ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email="breaker@example.com", username="breaker", full_name="Breaker", hashed_password="x")
+        db.add(user)
+        db.commit()
+        project = Project(name="Breaker", owner_id=user.id, status=ProjectStatus.ACTIVE)
+        db.add(project)
+        db.commit()
+        db.add(Task(title="T", project_id=project.id, creator_id=user.id, status=TaskStatus.TODO))
+        db.commit()
+
+        service = DeepseekAIService()
+        assert service.is_enabled()
+        deepseek_breaker.reset()
+        for _ in range(3):
+            service.analyze_project_risk(project.id, db)
+        state = deepseek_breaker.get_state()
+        print(f"   After failures: {state['state']} ({state['failures']} failures)")
+        assert state["state"] == CircuitBreaker.OPEN
+
+        started = time.monotonic()
+        assessment = service.analyze_project_risk(project.id, db)
+        elapsed = time.monotonic() - started
+        assert assessment.risk_level in ("Bajo", "Medio", "Alto")
+        assert deepseek_breaker.get_state()["calls"] == 3, "provider was called while open"
+        print(f"   Fallback took {elapsed * 1000:.1f} ms")
+
+        try:
+            service._call_deepseek_api("ping")
+            assert False, "call should be rejected"
+        except CircuitOpenError:
+            pass
+        print("✅ Open breaker goes straight to the local fallback")
+    finally:
+        db.close()
+
+def main():
+    print("Testing Deepseek Circuit Breaker")
+    print("=" * 50)
+    try:
+        test_state_machine()
+        test_slow_calls_open_breaker()
+        test_fallback_skips_provider()
+        print("Testing completed!")
+    finally:
+        os.unlink(_db_file.name)
+
+if __name__ == "__main__":
+    main()
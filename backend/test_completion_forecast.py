@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the Monte Carlo completion forecast
+Checks the simulation models, their speed and the local progress prediction
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.completion_forecast import CompletionForecaster
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+def test_constant_history():
+    """Deterministic history gives an exact answer"""
+    print("=== TESTING CONSTANT HISTORY ===")
+    forecaster = CompletionForecaster(simulations=2000)
+    # 5 tasks every week: 52 tasks take 10 weeks and 2/5 of the eleventh
+    forecast = forecaster.forecast(52, np.array([]), np.full(12, 5.0), now=NOW, deadline=NOW + timedelta(days=80))
+    assert forecast.model == "throughput"
+    assert all(abs(days - 72.8) < 1e-9 for days in forecast.days.values()), forecast.days
+    assert forecast.on_time_probability == 1.0
+    print(f"✅ Throughput model: {forecast.days[50]:.1f} days at every percentile")
+
+    # 10 tasks of 2 days over 2 assignees
+    forecast = forecaster.forecast(10, np.full(30, 2.0), np.zeros(1), workers=2, now=NOW)
+    assert forecast.model == "cycle_time" and abs(forecast.days[95] - 10.0) < 1e-9
+    print("✅ Cycle-time model used when throughput history is too short")
+
+    forecast = forecaster.forecast(0, np.array([]), np.array([]), now=NOW)
+    assert forecast.model == "done" and forecast.days[95] == 0
+    print("✅ Nothing remaining forecasts today")
+
+def test_percentiles():
+    """Variable history spreads the percentiles in order"""
+    print("\n=== TESTING PERCENTILES ===")
+    forecaster = CompletionForecaster(simulations=10000)
+    history = np.array([0, 2, 6, 3, 8, 1, 4, 5, 0, 7, 3, 4], dtype=float)
+    forecast = forecaster.forecast(60, np.array([]), history, now=NOW, deadline=NOW + timedelta(weeks=16), seed=1)
+    p50, p80, p95 = forecast.days[50], forecast.days[80], forecast.days[95]
+    mean_weeks = 60 / history.mean()
+    assert p50 < p80 < p95 and abs(p50 / 7 - mean_weeks) < 2, forecast.days
+    assert 0 < forecast.on_time_probability < 1
+    again = forecaster.forecast(60, np.array([]), history, now=NOW, deadline=NOW + timedelta(weeks=16), seed=1)
+    assert again.days == forecast.days, "same seed, same forecast"
+    print(f"✅ P50 {p50:.0f} / P80 {p80:.0f} / P95 {p95:.0f} days, on time {forecast.on_time_probability:.0%}")
+
+    stalled = CompletionForecaster(simulations=1000, max_weeks=10).forecast(500, np.array([]), np.array([0, 0, 1.0]), now=NOW)
+    assert stalled.beyond_horizon > 0.9 and stalled.days[95] == 70
+    print(f"✅ {stalled.beyond_horizon:.0%} of stalled simulations capped at the horizon")
+
+def test_speed():
+    """10k simulations of a large backlog in under 50 ms"""
+    print("\n=== TESTING SPEED ===")
+    forecaster = CompletionForecaster(simulations=10000)
+    rng = np.random.default_rng(3)
+    history = rng.poisson(5, 12).astype(float)
+    cycle_times = rng.lognormal(1, 0.6, 400)
+    timings = {}
+    # A 400-task backlog (~80 weeks at 5 a week) and a young project with 200 tasks left
+    for name, args in (("throughput", (400, cycle_times, history)), ("cycle_time", (200, cycle_times, np.zeros(2)))):
+        runs = []
+        for _ in range(3):
+            forecast = forecaster.forecast(*args, now=NOW)
+            runs.append(forecast.elapsed_ms)
+        timings[name] = min(runs)
+        assert forecast.model == name
+    print(f"   {', '.join(f'{name} {ms:.1f} ms' for name, ms in timings.items())}")
+    assert all(ms < 50 for ms in timings.values()), timings
+    print("✅ Each forecast under 50 ms")
+
+def test_progress_prediction():
+    """The local progress prediction uses the forecast"""
+    print("\n=== TESTING PROGRESS PREDICTION ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    now = datetime.utcnow()
+    user = User(email="forecast@example.com", username="forecast", full_name="Forecast", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Forecast", owner_id=user.id, status=ProjectStatus.ACTIVE,
+                      created_at=now - timedelta(weeks=10), end_date=now + timedelta(weeks=6))
+    db.add(project)
+    db.commit()
+    for index in range(40):
+        done = index < 24  # 24 done over 8 weeks: 3 a week, 16 left
+        created = now - timedelta(weeks=9)
+        db.add(Task(title=f"Task {index}", project_id=project.id, creator_id=user.id, assignee_id=user.id,
+                    status=TaskStatus.DONE if done else TaskStatus.TODO, created_at=created,
+                    completed_at=now - timedelta(days=2 + index * 7 // 3) if done else None))
+    db.commit()
+
+    prediction = AIProjectAnalysisService("local").predict_project_completion(project.id, db)
+    forecast = prediction.forecast
+    assert forecast["model"] == "throughput" and forecast["remaining_tasks"] == 16
+    scenarios = prediction.timeline_scenarios
+    assert scenarios["optimistic"]["completion_date"] <= scenarios["realistic"]["completion_date"] <= scenarios["pessimistic"]["completion_date"]
+    assert scenarios["realistic"]["probability"] == 0.8
+    assert prediction.completion_probability == forecast["on_time_probability"]
+    assert abs((prediction.predicted_completion_date - now).days - forecast["p50_days"]) <= 1
+    print(f"✅ {prediction.predicted_completion_date:%Y-%m-%d} (P50), P95 {forecast['p95_date'][:10]}, "
+          f"on time {prediction.completion_probability:.0%}, {forecast['elapsed_ms']} ms")
+    db.close()
+
+def main():
+    print("Testing the completion forecast...")
+    try:
+        test_constant_history()
+        test_percentiles()
+        test_speed()
+        test_progress_prediction()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
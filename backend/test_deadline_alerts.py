@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script for deadline alerts
+Checks the firing order of the heap, rescheduled and closed tasks, that
+repeated alerts are stored once, the indexed startup query and the cost of
+loading and maintaining many tasks
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import text
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import AIInsight, InsightType, InsightPriority
+from app.services.deadline_alerts import DeadlineAlertEngine, _naive, parse_lead_hours
+
+NOW = datetime(2026, 10, 19, 9, 0)
+
+def setup(db):
+    user = User(email="ana@example.com", username="ana", full_name="Ana", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Entrega", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    return user, project
+
+def add_task(db, project, user, title, due_in_hours, status=TaskStatus.TODO):
+    task = Task(title=title, project_id=project.id, creator_id=user.id, assignee_id=user.id, status=status,
+                due_date=NOW + timedelta(hours=due_in_hours) if due_in_hours is not None else None)
+    db.add(task)
+    db.commit()
+    return task
+
+def fired(alerts):
+    return [(alert.title.split(": ", 1)[1], alert.priority) for alert in alerts]
+
+def test_firing_order():
+    """Events fire in due order, each lead time once, overdue last"""
+    print("=== TESTING FIRING ORDER ===")
+    assert parse_lead_hours("24, 48,0,24") == [48.0, 24.0, 0.0]
+    # Aware values (Postgres, non-UTC session) are converted, not just stripped
+    assert _naive(datetime(2026, 10, 19, 11, 0, tzinfo=timezone(timedelta(hours=2)))) == NOW
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user, project = setup(db)
+    add_task(db, project, user, "Informe", 30)
+    add_task(db, project, user, "Demo", 60)
+    add_task(db, project, user, "Retrasada", -5)
+    add_task(db, project, user, "Antigua", -200)  # Beyond the lookback
+    add_task(db, project, user, "Hecha", 10, TaskStatus.DONE)
+    add_task(db, project, user, "Sin fecha", None)
+
+    engine_ = DeadlineAlertEngine(lead_hours=[48, 24, 0], lookback_hours=72)
+    engine_.load(db, NOW)
+    assert engine_.get_metrics()["tracked_tasks"] == 3
+    # Informe is already inside 48 h, Retrasada already overdue: both fire now
+    assert fired(engine_.fire_due(db, NOW)) == [("Informe", InsightPriority.MEDIUM), ("Retrasada", InsightPriority.CRITICAL)]
+    assert engine_.seconds_until_next(NOW) == 6 * 3600
+    assert engine_.fire_due(db, NOW + timedelta(hours=5)) == []
+    assert fired(engine_.fire_due(db, NOW + timedelta(hours=12))) == [("Informe", InsightPriority.HIGH), ("Demo", InsightPriority.MEDIUM)]
+    assert fired(engine_.fire_due(db, NOW + timedelta(hours=100))) == [
+        ("Informe", InsightPriority.CRITICAL), ("Demo", InsightPriority.HIGH), ("Demo", InsightPriority.CRITICAL)
+    ]
+    assert engine_.pending() == 0 and engine_.seconds_until_next() is None
+    print(f"✅ {engine_.fired} alerts fired in due order; closed, undated and long-overdue tasks skipped")
+    db.close()
+
+def test_rescheduled_and_closed():
+    """Writes reported by TaskService and changes made by other workers"""
+    print("\n=== TESTING RESCHEDULED AND CLOSED TASKS ===")
+    db = SessionLocal()
+    db.query(AIInsight).delete()
+    db.query(Task).delete()
+    db.commit()
+    user = db.query(User).first()
+    project = db.query(Project).first()
+    moved = add_task(db, project, user, "Movida", 30)
+    closed = add_task(db, project, user, "Cerrada", 30)
+    elsewhere = add_task(db, project, user, "Movida fuera", 30)
+    engine_ = DeadlineAlertEngine(lead_hours=[24, 0], lookback_hours=72)
+    engine_.load(db, NOW)
+
+    # Reported writes: the due date moves a week out, the other task is done
+    moved.due_date = NOW + timedelta(days=7, hours=6)
+    closed.status = TaskStatus.DONE
+    db.commit()
+    engine_.task_saved(moved, NOW)
+    engine_.task_saved(closed, NOW)
+    # Another worker moves a due date without this process hearing about it
+    db.query(Task).filter(Task.id == elsewhere.id).update({Task.due_date: NOW + timedelta(days=3)})
+    db.commit()
+
+    assert engine_.fire_due(db, NOW + timedelta(hours=8)) == []
+    assert engine_.get_metrics()["tracked_tasks"] == 2
+    assert fired(engine_.fire_due(db, NOW + timedelta(days=2, hours=1))) == [("Movida fuera", InsightPriority.HIGH)]
+    assert fired(engine_.fire_due(db, NOW + timedelta(days=6, hours=7))) == [("Movida fuera", InsightPriority.CRITICAL), ("Movida", InsightPriority.HIGH)]
+    print("✅ Stale events dropped; rescheduled tasks alert at their new due date; done tasks never alert")
+
+    # New task created already inside the window wakes the thread's wait
+    head = engine_.seconds_until_next(NOW)
+    urgent = add_task(db, project, user, "Urgente", 2)
+    engine_.task_saved(urgent, NOW)
+    assert engine_.seconds_until_next(NOW) == 0 < head
+    assert fired(engine_.fire_due(db, NOW)) == [("Urgente", InsightPriority.HIGH)]
+    print("✅ A new task moves the head of the heap")
+    db.close()
+
+def test_dedup():
+    """The same alert fired twice (restart, several workers) is stored once"""
+    print("\n=== TESTING DEDUP ===")
+    db = SessionLocal()
+    db.query(AIInsight).delete()
+    db.commit()
+    for _ in range(3):
+        engine_ = DeadlineAlertEngine(lead_hours=[24, 0], lookback_hours=72)
+        engine_.load(db, NOW)
+        engine_.fire_due(db, NOW)
+    alerts = db.query(AIInsight).filter(AIInsight.insight_type == InsightType.DEADLINE_ALERT).all()
+    assert len(alerts) == 1 and alerts[0].title == "⏰ Vence en menos de 24 h: Urgente", [a.title for a in alerts]
+    assert alerts[0].expires_at is not None and alerts[0].data_source == "Deadline Alerts"
+    print("✅ Three engines firing the same alert store one insight")
+    db.close()
+
+def test_scale():
+    """Startup load uses the due_date index; many tasks load and update quickly"""
+    print("\n=== TESTING SCALE ===")
+    db = SessionLocal()
+    user = db.query(User).first()
+    project = db.query(Project).first()
+    db.execute(
+        Task.__table__.insert(),
+        [{"title": f"Tarea {i}", "project_id": project.id, "creator_id": user.id, "status": "TODO",
+          "priority": "MEDIUM", "category": "general",
+          "due_date": NOW + timedelta(minutes=(i % 20000) - 4000) if i % 5 else None} for i in range(100000)]
+    )
+    db.commit()
+
+    plan = " ".join(row[-1] for row in db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id, due_date FROM tasks WHERE due_date >= :start AND status NOT IN ('DONE', 'CANCELLED')"
+    ), {"start": NOW}))
+    assert "ix_tasks_due_date" in plan, plan
+    print(f"   Plan: {plan}")
+
+    engine_ = DeadlineAlertEngine()
+    started = time.perf_counter()
+    engine_.load(db, NOW)
+    load = (time.perf_counter() - started) * 1000
+    tasks = db.query(Task).filter(Task.due_date.isnot(None)).limit(10000).all()
+    started = time.perf_counter()
+    for task in tasks:
+        task.due_date = task.due_date + timedelta(days=1)
+        engine_.task_saved(task, NOW)
+    update = (time.perf_counter() - started) * 1000
+    print(f"✅ {engine_.get_metrics()['tracked_tasks']} tasks loaded in {load:.0f} ms; 10k reschedules in {update:.0f} ms")
+    assert load < 5000 and update < 1000
+    db.rollback()
+    db.close()
+
+def main():
+    print("Testing deadline alerts...")
+    try:
+        test_firing_order()
+        test_rescheduled_and_closed()
+        test_dedup()
+        test_scale()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test script for the overdue and upcoming task lists
+Checks the lists against filtering every task in Python, paging and totals,
+project access, the index plan, the API routes and response time for a user
+with 20k assigned tasks
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from app.main import app
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.services.auth_service import AuthService
+from app.services.task_service import TaskService, OPEN_STATUSES
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+def setup(db):
+    ana = User(email="ana@example.com", username="ana", full_name="Ana",
+               hashed_password=AuthService.get_password_hash("secret123"))
+    ben = User(email="ben@example.com", username="ben", full_name="Ben", hashed_password="x")
+    db.add_all([ana, ben])
+    db.commit()
+    projects = [Project(name=f"P{i}", owner_id=ben.id, status=ProjectStatus.ACTIVE) for i in range(4)]
+    db.add_all(projects)
+    db.commit()
+    # Ana left the last project but still has tasks assigned there
+    db.add_all([ProjectMember(project_id=project.id, user_id=ana.id, role="member") for project in projects[:3]])
+    rng = random.Random(5)
+    db.execute(Task.__table__.insert(), [
+        {
+            "title": f"Tarea {i}",
+            "project_id": projects[i % 4].id,
+            "creator_id": ben.id,
+            "assignee_id": ana.id if i % 3 else ben.id,
+            "status": rng.choice(list(TaskStatus)).name,
+            "priority": rng.choice(list(TaskPriority)).name,
+            "category": "other",
+            "due_date": NOW + timedelta(hours=rng.randint(-600, 600)) if i % 7 else None
+        }
+        for i in range(3000)
+    ])
+    db.commit()
+    return ana, ben, projects
+
+def expected(db, user_id, project_ids, low, high, newest_first):
+    """Reference: every task loaded and filtered in Python"""
+    tasks = [
+        task for task in db.query(Task).all()
+        if task.assignee_id == user_id and task.status in OPEN_STATUSES and task.project_id in project_ids
+        and task.due_date is not None and (low is None or task.due_date >= low) and (high is None or task.due_date < high)
+    ]
+    tasks.sort(key=lambda task: (task.due_date, task.id), reverse=newest_first)
+    return [task.id for task in tasks]
+
+def test_lists():
+    """Pages and totals match the Python filter; other projects stay hidden"""
+    print("=== TESTING OVERDUE AND UPCOMING LISTS ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    ana, ben, projects = setup(db)
+    service = TaskService()
+    visible = {project.id for project in projects[:3]}
+
+    overdue = expected(db, ana.id, visible, None, NOW, True)
+    upcoming = expected(db, ana.id, visible, NOW, NOW + timedelta(days=7), False)
+    assert overdue and upcoming
+    pages = [service.get_overdue_tasks(db, ana.id, skip, 50, NOW) for skip in range(0, len(overdue) + 50, 50)]
+    assert all(page["total"] == len(overdue) for page in pages)
+    assert [task["id"] for page in pages for task in page["tasks"]] == overdue
+    page = service.get_upcoming_tasks(db, ana.id, 7, 10, 20, NOW)
+    assert page["total"] == len(upcoming) and [task["id"] for task in page["tasks"]] == upcoming[10:30]
+    assert all(task["status"] in {s.value for s in OPEN_STATUSES} for task in page["tasks"])
+    print(f"✅ {len(overdue)} overdue and {len(upcoming)} upcoming tasks paged exactly like the Python filter")
+
+    # Ben owns every project
+    assert service.get_overdue_tasks(db, ben.id, 0, 1, NOW)["total"] == len(
+        expected(db, ben.id, {project.id for project in projects}, None, NOW, True))
+
+    summary_now = datetime.utcnow()
+    summary = service.get_user_tasks_summary(db, ana.id)
+    assert summary["overdue_tasks"] == len(expected(db, ana.id, visible, None, summary_now, True))
+    assert [task["id"] for task in summary["recent_overdue"]] == expected(db, ana.id, visible, None, summary_now, True)[:5]
+    print("✅ Projects the user left are hidden; the summary uses the same counts")
+
+    plan = " ".join(row[-1] for row in db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT count(*) FROM tasks WHERE assignee_id = :user AND status IN ('TODO', 'IN_PROGRESS', 'IN_REVIEW') "
+        "AND due_date < :now AND project_id IN (1, 2, 3)"
+    ), {"user": ana.id, "now": NOW}))
+    assert "COVERING INDEX ix_tasks_assignee_status_due" in plan, plan
+    print(f"   Plan: {plan}")
+    db.close()
+
+def test_routes():
+    """Routes are reachable (not captured by /{task_id}) and page"""
+    print("\n=== TESTING ROUTES ===")
+    client = TestClient(app)
+    token = client.post("/api/v1/auth/login", json={"email": "ana@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/api/v1/tasks/overdue?skip=0&limit=5", headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert len(body["overdue_tasks"]) == 5 and body["count"] > 5
+    response = client.get("/api/v1/tasks/upcoming?days=3&limit=2", headers=headers)
+    assert response.status_code == 200 and response.json()["period_days"] == 3, response.text
+    assert client.get("/api/v1/tasks/my-tasks?limit=1", headers=headers).status_code == 200
+    print(f"✅ /tasks/overdue ({body['count']} total), /tasks/upcoming and /tasks/my-tasks answer 200")
+
+def test_response_time():
+    """20k tasks assigned to one user among 200k"""
+    print("\n=== TESTING RESPONSE TIME ===")
+    db = SessionLocal()
+    ana_id = db.query(User.id).filter(User.username == "ana").scalar()
+    ben_id = db.query(User.id).filter(User.username == "ben").scalar()
+    project_ids = [project.id for project in db.query(Project)]
+    rng = random.Random(9)
+    statuses = [status.name for status in TaskStatus]
+    db.execute(Task.__table__.insert(), [
+        {
+            "title": f"Carga {i}",
+            "project_id": project_ids[i % 3],
+            "creator_id": ben_id,
+            "assignee_id": ana_id if i % 10 == 0 else ben_id,
+            "status": rng.choice(statuses),
+            "priority": "MEDIUM",
+            "category": "other",
+            "due_date": NOW + timedelta(hours=rng.randint(-2000, 2000))
+        }
+        for i in range(200000)
+    ])
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+    service = TaskService()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    page = service.get_overdue_tasks(db, ana_id, 200, 50, NOW)
+    event.remove(engine, "before_cursor_execute", listener)
+    assert len(page["tasks"]) == 50 and page["total"] > 5000
+    assert len(statements) == 4, statements  # Admin flag, visible projects, count, page
+
+    timings = {}
+    for name, call in (("overdue", lambda: service.get_overdue_tasks(db, ana_id, 200, 50, NOW)),
+                       ("upcoming", lambda: service.get_upcoming_tasks(db, ana_id, 7, 0, 50, NOW))):
+        samples = []
+        for _ in range(20):
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = sorted(samples)[len(samples) // 2]
+    print(f"✅ {page['total']} overdue of ~20k assigned: page 5 in {timings['overdue']:.1f} ms, "
+          f"upcoming in {timings['upcoming']:.1f} ms")
+    assert timings["overdue"] < 10 and timings["upcoming"] < 10
+    db.close()
+
+def main():
+    print("Testing overdue and upcoming task lists...")
+    try:
+        test_lists()
+        test_routes()
+        test_response_time()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Test script for learned effort estimation
+Checks the shrinkage model, incremental updates against a full reload and
+the learned hours in the budget forecast and team performance
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus, TaskUpdate
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.effort_estimator import EffortEstimator, ShrinkageModel, effort_estimator
+from app.services.task_service import TaskService
+
+def test_shrinkage_model():
+    """Known effects are recovered and small groups are pulled to the mean"""
+    print("=== TESTING SHRINKAGE MODEL ===")
+    rng = np.random.default_rng(4)
+    category_effect = {"development": 0.3, "testing": -0.2, "other": 0.0}
+    project_effect = {1: 0.0, 2: 0.5}
+    assignee_effect = {10: 0.0, 11: -0.4, 12: 0.2}
+    model = ShrinkageModel(prior=0.0, shrinkage=5)
+    for _ in range(6000):
+        key = (rng.choice(list(category_effect)), int(rng.choice([1, 2])), int(rng.choice([10, 11, 12])))
+        value = category_effect[key[0]] + project_effect[key[1]] + assignee_effect[key[2]] + rng.normal(0, 0.3)
+        model.add(key, value)
+    model.fit()
+    for key in (("testing", 2, 11), ("development", 1, 12), ("other", 2, 10)):
+        truth = category_effect[key[0]] + project_effect[key[1]] + assignee_effect[key[2]]
+        learned = math.log(model.predict(key)) - model.variance / 2
+        assert abs(learned - truth) < 0.05, (key, learned, truth)
+    assert abs(model.variance - 0.09) < 0.01, model.variance
+    print(f"✅ Effects recovered from 6000 observations (residual variance {model.variance:.3f})")
+
+    model.add(("design", 3, 99), 2.0)
+    model.fit()
+    pulled = model.effects[1][3] + model.effects[2][99] + model.effects[0]["design"]
+    assert 0 < pulled < 1.0, pulled
+    print(f"✅ A single outlier moves its groups by {pulled:.2f} of its 2.0 deviation")
+
+    started = time.perf_counter()
+    big = ShrinkageModel(prior=0.0, shrinkage=5)
+    for project in range(200):
+        for assignee in range(20):
+            for category in ("development", "testing", "management", "other"):
+                big.add((category, project, project * 100 + assignee), rng.normal())
+    big.fit()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"   16000 cells (200 projects, 4000 assignees) added and fitted in {elapsed:.0f} ms")
+    assert elapsed < 1000
+
+def setup_history(db):
+    """Two projects: in the first, Ana takes twice her estimates; tests take ~3 h"""
+    users = [User(email=f"{name}@example.com", username=name, full_name=name.title(), hashed_password="x")
+             for name in ("ana", "ben")]
+    db.add_all(users)
+    db.commit()
+    ana, ben = users
+    projects = []
+    for index in range(2):
+        project = Project(name=f"Budget {index}", owner_id=ana.id, status=ProjectStatus.ACTIVE, budget=20000,
+                          created_at=datetime.utcnow() - timedelta(days=60))
+        db.add(project)
+        db.commit()
+        db.add_all([ProjectMember(project_id=project.id, user_id=user.id, role="admin") for user in users])
+        projects.append(project)
+    rng = random.Random(3)
+    done = datetime.utcnow() - timedelta(days=5)
+    for _ in range(40):
+        estimate = rng.choice([4, 8, 12])
+        db.add(Task(title="Desarrollo módulo", project_id=projects[0].id, creator_id=ana.id, assignee_id=ana.id,
+                    estimated_hours=estimate, actual_hours=estimate * 2, status=TaskStatus.DONE, completed_at=done))
+        db.add(Task(title="Desarrollo módulo", project_id=projects[1].id, creator_id=ana.id, assignee_id=ben.id,
+                    estimated_hours=estimate, actual_hours=estimate, status=TaskStatus.DONE, completed_at=done))
+        db.add(Task(title="Prueba de regresión", project_id=projects[1].id, creator_id=ana.id, assignee_id=ben.id,
+                    actual_hours=3, status=TaskStatus.DONE, completed_at=done))
+    db.commit()
+    return ana, ben, projects
+
+def test_estimates_and_incremental_updates():
+    """Learned corrections, task-save hooks and out-of-process reloads"""
+    print("\n=== TESTING ESTIMATES ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    ana, ben, projects = setup_history(db)
+    biased = Task(title="Desarrollo reportes", project_id=projects[0].id, creator_id=ana.id, assignee_id=ana.id, estimated_hours=10)
+    unestimated_test = Task(title="Prueba de carga", project_id=projects[1].id, creator_id=ana.id, assignee_id=ben.id)
+    db.add_all([biased, unestimated_test])
+    db.commit()
+
+    estimates = effort_estimator.estimate_tasks(db, [biased, unestimated_test])
+    assert 17 < estimates[biased.id].expected_hours < 22, estimates[biased.id]
+    assert estimates[biased.id].planned_hours == 10
+    assert 2.5 < estimates[unestimated_test.id].expected_hours < 4, estimates[unestimated_test.id]
+    print(f"✅ 10 h estimate by Ana → {estimates[biased.id].expected_hours:.1f} h; "
+          f"unestimated test → {estimates[unestimated_test.id].expected_hours:.1f} h (not the flat 8 h)")
+
+    # Titles of tasks not yet created (similar task suggestions) get the unassigned estimate
+    by_title = effort_estimator.estimate_title(db, "Prueba de carga", projects[1].id)
+    unassigned = effort_estimator.estimate(Task(title="Prueba de carga", project_id=projects[1].id))
+    assert by_title == unassigned and by_title.source == "learned" and 2.5 < by_title.expected_hours < 4, by_title
+    assert not db.new and not db.dirty
+    print(f"✅ Title-only estimate for a new test task → {by_title.expected_hours:.1f} h")
+
+    # Completions through TaskService update the cached model in place
+    service = TaskService()
+    rows_before = effort_estimator.size.count
+    for task in db.query(Task).filter(Task.status != TaskStatus.DONE).all():
+        service.update_task(db, task.id, TaskUpdate(status=TaskStatus.DONE, actual_hours=30), ana.id)
+    assert effort_estimator.size.count == rows_before + 2
+    assert effort_estimator._tally == EffortEstimator.signature(db), "no reload needed"
+    done_task = db.query(Task).filter(Task.title == "Prueba de carga").one()
+    service.update_task(db, done_task.id, TaskUpdate(title="Prueba de estrés", actual_hours=6), ana.id)
+    service.delete_task(db, biased.id, ana.id)
+
+    reloaded = EffortEstimator()
+    reloaded.refresh(db)
+    probe = Task(id=-1, title="Prueba nueva", project_id=projects[1].id, assignee_id=ben.id)
+    assert abs(effort_estimator.estimate(probe).expected_hours - reloaded.estimate(probe).expected_hours) < 1e-6
+    assert effort_estimator.size.count == reloaded.size.count
+    print("✅ Incremental updates match a full reload")
+
+    # A change from another worker is picked up by the signature check
+    db.query(Task).filter(Task.title == "Prueba de regresión").update({Task.actual_hours: 12})
+    db.commit()
+    before = effort_estimator.estimate(probe).expected_hours
+    effort_estimator.refresh(db)
+    after = effort_estimator.estimate(probe).expected_hours
+    assert after > before * 2, (before, after)
+    print(f"✅ Out-of-process edits trigger a reload ({before:.1f} h → {after:.1f} h)")
+    db.close()
+
+def test_budget_and_team():
+    """Budget forecast and team performance use the learned hours"""
+    print("\n=== TESTING BUDGET AND TEAM ===")
+    db = SessionLocal()
+    project = db.query(Project).filter(Project.name == "Budget 0").one()
+    ana = db.query(User).filter(User.username == "ana").one()
+    for index in range(5):
+        db.add(Task(title=f"Desarrollo fase {index}", project_id=project.id, creator_id=ana.id, assignee_id=ana.id, estimated_hours=10))
+    db.commit()
+
+    service = AIProjectAnalysisService("local")
+    forecast = service.forecast_budget(project.id, db)
+    spent = sum(t.actual_hours for t in db.query(Task).filter(Task.project_id == project.id, Task.status == TaskStatus.DONE))
+    naive = (spent + 50) * 75
+    assert forecast.projected_total_cost > naive * 1.05, (forecast.projected_total_cost, naive)
+    assert forecast.estimation["project_bias_factor"] > 1.5
+    assert any("más de lo estimado" in tip for tip in forecast.cost_optimization_tips)
+    print(f"✅ Projected cost ${forecast.projected_total_cost:,.0f} vs ${naive:,.0f} from raw estimates "
+          f"(bias ×{forecast.estimation['project_bias_factor']})")
+
+    team = service.analyze_team_performance(project.id, db)
+    ana_row = next(p for p in team.individual_performance if p["assignee_id"] == ana.id)
+    assert ana_row["expected_open_hours"] > 80 and team.workload_distribution[f"user_{ana.id}"] == ana_row["expected_open_hours"]
+    print(f"✅ Team workload uses expected hours: {team.workload_distribution}")
+    db.close()
+
+def main():
+    print("Testing learned effort estimation...")
+    try:
+        test_shrinkage_model()
+        test_estimates_and_incremental_updates()
+        test_budget_and_team()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Load test for the analysis execution lane
+Floods LLM-bound endpoints (provider latency simulated with a sleep) and
+measures CRUD latency with the lane enabled and with it lifted
+Runs in-process against a throwaway SQLite database
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+os.environ["AI_ANALYSIS_MODE"] = "local"
+os.environ["AI_LANE_CONCURRENCY"] = "4"
+os.environ["AI_LANE_MAX_QUEUE"] = "8"
+os.environ["AI_LANE_QUEUE_TIMEOUT_SECONDS"] = "5"
+os.environ["AI_LANE_RETRY_AFTER_SECONDS"] = "3"
+os.environ["CRUD_LANE_THREADS"] = "6"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.services.auth_service import AuthService
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.execution_lanes import analysis_lane
+
+LLM_LATENCY = 0.4
+STORM_CLIENTS = 30
+CRUD_CLIENTS = 3
+CRUD_REQUESTS = 40
+
+_original_risk = AIProjectAnalysisService.analyze_project_risk
+
+def slow_risk(self, project_id, db):
+    time.sleep(LLM_LATENCY)  # Stand-in for a blocking provider call
+    return _original_risk(self, project_id, db)
+
+def setup_data():
+    db = SessionLocal()
+    user = User(email="lanes@example.com", username="lanes", full_name="Lanes User",
+                hashed_password=AuthService.get_password_hash("pw123456"))
+    db.add(user)
+    db.commit()
+    project = Project(name="Lanes", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role="admin"))
+    task = Task(title="CRUD target", project_id=project.id, creator_id=user.id, status=TaskStatus.TODO)
+    db.add(task)
+    db.commit()
+    ids = project.id, task.id
+    db.close()
+    return ids
+
+def p99(latencies):
+    ordered = sorted(latencies)
+    return ordered[max(0, int(len(ordered) * 0.99) - 1)]
+
+def measure_crud(client, headers, task_id):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(CRUD_REQUESTS):
+            started = time.perf_counter()
+            response = client.get(f"/api/v1/tasks/{task_id}", headers=headers)
+            elapsed = time.perf_counter() - started
+            assert response.status_code == 200, response.text
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(CRUD_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+def run_storm(client, headers, project_id, stop, outcomes):
+    def worker():
+        while not stop.is_set():
+            response = client.get(f"/api/v1/ai-insights/project/{project_id}/risk-assessment", headers=headers)
+            outcomes.append((response.status_code, response.headers.get("retry-after")))
+            if response.status_code == 503:
+                time.sleep(0.2)  # Back off like a client honouring Retry-After, scaled down
+
+    threads = [threading.Thread(target=worker) for _ in range(STORM_CLIENTS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(LLM_LATENCY)  # Let the storm saturate before measuring
+    return threads
+
+def storm_phase(client, headers, project_id, task_id):
+    stop = threading.Event()
+    outcomes = []
+    threads = run_storm(client, headers, project_id, stop, outcomes)
+    try:
+        latencies = measure_crud(client, headers, task_id)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return latencies, outcomes
+
+def main():
+    print("Testing execution lanes under an AI storm...")
+    AIProjectAnalysisService.analyze_project_risk = slow_risk
+    project_id, task_id = setup_data()
+    try:
+        with TestClient(app) as client:
+            token = client.post("/api/v1/auth/login", json={"email": "lanes@example.com", "password": "pw123456"}).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+            print("=== BASELINE (NO STORM) ===")
+            baseline = p99(measure_crud(client, headers, task_id))
+            print(f"   CRUD p99: {baseline * 1000:.1f} ms")
+
+            print("=== STORM WITH THE ANALYSIS LANE ===")
+            latencies, outcomes = storm_phase(client, headers, project_id, task_id)
+            protected = p99(latencies)
+            rejected = [retry for status, retry in outcomes if status == 503]
+            served = sum(1 for status, _ in outcomes if status == 200)
+            print(f"   CRUD p99: {protected * 1000:.1f} ms; analyses served {served}, rejected {len(rejected)}")
+            print(f"   Lane: {analysis_lane.get_stats()}")
+            assert served > 0, "the lane still serves analyses"
+            assert rejected and all(retry == "3" for retry in rejected), "overflow gets 503 + Retry-After"
+            assert protected < baseline + LLM_LATENCY / 2, "CRUD latency must not follow the LLM latency"
+            print("✅ CRUD p99 unaffected, overflow rejected with 503 + Retry-After")
+
+            print("=== STORM WITHOUT THE LANE (for comparison) ===")
+            analysis_lane.limiter.total_tokens = 1000
+            analysis_lane.max_queue = 1000
+            latencies, _ = storm_phase(client, headers, project_id, task_id)
+            unprotected = p99(latencies)
+            print(f"   CRUD p99: {unprotected * 1000:.1f} ms")
+            assert unprotected > protected and unprotected >= LLM_LATENCY / 2, "the storm starves CRUD without the lane"
+            print("✅ Without the lane the storm takes every worker thread")
+    finally:
+        AIProjectAnalysisService.analyze_project_risk = _original_risk
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for AI insight fingerprinting, upsert and compaction
+Runs against a throwaway SQLite database, no server needed
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Use a temporary database before the app modules read DATABASE_URL
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.ai_insight import AIInsight, InsightType, InsightPriority
+from app.services.insight_dedup_service import InsightDedupService
+
+def setup_project(db):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="dedup@example.com", username="dedup", full_name="Dedup User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Dedup", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    return project
+
+def make_insight(project_id, title="Riesgo alto", description="Dos tareas vencidas", priority=InsightPriority.MEDIUM):
+    return AIInsight(project_id=project_id, insight_type=InsightType.RISK_ANALYSIS, priority=priority,
+                     title=title, description=description, recommendations="Revisar plan")
+
+def test_upsert(db, project):
+    """Identical content refreshes the stored row instead of inserting"""
+    print("=== TESTING UPSERT ===")
+    service = InsightDedupService()
+    first = service.upsert(db, make_insight(project.id), now=datetime.utcnow() - timedelta(hours=1))
+    second = service.upsert(db, make_insight(project.id, title="  riesgo   ALTO ", priority=InsightPriority.HIGH))
+    assert first.id == second.id, "duplicate inserted"
+    assert second.priority == InsightPriority.HIGH
+    assert second.last_seen_at > second.created_at - timedelta(seconds=1)
+    other = service.upsert(db, make_insight(project.id, description="Tres tareas vencidas"))
+    assert other.id != first.id
+    assert db.query(AIInsight).count() == 2
+    print("✅ Upsert refreshes identical insights and keeps distinct ones")
+
+def test_compaction(db, project):
+    """Legacy duplicates without fingerprints are merged into the oldest row"""
+    print("=== TESTING COMPACTION ===")
+    now = datetime.utcnow()
+    legacy = []
+    for days_ago in (5, 3, 1):
+        insight = make_insight(project.id, title="Legacy")
+        insight.created_at = now - timedelta(days=days_ago)
+        insight.expires_at = now + timedelta(days=10 - days_ago)
+        insight.is_acknowledged = days_ago == 3
+        legacy.append(insight)
+    db.add_all(legacy)
+    db.commit()
+    oldest_id = legacy[0].id
+
+    service = InsightDedupService()
+    dry = service.compact(db, dry_run=True)
+    assert dry["deleted"] == 2 and db.query(AIInsight).count() == 5
+    stats = service.compact(db)
+    print(f"   {stats}")
+    assert stats["deleted"] == 2 and stats["groups"] == 1
+
+    kept = db.query(AIInsight).filter(AIInsight.title == "Legacy").all()
+    assert len(kept) == 1 and kept[0].id == oldest_id
+    assert kept[0].is_acknowledged and kept[0].fingerprint
+    assert kept[0].expires_at > now + timedelta(days=8)
+    assert service.compact(db)["deleted"] == 0
+    print("✅ Duplicates merged, compaction is idempotent")
+
+def main():
+    print("Testing AI Insight Deduplication")
+    print("=" * 50)
+    db = SessionLocal()
+    try:
+        project = setup_project(db)
+        test_upsert(db, project)
+        test_compaction(db, project)
+        print("Testing completed!")
+    finally:
+        db.close()
+        os.unlink(_db_file.name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for AI insight expiry, batched purge and archival
+Runs against a throwaway SQLite database, no server needed
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Use a temporary database before the app modules read DATABASE_URL
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["INSIGHT_PURGE_BATCH_SIZE"] = "3"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.ai_insight import AIInsight, InsightType
+from app.services.insight_retention_service import InsightRetentionService, active_insight_filter
+
+def setup_data(db):
+    """One project with a mix of fresh, expired and legacy (no expiry) insights"""
+    Base.metadata.create_all(bind=engine)
+    user = User(email="retention@example.com", username="retention", full_name="Retention User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Retention", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    now = datetime.utcnow()
+    for i in range(7):
+        db.add(AIInsight(project_id=project.id, insight_type=InsightType.DEADLINE_ALERT, title=f"Expired {i}",
+                         description="d", created_at=now - timedelta(days=10), expires_at=now - timedelta(days=7)))
+    db.add(AIInsight(project_id=project.id, insight_type=InsightType.RISK_ANALYSIS, title="Fresh",
+                     description="d", expires_at=now + timedelta(days=5)))
+    db.add(AIInsight(project_id=project.id, insight_type=InsightType.PROGRESS_PREDICTION, title="Legacy",
+                     description="d", created_at=now - timedelta(days=30)))
+    db.commit()
+    return project
+
+def test_expiry_for():
+    """TTLs come from the per-type table"""
+    print("=== TESTING TTL ===")
+    service = InsightRetentionService()
+    created = datetime(2026, 1, 1)
+    assert service.expiry_for(InsightType.DEADLINE_ALERT, created) == created + timedelta(days=3)
+    assert service.expiry_for("budget_forecast", created) == created + timedelta(days=30)
+    print("✅ Expiry follows per-type TTLs")
+
+def test_reads_exclude_expired(db, project):
+    print("=== TESTING READ FILTER ===")
+    visible = db.query(AIInsight).filter(AIInsight.project_id == project.id, active_insight_filter()).all()
+    titles = sorted(i.title for i in visible)
+    print(f"   Visible: {titles}")
+    assert titles == ["Fresh", "Legacy"]
+    print("✅ Expired insights are hidden")
+
+def test_purge_with_archive(db):
+    print("=== TESTING BATCHED PURGE ===")
+    service = InsightRetentionService()
+    archive_dir = tempfile.mkdtemp()
+    backfilled = service.backfill_expiry(db)
+    result = service.purge_expired(db, archive_dir=archive_dir)
+    print(f"   Backfilled {backfilled}, {result}")
+    assert backfilled == 1
+    # 7 expired alerts + the legacy prediction (7-day TTL from 30 days ago)
+    assert result["deleted"] == 8 and result["batches"] == 3
+
+    with gzip.open(result["archive_file"], "rt", encoding="utf-8") as archive:
+        records = [json.loads(line) for line in archive]
+    assert len(records) == 8
+    assert {r["insight_type"] for r in records} == {"deadline_alert", "progress_prediction"}
+
+    remaining = [i.title for i in db.query(AIInsight).all()]
+    assert remaining == ["Fresh"], remaining
+    print("✅ Expired insights archived and purged in batches")
+
+def main():
+    print("Testing AI Insight Retention")
+    print("=" * 50)
+    db = SessionLocal()
+    try:
+        project = setup_data(db)
+        test_expiry_for()
+        test_reads_exclude_expired(db, project)
+        test_purge_with_archive(db)
+        print("Testing completed!")
+    finally:
+        db.close()
+        os.unlink(_db_file.name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the insight sweep scheduler and its database lock
+Runs against a throwaway SQLite database, no server needed
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Use a temporary database before the app modules read DATABASE_URL
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["INSIGHT_SWEEP_JITTER_SECONDS"] = "0"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import AIInsight
+from app.models.lock import DistributedLock
+from app.services.lock_service import LockService
+from app.services.insight_scheduler import InsightSweepScheduler
+
+def setup_data():
+    """Create one user with two active projects and one on hold"""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="sweep@example.com", username="sweep", full_name="Sweep User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    for name, project_status in [("Alpha", ProjectStatus.ACTIVE), ("Beta", ProjectStatus.ACTIVE), ("Gamma", ProjectStatus.ON_HOLD)]:
+        project = Project(name=name, owner_id=user.id, status=project_status)
+        db.add(project)
+        db.commit()
+        db.add(Task(title=f"{name} task", project_id=project.id, creator_id=user.id, status=TaskStatus.TODO))
+        db.commit()
+    db.close()
+
+def test_lock_is_exclusive():
+    """Only one owner can hold the lock until its lease expires"""
+    print("=== TESTING LOCK EXCLUSIVITY ===")
+    db = SessionLocal()
+    try:
+        first = LockService.acquire(db, "test_lock", "worker-a", 60)
+        second = LockService.acquire(db, "test_lock", "worker-b", 60)
+        renewed = LockService.acquire(db, "test_lock", "worker-a", 60)
+        print(f"   worker-a acquired: {first}, worker-b acquired: {second}, worker-a renewed: {renewed}")
+        assert first and not second and renewed
+
+        LockService.acquire(db, "expired_lock", "worker-a", -1)
+        takeover = LockService.acquire(db, "expired_lock", "worker-b", 60)
+        print(f"   worker-b took over expired lock: {takeover}")
+        assert takeover
+
+        # try_acquire takes a free or expired lease but never renews one
+        taken = LockService.try_acquire(db, "period_lock", "worker-a", 60)
+        again = LockService.try_acquire(db, "period_lock", "worker-a", 60)
+        other = LockService.try_acquire(db, "period_lock", "worker-b", 60)
+        print(f"   try_acquire: first {taken}, same owner again {again}, other owner {other}")
+        assert taken and not again and not other
+        LockService.try_acquire(db, "expired_period_lock", "worker-a", -1)
+        assert LockService.try_acquire(db, "expired_period_lock", "worker-a", 60)
+        print("✅ Lock exclusivity works")
+    finally:
+        db.close()
+
+def test_single_leader_sweep():
+    """Two schedulers share the interval lock, so only one sweeps"""
+    print("=== TESTING LEADER ELECTION ===")
+    scheduler_a = InsightSweepScheduler()
+    scheduler_b = InsightSweepScheduler()
+
+    metrics = scheduler_a.run_if_leader()
+    skipped = scheduler_b.run_if_leader()
+    print(f"   Leader metrics: {metrics}")
+    assert metrics is not None and skipped is None
+    assert metrics["projects_total"] == 2
+    assert metrics["projects_analyzed"] + metrics["projects_failed"] == 2
+
+    db = SessionLocal()
+    insight_count = db.query(AIInsight).count()
+    db.close()
+    print(f"   Insights stored: {insight_count}")
+    assert insight_count == metrics["insights_created"]
+    print("✅ Only the leader ran the sweep")
+
+    # The leader's next poll in the same interval does not sweep again
+    assert scheduler_a.run_if_leader() is None
+    assert scheduler_a.get_metrics()["sweeps_completed"] == 1 and scheduler_a.get_metrics()["is_leader"]
+    assert scheduler_b.run_if_leader() is None and not scheduler_b.get_metrics()["is_leader"]
+    print("✅ The leader sweeps once per interval")
+
+    # Once the lease expires the next poll, from any worker, sweeps
+    db = SessionLocal()
+    db.query(DistributedLock).update({DistributedLock.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+    assert scheduler_b.run_if_leader() is not None and scheduler_a.run_if_leader() is None
+    assert scheduler_b.get_metrics()["sweeps_completed"] == 1 and scheduler_a.get_metrics()["sweeps_completed"] == 1
+    print("✅ An expired lease starts the next interval's sweep")
+
+def test_time_budget():
+    """Projects that would start after the budget are skipped"""
+    print("=== TESTING TIME BUDGET ===")
+    scheduler = InsightSweepScheduler()
+    scheduler.time_budget_seconds = 0
+    metrics = scheduler.run_sweep()
+    print(f"   Skipped: {metrics['projects_skipped']} of {metrics['projects_total']}")
+    assert metrics["projects_skipped"] == metrics["projects_total"]
+    print("✅ Time budget respected")
+
+def main():
+    print("Testing Insight Sweep Scheduler")
+    print("=" * 50)
+    setup_data()
+    try:
+        test_lock_is_exclusive()
+        test_single_leader_sweep()
+        test_time_budget()
+        print("Testing completed!")
+    finally:
+        os.unlink(_db_file.name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the weekly insight trends
+Checks the SQL week x type counts against grouping every insight in Python,
+ISO week labels, the project access filter and the per-user trends cache
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Use a temporary database before the app modules read DATABASE_URL
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import event
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.ai_insight import AIInsight, InsightType
+from app.services import insight_service
+from app.services.insight_service import InsightService
+
+def setup_data(db):
+    """Two projects (the member only belongs to the first one) and a project with calendar edge cases"""
+    Base.metadata.create_all(bind=engine)
+    admin = User(email="admin@example.com", username="admin", full_name="Admin", hashed_password="x", is_admin=True)
+    owner = User(email="owner@example.com", username="owner", full_name="Owner", hashed_password="x")
+    member = User(email="member@example.com", username="member", full_name="Member", hashed_password="x")
+    db.add_all([admin, owner, member])
+    db.commit()
+    projects = [Project(name=f"Trends {i}", owner_id=owner.id, status=ProjectStatus.ACTIVE) for i in range(2)]
+    db.add_all(projects)
+    db.commit()
+    db.add(ProjectMember(project_id=projects[0].id, user_id=member.id))
+
+    rng = random.Random(28)
+    now = datetime.utcnow()
+    types = list(InsightType)
+    for index in range(600):
+        db.add(AIInsight(project_id=projects[index % 2].id, insight_type=rng.choice(types), title=f"Insight {index}",
+                         description="d", created_at=now - timedelta(days=rng.randint(0, 400), hours=rng.randint(0, 23))))
+
+    # Calendar edge cases in a project of their own
+    solo = User(email="solo@example.com", username="solo", full_name="Solo", hashed_password="x")
+    db.add(solo)
+    db.commit()
+    calendar = Project(name="Calendar", owner_id=solo.id, status=ProjectStatus.ACTIVE)
+    db.add(calendar)
+    db.commit()
+    edges = [
+        datetime(2025, 12, 31, 10, 0), datetime(2026, 1, 1, 10, 0), datetime(2026, 1, 4, 22, 0),  # ISO week from Monday 29/12/2025
+        datetime(2026, 2, 23, 9, 0), datetime(2026, 3, 1, 18, 0)  # Monday and the Sunday closing its week
+    ]
+    for created_at in edges:
+        db.add(AIInsight(project_id=calendar.id, insight_type=InsightType.RISK_ANALYSIS, title=f"Edge {created_at:%d/%m}",
+                         description="d", created_at=created_at))
+    db.commit()
+    return admin, owner, member, solo, projects
+
+def python_trends(db, project_ids, days):
+    """Reference: every insight loaded and grouped by ISO week in Python"""
+    since_date = datetime.utcnow() - timedelta(days=days)
+    trends = {}
+    for insight in db.query(AIInsight).filter(AIInsight.project_id.in_(project_ids), AIInsight.created_at >= since_date):
+        week = insight.created_at.strftime("%G-W%V")
+        types = trends.setdefault(week, {})
+        types[insight.insight_type.value] = types.get(insight.insight_type.value, 0) + 1
+    return {week: types for week, types in sorted(trends.items())}
+
+def test_weekly_counts(db, admin, owner, member, solo, projects):
+    """Per-type weekly counts match the Python grouping, for each user's projects"""
+    print("=== TESTING WEEKLY COUNTS ===")
+    service = InsightService()
+    all_ids = [project.id for project in projects]
+    every_id = [project_id for project_id, in db.query(Project.id)]
+    for user, project_ids in ((admin, every_id), (owner, all_ids), (member, all_ids[:1])):
+        for days in (30, 90, 365):
+            result = service.get_trends(db, user.id, days, use_cache=False)
+            found = {item["week"]: item["insights_by_type"] for item in result["trends"]}
+            assert found == python_trends(db, project_ids, days), (user.username, days)
+            assert [item["week"] for item in result["trends"]] == sorted(found)
+            assert result["summary"]["total_insights"] == sum(sum(types.values()) for types in found.values())
+    print("✅ SQL weekly counts match the Python grouping for admin, owner and member")
+
+    found = {item["week"]: item["total"] for item in service.get_trends(db, solo.id, 365, use_cache=False)["trends"]}
+    # %Y-W%U would give 2025-W52, 2026-W00, 2026-W01, 2026-W08 and 2026-W09
+    assert found == {"2026-W01": 3, "2026-W09": 2}, found
+    member_total = service.get_trends(db, member.id, 365, use_cache=False)["summary"]["total_insights"]
+    assert member_total < service.get_trends(db, admin.id, 365, use_cache=False)["summary"]["total_insights"]
+    print("✅ ISO labels: Sundays stay in their Monday week and New Year's week has one label; members only see their projects")
+
+def test_cache(db, admin, member):
+    """Results cached per (user, days, day); clear_trends_cache drops them"""
+    print("\n=== TESTING TRENDS CACHE ===")
+    service = InsightService()
+    InsightService.clear_trends_cache()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        first = service.get_trends(db, member.id, 90)
+        computed = len(statements)
+        assert computed > 0
+        assert service.get_trends(db, member.id, 90) is first and len(statements) == computed
+        other_days = service.get_trends(db, member.id, 30)
+        other_user = service.get_trends(db, admin.id, 90)
+        assert other_days is not first and other_user is not first and len(statements) > computed
+        today = datetime.utcnow().date()
+        assert insight_service._trends_cache.get((member.id, 90, today)) is first
+        assert insight_service._trends_cache.get((member.id, 90, today - timedelta(days=1))) is None
+
+        InsightService.clear_trends_cache()
+        before = len(statements)
+        again = service.get_trends(db, member.id, 90)
+        assert again is not first and again == first and len(statements) > before
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    print("✅ Cache hits per (user, days, day) with no queries; cleared entries are recomputed")
+
+def main():
+    print("Testing insight trends...")
+    db = SessionLocal()
+    try:
+        admin, owner, member, solo, projects = setup_data(db)
+        test_weekly_counts(db, admin, owner, member, solo, projects)
+        test_cache(db, admin, member)
+    finally:
+        db.close()
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the local LLM stub provider
+Drives DeepseekAIService against llm_stub_server.py in-process, no API key needed
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from llm_stub_server import StubConfig, parse_schema, start_in_thread
+
+# Configure before the app modules read the environment
+_stub, _base_url = start_in_thread(StubConfig(latency="fixed", latency_ms=0, token_ms=0, seed=1))
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "stub"
+os.environ["DEEPSEEK_BASE_URL"] = _base_url
+
+from app.database import engine, Base
+from app.models.llm_usage import LLMUsage  # noqa: F401 - table for the usage ledger
+from app.services.circuit_breaker import deepseek_breaker
+from app.services.deepseek_service import DeepseekAIService
+from app.services.prompt_builder import PromptBuilder, PROMPT_SPECS
+
+def stub_service(config: StubConfig):
+    """A stub server plus a service instance pointed at it"""
+    server, base_url = start_in_thread(config)
+    os.environ["DEEPSEEK_BASE_URL"] = base_url
+    try:
+        return server, DeepseekAIService()
+    finally:
+        os.environ["DEEPSEEK_BASE_URL"] = _base_url
+
+def test_schema_parsing():
+    """Every PromptBuilder schema yields all of its fields"""
+    print("=== TESTING SCHEMA PARSING ===")
+    for name, spec in PROMPT_SPECS.items():
+        fields = parse_schema(PromptBuilder._schema_text(spec))
+        assert set(fields) == set(spec.fields), (name, fields)
+    print("✅ Schemas with quoted hints parsed field by field")
+
+def test_structured_answers():
+    """Single and batched JSON-mode calls validate against their schemas"""
+    print("\n=== TESTING STRUCTURED ANSWERS ===")
+    deepseek_breaker.reset()
+    service = DeepseekAIService()
+    assert service.is_enabled(), "any key enables a non-OpenRouter base URL"
+
+    risk = service.call_structured("risk", {"project": "Demo", "overdue_tasks": 3})
+    assert 0 <= risk["overall_risk_score"] <= 1 and risk["risk_level"] in ("Bajo", "Medio", "Alto")
+    assert risk["risk_factors"] and risk["recommendations"]
+    progress = service.call_structured("progress", {"project": "Demo", "remaining_tasks": 12})
+    assert isinstance(progress["estimated_days_remaining"], int)
+    print(f"✅ risk {risk['risk_level']} ({risk['overall_risk_score']}), progress {progress['estimated_days_remaining']} días")
+
+    sections, errors = service.call_structured_batch("portfolio", {1: {"project": "A"}, 2: {"project": "B"}})
+    assert set(sections) == {1, 2} and not errors, (sections, errors)
+    print("✅ Batched portfolio answer has one valid section per project")
+
+def test_streaming():
+    """Streamed answers arrive in chunks and report usage"""
+    print("\n=== TESTING STREAMING ===")
+    deepseek_breaker.reset()
+    service = DeepseekAIService()
+    before = _stub.RequestHandlerClass.state.get_stats()["streamed"]
+    chunks = list(service.stream_chat([{"role": "user", "content": "Resume el estado del proyecto"}], analysis="risk"))
+    assert len(chunks) > 3 and "\n" in "".join(chunks)
+    assert _stub.RequestHandlerClass.state.get_stats()["streamed"] == before + 1
+    print(f"✅ {len(chunks)} chunks streamed")
+
+def test_canned_responses():
+    """Configured responses override the generated answer"""
+    print("\n=== TESTING CANNED RESPONSES ===")
+    deepseek_breaker.reset()
+    canned = {"overall_risk_score": 0.91, "risk_level": "Alto", "risk_factors": [],
+              "recommendations": ["Congelar el alcance"]}
+    server, service = stub_service(StubConfig(latency="fixed", latency_ms=0, responses={"Demo canned": canned}))
+    try:
+        risk = service.call_structured("risk", {"project": "Demo canned"})
+        assert risk["overall_risk_score"] == 0.91 and risk["recommendations"] == ["Congelar el alcance"]
+    finally:
+        server.shutdown()
+    print("✅ Canned answer returned for the matching prompt")
+
+def test_fault_injection():
+    """Injected errors and invalid answers surface as failed calls"""
+    print("\n=== TESTING FAULT INJECTION ===")
+    for config, expected in ((StubConfig(latency="fixed", latency_ms=0, error_rate=1.0, error_statuses=(500,)), "errors"),
+                             (StubConfig(latency="fixed", latency_ms=0, invalid_rate=1.0), "invalid")):
+        deepseek_breaker.reset()
+        server, service = stub_service(config)
+        try:
+            failure = None
+            try:
+                service.call_structured("risk", {"project": "Demo"})
+            except Exception as e:
+                failure = e
+            assert failure is not None, "the call should fail"
+            print(f"   {expected}: {str(failure)[:80]}")
+            assert server.RequestHandlerClass.state.get_stats()[expected] >= 1
+        finally:
+            server.shutdown()
+    deepseek_breaker.reset()
+    print("✅ HTTP errors and invalid JSON rejected by the service")
+
+def test_latency_distribution():
+    """Sampled latency stays around the configured mean"""
+    print("\n=== TESTING LATENCY ===")
+    server, base_url = start_in_thread(StubConfig(latency="uniform", latency_ms=100, latency_spread=0.2))
+    body = json.dumps({"model": "stub", "messages": [{"role": "user", "content": "hola"}]}).encode()
+    timings = []
+    try:
+        for _ in range(5):
+            request = urllib.request.Request(f"{base_url}/chat/completions", data=body,
+                                             headers={"Content-Type": "application/json"})
+            started = time.perf_counter()
+            with urllib.request.urlopen(request) as response:
+                payload = json.loads(response.read())
+            timings.append(time.perf_counter() - started)
+            assert payload["usage"]["prompt_tokens"] >= 1
+    finally:
+        server.shutdown()
+    assert all(0.075 <= elapsed < 0.3 for elapsed in timings), timings
+    print(f"✅ Latencies {[round(t * 1000) for t in timings]} ms within 80-120 ms plus overhead")
+
+def main():
+    print("Testing the LLM stub provider...")
+    Base.metadata.create_all(bind=engine)
+    try:
+        test_schema_parsing()
+        test_structured_answers()
+        test_streaming()
+        test_canned_responses()
+        test_fault_injection()
+        test_latency_distribution()
+    finally:
+        from app.services.usage_ledger import usage_ledger
+        usage_ledger.stop()
+        _stub.shutdown()
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
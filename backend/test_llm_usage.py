@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM usage ledger and its aggregations
+Runs against a throwaway SQLite database with an in-process fake chat client
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.llm_usage import LLMUsage
+from app.services.deepseek_service import DeepseekAIService
+from app.services.llm_usage_service import LLMUsageService
+from app.services.usage_ledger import UsageLedger, usage_ledger, usage_scope
+
+def fake_client(content, cached_tokens=0, error=None):
+    def create(**request):
+        if error:
+            raise error
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30,
+                                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def setup_data(db):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="usage@example.com", username="usage", full_name="Usage User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    projects = [Project(name=f"Usage {i}", owner_id=user.id, status=ProjectStatus.ACTIVE) for i in range(2)]
+    db.add_all(projects)
+    db.commit()
+    return user.id, [p.id for p in projects]
+
+def test_batched_writes(user_id, project_ids):
+    print("=== TESTING BATCHED LEDGER WRITES ===")
+    ledger = UsageLedger(batch_size=3, flush_seconds=0.2, queue_size=50)
+    started = time.monotonic()
+    with usage_scope(project_id=project_ids[0], user_id=user_id):
+        for i in range(7):
+            ledger.record(model="test-model", analysis="batch-test", latency_ms=10.0 * i, outcome="success")
+    elapsed_ms = (time.monotonic() - started) * 1000
+    deadline = time.monotonic() + 3
+    while ledger.get_stats()["written"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    ledger.stop()
+
+    db = SessionLocal()
+    rows = db.query(LLMUsage).filter(LLMUsage.analysis == "batch-test").all()
+    db.close()
+    print(f"   7 records queued in {elapsed_ms:.2f} ms, stats {ledger.get_stats()}")
+    assert len(rows) == 7, len(rows)
+    assert all(r.project_id == project_ids[0] and r.user_id == user_id for r in rows)
+
+    tiny = UsageLedger(queue_size=2, flush_seconds=60)
+    for _ in range(4):
+        tiny.record(model="m", outcome="success")
+    assert tiny.get_stats()["dropped"] == 2, "a full queue drops rows instead of blocking"
+    tiny.stop()
+    print("✅ Rows are written in background batches with their scope")
+
+def test_deepseek_calls_recorded(user_id, project_ids):
+    print("=== TESTING RECORDED CALLS ===")
+    service = DeepseekAIService()
+    service.deepseek_enabled = True
+    service.breaker.reset()
+    answer = json.dumps({"recommendations": ["Revisar"]})
+    fields = {"recommendations": "acciones"}
+
+    with usage_scope(project_id=project_ids[1], user_id=user_id):
+        service.client = fake_client(answer, cached_tokens=100)
+        assert service.generate_narrative("risk", {"x": 1}, fields)
+        service.client = fake_client("not json")
+        assert service.generate_narrative("risk", {"x": 1}, fields) is None
+        service.client = fake_client(answer, error=RuntimeError("timeout"))
+        assert service.generate_narrative("risk", {"x": 1}, fields) is None
+        service.breaker._open()
+        try:
+            service._call_deepseek_messages([{"role": "user", "content": "hola"}], analysis="narrative")
+        except Exception:
+            pass
+        service.breaker.reset()
+    usage_ledger.flush()
+
+    db = SessionLocal()
+    rows = db.query(LLMUsage).filter(LLMUsage.project_id == project_ids[1]).order_by(LLMUsage.id).all()
+    db.close()
+    outcomes = [r.outcome for r in rows]
+    print(f"   Outcomes: {outcomes}")
+    assert outcomes == ["success", "invalid", "error", "rejected"], outcomes
+    assert rows[0].prompt_tokens == 120 and rows[0].completion_tokens == 30 and rows[0].cache_hit
+    assert rows[0].analysis == "narrative" and rows[0].breaker_state == "closed"
+    assert rows[3].breaker_state == "open" and rows[3].latency_ms == 0.0
+    print("✅ Tokens, cache hits, breaker state and outcome are recorded per call")
+
+def test_aggregations(user_id, project_ids):
+    print("=== TESTING AGGREGATIONS ===")
+    db = SessionLocal()
+    now = datetime.utcnow()
+    db.add_all([
+        LLMUsage(created_at=now - timedelta(days=1), project_id=project_ids[0], user_id=user_id, model="m",
+                 prompt_tokens=100, completion_tokens=10, latency_ms=float(latency), outcome="success")
+        for latency in range(1, 101)
+    ])
+    db.commit()
+
+    service = LLMUsageService()
+    by_project = service.summarize(db, group_by="project", days=30)
+    top = by_project["groups"][0]
+    print(f"   Top project: {top['label']} {top['total_tokens']} tokens, latency {top['latency_ms']}")
+    assert top["key"] == project_ids[0] and top["label"] == "Usage 0"
+    assert top["calls"] == 107 and top["total_tokens"] == 100 * 110
+    # 7 batched + 2 flushed by the small-queue ledger + 4 recorded calls + 100 loaded rows
+    assert by_project["totals"]["calls"] == 113
+
+    scoped = service.summarize(db, group_by="analysis", days=30, project_ids=[project_ids[0]])
+    loaded = next(g for g in scoped["groups"] if g["key"] is None)
+    assert loaded["latency_ms"]["p50"] == 50.0 and loaded["latency_ms"]["p95"] == 95.0 and loaded["latency_ms"]["p99"] == 99.0
+
+    by_day = service.summarize(db, group_by="day", days=30)
+    assert len(by_day["groups"]) == 2 and sum(g["calls"] for g in by_day["groups"]) == 113
+    by_user = service.summarize(db, group_by="user", days=30)
+    assert by_user["groups"][0]["label"] == "usage@example.com"
+    assert service.summarize(db, group_by="project", days=30, user_id=999)["groups"] == []
+    db.close()
+    print("✅ Usage is aggregated by project, user, day and analysis with percentiles")
+
+def main():
+    print("Testing LLM usage ledger...")
+    db = SessionLocal()
+    try:
+        user_id, project_ids = setup_data(db)
+    finally:
+        db.close()
+    try:
+        test_batched_writes(user_id, project_ids)
+        test_deepseek_calls_recorded(user_id, project_ids)
+        test_aggregations(user_id, project_ids)
+    finally:
+        usage_ledger.stop()
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
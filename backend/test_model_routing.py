@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for adaptive model routing (auto analysis mode)
+Runs against a throwaway SQLite database with an in-process fake chat client
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import AIInsight
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.model_router import ModelRouter
+
+class FakeChatClient:
+    """Records the model of every call and answers with a valid risk analysis"""
+
+    def __init__(self):
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        self.models.append(request["model"])
+        body = {"overall_risk_score": 0.7, "risk_level": "Alto", "risk_factors": [], "recommendations": ["Replanificar"]}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+def make_router():
+    return ModelRouter("fast-model", "strong-model", local_max_tasks=10, strong_min_tasks=200, strong_min_changes=25)
+
+def setup_data(db):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="routing@example.com", username="routing", full_name="Routing User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    created = datetime.utcnow() - timedelta(days=3)
+    project_ids = {}
+    for name, count in (("small", 4), ("medium", 40), ("large", 250)):
+        project = Project(name=name.title(), owner_id=user.id, status=ProjectStatus.ACTIVE)
+        db.add(project)
+        db.commit()
+        db.add_all([
+            Task(title=f"Task {i}", project_id=project.id, creator_id=user.id, status=TaskStatus.TODO,
+                 created_at=created, updated_at=created)
+            for i in range(count)
+        ])
+        db.commit()
+        project_ids[name] = project.id
+    return project_ids
+
+def test_decision_rules():
+    print("=== TESTING ROUTING RULES ===")
+    router = make_router()
+    cases = [
+        (("team", 500, 500, True), "none"),
+        (("risk", 5, 5, True), "none"),
+        (("risk", 50, 50, False), "none"),
+        (("risk", 50, 50, True), "fast"),
+        (("progress", 300, 300, True), "strong"),
+        (("progress", 300, 3, True), "fast"),
+    ]
+    for args, tier in cases:
+        decision = router.decide(*args)
+        print(f"   {args} -> {decision.tier} ({decision.reason})")
+        assert decision.tier == tier, (args, decision)
+    assert router.decide("risk", 300, 300).model == "strong-model"
+    assert router.decide("risk", 50, 50).model == "fast-model"
+    assert router.decide("risk", 5, 5).model is None
+    print("✅ Thresholds pick no model, the fast model or the strong model")
+
+def auto_service(client):
+    service = AIProjectAnalysisService("auto")
+    service.router = make_router()
+    deepseek = service.deepseek_service
+    deepseek.deepseek_enabled = True
+    deepseek.client = client
+    deepseek.breaker.reset()
+    return service
+
+def test_auto_mode(project_ids):
+    print("=== TESTING AUTO MODE ===")
+    db = SessionLocal()
+    client = FakeChatClient()
+    service = auto_service(client)
+
+    small = service.generate_specific_analysis(db, project_ids["small"], "risk")
+    assert client.models == [], "small projects never reach the provider"
+    assert small[0]["routing_tier"] == "none" and small[0]["analysis_source"] == "local"
+
+    large = service.generate_specific_analysis(db, project_ids["large"], "risk")
+    medium = service.generate_specific_analysis(db, project_ids["medium"], "risk")
+    print(f"   Models called: {client.models}")
+    assert client.models == ["strong-model", "fast-model"], client.models
+    assert large[0]["routing_tier"] == "strong" and large[0]["routing_model"] == "strong-model"
+    assert medium[0]["routing_tier"] == "fast"
+    assert service.deepseek_service.model not in ("fast-model", "strong-model"), "routed model is restored"
+
+    team = service.generate_specific_analysis(db, project_ids["large"], "team")
+    assert team[0]["routing_tier"] == "none" and team[0]["routing_reason"] == "análisis sin narrativa"
+
+    stored = db.query(AIInsight).filter(AIInsight.id == large[0]["id"]).one()
+    assert (stored.routing_tier, stored.routing_model) == ("strong", "strong-model")
+    assert stored.routing_reason.startswith("proyecto complejo")
+    db.close()
+    print("✅ Decisions are applied and stored with each insight")
+
+def test_data_version_delta(project_ids):
+    print("=== TESTING DATA-VERSION DELTA ===")
+    db = SessionLocal()
+    router = make_router()
+    # The large project was analysed above and none of its tasks changed since
+    decision = router.route(db, project_ids["large"], "risk")
+    print(f"   Unchanged large project -> {decision.tier} ({decision.reason})")
+    assert decision.tier == "fast" and decision.changed_tasks == 0
+
+    tasks = db.query(Task).filter(Task.project_id == project_ids["large"]).limit(30).all()
+    for task in tasks:
+        task.status = TaskStatus.IN_PROGRESS
+        task.updated_at = datetime.utcnow() + timedelta(seconds=1)
+    db.commit()
+    decision = router.route(db, project_ids["large"], "risk")
+    print(f"   30 tasks changed -> {decision.tier}")
+    assert decision.tier == "strong" and decision.changed_tasks == 30
+
+    never_analysed = router.route(db, project_ids["medium"], "progress")
+    assert never_analysed.changed_tasks == never_analysed.task_count == 40
+    db.close()
+    print("✅ Only projects with enough changes pay for the strong model again")
+
+def main():
+    print("Testing adaptive model routing...")
+    db = SessionLocal()
+    try:
+        project_ids = setup_data(db)
+    finally:
+        db.close()
+    try:
+        test_decision_rules()
+        test_auto_mode(project_ids)
+        test_data_version_delta(project_ids)
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for batched portfolio risk analysis
+Runs against a throwaway SQLite database with an in-process fake chat client
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+os.environ["DEEPSEEK_PORTFOLIO_BATCH_SIZE"] = "10"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import AIInsight, InsightType
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.prompt_builder import PromptBuilder, PromptValidationError
+
+class FakeChatClient:
+    """Answers batched prompts with one section per project id; single prompts get a plain answer"""
+
+    def __init__(self, broken_ids=()):
+        self.broken_ids = {str(pid) for pid in broken_ids}
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        content = request["messages"][-1]["content"]
+        self.calls.append(content)
+        answer = {"overall_risk_score": 0.7, "risk_level": "alto", "recommendations": ["Replanificar"]}
+        if "una clave por id" in content:
+            data = json.loads(content.split("Datos: ", 1)[1])
+            body = {pid: ({"risk_level": "???"} if pid in self.broken_ids else answer) for pid in data}
+        else:
+            body = {**answer, "risk_factors": []}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(body)))])
+
+def setup_data(db, count=25):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="portfolio@example.com", username="portfolio", full_name="Portfolio User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+    projects = [Project(name=f"Portfolio {i}", owner_id=user.id, status=ProjectStatus.ACTIVE) for i in range(count)]
+    empty = Project(name="Empty", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add_all(projects + [empty])
+    db.commit()
+    for project in projects:
+        for i in range(4):
+            db.add(Task(title=f"Task {i}", project_id=project.id, creator_id=user.id,
+                        status=TaskStatus.DONE if i == 0 else TaskStatus.TODO,
+                        due_date=now - timedelta(days=1)))
+    db.commit()
+    return [p.id for p in projects], empty.id
+
+def test_batch_validation():
+    print("=== TESTING BATCH VALIDATION ===")
+    builder = PromptBuilder()
+    spec = builder.get_spec("portfolio")
+    messages = builder.build_batch(spec, {2: {"name": "B"}, 1: {"name": "A"}})
+    assert messages[1]["content"].endswith('{"1":{"name":"A"},"2":{"name":"B"}}')
+
+    raw = json.dumps({"projects": {
+        "1": {"overall_risk_score": 3, "risk_level": "medio", "recommendations": "Revisar"},
+        "2": {"risk_level": "Medio"}
+    }})
+    results, errors = builder.validate_batch(spec, raw, [1, 2, 3])
+    assert results[1]["overall_risk_score"] == 1.0 and results[1]["risk_level"] == "Medio"
+    assert set(errors) == {2, 3}, errors
+    try:
+        builder.validate_batch(spec, "no json", [1])
+        assert False, "unparseable batch accepted"
+    except PromptValidationError:
+        pass
+    print("✅ Sections are validated independently")
+
+def test_batched_sweep(db, project_ids, empty_id):
+    print("=== TESTING BATCHED SWEEP ===")
+    service = AIProjectAnalysisService("llm")
+    deepseek = service.deepseek_service
+    deepseek.deepseek_enabled = True
+    deepseek.client = FakeChatClient(broken_ids=[project_ids[3]])
+    deepseek.breaker.reset()
+
+    assessments = service.analyze_portfolio_risk(project_ids + [empty_id, 999999], db)
+    batched_calls = [c for c in deepseek.client.calls if "una clave por id" in c]
+    single_calls = len(deepseek.client.calls) - len(batched_calls)
+    print(f"   {len(assessments)} projects in {len(batched_calls)} batched + {single_calls} single call(s)")
+    assert len(batched_calls) == 3, "25 projects at batch size 10"
+    assert single_calls == 1, "only the broken section is retried"
+    assert 999999 not in assessments and len(assessments) == len(project_ids) + 1
+    assert assessments[project_ids[0]].analysis_source == "llm"
+    assert assessments[project_ids[0]].risk_level == "Alto"
+    assert assessments[project_ids[3]].analysis_source == "llm"
+    assert assessments[empty_id].analysis_source == "local"
+    print("✅ One round-trip per batch, failed sections retried individually")
+
+def test_failed_batch_falls_back(db, project_ids):
+    print("=== TESTING FAILED BATCH ===")
+    service = AIProjectAnalysisService("llm")
+    deepseek = service.deepseek_service
+    deepseek.deepseek_enabled = True
+    deepseek.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **request: (_ for _ in ()).throw(RuntimeError("boom")))))
+    deepseek.breaker.reset()
+    assessments = service.analyze_portfolio_risk(project_ids[:3], db)
+    assert {a.analysis_source for a in assessments.values()} == {"fallback"}
+    deepseek.breaker.reset()
+    print("✅ Projects of a failed batch still get an assessment")
+
+def test_portfolio_insights(db, project_ids):
+    print("=== TESTING PORTFOLIO INSIGHTS ===")
+    service = AIProjectAnalysisService("local")
+    saved = service.generate_portfolio_risk_insights(db, project_ids[:5])
+    assert set(saved) == set(project_ids[:5])
+    stored = db.query(AIInsight).filter(AIInsight.insight_type == InsightType.RISK_ANALYSIS).count()
+    assert stored == 5, stored
+    print("✅ One risk insight saved per project")
+
+def main():
+    print("Testing portfolio risk analysis...")
+    db = SessionLocal()
+    try:
+        project_ids, empty_id = setup_data(db)
+        test_batch_validation()
+        test_batched_sweep(db, project_ids, empty_id)
+        test_failed_batch_falls_back(db, project_ids)
+        test_portfolio_insights(db, project_ids)
+    finally:
+        db.close()
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
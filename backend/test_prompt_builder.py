@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for the token-budgeted prompt builder and response validation
+No server or API key needed
+"""
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.prompt_builder import PromptBuilder, PromptValidationError, SHARED_SYSTEM_PROMPT
+
+def test_compact_deterministic_prompts():
+    print("=== TESTING PROMPT CONSTRUCTION ===")
+    builder = PromptBuilder()
+    spec = builder.get_spec("risk")
+    facts = {"name": "Portal", "total_tasks": 40, "overdue_rate": 12.5, "deadline": None}
+    first = builder.build(spec, facts)
+    second = builder.build(spec, dict(reversed(list(facts.items()))))
+    assert first == second, "prompt depends on dict order"
+    assert first[0]["content"] == SHARED_SYSTEM_PROMPT
+    assert builder.build(builder.get_spec("progress"), facts)[0] == first[0], "system prompt must be shared"
+    user = first[1]["content"]
+    assert "  " not in user and '"overdue_rate":12.5' in user
+    print(f"   User message: {builder.estimate_tokens(user)} tokens ~ {len(user)} chars")
+    print("✅ Prompts are compact and deterministic")
+
+def test_input_budget():
+    print("=== TESTING INPUT BUDGET ===")
+    builder = PromptBuilder()
+    spec = builder.get_spec("narrative", {})
+    facts = {"factors": [f"Factor de riesgo número {i} con descripción larga" for i in range(200)], "name": "X"}
+    content = builder.build(spec, facts)[1]["content"]
+    assert builder.estimate_tokens(content) <= spec.max_input_tokens, builder.estimate_tokens(content)
+    assert '"name":"X"' in content
+    print(f"   Trimmed to {builder.estimate_tokens(content)} tokens")
+    print("✅ Facts are trimmed to the input budget")
+
+def test_validation():
+    print("=== TESTING RESPONSE VALIDATION ===")
+    builder = PromptBuilder()
+    spec = builder.get_spec("risk")
+    raw = """Aquí está el análisis:
+```json
+{"overall_risk_score": "1.4", "risk_level": "alto", "risk_factors": [{"factor": "Retrasos"}],
+ "recommendations": ["Replanificar", {"accion": "Reasignar"}]}
+```"""
+    result = builder.validate(spec, raw)
+    assert result["overall_risk_score"] == 1.0 and result["risk_level"] == "Alto"
+    assert result["recommendations"] == ["Replanificar", "Reasignar"]
+    assert result["critical_issues"] == [] and result["mitigation_strategies"] == []
+
+    for bad in ['{"risk_level": "Alto"}', "no json", '{"overall_risk_score": 0.2, "risk_level": "Bajo", "risk_factors": [], "recommendations": []}', '{"overall_risk_score": 0.5, "risk_level": "Extremo", '
+                '"risk_factors": [], "recommendations": ["x"]}']:
+        try:
+            builder.validate(spec, bad)
+            assert False, f"accepted invalid response: {bad}"
+        except PromptValidationError as e:
+            print(f"   Rejected: {e}")
+    print("✅ Responses are parsed leniently and validated strictly")
+
+def main():
+    print("Testing Prompt Builder")
+    print("=" * 50)
+    test_compact_deterministic_prompts()
+    test_input_budget()
+    test_validation()
+    print("Testing completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test script for the similar-task finder
+Checks the sparse TF-IDF index against brute force, incremental updates and
+compaction, syncing with other workers, the API and query time on 1M tasks
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.services.auth_service import AuthService
+from app.services.similar_task_service import similar_task_service
+from app.services.task_similarity import SimilarityIndex
+
+VOCABULARY = [f"w{i}" for i in range(300)] + ["desarrollo", "prueba", "gestión", "api", "login", "pagos"]
+
+def random_text(rng):
+    return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 8)))
+
+def brute_force(index, texts, query, project_ids=None):
+    """Reference: dense TF-IDF cosine with the IDF weights of the index"""
+    features, frequencies = index.vectorize(query, None)
+    weights = dict(zip(features.tolist(), (frequencies * index._idf[features]).tolist()))
+    query_norm = np.sqrt(sum(w * w for w in weights.values()))
+    scores = {}
+    for task_id, (project_id, title, description) in texts.items():
+        if project_ids is not None and project_id not in project_ids:
+            continue
+        features, frequencies = index.vectorize(title, description)
+        vector = frequencies * index._idf[features]
+        dot = sum(weights.get(f, 0.0) * v for f, v in zip(features.tolist(), vector.tolist()))
+        if dot > 0:
+            scores[task_id] = dot / (query_norm * np.sqrt((vector ** 2).sum()))
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def assert_same_ranking(found, expected, limit):
+    expected = expected[:limit]
+    assert len(found) == len(expected), (found, expected)
+    for (_, found_score), (_, expected_score) in zip(found, expected):
+        assert abs(found_score - expected_score) < 1e-4, (found, expected)
+
+def test_index():
+    """Scores match brute force before and after compaction"""
+    print("=== TESTING SIMILARITY INDEX ===")
+    rng = random.Random(0)
+    texts = {task_id: (task_id % 7, random_text(rng), random_text(rng) if task_id % 2 else None) for task_id in range(1, 3001)}
+    index = SimilarityIndex(n_features=1 << 16, min_postings=0, max_df=1.0, min_delta=10 ** 6)
+    index.load((task_id, *texts[task_id]) for task_id in list(texts)[:2000])
+    for task_id in list(texts)[2000:]:
+        index.upsert(task_id, *texts[task_id])
+    for task_id in rng.sample(list(texts), 300):
+        texts[task_id] = (texts[task_id][0], random_text(rng), None)
+        index.upsert(task_id, *texts[task_id])
+    for task_id in rng.sample(list(texts), 100):
+        del texts[task_id]
+        index.remove(task_id)
+    assert len(index) == len(texts) and len(index._delta) > 1000 and index._dead > 0
+
+    queries = [random_text(rng) for _ in range(20)]
+    for query in queries:
+        assert_same_ranking(index.query(query, limit=10), brute_force(index, texts, query), 10)
+        assert_same_ranking(index.query(query, limit=5, project_ids=[2, 3]), brute_force(index, texts, query, {2, 3}), 5)
+    print(f"✅ Matrix + delta scores match brute force ({len(index._delta)} tasks in the delta, {index._dead} tombstones)")
+
+    index.compact()
+    fresh = SimilarityIndex(n_features=1 << 16, min_postings=0, max_df=1.0)
+    fresh.load((task_id, *text) for task_id, text in texts.items())
+    assert len(index._delta) == 0 and index._dead == 0
+    for query in queries:
+        assert_same_ranking(index.query(query, limit=10), fresh.query(query, limit=10), 10)
+        assert_same_ranking(index.query(query, limit=10), brute_force(index, texts, query), 10)
+    assert index.upsert(1, *texts[1]) is False, "unchanged text is not re-indexed"
+    print("✅ Compaction gives the same index as a bulk load")
+
+def test_service_and_api():
+    """Saves update the index; other workers' edits are picked up; API results"""
+    print("\n=== TESTING SERVICE AND API ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    ana = User(email="ana@example.com", username="ana", full_name="Ana",
+               hashed_password=AuthService.get_password_hash("secret123"))
+    ben = User(email="ben@example.com", username="ben", full_name="Ben", hashed_password="x")
+    db.add_all([ana, ben])
+    db.commit()
+    mine = Project(name="Pagos", owner_id=ana.id, status=ProjectStatus.ACTIVE)
+    other = Project(name="Ajeno", owner_id=ben.id, status=ProjectStatus.ACTIVE)
+    db.add_all([mine, other])
+    db.commit()
+    db.add(ProjectMember(project_id=mine.id, user_id=ana.id, role="admin"))
+    history = [("Integración pasarela de pagos Stripe", 12), ("Integración pasarela de pagos PayPal", 18),
+               ("Reporte mensual de ventas", 4)]
+    for title, hours in history:
+        db.add(Task(title=title, project_id=mine.id, creator_id=ana.id, status=TaskStatus.DONE, actual_hours=hours))
+    db.add(Task(title="Integración pasarela de pagos Redsys", project_id=other.id, creator_id=ben.id))
+    db.commit()
+
+    client = TestClient(app)
+    token = client.post("/api/v1/auth/login", json={"email": "ana@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/api/v1/tasks/similar", headers=headers,
+                           json={"title": "Integración de la pasarela de pagos", "project_id": mine.id, "limit": 5})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    titles = [match["title"] for match in result["matches"]]
+    assert titles[:2] == ["Integración pasarela de pagos PayPal", "Integración pasarela de pagos Stripe"] or \
+        titles[:2] == ["Integración pasarela de pagos Stripe", "Integración pasarela de pagos PayPal"], titles
+    assert "Integración pasarela de pagos Redsys" not in titles, "other projects stay hidden"
+    assert result["suggested_hours_source"] == "similar_tasks" and 12 <= result["suggested_hours"] <= 18
+    print(f"✅ Similar finished tasks suggest {result['suggested_hours']} h; projects without access are excluded")
+
+    response = client.post("/api/v1/tasks/similar", headers=headers,
+                           json={"title": "Diseño del logotipo", "project_id": mine.id, "limit": 5})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["suggested_hours_source"] == "learned" and result["suggested_hours"] > 0, result
+    print(f"✅ Without similar finished tasks the learned estimate suggests {result['suggested_hours']} h")
+
+    created = client.post("/api/v1/tasks/", headers=headers,
+                          json={"title": "Integración pasarela de pagos Stripe", "project_id": mine.id}).json()
+    result = client.get(f"/api/v1/tasks/{created['id']}/similar", headers=headers).json()
+    assert result["matches"][0]["similarity"] == 1.0 and result["possible_duplicates"] == [result["matches"][0]["task_id"]]
+    assert created["id"] not in [match["task_id"] for match in result["matches"]]
+    print("✅ New task indexed on save and its duplicate flagged")
+
+    # Another worker renames, inserts and deletes without going through this process
+    renamed = db.query(Task).filter(Task.title == "Reporte mensual de ventas").one()
+    db.query(Task).filter(Task.id == renamed.id).update(
+        {Task.title: "Migración de la base de datos", Task.updated_at: datetime.utcnow()}, synchronize_session=False)
+    db.add(Task(title="Migración de usuarios a la nueva base de datos", project_id=mine.id, creator_id=ana.id))
+    db.query(Task).filter(Task.title == "Integración pasarela de pagos PayPal").delete(synchronize_session=False)
+    db.commit()
+    found = similar_task_service.similar(db, "Migración base de datos", limit=5)
+    found_titles = {db.get(Task, task_id).title for task_id, _ in found}
+    assert found_titles == {"Migración de la base de datos", "Migración de usuarios a la nueva base de datos"}, found_titles
+    assert len(similar_task_service.index) == db.query(Task).count()
+    print("✅ Out-of-process renames, inserts and deletes are picked up")
+
+    response = client.post("/api/v1/tasks/similar", headers=headers, json={"title": "Pagos", "project_id": other.id})
+    assert response.status_code == 403
+    db.close()
+
+def test_query_time():
+    """Top-k queries over 1M tasks"""
+    print("\n=== TESTING QUERY TIME ===")
+    rng = random.Random(1)
+    verbs = ["Implementar", "Corregir", "Probar", "Diseñar", "Revisar", "Documentar", "Migrar", "Optimizar"]
+    nouns = [f"modulo{i}" for i in range(5000)] + ["login", "api", "pagos", "facturación", "usuarios", "reportes"]
+
+    def title():
+        return f"{rng.choice(verbs)} {rng.choice(nouns)} de {rng.choice(nouns)} {rng.choice(nouns)}"
+
+    index = SimilarityIndex()
+    started = time.perf_counter()
+    index.load((task_id, task_id % 2000, title(), None) for task_id in range(1, 1000001))
+    print(f"   Built over 1M tasks in {time.perf_counter() - started:.1f} s")
+    queries = [title() for _ in range(200)]
+    started = time.perf_counter()
+    for query in queries:
+        assert index.query(query, limit=10)
+    elapsed = (time.perf_counter() - started) / len(queries) * 1000
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.upsert(rng.randint(1, 1000000), 1, title(), None)
+    upsert = (time.perf_counter() - started) * 1000
+    print(f"✅ Top-10 query in {elapsed:.1f} ms; 1000 edits indexed in {upsert:.0f} ms")
+    assert elapsed < 50
+
+def main():
+    print("Testing similar-task finder...")
+    try:
+        test_index()
+        test_service_and_api()
+        test_query_time()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
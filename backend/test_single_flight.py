@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical analysis requests
+Runs against a throwaway SQLite database; workers are simulated with threads
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.single_flight import (
+    SingleFlight, LocalFlightLock, DatabaseFlightLock, project_data_version
+)
+
+def run_concurrently(count, target):
+    results = [None] * count
+    def worker(i):
+        results[i] = target(i)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def slow_counter(calls, value="result", delay=0.3):
+    def compute():
+        calls.append(1)
+        time.sleep(delay)
+        return {"value": value}
+    return compute
+
+def test_in_process_coalescing():
+    print("=== TESTING IN-PROCESS COALESCING ===")
+    flight = SingleFlight(backend=None)
+    calls = []
+    results = run_concurrently(8, lambda i: flight.do("k", slow_counter(calls)))
+    roles = sorted(role for _, role in results)
+    assert len(calls) == 1, f"{len(calls)} computations"
+    assert roles == ["follower"] * 7 + ["leader"], roles
+    assert all(result == {"value": "result"} for result, _ in results)
+    assert results[0][0] is not results[1][0], "followers get their own copy"
+
+    other = []
+    run_concurrently(2, lambda i: flight.do(f"key-{i}", slow_counter(other)))
+    assert len(other) == 2, "different keys are not coalesced"
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("provider down")
+    errors = run_concurrently(3, lambda i: _capture(lambda: flight.do("boom", failing)))
+    assert all(isinstance(e, RuntimeError) for e in errors), errors
+    assert flight.get_stats()["in_flight"] == 0
+    print("✅ One computation per key, errors shared with waiting callers")
+
+def _capture(fn):
+    try:
+        return fn()
+    except Exception as e:
+        return e
+
+def check_cross_worker(backend, label):
+    worker_a = SingleFlight(backend=backend, poll_seconds=0.05)
+    worker_b = SingleFlight(backend=backend, poll_seconds=0.05)
+    calls = []
+
+    def call(i):
+        if i == 1:
+            time.sleep(0.1)  # B arrives while A is computing
+        worker = worker_a if i == 0 else worker_b
+        return worker.do("analysis:1:risk:local:v1", slow_counter(calls, delay=0.4),
+                         lambda since: {"value": "persisted", "since": since})
+
+    (result_a, role_a), (result_b, role_b) = run_concurrently(2, call)
+    assert len(calls) == 1, f"{label}: {len(calls)} computations"
+    assert role_a == "leader" and role_b == "shared", (role_a, role_b)
+    assert result_b["value"] == "persisted" and result_b["since"] <= datetime.utcnow()
+    assert backend.holder_since("analysis:1:risk:local:v1") is None, "lease released"
+    print(f"   {label}: second worker reused the persisted result")
+
+def test_cross_worker_coalescing():
+    print("=== TESTING CROSS-WORKER COALESCING ===")
+    check_cross_worker(LocalFlightLock(), "local stand-in")
+    check_cross_worker(DatabaseFlightLock(), "database lease")
+    print("✅ Workers coordinate through the shared lease")
+
+def setup_data(db):
+    Base.metadata.create_all(bind=engine)
+    user = User(email="flight@example.com", username="flight", full_name="Flight User", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Standup", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    for i in range(5):
+        db.add(Task(title=f"Task {i}", project_id=project.id, creator_id=user.id, status=TaskStatus.TODO,
+                    due_date=datetime.utcnow() - timedelta(days=1)))
+    db.commit()
+    return user.id, project.id
+
+def test_analysis_requests_coalesced(user_id, project_id):
+    print("=== TESTING COALESCED ANALYSIS REQUESTS ===")
+    flight = SingleFlight(backend=LocalFlightLock())
+    computations = []
+
+    def request(i):
+        db = SessionLocal()
+        try:
+            service = AIProjectAnalysisService("local")
+            service.flight = flight
+            original = service._generate_specific_analysis
+            def slow(*args):
+                computations.append(1)
+                time.sleep(0.3)  # Stand-in for LLM latency
+                return original(*args)
+            service._generate_specific_analysis = slow
+            return service.generate_specific_analysis(db, project_id, "risk")
+        finally:
+            db.close()
+
+    results = run_concurrently(6, request)
+    ids = {tuple(insight["id"] for insight in result) for result in results}
+    print(f"   6 requests -> {len(computations)} computation(s), stats {flight.get_stats()}")
+    assert len(computations) == 1
+    assert len(ids) == 1, ids
+
+    db = SessionLocal()
+    before = project_data_version(db, project_id)
+    db.add(Task(title="New work", project_id=project_id, creator_id=user_id, status=TaskStatus.TODO))
+    db.commit()
+    assert project_data_version(db, project_id) != before, "new data must start a new flight"
+    db.close()
+    print("✅ Identical requests share one analysis run")
+
+def main():
+    print("Testing single-flight coalescing...")
+    db = SessionLocal()
+    try:
+        user_id, project_id = setup_data(db)
+    finally:
+        db.close()
+    try:
+        test_in_process_coalescing()
+        test_cross_worker_coalescing()
+        test_analysis_requests_coalesced(user_id, project_id)
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for task category classification
+Checks the multi-pattern matcher, classification on write, the backfill
+script and the GROUP BY cost breakdown
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import text
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus, TaskCreate, TaskUpdate
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.task_categories import TaskCategoryClassifier, categorize_task, normalize_text, parse_keywords
+from app.services.task_service import TaskService
+from classify_tasks import reclassify
+
+def naive_hits(classifier, title):
+    """Reference: scan for every keyword separately"""
+    text_value = normalize_text(title)
+    hits = []
+    for category in classifier.categories:
+        count = 0
+        for keyword in classifier.keywords[category]:
+            keyword = normalize_text(keyword)
+            start = text_value.find(keyword)
+            while start >= 0:
+                if start == 0 or not text_value[start - 1].isalnum():
+                    count += 1
+                start = text_value.find(keyword, start + 1)
+        hits.append(count)
+    return hits
+
+def test_classifier():
+    """Spanish and English keywords, accents, word starts and ties"""
+    print("=== TESTING CLASSIFIER ===")
+    classifier = TaskCategoryClassifier()
+    cases = {
+        "Desarrollo del API": "development",
+        "Implement OAuth login": "development",
+        "Pruebas de integración": "testing",
+        "QA regression": "testing",
+        "Gestion de riesgos": "management",
+        "Sprint planning meeting": "management",
+        "Diseño de la UI": "other",
+        "Contest results": "other",
+        "Pruebas del desarrollo de QA": "testing",
+        "Desarrollo y pruebas": "development"
+    }
+    for title, expected in cases.items():
+        assert classifier.classify(title) == expected, (title, classifier.classify(title))
+    print(f"✅ {len(cases)} titles classified, including ties and accent-free spellings")
+
+    rng = random.Random(1)
+    alphabet = "abcdeiglmnoprstuvqáó "
+    for _ in range(2000):
+        title = "".join(rng.choice(alphabet) for _ in range(50))
+        assert classifier.matches(title) == naive_hits(classifier, title), title
+    print("✅ Automaton agrees with a keyword-by-keyword scan on 2000 random titles")
+
+    custom = TaskCategoryClassifier(parse_keywords("design: diseño, mockup ; ops:deploy,despliegue;broken"))
+    assert custom.categories == ["design", "ops"]
+    assert custom.classify("Mockup de la home") == "design" and custom.classify("Despliegue a producción") == "ops"
+    print("✅ Keyword sets configurable through TASK_CATEGORY_KEYWORDS")
+
+    titles = [f"Tarea {i}: " + rng.choice(list(cases)) + " del módulo de facturación" for i in range(100000)]
+    started = time.perf_counter()
+    for title in titles:
+        classifier.classify(title)
+    elapsed = time.perf_counter() - started
+    print(f"   100k titles in {elapsed * 1000:.0f} ms ({elapsed * 10:.1f} µs each)")
+    assert elapsed < 10
+
+def setup_data(db):
+    user = User(email="cat@example.com", username="cat", full_name="Cat", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Categories", owner_id=user.id, status=ProjectStatus.ACTIVE, budget=50000)
+    db.add(project)
+    db.commit()
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role="admin"))
+    db.commit()
+    return user, project
+
+def test_classified_on_write():
+    """Category is stored on insert and update; the backfill fills older rows"""
+    print("\n=== TESTING CLASSIFICATION ON WRITE ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user, project = setup_data(db)
+    task = TaskService().create_task(db, TaskCreate(title="Desarrollo backend", project_id=project.id), user.id)
+    assert task.category == "development"
+    TaskService().update_task(db, task.id, TaskUpdate(priority="high"), user.id)
+    assert task.category == "development"
+    TaskService().update_task(db, task.id, TaskUpdate(title="Test end to end"), user.id)
+    db.refresh(task)
+    assert task.category == "testing"
+    print("✅ Category set on create and updated with the title")
+
+    # Rows written around TaskService (or before the migration) have no category
+    db.execute(text("INSERT INTO tasks (title, project_id, creator_id, status, priority) VALUES "
+                    "('Reunión semanal', :p, :u, 'TODO', 'MEDIUM'), ('Prueba de humo', :p, :u, 'TODO', 'MEDIUM')"),
+               {"p": project.id, "u": user.id})
+    db.commit()
+    assert db.query(Task).filter(Task.category.is_(None)).count() == 2
+    stats = reclassify(db, dry_run=True)
+    assert stats["changed"] == 2 and db.query(Task).filter(Task.category.is_(None)).count() == 2
+    stats = reclassify(db, batch_size=1)
+    assert stats["changed"] == 2 and stats["tasks"] == 3
+    assert {t.title: t.category for t in db.query(Task)}["Reunión semanal"] == "management"
+    assert reclassify(db)["changed"] == 0
+    print(f"✅ Backfill classified {stats['changed']} rows: {stats['categories']}")
+    db.close()
+
+def test_cost_breakdown():
+    """Breakdown is one GROUP BY on the indexed column, each task counted once"""
+    print("\n=== TESTING COST BREAKDOWN ===")
+    db = SessionLocal()
+    user = db.query(User).filter(User.username == "cat").one()
+    project = db.query(Project).filter(Project.name == "Categories").one()
+    rng = random.Random(5)
+    titles = ["Desarrollo de pruebas automáticas", "Gestión de QA", "Dev tooling", "Documentación", "Test plan"]
+    for index in range(60):
+        done = index % 3 == 0
+        title = rng.choice(titles)
+        db.add(Task(title=title, category=categorize_task(title), project_id=project.id, creator_id=user.id,
+                    assignee_id=user.id if index % 2 else None, estimated_hours=rng.choice([None, 4, 8]),
+                    actual_hours=rng.choice([None, 5, 10]) if done else None,
+                    status=TaskStatus.DONE if done else TaskStatus.TODO))
+    db.commit()
+
+    service = AIProjectAnalysisService("local")
+    forecast = service.forecast_budget(project.id, db)
+    tasks = db.query(Task).filter(Task.project_id == project.id).all()
+    estimates = service.estimator.estimate_tasks(db, tasks)
+    expected = {}
+    for task in tasks:
+        hours = task.actual_hours if task.status == TaskStatus.DONE and task.actual_hours else estimates[task.id].expected_hours
+        expected[task.category] = expected.get(task.category, 0) + hours * 75
+    for category, cost in expected.items():
+        assert abs(forecast.cost_breakdown[category] - cost) < 0.01, (category, forecast.cost_breakdown, expected)
+    assert abs(sum(forecast.cost_breakdown.values()) - forecast.projected_total_cost) < 0.05
+    print(f"✅ Breakdown {forecast.cost_breakdown} sums to the projected ${forecast.projected_total_cost:,.2f}")
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT category, assignee_id, count(*) FROM tasks WHERE project_id = :p GROUP BY category, assignee_id"
+    ), {"p": project.id}).fetchall()
+    assert any("ix_tasks_project_category" in str(row) for row in plan), plan
+    print("✅ Breakdown query uses ix_tasks_project_category")
+    db.close()
+
+def main():
+    print("Testing task categories...")
+    try:
+        test_classifier()
+        test_classified_on_write()
+        test_cost_breakdown()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Test script for task dependencies and the incremental critical path
+Checks cycle detection, incremental updates against full rebuilds, the
+API and the cost of single edits on a 50k-task graph
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskDependency
+from app.services.auth_service import AuthService
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.dependency_service import dependency_service
+from app.services.task_graph import CycleError, TaskGraph
+
+def longest_path(hours, edges):
+    """Reference: full recomputation over a fresh topological sort"""
+    graph = TaskGraph.build(((node, value, None) for node, value in hours.items()), edges)
+    return max(graph.finish.values(), default=0.0)
+
+def test_cycles_and_paths():
+    """Longest path on a diamond and cycle rejection with the offending chain"""
+    print("=== TESTING CYCLES AND PATHS ===")
+    graph = TaskGraph.build([(1, 4, None), (2, 10, None), (3, 2, None), (4, 1, None)], [(1, 2), (1, 3), (2, 4), (3, 4)])
+    path, hours = graph.critical_path()
+    assert path == [1, 2, 4] and hours == 15, (path, hours)
+    print(f"✅ Diamond critical path {path} = {hours} h")
+
+    for blocker, blocked in ((4, 1), (2, 1), (3, 3)):
+        try:
+            graph.add_edge(blocker, blocked)
+            raise AssertionError(f"{blocker} → {blocked} should be rejected")
+        except CycleError as e:
+            assert e.path[0] == blocked and e.path[-1] == blocked
+    print(f"✅ Cycles rejected, e.g. {CycleError([1, 2, 4, 1])}")
+
+    # Back edge in topological order that is not a cycle: reorder, then recompute
+    graph.add_task(5, 7)
+    graph.add_edge(5, 1)
+    assert graph.order[5] < graph.order[1]
+    path, hours = graph.critical_path()
+    assert path == [5, 1, 2, 4] and hours == 22
+    graph.set_hours(2, 0)
+    assert graph.critical_path() == ([5, 1, 3, 4], 14)
+    graph.remove_task(1)
+    assert graph.critical_path() == ([5], 7) and graph.edge_count == 2
+    print("✅ Reordering, duration change and task removal update the path")
+
+def test_incremental_matches_rebuild():
+    """Random edits applied incrementally equal a full recomputation"""
+    print("\n=== TESTING INCREMENTAL UPDATES ===")
+    rng = random.Random(5)
+    hours = {node: rng.randint(0, 20) for node in range(1, 201)}
+    graph = TaskGraph.build(((node, value, None) for node, value in hours.items()), [])
+    edges = set()
+    rejected = 0
+    for step in range(3000):
+        action = rng.random()
+        if action < 0.6:
+            blocker, blocked = rng.sample(sorted(hours), 2)
+            try:
+                if graph.add_edge(blocker, blocked):
+                    edges.add((blocker, blocked))
+            except CycleError:
+                rejected += 1
+        elif action < 0.8 and edges:
+            edge = rng.choice(sorted(edges))
+            graph.remove_edge(*edge)
+            edges.discard(edge)
+        else:
+            node = rng.choice(sorted(hours))
+            hours[node] = rng.randint(0, 20)
+            graph.set_hours(node, hours[node])
+        if step % 100 == 0:
+            assert abs(graph.critical_path()[1] - longest_path(hours, edges)) < 1e-9, step
+    assert all(graph.order[a] < graph.order[b] for a, b in edges), "topological order kept"
+    assert graph.edge_count == len(edges)
+    print(f"✅ 3000 random edits ({len(edges)} edges, {rejected} cycles rejected) match full recomputation")
+
+def test_large_graph():
+    """Single edits on a 50k-task graph stay in the millisecond range"""
+    print("\n=== TESTING 50K TASKS ===")
+    rng = random.Random(9)
+    count = 50000
+    hours = [(node, rng.randint(1, 16), None) for node in range(1, count + 1)]
+    # Mostly short-range dependencies, like phases of work
+    edges = [(node, node + rng.randint(1, 50)) for node in range(1, count - 50) for _ in range(2)]
+    started = time.perf_counter()
+    graph = TaskGraph.build(hours, edges)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    timings = {"add_edge": [], "set_hours": [], "remove_edge": [], "cycle_check": []}
+    for _ in range(200):
+        blocker = rng.randint(1, count - 100)
+        blocked = blocker + rng.randint(1, 100)
+        started = time.perf_counter()
+        added = graph.add_edge(blocker, blocked)
+        timings["add_edge"].append(time.perf_counter() - started)
+
+        node = rng.randint(1, count)
+        started = time.perf_counter()
+        graph.set_hours(node, rng.randint(1, 16))
+        timings["set_hours"].append(time.perf_counter() - started)
+
+        if added:
+            started = time.perf_counter()
+            graph.remove_edge(blocker, blocked)
+            timings["remove_edge"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        try:
+            graph.check_edge(blocked + 200, blocker) if blocked + 200 <= count else None
+        except CycleError:
+            pass
+        timings["cycle_check"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    graph.critical_path()
+    path_ms = (time.perf_counter() - started) * 1000
+    averages = {name: sum(values) / len(values) * 1000 for name, values in timings.items() if values}
+    print(f"   build {build_ms:.0f} ms, critical path {path_ms:.1f} ms, "
+          + ", ".join(f"{name} avg {ms:.2f} ms" for name, ms in averages.items()))
+    assert build_ms < 5000 and path_ms < 100
+    assert all(ms < 50 for ms in averages.values()), averages
+    print("✅ Incremental edits avoid rebuilding the graph")
+
+def setup_data():
+    db = SessionLocal()
+    user = User(email="deps@example.com", username="deps", full_name="Deps User",
+                hashed_password=AuthService.get_password_hash("pw123456"))
+    db.add(user)
+    db.commit()
+    project = Project(name="Deps", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role="admin"))
+    db.commit()
+    ids = project.id
+    db.close()
+    return ids
+
+def test_api():
+    """Endpoints, cycle errors, hooks from task edits and stale-graph rebuilds"""
+    print("\n=== TESTING API ===")
+    project_id = setup_data()
+    with TestClient(app) as client:
+        token = client.post("/api/v1/auth/login", json={"email": "deps@example.com", "password": "pw123456"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        ids = []
+        for title, hours in (("Diseño", 8), ("Backend", 24), ("Frontend", 16), ("Pruebas", 6)):
+            response = client.post("/api/v1/tasks/", headers=headers,
+                                   json={"title": title, "project_id": project_id, "estimated_hours": hours})
+            assert response.status_code == 200, response.text
+            ids.append(response.json()["id"])
+        design, backend, frontend, qa = ids
+        for blocker, blocked in ((design, backend), (design, frontend), (backend, qa), (frontend, qa)):
+            response = client.post(f"/api/v1/tasks/{blocked}/dependencies", headers=headers, json={"blocker_id": blocker})
+            assert response.status_code == 200, response.text
+
+        response = client.post(f"/api/v1/tasks/{design}/dependencies", headers=headers, json={"blocker_id": qa})
+        assert response.status_code == 400 and "cycle" in response.json()["error"], response.text
+        response = client.post(f"/api/v1/tasks/{qa}/dependencies", headers=headers, json={"blocker_id": backend})
+        assert response.status_code == 400
+        print(f"✅ Cycle rejected: {client.post(f'/api/v1/tasks/{design}/dependencies', headers=headers, json={'blocker_id': qa}).json()['error']}")
+
+        deps = client.get(f"/api/v1/tasks/{qa}/dependencies", headers=headers).json()
+        assert {d["blocker_id"] for d in deps["blocked_by"]} == {backend, frontend} and deps["blocks"] == []
+
+        path = client.get(f"/api/v1/projects/{project_id}/critical-path", headers=headers).json()
+        assert [t["id"] for t in path["tasks"]] == [design, backend, qa] and path["total_hours"] == 38
+        print(f"✅ Critical path {[t['title'] for t in path['tasks']]} = {path['total_hours']} h")
+
+        # Task edits go through the hook: same cached graph, new path
+        graph = dependency_service.graph(SessionLocal(), project_id)
+        client.put(f"/api/v1/tasks/{frontend}", headers=headers, json={"estimated_hours": 40})
+        path = client.get(f"/api/v1/projects/{project_id}/critical-path", headers=headers).json()
+        assert [t["id"] for t in path["tasks"]] == [design, frontend, qa] and path["total_hours"] == 54
+        client.put(f"/api/v1/tasks/{frontend}/status?new_status=done", headers=headers)
+        path = client.get(f"/api/v1/projects/{project_id}/critical-path", headers=headers).json()
+        assert [t["id"] for t in path["tasks"]] == [design, backend, qa]
+        db = SessionLocal()
+        assert dependency_service.graph(db, project_id) is graph, "updated in place, not rebuilt"
+        print("✅ Task updates adjust the cached graph incrementally")
+
+        # A change made by another worker is detected by the signature
+        db.query(TaskDependency).filter(TaskDependency.blocked_id == qa, TaskDependency.blocker_id == backend).delete()
+        db.commit()
+        path = client.get(f"/api/v1/projects/{project_id}/critical-path", headers=headers).json()
+        assert dependency_service.graph(db, project_id) is not graph and path["total_hours"] == 32
+        print("✅ Out-of-process edits trigger a rebuild")
+
+        prediction = AIProjectAnalysisService("local").predict_project_completion(project_id, db)
+        assert prediction.critical_path["task_ids"] == [design, backend]
+        assert any("Ruta crítica" in factor for factor in prediction.factors_affecting_timeline)
+        print(f"✅ Progress prediction reports the critical path: {prediction.critical_path}")
+
+        assert client.delete(f"/api/v1/tasks/{design}/dependencies/{qa}", headers=headers).status_code == 404
+        assert client.delete(f"/api/v1/tasks/{design}", headers=headers).status_code == 200
+        assert db.query(TaskDependency).filter(TaskDependency.blocker_id == design).count() == 0
+        path = client.get(f"/api/v1/projects/{project_id}/critical-path", headers=headers).json()
+        assert path["dependency_count"] == 1 and path["total_hours"] == 24
+        print("✅ Deleting a task removes its dependencies")
+        db.close()
+
+def main():
+    print("Testing task dependencies...")
+    try:
+        test_cycles_and_paths()
+        test_incremental_matches_rebuild()
+        test_large_graph()
+        test_api()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test script for the user task summary and project task analytics
+Checks the aggregate queries against the previous implementations (every
+task loaded and counted in Python) and times both at 100k tasks
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import event, text
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectMember, ProjectStatus
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.services.task_service import TaskService, OPEN_STATUSES
+
+def legacy_user_summary(service, db, user_id):
+    """The summary as computed before the aggregate query, limited like the
+    overdue and upcoming lists to projects the user can see"""
+    project_ids = service._visible_project_ids(db, user_id)
+    user_tasks = [t for t in db.query(Task).filter(Task.assignee_id == user_id).all()
+                  if project_ids is None or t.project_id in project_ids]
+    total_tasks = len(user_tasks)
+    completed_tasks = len([t for t in user_tasks if t.status == TaskStatus.DONE])
+    now = datetime.utcnow()
+    overdue = service._assigned_by_due_date(db, user_id, None, now, True, 0, 5, project_ids)
+    upcoming = service._assigned_by_due_date(db, user_id, now, now + timedelta(days=7), False, 0, 5, project_ids)
+    open_tasks = [t for t in user_tasks if t.status != TaskStatus.DONE]
+    return {
+        "user_id": user_id,
+        "total_tasks": total_tasks,
+        "task_status_breakdown": {
+            "completed": completed_tasks,
+            "in_progress": len([t for t in user_tasks if t.status == TaskStatus.IN_PROGRESS]),
+            "todo": len([t for t in user_tasks if t.status == TaskStatus.TODO])
+        },
+        "completion_rate": round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 1),
+        "overdue_tasks": overdue["total"],
+        "upcoming_tasks": upcoming["total"],
+        "priority_breakdown": {
+            "high": len([t for t in open_tasks if t.priority == TaskPriority.HIGH]),
+            "medium": len([t for t in open_tasks if t.priority == TaskPriority.MEDIUM]),
+            "low": len([t for t in open_tasks if t.priority == TaskPriority.LOW])
+        },
+        "recent_overdue": overdue["tasks"],
+        "upcoming_deadlines": upcoming["tasks"]
+    }
+
+def legacy_project_analytics(db, project_id):
+    """The project analytics as computed before the aggregate query; overdue
+    now counts open tasks only, like the overdue list"""
+    project_tasks = db.query(Task).filter(Task.project_id == project_id).all()
+    if not project_tasks:
+        return {"project_id": project_id, "total_tasks": 0, "message": "No tasks found for this project"}
+    total_tasks = len(project_tasks)
+    completed_tasks = len([t for t in project_tasks if t.status == TaskStatus.DONE])
+    total_estimated_hours = sum(t.estimated_hours or 0 for t in project_tasks)
+    total_actual_hours = sum(t.actual_hours or 0 for t in project_tasks)
+    workload = {}
+    for task in project_tasks:
+        if task.assignee_id:
+            entry = workload.setdefault(task.assignee_id, {"total_tasks": 0, "completed_tasks": 0, "estimated_hours": 0, "actual_hours": 0})
+            entry["total_tasks"] += 1
+            if task.status == TaskStatus.DONE:
+                entry["completed_tasks"] += 1
+            entry["estimated_hours"] += task.estimated_hours or 0
+            entry["actual_hours"] += task.actual_hours or 0
+    four_weeks_ago = datetime.utcnow() - timedelta(weeks=4)
+    recent = [t for t in project_tasks if t.status == TaskStatus.DONE and t.completed_at and t.completed_at >= four_weeks_ago]
+    return {
+        "project_id": project_id,
+        "total_tasks": total_tasks,
+        "progress_percentage": round(completed_tasks / total_tasks * 100, 1),
+        "task_status_breakdown": {
+            "completed": completed_tasks,
+            "in_progress": len([t for t in project_tasks if t.status == TaskStatus.IN_PROGRESS]),
+            "todo": len([t for t in project_tasks if t.status == TaskStatus.TODO]),
+            "cancelled": len([t for t in project_tasks if t.status == TaskStatus.CANCELLED])
+        },
+        "time_tracking": {
+            "total_estimated_hours": total_estimated_hours,
+            "total_actual_hours": total_actual_hours,
+            "efficiency_percentage": round((total_estimated_hours / total_actual_hours * 100), 1) if total_actual_hours > 0 else 0
+        },
+        "team_workload": workload,
+        "velocity": round(len(recent) / 4, 1),
+        "overdue_tasks": len([t for t in project_tasks if t.due_date and t.due_date < datetime.utcnow() and t.status in OPEN_STATUSES])
+    }
+
+def task_rows(rng, count, project_ids, creator_id, assignee_ids):
+    """Random tasks; due and completion times stay clear of the minute around now"""
+    now = datetime.utcnow()
+    statuses = [status.name for status in TaskStatus]
+    priorities = [priority.name for priority in TaskPriority]
+    for index in range(count):
+        status = rng.choice(statuses)
+        yield {
+            "title": f"Tarea {index}",
+            "project_id": rng.choice(project_ids),
+            "creator_id": creator_id,
+            "assignee_id": rng.choice(assignee_ids),
+            "status": status,
+            "priority": rng.choice(priorities),
+            "category": "other",
+            "estimated_hours": rng.choice([None, 1.5, 4, 8, 16]),
+            "actual_hours": rng.choice([None, 2, 6.5, 10]),
+            "due_date": now + timedelta(hours=rng.randint(-400, 400), minutes=30) if rng.random() < 0.8 else None,
+            "completed_at": now - timedelta(days=rng.randint(0, 60), minutes=30) if status == "DONE" and rng.random() < 0.9 else None
+        }
+
+def test_equivalence():
+    """Same output as the previous implementations"""
+    print("=== TESTING EQUIVALENCE ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = [User(email=f"u{i}@example.com", username=f"u{i}", full_name=f"U{i}", hashed_password="x") for i in range(4)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    projects = [Project(name=f"P{i}", owner_id=user_ids[0], status=ProjectStatus.ACTIVE) for i in range(5)]
+    db.add_all(projects)
+    db.commit()
+    project_ids = [project.id for project in projects]
+    # u1 belongs to the first two projects only; the last project stays empty
+    db.add_all([ProjectMember(project_id=project_id, user_id=user_ids[1]) for project_id in project_ids[:2]])
+    db.execute(Task.__table__.insert(), list(task_rows(random.Random(11), 4000, project_ids[:4], user_ids[0], user_ids + [None])))
+    db.commit()
+
+    service = TaskService()
+    for user_id in user_ids:
+        assert service.get_user_tasks_summary(db, user_id) == legacy_user_summary(service, db, user_id), user_id
+    # Tasks still assigned in projects the user cannot see are left out of every count
+    summary = service.get_user_tasks_summary(db, user_ids[1])
+    assert summary["total_tasks"] == db.query(Task).filter(Task.assignee_id == user_ids[1], Task.project_id.in_(project_ids[:2])).count()
+    assert service.get_user_tasks_summary(db, user_ids[2])["total_tasks"] == 0
+    for project_id in project_ids:
+        assert service.get_project_tasks_analytics(db, project_id, user_ids[0]) == legacy_project_analytics(db, project_id), project_id
+    print(f"✅ Summaries of {len(user_ids)} users and analytics of {len(project_ids)} projects match the previous output")
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    service.get_project_tasks_analytics(db, project_ids[0], user_ids[0])
+    analytics_statements = len(statements)
+    statements.clear()
+    service.get_user_tasks_summary(db, user_ids[1])
+    event.remove(engine, "before_cursor_execute", listener)
+    # Access checks, then the aggregate; the summary adds two top-5 lists
+    assert sum("GROUP BY" in statement for statement in statements) == 0
+    assert sum("FROM tasks" in statement and "count(" in statement for statement in statements) == 1, statements
+    assert len(statements) == 5, statements
+    print(f"✅ Analytics in {analytics_statements} statements, summary in {len(statements)} (one aggregate each)")
+    db.close()
+
+def test_benchmark():
+    """100k tasks for one user and one project"""
+    print("\n=== TESTING 100K TASKS ===")
+    db = SessionLocal()
+    user = User(email="big@example.com", username="big", full_name="Big", hashed_password="x")
+    db.add(user)
+    db.commit()
+    project = Project(name="Grande", owner_id=user.id, status=ProjectStatus.ACTIVE)
+    db.add(project)
+    db.commit()
+    user_id, project_id = user.id, project.id
+    db.execute(Task.__table__.insert(), list(task_rows(random.Random(12), 100000, [project_id], user_id, [user_id])))
+    db.commit()
+    db.execute(text("ANALYZE"))
+
+    service = TaskService()
+    timings = {}
+    for name, new, old in (
+        ("user summary", lambda: service.get_user_tasks_summary(db, user_id), lambda: legacy_user_summary(service, db, user_id)),
+        ("project analytics", lambda: service.get_project_tasks_analytics(db, project_id, user_id), lambda: legacy_project_analytics(db, project_id))
+    ):
+        started = time.perf_counter()
+        expected = old()
+        legacy = (time.perf_counter() - started) * 1000
+        db.expunge_all()
+        started = time.perf_counter()
+        result = new()
+        aggregate = (time.perf_counter() - started) * 1000
+        assert result == expected
+        timings[name] = (legacy, aggregate)
+        print(f"   {name}: {legacy:.0f} ms before, {aggregate:.0f} ms now")
+    assert all(aggregate * 5 < legacy for legacy, aggregate in timings.values()), timings
+    print("✅ Same results at 100k tasks, at least 5x faster")
+    db.close()
+
+def main():
+    print("Testing task summaries...")
+    try:
+        test_equivalence()
+        test_benchmark()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Test script for velocity anomaly detection
+Checks the rolling statistics, the weekly aggregate, anomaly detection and
+that TEAM_PERFORMANCE insights are only emitted on anomalies
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Configure before the app modules read the environment
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["DEEPSEEK_API_KEY"] = "disabled"
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+from sqlalchemy import event
+from app.database import SessionLocal, engine, Base
+from app.models.user import User
+from app.models.project import Project, ProjectStatus
+from app.models.task import Task, TaskStatus
+from app.models.ai_insight import InsightType, InsightPriority
+from app.services.ai_service import AIProjectAnalysisService
+from app.services.time_buckets import python_bucket_start
+from app.services.velocity_monitor import VelocityMonitor
+
+def test_rolling_scores():
+    """Vectorized rolling mean and z-scores match a week-by-week loop"""
+    print("=== TESTING ROLLING STATISTICS ===")
+    monitor = VelocityMonitor(window_weeks=4)
+    values = np.random.default_rng(3).poisson(5, size=(50, 12)).astype(float)
+    mean, z_scores = monitor.rolling_scores(values)
+    assert mean.shape == (50, 8)
+    for row in range(50):
+        for week in range(4, 12):
+            window = values[row, week - 4:week]
+            sigma = max(window.std(), np.sqrt(window.mean()))
+            assert abs(mean[row, week - 4] - window.mean()) < 1e-9
+            assert abs(z_scores[row, week - 4] - (values[row, week] - window.mean()) / sigma) < 1e-9
+    print("✅ Rolling baseline and z-scores match the loop")
+
+    big = np.random.default_rng(4).poisson(3, size=(100000, 12)).astype(float)
+    started = time.perf_counter()
+    VelocityMonitor().rolling_scores(big)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"   100k series scored in {elapsed:.0f} ms")
+    assert elapsed < 1000
+
+def add_week(db, project, user_ids, week_start, counts):
+    """``counts[i]`` tasks completed by ``user_ids[i]`` mid-week"""
+    for user_id, count in zip(user_ids, counts):
+        for index in range(count):
+            db.add(Task(title="Tarea", project_id=project.id, creator_id=user_ids[0], assignee_id=user_id,
+                        status=TaskStatus.DONE, actual_hours=4, completed_at=week_start + timedelta(days=2, hours=index)))
+
+def setup_projects(db):
+    users = [User(email=f"{name}@example.com", username=name, full_name=name.title(), hashed_password="x")
+             for name in ("ana", "ben")]
+    db.add_all(users)
+    db.commit()
+    ids = [user.id for user in users]
+    current = python_bucket_start(datetime.utcnow(), "weekly")
+    weeks = [current - timedelta(weeks=offset) for offset in range(12, 0, -1)]
+    projects = {}
+    rng = np.random.default_rng(7)
+    for name in ("steady", "drop", "spike", "quiet"):
+        project = Project(name=name, owner_id=ids[0], status=ProjectStatus.ACTIVE)
+        db.add(project)
+        db.commit()
+        projects[name] = project
+        for index, week in enumerate(weeks):
+            last = index == len(weeks) - 1
+            if name == "steady":
+                counts = [int(rng.poisson(4)), int(rng.poisson(4))]
+            elif name == "drop":
+                counts = [0, 3] if last else [8, 4]  # Ana stops completing tasks
+            elif name == "spike":
+                counts = [14, 3] if last else [3, 3]
+            else:
+                counts = [1 if index % 4 == 0 else 0, 0]
+            add_week(db, project, ids, week, counts)
+        # The current (partial) week is never judged
+        add_week(db, project, ids, python_bucket_start(datetime.utcnow(), "weekly"), [0, 0])
+    db.commit()
+    return ids, projects
+
+def test_detection():
+    """Weekly series come from one query; only real breaks are flagged"""
+    print("\n=== TESTING DETECTION ===")
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    (ana, ben), projects = setup_projects(db)
+    monitor = VelocityMonitor()
+
+    project_ids = [project.id for project in projects.values()]
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    series, anomalies = monitor.scan(db, project_ids)
+    event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1, statements
+    drop_row = series.row(projects["drop"].id)
+    assert series.completions[drop_row].tolist() == [12.0] * 11 + [3.0]
+    assert series.completions[series.row(projects["drop"].id, ana)].tolist() == [8.0] * 11 + [0.0]
+    assert series.hours[drop_row, -1] == 12.0
+    print(f"✅ {len(series.keys)} series × {len(series.weeks)} weeks from one aggregate query")
+
+    found = {(a.project_id, a.assignee_id, a.kind) for a in anomalies}
+    assert (projects["drop"].id, None, "drop") in found
+    assert (projects["drop"].id, ana, "drop") in found
+    assert (projects["drop"].id, ben, "drop") not in found
+    assert (projects["spike"].id, None, "spike") in found and (projects["spike"].id, ana, "spike") in found
+    assert not any(a.project_id in (projects["steady"].id, projects["quiet"].id) for a in anomalies), anomalies
+    assert anomalies[0].assignee_id is None
+    print(f"✅ Flagged {len(anomalies)} anomalies: drops and spikes; steady and low-volume projects left alone")
+    db.close()
+
+def test_insights():
+    """TEAM_PERFORMANCE insights only for projects with an anomaly"""
+    print("\n=== TESTING INSIGHTS ===")
+    db = SessionLocal()
+    service = AIProjectAnalysisService("local")
+    by_name = {project.name: project for project in db.query(Project)}
+
+    steady = service.generate_ai_insights(by_name["steady"].id, db)
+    assert not any(i.insight_type == InsightType.TEAM_PERFORMANCE for i in steady)
+    drop = [i for i in service.generate_ai_insights(by_name["drop"].id, db) if i.insight_type == InsightType.TEAM_PERFORMANCE]
+    assert len(drop) == 1 and drop[0].priority == InsightPriority.HIGH and "Drop" in drop[0].title, drop
+    print(f"✅ Steady project: no team insight; dropping project: \"{drop[0].title}\"")
+
+    team = service.analyze_team_performance(by_name["drop"].id, db)
+    assert team.team_velocity == 9.75 and team.performance_trends["velocity"][-1] == 3.0
+    assert len(team.trend_weeks) == 12 and team.velocity_anomalies
+    assert any(b.startswith("📉 Equipo") for b in team.bottlenecks)
+    print(f"✅ Team analysis reports the real weekly series (velocity {team.team_velocity}) and the drop")
+    db.close()
+
+def main():
+    print("Testing velocity anomaly detection...")
+    try:
+        test_rolling_scores()
+        test_detection()
+        test_insights()
+    finally:
+        os.unlink(_db_file.name)
+    print("\nTesting completed!")
+
+if __name__ == "__main__":
+    main()